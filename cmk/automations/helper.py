@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Calling the automation helper
+
+The automation helper ("cmk --automation-helper") executes automation calls in
+processes which loaded the configuration in advance. A worker of the helper
+accepts a call by sending the ACCEPTED byte over the Unix socket of the helper.
+Only then the call is sent as a JSON object and the writing side of the
+connection is shut down. The helper answers with the exit code and the output
+the call of "cmk --automation" would have produced.
+
+The helper closes the connection without accepting the call if it can not
+execute it with the current configuration. Callers which are not accepted in
+time, because all workers are busy, close the connection. In both cases the call
+has not been executed and callers run "cmk --automation" instead. A call which
+was accepted is never executed again: it may have changed something already.
+
+The helper loads the configuration again when the configuration generation
+changed. Everything changing the configuration bumps it."""
+
+import json
+import os
+import socket
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Final, NamedTuple
+
+import cmk.utils.store as store
+from cmk.utils.exceptions import MKGeneralException
+
+__all__ = [
+    "ACCEPTED",
+    "HelperRequest",
+    "HelperResponse",
+    "accept_call",
+    "bump_config_generation",
+    "call_helper",
+    "read_config_generation",
+    "receive",
+    "send",
+]
+
+ACCEPTED: Final = b"\x06"
+_ACCEPT_TIMEOUT: Final = 1.0
+_REQUEST_TIMEOUT: Final = 10.0
+
+
+class HelperRequest(NamedTuple):
+    command: str
+    args: Sequence[str]
+    stdin: str
+    verbosity: int = 0
+
+    def serialize(self) -> bytes:
+        return json.dumps(self._asdict()).encode()
+
+    @classmethod
+    def deserialize(cls, serialized: bytes) -> "HelperRequest":
+        raw = json.loads(serialized)
+        return cls(
+            command=str(raw["command"]),
+            args=[str(arg) for arg in raw["args"]],
+            stdin=str(raw["stdin"]),
+            verbosity=int(raw["verbosity"]),
+        )
+
+
+class HelperResponse(NamedTuple):
+    returncode: int
+    stdout: str
+    stderr: str
+
+    def serialize(self) -> bytes:
+        return json.dumps(self._asdict()).encode()
+
+    @classmethod
+    def deserialize(cls, serialized: bytes) -> "HelperResponse":
+        raw = json.loads(serialized)
+        return cls(
+            returncode=int(raw["returncode"]),
+            stdout=str(raw["stdout"]),
+            stderr=str(raw["stderr"]),
+        )
+
+
+def send(sock: socket.socket, data: bytes) -> None:
+    sock.sendall(data)
+    sock.shutdown(socket.SHUT_WR)
+
+
+def receive(sock: socket.socket) -> bytes:
+    chunks = []
+    while chunk := sock.recv(65536):
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def call_helper(
+    socket_path: Path, request: HelperRequest, accept_timeout: float = _ACCEPT_TIMEOUT
+) -> HelperResponse | None:
+    """Execute an automation call in the helper
+
+    None is returned if the helper is not running or did not accept the call within
+    accept_timeout seconds, the call has not been executed then."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(accept_timeout)
+        try:
+            sock.connect(str(socket_path))
+            if sock.recv(len(ACCEPTED)) != ACCEPTED:
+                return None
+        except OSError:
+            return None
+
+        sock.settimeout(None)
+        try:
+            send(sock, request.serialize())
+            answer = receive(sock)
+        except OSError as e:
+            raise MKGeneralException(f"Lost the connection to the automation helper: {e}")
+
+    if not answer:
+        raise MKGeneralException("The automation helper accepted the call but did not answer")
+    return HelperResponse.deserialize(answer)
+
+
+def accept_call(connection: socket.socket) -> HelperRequest | None:
+    """Accept the call of a connected caller
+
+    None is returned if the caller gave up waiting, it executes the call on its own."""
+    connection.settimeout(_REQUEST_TIMEOUT)
+    try:
+        connection.sendall(ACCEPTED)
+        serialized = receive(connection)
+    except OSError:
+        return None
+    return HelperRequest.deserialize(serialized) if serialized else None
+
+
+def bump_config_generation(path: Path) -> None:
+    """Make the helper load the configuration again before executing further calls"""
+    store.save_text_to_file(path, f"{time.time_ns()} {os.getpid()}\n")
+
+
+def read_config_generation(path: Path) -> str:
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return ""
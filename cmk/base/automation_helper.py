@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Execute automation calls with the configuration loaded in advance
+
+Each call of "cmk --automation" loads the plugins and the configuration before
+doing its work, which takes seconds on larger sites while the GUI is waiting.
+The helper loads them once and forks workers in advance. Each worker accepts one
+connection on the socket, executes the automation call like "cmk --automation"
+and exits, so nothing changed by a call is seen by the next one. The main
+process replaces the workers which exited.
+
+The loaded configuration belongs to a generation, which the GUI bumps when it
+records a change and the activation bumps when creating the core configuration.
+Reading it is cheap compared to checking all configuration files. When it
+changes, the main process replaces itself with a new one, which loads everything
+again. A worker connected to a caller after the change closes the connection
+without accepting the call, the caller runs "cmk --automation" instead.
+Configuration files and plugins changed by hand are loaded after "cmk -R" or
+"cmk -O".
+
+See cmk.automations.helper for the protocol."""
+
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+from collections.abc import Iterable
+from pathlib import Path
+from types import FrameType
+from typing import Final, NoReturn
+
+import cmk.utils.log as log
+import cmk.utils.paths
+from cmk.utils.exceptions import MKBailOut, MKGeneralException, MKTerminate
+
+from cmk.automations.helper import (
+    accept_call,
+    HelperRequest,
+    HelperResponse,
+    read_config_generation,
+    send,
+)
+
+import cmk.base.automations as automations
+import cmk.base.config as config
+
+__all__ = ["ConfigGeneration", "config_generation", "execute", "serve"]
+
+logger = logging.getLogger("cmk.base.automation_helper")
+
+ConfigGeneration = str
+
+# Exit code of a worker which found the configuration outdated
+_EXIT_OUTDATED: Final = 75
+_REAP_INTERVAL: Final = 0.05
+_GENERATION_CHECK_INTERVAL: Final = 1.0
+
+
+def config_generation() -> ConfigGeneration:
+    """The generation of the configuration and plugins the helper loads"""
+    return read_config_generation(Path(cmk.utils.paths.automation_helper_generation_file))
+
+
+def serve(socket_path: Path, num_workers: int) -> bool:
+    """Serve automation calls on the socket until terminated
+
+    The plugins have to be loaded already. Returns True if the configuration
+    changed, the helper has to be started again then."""
+    generation = config_generation()
+    config.load(validate_hosts=False)
+
+    signal.signal(signal.SIGTERM, _raise_terminate)
+    listener = _listen(socket_path)
+    workers: set[int] = set()
+    logger.info("Serving automation calls on %s with %d workers", socket_path, num_workers)
+    try:
+        last_check = time.monotonic()
+        while True:
+            while len(workers) < num_workers:
+                workers.add(_start_worker(listener, generation))
+
+            time.sleep(_REAP_INTERVAL)
+            for pid, exit_code in _reap():
+                # Workers of the process replaced by this one may still be running
+                if pid not in workers:
+                    continue
+                workers.remove(pid)
+                if exit_code == _EXIT_OUTDATED:
+                    logger.info("Configuration changed, restarting")
+                    return True
+
+            if time.monotonic() - last_check > _GENERATION_CHECK_INTERVAL:
+                if config_generation() != generation:
+                    logger.info("Configuration changed, restarting")
+                    return True
+                last_check = time.monotonic()
+
+    except MKTerminate:
+        logger.info("Terminated")
+        return False
+
+    finally:
+        # Busy workers finish their calls, they do not accept new ones
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+        listener.close()
+        socket_path.unlink(missing_ok=True)
+
+
+def _raise_terminate(signum: int, stackframe: FrameType | None) -> NoReturn:
+    raise MKTerminate()
+
+
+def _listen(socket_path: Path) -> socket.socket:
+    socket_path.unlink(missing_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(socket_path))
+    listener.listen(socket.SOMAXCONN)
+    return listener
+
+
+def _reap() -> Iterable[tuple[int, int]]:
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if not pid:
+            return
+        yield pid, os.waitstatus_to_exitcode(status)
+
+
+def _start_worker(listener: socket.socket, generation: ConfigGeneration) -> int:
+    # Do not write buffered output twice
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if pid := os.fork():
+        return pid
+
+    exit_code = 0
+    try:
+        signal.signal(signal.SIGTERM, _raise_terminate)
+        connection, _address = listener.accept()
+        # Finish the call when terminated while executing it
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        listener.close()
+        with connection:
+            if config_generation() != generation:
+                exit_code = _EXIT_OUTDATED
+            else:
+                # Not accepted if the caller gave up waiting for a free worker
+                if (request := accept_call(connection)) is not None:
+                    send(connection, execute(request).serialize())
+    except MKTerminate:
+        pass
+    except Exception:
+        logger.exception("Failed to execute an automation call")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def execute(request: HelperRequest) -> HelperResponse:
+    """Execute the call like "cmk --automation" with the loaded configuration
+
+    Standard input and output of the process are replaced, so only call this in
+    a worker."""
+    with (
+        tempfile.TemporaryFile() as stdin,
+        tempfile.TemporaryFile() as stdout,
+        tempfile.TemporaryFile() as stderr,
+    ):
+        stdin.write(request.stdin.encode())
+        stdin.seek(0)
+        for stream, fd in [(stdin, 0), (stdout, 1), (stderr, 2)]:
+            os.dup2(stream.fileno(), fd)
+        # Child processes use the file descriptors, the automations the streams
+        # pylint: disable=consider-using-with
+        sys.stdin = open(0, encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", closefd=False)
+
+        log.setup_console_logging()
+        log.logger.setLevel(log.verbosity_to_log_level(request.verbosity))
+        automations.setup_console_logging(request.command)
+        try:
+            returncode = automations.automations.execute(
+                request.command, list(request.args), preloaded=True
+            )
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else 1
+        except (MKGeneralException, MKBailOut) as e:
+            sys.stderr.write("%s\n" % e)
+            returncode = 3
+        except Exception:
+            sys.stderr.write(traceback.format_exc())
+            returncode = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+        stdout.seek(0)
+        stderr.seek(0)
+        return HelperResponse(
+            returncode=returncode,
+            stdout=stdout.read().decode(errors="replace"),
+            stderr=stderr.read().decode(errors="replace"),
+        )
@@ -41,7 +41,11 @@ class Automations:
             raise TypeError()
         self._automations[automation.cmd] = automation
 
-    def execute(self, cmd: str, args: list[str]) -> Any:
+    def execute(self, cmd: str, args: list[str], *, preloaded: bool = False) -> Any:
+        """Execute an automation call, printing the serialized result
+
+        With preloaded, the plugins and the configuration have been loaded already
+        (by the automation helper)."""
         self._handle_generic_arguments(args)
 
         try:
@@ -50,7 +54,7 @@ class Automations:
             except KeyError:
                 raise MKAutomationError("Automation command '%s' is not implemented." % cmd)
 
-            if automation.needs_checks:
+            if automation.needs_checks and not preloaded:
                 with redirect_stdout(open(os.devnull, "w")):
                     log.setup_console_logging()
                     config.load_all_agent_based_plugins(
@@ -59,7 +63,7 @@ class Automations:
                         checks_dir=paths.checks_dir,
                     )
 
-            if automation.needs_config:
+            if automation.needs_config and not preloaded:
                 config.load(validate_hosts=False)
 
             result = automation.execute(args)
@@ -98,6 +102,21 @@ class Automations:
         raise MKTimeout("Action timed out.")
 
 
+def setup_console_logging(cmd: str) -> None:
+    # At least for the automation calls that buffer and handle the stdout/stderr on their own
+    # we can now enable this. In the future we should remove this call for all automations calls
+    # and handle the output in a common way.
+    if cmd not in [
+        "restart",
+        "reload",
+        "start",
+        "create-diagnostics-dump",
+        "try-inventory",
+        "service-discovery-preview",
+    ]:
+        log.clear_console_logging()
+
+
 class Automation(abc.ABC):
     cmd: str | None = None
     needs_checks = False
@@ -29,6 +29,7 @@ import cmk.utils.debug
 import cmk.utils.log as log
 import cmk.utils.man_pages as man_pages
 import cmk.utils.password_store
+import cmk.utils.piggyback as piggyback
 import cmk.utils.tty as tty
 from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.auto_queue import AutoQueue
@@ -256,6 +257,7 @@ class AutomationDiscovery(DiscoveryAutomation):
             selected_sections=NO_SELECTION,
             simulation_mode=config.simulation_mode,
             max_cachefile_age=config.max_cachefile_age(),
+            max_concurrent_fetches=config.max_concurrent_fetches,
         )
         for hostname in hostnames:
 
@@ -431,6 +433,7 @@ def _execute_discovery(
         selected_sections=NO_SELECTION,
         simulation_mode=config.simulation_mode,
         max_cachefile_age=config.max_cachefile_age(),
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
     ip_address = (
         None
@@ -540,6 +543,7 @@ def _execute_autodiscovery() -> tuple[Mapping[HostName, DiscoveryResult], bool]:
         # autodiscovery is run every 5 minutes
         # make sure we may use the file the active discovery check left behind:
         max_cachefile_age=config.max_cachefile_age(discovery=600),
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
     section_plugins = SectionPluginMapper()
     host_label_plugins = HostLabelPluginMapper(config_cache=config_cache)
@@ -897,6 +901,9 @@ class AutomationRenameHosts(Automation):
                 if self._rename_host_file(piggybase + piggydir, oldname, newname):
                     actions.append("piggyback-pig")
 
+        if "piggyback-load" in actions or "piggyback-pig" in actions:
+            piggyback.rebuild_piggyback_index()
+
         # Logwatch
         if self._rename_host_dir(logwatch_dir, oldname, newname):
             actions.append("logwatch")
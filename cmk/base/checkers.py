@@ -11,6 +11,7 @@ import functools
 import itertools
 import logging
 from collections.abc import Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import Callable, Final
 
@@ -88,18 +89,62 @@ __all__ = [
 
 
 def _fetch_all(
-    sources: Iterable[Source], *, simulation: bool, file_cache_options: FileCacheOptions, mode: Mode
+    sources: Iterable[Source],
+    *,
+    simulation: bool,
+    file_cache_options: FileCacheOptions,
+    mode: Mode,
+    max_concurrent_fetches: int = 1,
 ) -> Sequence[tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot,]]:
     console.verbose("%s+%s %s\n", tty.yellow, tty.normal, "Fetching data".upper())
-    return [
-        _do_fetch(
-            source.source_info(),
-            source.file_cache(simulation=simulation, file_cache_options=file_cache_options),
-            source.fetcher(),
-            mode=mode,
-        )
-        for source in sources
-    ]
+    sources = list(sources)
+    if max_concurrent_fetches <= 1 or len(sources) <= 1:
+        return [
+            _fetch_source(
+                source,
+                simulation=simulation,
+                file_cache_options=file_cache_options,
+                mode=mode,
+                per_thread=False,
+            )
+            for source in sources
+        ]
+
+    fetch = functools.partial(
+        _fetch_source,
+        simulation=simulation,
+        file_cache_options=file_cache_options,
+        mode=mode,
+        per_thread=True,
+    )
+    # The fetchers mostly wait for the network or their programs, so threads are enough.
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_concurrent_fetches, len(sources)), thread_name_prefix="fetch"
+    )
+    try:
+        # In the order of the sources
+        return list(executor.map(fetch, sources))
+    finally:
+        # After a timeout the fetches not yet started are dropped, but the running ones are
+        # waited for: they would write into the caches of the next host of a keepalive helper.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _fetch_source(
+    source: Source,
+    *,
+    simulation: bool,
+    file_cache_options: FileCacheOptions,
+    mode: Mode,
+    per_thread: bool,
+) -> tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot,]:
+    return _do_fetch(
+        source.source_info(),
+        source.file_cache(simulation=simulation, file_cache_options=file_cache_options),
+        source.fetcher(),
+        mode=mode,
+        per_thread=per_thread,
+    )
 
 
 def _do_fetch(
@@ -108,9 +153,11 @@ def _do_fetch(
     fetcher: Fetcher,
     *,
     mode: Mode,
+    per_thread: bool,
 ) -> tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot,]:
     console.vverbose(f"  Source: {source_info}\n")
-    with CPUTracker() as tracker:
+    # Other sources are fetched concurrently in other threads if per_thread is set
+    with CPUTracker(per_thread=per_thread) as tracker:
         raw_data = get_raw_data(file_cache, fetcher, mode)
     return source_info, raw_data, tracker.duration
 
@@ -239,6 +286,7 @@ class CMKFetcher:
         selected_sections: SectionNameCollection,
         simulation_mode: bool,
         max_cachefile_age: MaxAge | None = None,
+        max_concurrent_fetches: int = 1,
     ) -> None:
         self.config_cache: Final = config_cache
         self.file_cache_options: Final = file_cache_options
@@ -248,6 +296,7 @@ class CMKFetcher:
         self.selected_sections: Final = selected_sections
         self.simulation_mode: Final = simulation_mode
         self.max_cachefile_age: Final = max_cachefile_age
+        self.max_concurrent_fetches: Final = max_concurrent_fetches
 
     def __call__(
         self, host_name: HostName, *, ip_address: HostAddress | None
@@ -291,6 +340,7 @@ class CMKFetcher:
             simulation=self.simulation_mode,
             file_cache_options=self.file_cache_options,
             mode=self.mode,
+            max_concurrent_fetches=self.max_concurrent_fetches,
         )
 
 
@@ -14,6 +14,7 @@ import ipaddress
 import itertools
 import logging
 import marshal
+import mmap
 import numbers
 import os
 import pickle
@@ -964,7 +965,21 @@ class PackedConfigGenerator:
 
 
 class PackedConfigStore:
-    """Caring about persistence of the packed configuration"""
+    """Caring about persistence of the packed configuration
+
+    The variables mapping host names to values (see _HOST_VARIABLE_NAMES) are
+    split into one slice per host. The file holds a header, an index of the host
+    names sorted by name, the pickled global variables and the pickled slices.
+    Reading maps the file into memory and only unpickles the global variables; the
+    slice of a host is unpickled when one of its values is looked up. So a helper
+    does not load the addresses and attributes of the hosts it does not check.
+    """
+
+    _MAGIC: Final = b"CMKPACK1"
+    # Magic, number of hosts, start of the pickled global variables
+    _HEADER: Final = struct.Struct("<8sQQ")
+    # Start of the name of a host, its slice follows the name
+    _ENTRY: Final = struct.Struct("<QQ")
 
     def __init__(self, path: Path) -> None:
         self.path: Final = path
@@ -978,15 +993,162 @@ class PackedConfigStore:
         return Path(config_path) / "precompiled_check_config.mk"
 
     def write(self, helper_config: Mapping[str, Any]) -> None:
+        global_variables = {}
+        sliced_variable_names = []
+        slices: dict[str, dict[str, object]] = {}
+        for varname, value in helper_config.items():
+            if varname not in _HOST_VARIABLE_NAMES or not isinstance(value, Mapping):
+                global_variables[varname] = value
+                continue
+            sliced_variable_names.append(varname)
+            for host_name, host_value in value.items():
+                slices.setdefault(host_name, {})[varname] = host_value
+
+        host_names = sorted(slices, key=lambda h: h.encode("utf-8"))
+        chunks = [pickle.dumps((global_variables, sliced_variable_names))]
+        entries = []
+        position = self._HEADER.size + self._ENTRY.size * len(host_names) + len(chunks[0])
+        for host_name in host_names:
+            name = host_name.encode("utf-8")
+            host_slice = pickle.dumps(slices[host_name])
+            entries.append(self._ENTRY.pack(position, position + len(name)))
+            chunks += (name, host_slice)
+            position += len(name) + len(host_slice)
+
         self.path.parent.mkdir(parents=True, exist_ok=True)
         tmp_path = self.path.with_suffix(self.path.suffix + ".compiled")
         with tmp_path.open("wb") as compiled_file:
-            pickle.dump(helper_config, compiled_file)
+            compiled_file.write(
+                self._HEADER.pack(
+                    self._MAGIC,
+                    len(host_names),
+                    self._HEADER.size + self._ENTRY.size * len(host_names),
+                )
+            )
+            compiled_file.writelines(entries)
+            compiled_file.writelines(chunks)
         tmp_path.rename(self.path)
 
     def read(self) -> Mapping[str, Any]:
         with self.path.open("rb") as f:
-            return pickle.load(f)  # nosec B301 # BNS:c3c5e9
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise ValueError(f"Invalid packed configuration: {self.path}") from exc
+        if len(buffer) < self._HEADER.size:
+            raise ValueError(f"Invalid packed configuration: {self.path}")
+        magic, num_hosts, global_start = self._HEADER.unpack_from(buffer)
+        if magic != self._MAGIC:
+            raise ValueError(f"Invalid packed configuration: {self.path}")
+        slices = _HostSlices(buffer, num_hosts, global_start, self._HEADER.size, self._ENTRY)
+        global_variables, sliced_variable_names = pickle.loads(  # nosec B301 # BNS:c3c5e9
+            slices.global_section()
+        )
+        return {
+            **global_variables,
+            **{varname: _HostVariable(slices, varname) for varname in sliced_variable_names},
+        }
+
+
+# Variables mapping host names to values, which are only looked up for single hosts
+_HOST_VARIABLE_NAMES: Final = frozenset(
+    {
+        "explicit_snmp_communities",
+        "host_attributes",
+        "ipaddresses",
+        "ipv6addresses",
+        "management_ipmi_credentials",
+        "management_protocol",
+        "management_snmp_credentials",
+    }
+)
+
+
+class _HostSlices:
+    """The slices of the hosts in a memory mapped packed configuration"""
+
+    def __init__(
+        self,
+        buffer: mmap.mmap,
+        num_hosts: int,
+        global_start: int,
+        entries_start: int,
+        entry: struct.Struct,
+    ) -> None:
+        self._buffer: Final = buffer
+        self._num_hosts: Final = num_hosts
+        self._global_start: Final = global_start
+        self._entries_start: Final = entries_start
+        self._entry: Final = entry
+        self._loaded: dict[str, Mapping[str, object]] = {}
+
+    def global_section(self) -> bytes:
+        return self._buffer[self._global_start : self._start_of_name(0)]
+
+    def _start_of_name(self, position: int) -> int:
+        if position == self._num_hosts:
+            return len(self._buffer)
+        return self._entry.unpack_from(
+            self._buffer, self._entries_start + self._entry.size * position
+        )[0]
+
+    def _name(self, position: int) -> bytes:
+        name_start, slice_start = self._entry.unpack_from(
+            self._buffer, self._entries_start + self._entry.size * position
+        )
+        return self._buffer[name_start:slice_start]
+
+    def host_names(self) -> Iterator[str]:
+        return (self._name(position).decode("utf-8") for position in range(self._num_hosts))
+
+    def get(self, host_name: str) -> Mapping[str, object]:
+        with contextlib.suppress(KeyError):
+            return self._loaded[host_name]
+
+        name = host_name.encode("utf-8")
+        low, high = 0, self._num_hosts
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._num_hosts or self._name(low) != name:
+            host_slice: Mapping[str, object] = {}
+        else:
+            slice_start = self._entry.unpack_from(
+                self._buffer, self._entries_start + self._entry.size * low
+            )[1]
+            host_slice = pickle.loads(  # nosec B301 # BNS:c3c5e9
+                self._buffer[slice_start : self._start_of_name(low + 1)]
+            )
+        self._loaded[host_name] = host_slice
+        return host_slice
+
+
+class _HostVariable(Mapping[str, object]):
+    """A variable of the packed configuration mapping host names to values
+
+    The values of a host are loaded when they are looked up. Iterating over
+    the variable loads the values of all hosts."""
+
+    def __init__(self, slices: _HostSlices, varname: str) -> None:
+        self._slices: Final = slices
+        self._varname: Final = varname
+
+    def __getitem__(self, host_name: str) -> object:
+        if not isinstance(host_name, str):
+            raise KeyError(host_name)
+        return self._slices.get(host_name)[self._varname]
+
+    def __iter__(self) -> Iterator[str]:
+        return (h for h in self._slices.host_names() if self._varname in self._slices.get(h))
+
+    def __len__(self) -> int:
+        return sum(1 for _host_name in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
 
 
 @contextlib.contextmanager
@@ -2276,6 +2438,7 @@ class ConfigCache:
             clusters_of=self._clusters_of_cache,
             nodes_of=self._nodes_of_cache,
             all_configured_hosts=self._all_configured_hosts,
+            matching_hosts_cache_dir=cmk.utils.paths.tmp_dir / "ruleset_matcher",
         )
 
         self._all_active_clusters = set(_filter_active_hosts(self, self._all_configured_clusters))
@@ -3471,8 +3634,13 @@ class ConfigCache:
                 return SNMPBackendEnum.INLINE
             if host_backend == "classic":
                 return SNMPBackendEnum.CLASSIC
+            if host_backend == "native":
+                return SNMPBackendEnum.NATIVE
             raise MKGeneralException("Bad Host SNMP Backend configuration: %s" % host_backend)
 
+        if snmp_backend_default == "native":
+            return SNMPBackendEnum.NATIVE
+
         # TODO(sk): remove this when netsnmp is fixed
         # NOTE: Force usage of CLASSIC with SNMP-v1 to prevent memory leak in the netsnmp
         if self._is_host_snmp_v1(host_name):
@@ -9,6 +9,7 @@ import os
 import subprocess
 from collections.abc import Iterator, Sequence
 from contextlib import contextmanager
+from pathlib import Path
 from typing import Literal
 
 import cmk.utils.cleanup
@@ -19,6 +20,8 @@ import cmk.utils.tty as tty
 from cmk.utils.exceptions import MKBailOut, MKGeneralException
 from cmk.utils.hostaddress import HostName
 
+from cmk.automations.helper import bump_config_generation
+
 import cmk.base.config as config
 import cmk.base.core_config as core_config
 import cmk.base.nagios_utils
@@ -84,6 +87,8 @@ def do_restart(
                 duplicates=duplicates,
                 skip_config_locking_for_bakery=skip_config_locking_for_bakery,
             )
+            # Configuration files and plugins may have been changed without the GUI
+            bump_config_generation(Path(cmk.utils.paths.automation_helper_generation_file))
             do_core_action(action, monitoring_core=core.name())
 
     except Exception as e:
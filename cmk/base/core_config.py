@@ -360,6 +360,9 @@ def _create_core_config(
     with config_path.create(is_cmc=core.is_cmc()), _backup_objects_file(core):
         core.create_config(config_path, config_cache, hosts_to_update=hosts_to_update)
 
+    # Make the matching hosts computed for the core config available to all other processes
+    config_cache.ruleset_matcher.save_matching_hosts_cache()
+
     cmk.utils.password_store.save_for_helpers(config_path)
 
 
@@ -63,6 +63,8 @@ fake_dns: str | None = None
 agent_simulator = False
 perfdata_format: Literal["pnp", "standard"] = "pnp"
 check_mk_perfdata_with_times = True
+# Number of data sources (of all nodes of a cluster) fetched at the same time
+max_concurrent_fetches = 1
 # TODO: Remove these options?
 debug_log = False  # deprecated
 monitoring_host: str | None = None  # deprecated
@@ -79,7 +81,7 @@ http_proxies: dict[str, dict[str, str]] = {}
 # SNMP communities and encoding
 
 # Global config for SNMP Backend
-snmp_backend_default: Literal["inline", "classic"] = "inline"
+snmp_backend_default: Literal["inline", "classic", "native"] = "inline"
 # Deprecated: Replaced by snmp_backend_hosts
 use_inline_snmp: bool = True
 
@@ -1532,19 +1532,7 @@ def mode_automation(args: list[str]) -> None:
     if not args:
         raise automations.MKAutomationError("You need to provide arguments")
 
-    # At least for the automation calls that buffer and handle the stdout/stderr on their own
-    # we can now enable this. In the future we should remove this call for all automations calls and
-    # handle the output in a common way.
-    if args[0] not in [
-        "restart",
-        "reload",
-        "start",
-        "create-diagnostics-dump",
-        "try-inventory",
-        "service-discovery-preview",
-    ]:
-        log.clear_console_logging()
-
+    automations.setup_console_logging(args[0])
     sys.exit(automations.automations.execute(args[0], args[1:]))
 
 
@@ -1561,6 +1549,36 @@ modes.register(
     )
 )
 
+
+def mode_automation_helper(options: Mapping[str, int]) -> None:
+    import cmk.base.automation_helper as automation_helper  # pylint: disable=import-outside-toplevel
+
+    if automation_helper.serve(
+        Path(cmk.utils.paths.automation_helper_socket), options.get("workers", 4)
+    ):
+        # Load the changed configuration and plugins in a fresh process
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+
+
+modes.register(
+    Mode(
+        long_option="automation-helper",
+        handler_function=mode_automation_helper,
+        needs_config=False,
+        needs_checks=True,
+        short_help="Internal helper to execute automation calls with preloaded configuration",
+        sub_options=[
+            Option(
+                long_option="workers",
+                argument=True,
+                argument_descr="N",
+                argument_conv=int,
+                short_help="Execute up to N automation calls in parallel. Defaults to 4.",
+            ),
+        ],
+    )
+)
+
 # .
 #   .--notify--------------------------------------------------------------.
 #   |                                 _   _  __                            |
@@ -1633,6 +1651,7 @@ def mode_check_discovery(
         selected_sections=NO_SELECTION,
         simulation_mode=config.simulation_mode,
         max_cachefile_age=config.max_cachefile_age(discovery=discovery_file_cache_max_age),
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
     parser = CMKParser(
         config_cache,
@@ -1943,6 +1962,7 @@ def mode_discover(options: _DiscoveryOptions, args: list[str]) -> None:
         selected_sections=selected_sections,
         simulation_mode=config.simulation_mode,
         max_cachefile_age=config.max_cachefile_age(),
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
     for hostname in sorted(
         _preprocess_hostnames(
@@ -2093,6 +2113,7 @@ def mode_check(
         on_error=OnError.RAISE,
         selected_sections=selected_sections,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
     parser = CMKParser(
         config_cache,
@@ -2127,7 +2148,8 @@ def mode_check(
         hostname, store_changes=not dry_run
     ) as value_store_manager:
         console.vverbose("Checkmk version %s\n", cmk_version.__version__)
-        fetched = fetcher(hostname, ip_address=ipaddress)
+        with CPUTracker() as fetch_tracker:
+            fetched = fetcher(hostname, ip_address=ipaddress)
         check_plugins = CheckPluginMapper(
             config_cache,
             value_store_manager,
@@ -2168,9 +2190,10 @@ def mode_check(
         check_result = ActiveCheckResult.from_subresults(
             check_result,
             make_timing_results(
-                tracker.duration,
+                fetch_tracker.duration + tracker.duration,
                 tuple((f[0], f[2]) for f in fetched),
                 perfdata_with_times=config.check_mk_perfdata_with_times,
+                max_concurrent_fetches=config.max_concurrent_fetches,
             ),
         )
 
@@ -2295,6 +2318,7 @@ def mode_inventory(options: _InventoryOptions, args: list[str]) -> None:
         on_error=OnError.RAISE,
         selected_sections=selected_sections,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
     parser = CMKParser(
         config_cache,
@@ -2526,6 +2550,7 @@ def mode_inventory_as_check(
         on_error=OnError.RAISE,
         selected_sections=NO_SELECTION,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
     parser = CMKParser(
         config_cache,
@@ -2672,6 +2697,7 @@ def mode_inventorize_marked_hosts(options: Mapping[str, Literal[True]]) -> None:
         on_error=OnError.RAISE,
         selected_sections=NO_SELECTION,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
     )
 
     def summarizer(host_name: HostName) -> CMKSummarizer:
@@ -133,9 +133,7 @@ class BIStateOfHostAction(ABCBIAction, ABCWithSchema):
     def execute(
         self, argument: ActionArgument, bi_searcher: ABCBISearcher
     ) -> list[ABCBICompiledNode]:
-        host_matches, _match_groups = bi_searcher.get_host_name_matches(
-            list(bi_searcher.hosts.values()), argument[0]
-        )
+        host_matches, _match_groups = bi_searcher.search_host_names(argument[0])
         return [BICompiledLeaf(host_name=x.name, site_id=x.site_id) for x in host_matches]
 
 
@@ -190,9 +188,7 @@ class BIStateOfServiceAction(ABCBIAction, ABCWithSchema):
     def execute(
         self, argument: ActionArgument, bi_searcher: ABCBISearcher
     ) -> list[ABCBICompiledNode]:
-        matched_hosts, match_groups = bi_searcher.get_host_name_matches(
-            list(bi_searcher.hosts.values()), argument[0]
-        )
+        matched_hosts, match_groups = bi_searcher.search_host_names(argument[0])
 
         host_search_matches = [BIHostSearchMatch(x, match_groups[x.name]) for x in matched_hosts]
         service_matches = bi_searcher.get_service_description_matches(
@@ -252,9 +248,7 @@ class BIStateOfRemainingServicesAction(ABCBIAction, ABCWithSchema):
     def execute(
         self, argument: ActionArgument, bi_searcher: ABCBISearcher
     ) -> list[ABCBICompiledNode]:
-        host_matches, _match_groups = bi_searcher.get_host_name_matches(
-            list(bi_searcher.hosts.values()), argument[0]
-        )
+        host_matches, _match_groups = bi_searcher.search_host_names(argument[0])
         return [BIRemainingResult([x.name for x in host_matches])]
 
 
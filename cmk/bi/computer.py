@@ -111,6 +111,9 @@ class BIComputer:
     def compute_results(
         self, required_aggregations: list[tuple[BICompiledAggregation, list[BICompiledRule]]]
     ) -> list[tuple[BICompiledAggregation, list[NodeResultBundle]]]:
+        # Computed in this process. Worker processes not forked from the GUI process would need the
+        # compiled aggregations and the states. Sending them and attaching the results to the trees
+        # again takes more than half as long as computing them here (doc/benchmark/bi_compilation.py)
         results = []
         for compiled_aggregation, branches in required_aggregations:
             node_result_bundles = compiled_aggregation.compute_branches(
@@ -173,15 +173,15 @@ class BIStructureFetcher:
             self._marshal_save_data(path, hosts)
 
     def _read_cached_data(self, required_program_starts: set[SiteProgramStart]) -> None:
-        required_sites = {x[0] for x in required_program_starts}
-        for path_object, (site_id, _timestamp) in self._get_site_data_files():
+        for path_object, (site_id, timestamp) in self._get_site_data_files():
             if site_id in self._have_sites:
                 # This data was already read during the live query
                 continue
 
-            if site_id not in required_sites:
+            if (site_id, timestamp) not in required_program_starts:
                 # The data for this site is no longer required
                 # The site probably got disabled in the distributed monitoring page
+                # or the data is from before the last restart of its core
                 continue
 
             site_data = self._marshal_load_data(path_object)
@@ -218,9 +218,27 @@ class BIStructureFetcher:
         # ("alias", str),
         # ("name", str),
 
+        self._hosts.update(self._create_host_data(hosts))
+        self._have_sites.add(site_id)
+
+    def load_cached_site_data(
+        self, program_start: SiteProgramStart
+    ) -> dict[str, BIHostData] | None:
+        """Read the data of a site from the cache without adding it
+
+        Returns None if the data of the site at this program start is no longer cached."""
+        path = self._path_site_structure_data.joinpath(self._site_data_filename(*program_start))
+        try:
+            return self._create_host_data(self._marshal_load_data(path))
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    @staticmethod
+    def _create_host_data(hosts: Mapping[HostName, tuple]) -> dict[str, BIHostData]:
+        host_data: dict[str, BIHostData] = {}
         for host_name, values in hosts.items():
             site_id, tags, labels, folder, services, children, parents, alias, name = values
-            self._hosts[host_name] = BIHostData(
+            host_data[host_name] = BIHostData(
                 site_id,
                 tags,
                 labels,
@@ -231,8 +249,7 @@ class BIStructureFetcher:
                 alias,
                 name,
             )
-
-        self._have_sites.add(site_id)
+        return host_data
 
     def cleanup_orphaned_files(self, known_sites: Mapping[SiteId, int]) -> None:
         for path_object, (site_id, timestamp) in self._get_site_data_files():
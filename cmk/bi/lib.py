@@ -398,6 +398,10 @@ class ABCBISearcher(ABC):
     ) -> tuple[list[BIHostData], dict]:
         raise NotImplementedError()
 
+    @abstractmethod
+    def search_host_names(self, pattern: str) -> tuple[list[BIHostData], dict]:
+        raise NotImplementedError()
+
     @abstractmethod
     def get_service_description_matches(
         self, host_matches: list[BIHostSearchMatch], pattern: str
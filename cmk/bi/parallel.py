@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Distribute independent work on aggregations over worker processes
+
+The GUI process may run several threads. Forking it is only safe if no other
+thread holds a lock (e.g. of the logging module) at that time, otherwise the
+worker waits for it forever. The workers are therefore not forked from the
+calling process but from a forkserver. It is started once per process as a new
+interpreter, which only imports the BI modules and has no other threads.
+
+Nothing is inherited from the calling process, the function has to be defined
+on module level and its arguments and results have to be picklable. The common
+argument of all calls (e.g. the searcher) is pickled once and sent to each
+worker, the items are sent to the worker processing them."""
+
+import multiprocessing
+import pickle
+import sys
+from collections.abc import Callable, Sequence
+from multiprocessing.context import ForkServerContext
+from typing import Any, Final, TypeVar
+
+import cmk.utils.paths
+
+_C = TypeVar("_C")
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# Imported by the forkserver, so that the workers do not import them again
+_PRELOADED_MODULES: Final = ["cmk.bi.compiler"]
+
+# Set in the worker processes by _initialize_worker
+_worker_task: tuple[Callable[[Any, Any], Any], Any] | None = None
+
+
+def map_in_processes(
+    function: Callable[[_C, _T], _R], common: _C, items: Sequence[_T], num_workers: int
+) -> list[_R]:
+    if num_workers <= 1 or len(items) <= 1:
+        return [function(common, item) for item in items]
+
+    with _forkserver_context().Pool(
+        min(num_workers, len(items)),
+        initializer=_initialize_worker,
+        # Pickled only once, not for each worker
+        initargs=(pickle.dumps((function, common), protocol=pickle.HIGHEST_PROTOCOL),),
+    ) as pool:
+        return pool.map(_execute, items, chunksize=1)
+
+
+def _forkserver_context() -> ForkServerContext:
+    context = multiprocessing.get_context("forkserver")
+    assert isinstance(context, ForkServerContext)
+    # Within the apache, sys.executable may not point to the python interpreter of the site
+    if not sys.executable or not sys.executable.rsplit("/", 1)[-1].startswith("python"):
+        context.set_executable(str(cmk.utils.paths.omd_root / "bin" / "python3"))
+    context.set_forkserver_preload(_PRELOADED_MODULES)
+    return context
+
+
+def _initialize_worker(pickled_task: bytes) -> None:
+    global _worker_task
+    _worker_task = pickle.loads(pickled_task)
+
+
+def _execute(item: Any) -> Any:
+    assert _worker_task is not None
+    function, common = _worker_task
+    return function(common, item)
@@ -3,12 +3,16 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-from collections.abc import Iterable, Mapping
-from typing import Any
+import bisect
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Literal
 
 from cmk.utils.regex import regex
 from cmk.utils.rulesets.ruleset_matcher import matches_labels, matches_tag_condition, TagCondition
-from cmk.utils.tags import TagGroupID
+from cmk.utils.tags import TagGroupID, TagID
 
 from cmk.bi.lib import ABCBISearcher, BIHostData, BIHostSearchMatch, BIServiceSearchMatch
 
@@ -23,6 +27,95 @@ from cmk.bi.lib import ABCBISearcher, BIHostData, BIHostSearchMatch, BIServiceSe
 
 # Search data used by bi_searcher
 
+# Characters with a special meaning in a regex, the literal prefix of a pattern ends before them
+_REGEX_SPECIAL_CHARS = set(".^$*+?{}[]()|\\")
+
+
+def _literal_prefix(pattern: str) -> str:
+    """The text each string matched by the pattern (with re.match) starts with"""
+    if "|" in pattern:
+        return ""
+    for idx, char in enumerate(pattern):
+        if char in _REGEX_SPECIAL_CHARS:
+            # The quantifier makes the previous character optional
+            return pattern[: max(idx - 1, 0)] if char in "*?{" else pattern[:idx]
+    return pattern
+
+
+def _is_host_name_regex(pattern: str) -> bool:
+    """Other patterns are looked up as host names, e.g. the names with dots"""
+    return any(map(lambda x: x in pattern, ["(", ")", "*", "$", "|", "[", "]"]))
+
+
+class _BIHostIndex:
+    """Lookup tables for searching all hosts
+
+    The tables only narrow down the hosts to check, the conditions are still evaluated for
+    each remaining host."""
+
+    def __init__(self, hosts: Mapping[str, BIHostData]) -> None:
+        self.hosts = list(hosts.values())
+        self.name_match_groups = {host.name: (host.name,) for host in self.hosts}
+        self._positions: dict[str, int] = {host.name: idx for idx, host in enumerate(self.hosts)}
+        self._names = sorted(self.name_match_groups)
+        self._aliases = sorted((host.alias, host.name) for host in self.hosts)
+
+        self._by_tag: dict[tuple[TagGroupID, TagID | None], set[str]] = defaultdict(set)
+        self._by_label: dict[tuple[str, str], set[str]] = defaultdict(set)
+        # Each folder and its parent folders, like the condition "host_folder" looks at them
+        self._by_folder: dict[str, set[str]] = defaultdict(set)
+        for host in self.hosts:
+            for tag in host.tags:
+                self._by_tag[tag].add(host.name)
+            for label in host.labels.items():
+                self._by_label[label].add(host.name)
+            for idx, char in enumerate(host.folder):
+                if char == "/":
+                    self._by_folder[host.folder[: idx + 1]].add(host.name)
+
+    def get_hosts(self, host_names: Iterable[str]) -> list[BIHostData]:
+        """The hosts in the order of all hosts"""
+        return [self.hosts[idx] for idx in sorted(self._positions[x] for x in host_names)]
+
+    def names_with_prefix(self, prefix: str) -> Iterator[str]:
+        for name in self._names[bisect.bisect_left(self._names, prefix) :]:
+            if not name.startswith(prefix):
+                return
+            yield name
+
+    def names_with_alias_prefix(self, prefix: str) -> Iterator[str]:
+        for alias, name in self._aliases[bisect.bisect_left(self._aliases, (prefix,)) :]:
+            if not alias.startswith(prefix):
+                return
+            yield name
+
+    def candidates(self, conditions: dict) -> set[str] | None:
+        """The names of the hosts that may match the folder, tag and label conditions
+
+        None if the conditions do not narrow down the hosts."""
+        candidate_sets = []
+        if folder_path := conditions["host_folder"]:
+            candidate_sets.append(self._by_folder.get(f"{folder_path}/", set()))
+
+        for taggroup_id, tag_condition in conditions["host_tags"].items():
+            if not isinstance(tag_condition, dict):
+                candidate_sets.append(self._by_tag.get((taggroup_id, tag_condition), set()))
+            elif "$or" in tag_condition:
+                candidate_sets.append(
+                    set().union(
+                        *(self._by_tag.get((taggroup_id, x), set()) for x in tag_condition["$or"])
+                    )
+                )
+
+        for label_id, label_value in (conditions["host_labels"] or {}).items():
+            if isinstance(label_value, str):
+                candidate_sets.append(self._by_label.get((label_id, label_value), set()))
+
+        if not candidate_sets:
+            return None
+        return set.intersection(*sorted(candidate_sets, key=len))
+
+
 #   .--BISearcher----------------------------------------------------------.
 #   |         ____ ___ ____                      _                         |
 #   |        | __ )_ _/ ___|  ___  __ _ _ __ ___| |__   ___ _ __           |
@@ -33,7 +126,51 @@ from cmk.bi.lib import ABCBISearcher, BIHostData, BIHostSearchMatch, BIServiceSe
 #   +----------------------------------------------------------------------+
 
 
+SearchKind = Literal["hosts", "services", "host_name"]
+
+
+@dataclass
+class BISearchDependencies:
+    """The data a compilation depends on
+
+    These are the searches over all hosts, with the macros already replaced, and the names of the
+    hosts whose data was used. Searches only look at one host at a time, so changed hosts can only
+    change the result of the compilation if they are used or match one of the searches."""
+
+    searches: list[tuple[SearchKind, Any]] = field(default_factory=list)
+    host_names: set[str] = field(default_factory=set)
+
+    def affected_by(self, changed_host_names: set[str], changed_hosts: "BISearcher") -> bool:
+        """changed_hosts searches the new data of the changed hosts, removed hosts are missing"""
+        if not self.host_names.isdisjoint(changed_host_names):
+            return True
+        return any(changed_hosts.has_matches(kind, argument) for kind, argument in self.searches)
+
+
 class BISearcher(ABCBISearcher):
+    def __init__(self) -> None:
+        super().__init__()
+        self._dependencies: BISearchDependencies | None = None
+        self._index: _BIHostIndex | None = None
+        # The results of the searches over all hosts, valid until the hosts are replaced
+        self._search_cache: dict[tuple[str, str], Any] = {}
+        self._service_match_cache: dict[str, dict[str, tuple | None]] = {}
+
+    @contextmanager
+    def record_dependencies(self) -> Iterator[BISearchDependencies]:
+        self._dependencies = dependencies = BISearchDependencies()
+        try:
+            yield dependencies
+        finally:
+            self._dependencies = None
+
+    def has_matches(self, kind: SearchKind, argument: Any) -> bool:
+        if kind == "hosts":
+            return bool(self._search_hosts(argument))
+        if kind == "services":
+            return bool(self._search_services(argument))
+        return bool(self._search_host_names(argument)[0])
+
     def set_hosts(self, hosts: dict[str, BIHostData]) -> None:
         self.cleanup()
         # The key may be a pattern / regex, so `str` is the correct type for the key.
@@ -45,15 +182,57 @@ class BISearcher(ABCBISearcher):
         self.hosts = {}
         self._host_regex_match_cache.clear()
         self._host_regex_miss_cache.clear()
+        self._index = None
+        self._search_cache.clear()
+        self._service_match_cache.clear()
+
+    def _get_index(self) -> _BIHostIndex:
+        if self._index is None:
+            self._index = _BIHostIndex(self.hosts)
+        return self._index
 
     def search_hosts(self, conditions: dict) -> list[BIHostSearchMatch]:
-        hosts, matched_re_groups = self.filter_host_choice(
-            list(self.hosts.values()), conditions["host_choice"]
-        )
-        matched_hosts = self.filter_host_folder(hosts, conditions["host_folder"])
-        matched_hosts = self.filter_host_tags(matched_hosts, conditions["host_tags"])
-        matched_hosts = self.filter_host_labels(matched_hosts, conditions["host_labels"])
-        return [BIHostSearchMatch(x, matched_re_groups[x.name]) for x in matched_hosts]
+        host_matches = self._search_hosts(conditions)
+        if self._dependencies is not None:
+            self._dependencies.searches.append(("hosts", conditions))
+            for host_match in host_matches:
+                self._dependencies.host_names.add(host_match.host.name)
+                # The children are looked up when the search refers to them
+                self._dependencies.host_names.update(host_match.host.children)
+        return host_matches
+
+    def _search_hosts(self, conditions: dict) -> list[BIHostSearchMatch]:
+        cache_key = ("hosts", repr(conditions))
+        if (host_matches := self._search_cache.get(cache_key)) is None:
+            hosts, matched_re_groups = self._filter_host_choice_of_all_hosts(
+                conditions["host_choice"], self._get_index().candidates(conditions)
+            )
+            matched_hosts = self.filter_host_folder(hosts, conditions["host_folder"])
+            matched_hosts = self.filter_host_tags(matched_hosts, conditions["host_tags"])
+            matched_hosts = self.filter_host_labels(matched_hosts, conditions["host_labels"])
+            host_matches = [BIHostSearchMatch(x, matched_re_groups[x.name]) for x in matched_hosts]
+            self._search_cache[cache_key] = host_matches
+        return list(host_matches)
+
+    def _filter_host_choice_of_all_hosts(
+        self, condition: dict, candidates: set[str] | None
+    ) -> tuple[list[BIHostData], dict]:
+        if condition["type"] == "all_hosts":
+            index = self._get_index()
+            if candidates is None:
+                return index.hosts, index.name_match_groups
+            return index.get_hosts(candidates), index.name_match_groups
+
+        if condition["type"] == "host_name_regex":
+            hosts, matched_re_groups = self._search_host_names(condition["pattern"])
+        elif condition["type"] == "host_alias_regex":
+            hosts, matched_re_groups = self._search_host_aliases(condition["pattern"])
+        else:
+            raise NotImplementedError("Invalid condition type %r" % condition["type"])
+
+        if candidates is None:
+            return hosts, matched_re_groups
+        return [x for x in hosts if x.name in candidates], matched_re_groups
 
     def filter_host_choice(
         self,
@@ -64,7 +243,7 @@ class BISearcher(ABCBISearcher):
             return hosts, self._host_match_groups(hosts)
 
         if condition["type"] == "host_name_regex":
-            return self.get_host_name_matches(hosts, condition["pattern"])
+            return self._get_host_name_matches(hosts, condition["pattern"])
 
         if condition["type"] == "host_alias_regex":
             return self.get_host_alias_matches(hosts, condition["pattern"])
@@ -78,12 +257,45 @@ class BISearcher(ABCBISearcher):
         self,
         hosts: list[BIHostData],
         pattern: str,
+    ) -> tuple[list[BIHostData], dict]:
+        matched_hosts, matched_re_groups = self._get_host_name_matches(hosts, pattern)
+        if self._dependencies is not None:
+            self._dependencies.searches.append(("host_name", pattern))
+            self._dependencies.host_names.update(host.name for host in matched_hosts)
+        return matched_hosts, matched_re_groups
+
+    def search_host_names(self, pattern: str) -> tuple[list[BIHostData], dict]:
+        matched_hosts, matched_re_groups = self._search_host_names(pattern)
+        if self._dependencies is not None:
+            self._dependencies.searches.append(("host_name", pattern))
+            self._dependencies.host_names.update(host.name for host in matched_hosts)
+        return list(matched_hosts), matched_re_groups
+
+    def _search_host_names(self, pattern: str) -> tuple[list[BIHostData], dict]:
+        index = self._get_index()
+        if pattern == "(.*)":
+            return index.hosts, index.name_match_groups
+        if not _is_host_name_regex(pattern):
+            return self._get_host_name_matches(index.hosts, pattern)
+
+        cache_key = ("host_name", pattern)
+        if (result := self._search_cache.get(cache_key)) is None:
+            # Only the hosts starting with the literal prefix of the pattern can match
+            result = self._get_host_name_matches(
+                index.get_hosts(index.names_with_prefix(_literal_prefix(pattern))), pattern
+            )
+            self._search_cache[cache_key] = result
+        return result
+
+    def _get_host_name_matches(
+        self,
+        hosts: list[BIHostData],
+        pattern: str,
     ) -> tuple[list[BIHostData], dict]:
         if pattern == "(.*)":
             return hosts, self._host_match_groups(hosts)
 
-        is_regex_match = any(map(lambda x: x in pattern, ["(", ")", "*", "$", "|", "[", "]"]))
-        if not is_regex_match:
+        if not _is_host_name_regex(pattern):
             host = self.hosts.get(pattern)
             if host:
                 return [host], {pattern: (pattern,)}
@@ -140,6 +352,20 @@ class BISearcher(ABCBISearcher):
             matched_re_groups[host.name] = tuple(match.groups())
         return matched_hosts, matched_re_groups
 
+    def _search_host_aliases(self, pattern: str) -> tuple[list[BIHostData], dict]:
+        index = self._get_index()
+        if pattern == "(.*)":
+            return self.get_host_alias_matches(index.hosts, pattern)
+
+        cache_key = ("host_alias", pattern)
+        if (result := self._search_cache.get(cache_key)) is None:
+            # Only the hosts whose alias starts with the literal prefix of the pattern can match
+            result = self.get_host_alias_matches(
+                index.get_hosts(index.names_with_alias_prefix(_literal_prefix(pattern))), pattern
+            )
+            self._search_cache[cache_key] = result
+        return result
+
     def get_service_description_matches(
         self,
         host_matches: list[BIHostSearchMatch],
@@ -147,22 +373,45 @@ class BISearcher(ABCBISearcher):
     ) -> list[BIServiceSearchMatch]:
         matched_services = []
         regex_pattern = regex(pattern)
+        # Most hosts share their service descriptions, each one is matched only once
+        match_groups = self._service_match_cache.setdefault(pattern, {})
         for host_match in host_matches:
             for service_description in host_match.host.services.keys():
-                if match := regex_pattern.match(service_description):
+                try:
+                    groups = match_groups[service_description]
+                except KeyError:
+                    match = regex_pattern.match(service_description)
+                    groups = match_groups[service_description] = (
+                        None if match is None else tuple(match.groups())
+                    )
+                if groups is not None:
                     matched_services.append(
-                        BIServiceSearchMatch(host_match, service_description, tuple(match.groups()))
+                        BIServiceSearchMatch(host_match, service_description, groups)
                     )
         return matched_services
 
     def search_services(self, conditions: dict) -> list[BIServiceSearchMatch]:
-        host_matches: list[BIHostSearchMatch] = self.search_hosts(conditions)
-        service_matches = self.get_service_description_matches(
-            host_matches, conditions["service_regex"]
-        )
-        service_matches = self.filter_service_labels(service_matches, conditions["service_labels"])
+        service_matches = self._search_services(conditions)
+        if self._dependencies is not None:
+            self._dependencies.searches.append(("services", conditions))
+            self._dependencies.host_names.update(
+                service_match.host_match.host.name for service_match in service_matches
+            )
         return service_matches
 
+    def _search_services(self, conditions: dict) -> list[BIServiceSearchMatch]:
+        cache_key = ("services", repr(conditions))
+        if (service_matches := self._search_cache.get(cache_key)) is None:
+            host_matches: list[BIHostSearchMatch] = self._search_hosts(conditions)
+            service_matches = self.get_service_description_matches(
+                host_matches, conditions["service_regex"]
+            )
+            service_matches = self.filter_service_labels(
+                service_matches, conditions["service_labels"]
+            )
+            self._search_cache[cache_key] = service_matches
+        return list(service_matches)
+
     def filter_host_folder(
         self,
         hosts: Iterable[BIHostData],
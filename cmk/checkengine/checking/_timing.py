@@ -23,10 +23,20 @@ def make_timing_results(
     fetched: Iterable[tuple[SourceInfo, Snapshot]],
     *,
     perfdata_with_times: bool,
+    max_concurrent_fetches: int = 1,
 ) -> ActiveCheckResult:
+    """The times of the Checkmk service
+
+    The total times include fetching: the sources may have been fetched
+    concurrently, so their times do not add up to it. Only then the time of
+    each source is shown."""
     summary: DefaultDict[str, Snapshot] = defaultdict(Snapshot.null)
+    details = []
     for source, duration in fetched:
-        total_times += duration
+        if max_concurrent_fetches > 1:
+            details.append(
+                f"[{source.ident}] {source.hostname}: fetched in {duration.process.elapsed:.1f} sec"
+            )
         with suppress(KeyError):
             summary[
                 {
@@ -41,7 +51,7 @@ def make_timing_results(
     infotext = "execution time %.1f sec" % total_times.process.elapsed
     if not perfdata_with_times:
         return ActiveCheckResult(
-            0, infotext, (), ("execution_time=%.3f" % total_times.process.elapsed,)
+            0, infotext, details, ("execution_time=%.3f" % total_times.process.elapsed,)
         )
 
     perfdata = [
@@ -55,4 +65,4 @@ def make_timing_results(
     for phase, duration in summary.items():
         perfdata.append(f"cmk_time_{phase}={duration.idle:.3f}")
 
-    return ActiveCheckResult(0, infotext, (), perfdata)
+    return ActiveCheckResult(0, infotext, details, perfdata)
@@ -161,6 +161,7 @@ class Rule(TypedDict, total=False):
     comment: str
     contact_groups: ContactGroups
     count: Count
+    delay: int
     description: str
     docu_url: str
     disabled: bool
@@ -320,7 +321,7 @@ class SNMPCredential(SNMPCredentialBase, total=False):
 # This is what we get from the outside.
 class ConfigFromWATO(TypedDict):
     actions: Sequence[Action]
-    archive_mode: Literal["file", "mongodb"]
+    archive_mode: Literal["file", "mongodb", "sqlite"]
     archive_orphans: bool
     debug_rules: bool
     event_limit: EventLimits
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""The open events of the Event Console, indexed by the fields used to find them
+
+All event lists (overall and per index key) are ordered by the creation of the
+events, the oldest event first. This is the order of the status file, too.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Iterator
+from typing import Any, Generic, TypeVar
+
+from .event import Event
+
+_Key = TypeVar("_Key", bound=Hashable)
+
+# rule_id, host, application, match_groups: Events of the same "breed" are counted together
+BreedKey = tuple[str | None, str, str, tuple[Any, ...]]
+
+# rule_id, host, breed
+_IndexKeys = tuple[str | None, str, BreedKey]
+
+
+def breed_key(event: Event) -> BreedKey:
+    return (
+        event.get("rule_id"),
+        event.get("host", ""),
+        event.get("application", ""),
+        tuple(event.get("match_groups", ())),
+    )
+
+
+def _index_keys(event: Event) -> _IndexKeys:
+    return event.get("rule_id"), event.get("host", ""), breed_key(event)
+
+
+class _Index(Generic[_Key]):
+    """Events by a key, the events of a key are ordered by their id"""
+
+    def __init__(self) -> None:
+        self._events: dict[_Key, dict[int, Event]] = {}
+
+    def add(self, key: _Key, event: Event) -> None:
+        events = self._events.setdefault(key, {})
+        newest_id = next(reversed(events), None)
+        events[event["id"]] = event
+        if newest_id is not None and event["id"] < newest_id:
+            # The key of an older event has changed: restore the order
+            self._events[key] = dict(sorted(events.items()))
+
+    def remove(self, key: _Key, event_id: int) -> None:
+        events = self._events[key]
+        del events[event_id]
+        if not events:
+            del self._events[key]
+
+    def get(self, key: _Key) -> Iterator[Event]:
+        return iter(self._events.get(key, {}).values())
+
+    def oldest(self, key: _Key) -> Event | None:
+        return next(iter(self._events.get(key, {}).values()), None)
+
+
+class EventStore:
+    """Open events by id, rule, host, rule and host, and breed
+
+    The fields of the stored events used by the indexes may only be changed followed by a call
+    of update(). The iterators returned by the events_of_*() methods must be consumed before
+    events are added, removed or updated."""
+
+    def __init__(self, events: Iterable[Event] = ()) -> None:
+        self._events: dict[int, Event] = {}
+        self._keys: dict[int, _IndexKeys] = {}
+        self._by_rule = _Index[str | None]()
+        self._by_host = _Index[str]()
+        self._by_rule_and_host = _Index[tuple[str | None, str]]()
+        self._by_breed = _Index[BreedKey]()
+        for event in events:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, event: Event) -> bool:
+        return self._events.get(event["id"]) is event
+
+    def events(self) -> list[Event]:
+        return list(self._events.values())
+
+    def get(self, event_id: int) -> Event | None:
+        return self._events.get(event_id)
+
+    def add(self, event: Event) -> None:
+        event_id = event["id"]
+        if event_id in self._events:
+            raise ValueError(f"Event {event_id} already exists")
+        self._events[event_id] = event
+        self._add_to_indexes(event)
+
+    def _add_to_indexes(self, event: Event) -> None:
+        keys = self._keys[event["id"]] = _index_keys(event)
+        self._by_rule.add(keys[0], event)
+        self._by_host.add(keys[1], event)
+        self._by_rule_and_host.add(keys[:2], event)
+        self._by_breed.add(keys[2], event)
+
+    def remove(self, event: Event) -> None:
+        """Remove the event, raises KeyError if it is not stored here"""
+        if event not in self:
+            raise KeyError(event["id"])
+        del self._events[event["id"]]
+        self._remove_from_indexes(event["id"])
+
+    def _remove_from_indexes(self, event_id: int) -> None:
+        rule_id, host, breed = self._keys.pop(event_id)
+        self._by_rule.remove(rule_id, event_id)
+        self._by_host.remove(host, event_id)
+        self._by_rule_and_host.remove((rule_id, host), event_id)
+        self._by_breed.remove(breed, event_id)
+
+    def update(self, event: Event) -> None:
+        """Update the indexes after the fields of a stored event have been changed"""
+        if self._keys[event["id"]] != _index_keys(event):
+            self._remove_from_indexes(event["id"])
+            self._add_to_indexes(event)
+
+    def oldest(self) -> Event | None:
+        return next(iter(self._events.values()), None)
+
+    def events_of_rule(self, rule_id: str | None) -> Iterator[Event]:
+        return self._by_rule.get(rule_id)
+
+    def oldest_of_rule(self, rule_id: str | None) -> Event | None:
+        return self._by_rule.oldest(rule_id)
+
+    def events_of_host(self, host: str) -> Iterator[Event]:
+        return self._by_host.get(host)
+
+    def oldest_of_host(self, host: str) -> Event | None:
+        return self._by_host.oldest(host)
+
+    def events_of_rule_and_host(self, rule_id: str | None, host: str) -> Iterator[Event]:
+        return self._by_rule_and_host.get((rule_id, host))
+
+    def events_of_breed(self, key: BreedKey) -> Iterator[Event]:
+        return self._by_breed.get(key)
@@ -6,20 +6,21 @@
 import contextlib
 import os
 import shlex
+import sqlite3
 import subprocess
 import threading
 import time
 from collections.abc import Callable, Iterable, Sequence
 from logging import Logger
 from pathlib import Path
-from typing import Any, assert_never, Literal
+from typing import Any, assert_never, Final, Literal
 
 from cmk.utils.log import VERBOSE
 from cmk.utils.render import date_and_time
 
 from .config import Config
 from .event import Event
-from .query import OperatorName, QueryGET
+from .query import operator_for, OperatorName, QueryGET
 from .settings import Settings
 
 # TODO: As one can see clearly below, we should really have a class hierarchy here...
@@ -61,36 +62,56 @@ class History:
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._mongodb = MongoDB()
+        self._sqlite = SQLite()
         self._active_history_period = ActiveHistoryPeriod()
         self.reload_configuration(config)
 
     def reload_configuration(self, config: Config) -> None:
+        _close_sqlite(self)  # Reopened with the new configuration when needed
         self._config = config
         if self._config["archive_mode"] == "mongodb":
             _reload_configuration_mongodb(self)
+        elif self._config["archive_mode"] == "sqlite":
+            _reload_configuration_sqlite(self)
         else:
             _reload_configuration_files(self)
 
     def flush(self) -> None:
         if self._config["archive_mode"] == "mongodb":
             _flush_mongodb(self)
+        elif self._config["archive_mode"] == "sqlite":
+            _flush_sqlite(self)
         else:
             _flush_files(self)
 
     def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
         if self._config["archive_mode"] == "mongodb":
             _add_mongodb(self, event, what, who, addinfo)
+        elif self._config["archive_mode"] == "sqlite":
+            _add_sqlite(self, event, what, who, addinfo)
         else:
             _add_files(self, event, what, who, addinfo)
 
     def get(self, query: QueryGET) -> Iterable[Any]:
         if self._config["archive_mode"] == "mongodb":
             return _get_mongodb(self, query)
+        if self._config["archive_mode"] == "sqlite":
+            return _get_sqlite(self, query)
         return _get_files(self, self._logger, query)
 
+    def close(self) -> None:
+        _close_sqlite(self)
+
+    def write_pending(self) -> None:
+        """Write the entries which have been added a while ago, called at least every second"""
+        if self._config["archive_mode"] == "sqlite":
+            _write_expired_pending_sqlite(self)
+
     def housekeeping(self) -> None:
         if self._config["archive_mode"] == "mongodb":
             _housekeeping_mongodb(self)
+        elif self._config["archive_mode"] == "sqlite":
+            _housekeeping_sqlite(self)
         else:
             _housekeeping_files(self)
 
@@ -301,6 +322,307 @@ def _get_mongodb(  # pylint: disable=too-many-branches
     return history_entries
 
 
+# .
+#   .--SQLite--------------------------------------------------------------.
+#   |                 ____   ___  _     _ _                                |
+#   |                / ___| / _ \| |   (_) |_ ___                          |
+#   |                \___ \| | | | |   | | __/ _ \                         |
+#   |                 ___) | |_| | |___| | ||  __/                         |
+#   |                |____/ \__\_\_____|_|\__\___|                         |
+#   |                                                                      |
+#   +----------------------------------------------------------------------+
+#   | The Event Log Archive can be stored in local SQLite databases, one   |
+#   | segment per history period. The segments are indexed by the columns  |
+#   | used by the typical history queries, expired segments are deleted    |
+#   | as a whole.                                                          |
+#   '----------------------------------------------------------------------'
+
+# Write the added entries after this number of entries or seconds. Queries and the housekeeping
+# write the pending entries, too. The event server writes them after this number of seconds when
+# no further entries are added.
+_SQLITE_BATCH_SIZE: Final = 1000
+_SQLITE_BATCH_MAX_AGE: Final = 1.0
+
+# Columns containing sequences, stored in the format of the history files
+_SQLITE_SEQUENCE_COLUMNS: Final = {
+    "event_match_groups",
+    "event_contact_groups",
+    "event_match_groups_syslog_application",
+}
+
+# Indexed columns, in combination with the time to deliver the youngest entries first
+_SQLITE_INDEXED_COLUMNS: Final = ("event_id", "event_host", "event_rule_id", "event_phase")
+
+_SQLITE_COMPARISON_OPERATORS: Final = {"=", "<", ">", "<=", ">="}
+_SQLITE_REGEX_OPERATORS: Final = {"~", "=~", "~~"}
+
+
+class SQLite:
+    def __init__(self) -> None:
+        self.connection: sqlite3.Connection | None = None
+        self.path: Path | None = None
+        self.active_history_period = ActiveHistoryPeriod()
+        self.pending: list[list[Any]] = []
+        self.first_pending = 0.0
+
+
+def _reload_configuration_sqlite(history: History) -> None:
+    pass
+
+
+def _sqlite_segments(history_dir: Path) -> list[Path]:
+    """Return the segments, the youngest first"""
+    return sorted(history_dir.glob("*.sqlite"), key=lambda p: int(p.stem), reverse=True)
+
+
+def _sqlite_connection(history: History) -> sqlite3.Connection:
+    """Return the connection to the segment of the current history period"""
+    path = get_logfile(
+        history._config,
+        history._settings.paths.history_dir.value,
+        history._sqlite.active_history_period,
+        ".sqlite",
+    )
+    if history._sqlite.connection is not None and history._sqlite.path == path:
+        return history._sqlite.connection
+
+    if history._sqlite.connection is not None:
+        history._sqlite.connection.close()
+    # The connection is used by all threads, always under the lock of the history.
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    column_names = [name for name, _default in history._history_columns]
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS history (history_line INTEGER PRIMARY KEY, %s)"
+        % ", ".join(column_names[1:])
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS history_time ON history (history_time)")
+    for column_name in _SQLITE_INDEXED_COLUMNS:
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {column_name} ON history ({column_name}, history_time)"
+        )
+    connection.commit()
+    history._sqlite.connection = connection
+    history._sqlite.path = path
+    return connection
+
+
+def _write_pending_sqlite(history: History) -> None:
+    """Write the pending entries in one transaction, the lock of the history must be held"""
+    if not (pending := history._sqlite.pending):
+        return
+    connection = _sqlite_connection(history)
+    with connection:
+        connection.executemany(
+            "INSERT INTO history VALUES (NULL, %s)" % ", ".join("?" * len(pending[0])), pending
+        )
+    history._sqlite.pending = []
+
+
+def _write_expired_pending_sqlite(history: History) -> None:
+    with history._lock:
+        if (
+            history._sqlite.pending
+            and time.time() - history._sqlite.first_pending >= _SQLITE_BATCH_MAX_AGE
+        ):
+            _write_pending_sqlite(history)
+
+
+def _close_sqlite(history: History) -> None:
+    with history._lock:
+        _write_pending_sqlite(history)
+        _close_sqlite_connection(history._sqlite)
+
+
+def _close_sqlite_connection(sqlite: SQLite) -> None:
+    if sqlite.connection is not None:
+        sqlite.connection.close()
+        sqlite.connection = None
+        sqlite.path = None
+
+
+def _flush_sqlite(history: History) -> None:
+    with history._lock:
+        history._sqlite.pending = []
+        _close_sqlite_connection(history._sqlite)
+        for path in _sqlite_segments(history._settings.paths.history_dir.value):
+            _remove_sqlite_segment(path)
+
+
+def _remove_sqlite_segment(path: Path) -> None:
+    for segment_file in [path, path.with_suffix(".sqlite-wal"), path.with_suffix(".sqlite-shm")]:
+        segment_file.unlink(missing_ok=True)
+
+
+def _sqlite_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return quote_tab(value).decode("utf-8")
+    return value
+
+
+def _add_sqlite(history: History, event: Event, what: HistoryWhat, who: str, addinfo: str) -> None:
+    _log_event(history._config, history._logger, event, what, who, addinfo)
+    now = time.time()
+    values: list[Any] = [now, scrub_string(what), scrub_string(who), scrub_string(addinfo)]
+    values += [
+        _sqlite_value(event.get(colname[6:], defval))  # drop "event_"
+        for colname, defval in history._event_columns
+    ]
+    with history._lock:
+        if not history._sqlite.pending:
+            history._sqlite.first_pending = now
+        history._sqlite.pending.append(values)
+        if (
+            len(history._sqlite.pending) >= _SQLITE_BATCH_SIZE
+            or now - history._sqlite.first_pending >= _SQLITE_BATCH_MAX_AGE
+        ):
+            _write_pending_sqlite(history)
+
+
+def _housekeeping_sqlite(history: History) -> None:
+    """Write the pending entries and delete the expired segments"""
+    with history._lock:
+        try:
+            _write_pending_sqlite(history)
+            days = history._config["history_lifetime"]
+            min_time = time.time() - days * 86400
+            history._logger.log(
+                VERBOSE,
+                "Expiring history segments (Horizon: %d days -> %s)",
+                days,
+                date_and_time(min_time),
+            )
+            for path in _sqlite_segments(history._settings.paths.history_dir.value):
+                if path == history._sqlite.path:
+                    continue
+                with contextlib.closing(_sqlite_read_connection(path)) as connection:
+                    last_entry = _sqlite_segment_timespan(connection)[1]
+                if last_entry is None or last_entry < min_time:
+                    history._logger.info("Deleting history segment %s", path)
+                    _remove_sqlite_segment(path)
+        except Exception as e:
+            if history._settings.options.debug:
+                raise
+            history._logger.warning(f"Error expiring history segments: {e}")
+
+
+def _sqlite_segment_timespan(connection: sqlite3.Connection) -> tuple[float | None, float | None]:
+    first_entry, last_entry = connection.execute(
+        "SELECT min(history_time), max(history_time) FROM history"
+    ).fetchone()
+    return first_entry, last_entry
+
+
+def _sqlite_read_connection(path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    connection.create_function("ec_filter", 3, _sqlite_filter, deterministic=True)
+    return connection
+
+
+def _sqlite_filter(operator_name: OperatorName, value: Any, argument: Any) -> bool:
+    """Evaluate a filter within SQLite, so that only the matching rows need to be converted"""
+    if not isinstance(value, str):
+        return True  # Decided when filtering the returned rows
+    return operator_for(operator_name)[1](value, argument)
+
+
+def _sqlite_where(
+    history_columns: Columns,
+    filters: Iterable[tuple[str, OperatorName, Callable[[Any], bool], Any]],
+) -> tuple[str, list[Any]]:
+    """Translate the filters which can be evaluated by SQLite
+
+    All filters are applied to the returned rows again.
+
+    >>> _sqlite_where(
+    ...     [("history_time", 0.0), ("event_host", ""), ("event_match_groups", "")],
+    ...     [
+    ...         ("history_time", ">=", lambda x: True, 1.0),
+    ...         ("event_host", "=", lambda x: True, "heute"),
+    ...         ("event_host", "~", lambda x: True, "heu"),
+    ...         ("event_host", "in", lambda x: True, ["heute"]),
+    ...         ("event_match_groups", "=", lambda x: True, "a"),
+    ...     ],
+    ... )
+    ('WHERE history_time >= ? AND event_host = ? AND ec_filter(?, event_host, ?)', [1.0, 'heute', '~', 'heu'])
+    """
+    column_types = {name: type(default) for name, default in history_columns}
+    conditions = []
+    arguments = []
+    for column_name, operator_name, _predicate, argument in filters:
+        column_type = column_types.get(column_name)
+        if (
+            column_type not in (int, float, str)
+            or column_name in _SQLITE_SEQUENCE_COLUMNS
+            or type(argument) not in (int, float, str)
+        ):
+            continue
+        if operator_name in _SQLITE_COMPARISON_OPERATORS:
+            conditions.append(f"{column_name} {operator_name} ?")
+            arguments.append(argument)
+        elif operator_name in _SQLITE_REGEX_OPERATORS and column_type is str:
+            conditions.append(f"ec_filter(?, {column_name}, ?)")
+            arguments += [operator_name, argument]
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), arguments
+
+
+def _get_sqlite(history: History, query: QueryGET) -> Iterable[Any]:
+    with history._lock:
+        _write_pending_sqlite(history)
+
+    history_dir = history._settings.paths.history_dir.value
+    if not history_dir.exists():
+        return []
+
+    filters, limit = query.filters, query.limit
+    time_filters = [
+        (operator_name, argument)
+        for column_name, operator_name, _predicate, argument in filters
+        if column_name.split("_")[-1] == "time"
+    ]
+    time_range = (
+        _greatest_lower_bound_for_filters(time_filters),
+        _least_upper_bound_for_filters(time_filters),
+    )
+    where, arguments = _sqlite_where(history._history_columns, filters)
+    column_names = [name for name, _default in history._history_columns]
+    sql = "SELECT %s FROM history %s ORDER BY history_time DESC, history_line DESC" % (
+        ", ".join(column_names),
+        where,
+    )
+    history._logger.debug("Filters: %r, SQL: %s %r", filters, sql, arguments)
+
+    history_entries: list[Any] = []
+    for path in _sqlite_segments(history_dir):
+        if limit is not None and len(history_entries) >= limit:
+            break
+        try:
+            with contextlib.closing(_sqlite_read_connection(path)) as connection:
+                if not _intersects(time_range, _sqlite_segment_timespan(connection)):
+                    continue
+                for row in connection.execute(sql, arguments):
+                    entry = _convert_sqlite_row(column_names, row)
+                    if query.filter_row(entry):
+                        history_entries.append(entry)
+                        if limit is not None and len(history_entries) >= limit:
+                            break
+        except sqlite3.Error as e:
+            if history._settings.options.debug:
+                raise
+            history._logger.warning(f"Error reading history segment {path}: {e}")
+    return history_entries
+
+
+def _convert_sqlite_row(column_names: Sequence[str], row: Sequence[Any]) -> list[Any]:
+    return [
+        _unsplit(value)
+        if column_name in _SQLITE_SEQUENCE_COLUMNS
+        else (bool(value) if column_name == "event_host_in_downtime" else value)
+        for column_name, value in zip(column_names, row)
+    ]
+
+
 # .
 #   .--History-------------------------------------------------------------.
 #   |                   _   _ _     _                                      |
@@ -378,7 +700,12 @@ class ActiveHistoryPeriod:
         self.value: int | None = None
 
 
-def get_logfile(config: Config, log_dir: Path, active_history_period: ActiveHistoryPeriod) -> Path:
+def get_logfile(
+    config: Config,
+    log_dir: Path,
+    active_history_period: ActiveHistoryPeriod,
+    suffix: str = ".log",
+) -> Path:
     """Get file object to current log file, handle also history and lifetime limit."""
     log_dir.mkdir(parents=True, exist_ok=True)
     # Log into file starting at current history period,
@@ -391,13 +718,13 @@ def get_logfile(config: Config, log_dir: Path, active_history_period: ActiveHist
     # compute currently active period
     if active_history_period.value is None or timestamp > active_history_period.value:
         # Look if newer files exist
-        timestamps = sorted(int(str(path.name)[:-4]) for path in log_dir.glob("*.log"))
+        timestamps = sorted(int(path.stem) for path in log_dir.glob(f"*{suffix}"))
         if len(timestamps) > 0:
             timestamp = max(timestamps[-1], timestamp)
 
         active_history_period.value = timestamp
 
-    return log_dir / f"{timestamp}.log"
+    return log_dir / f"{timestamp}{suffix}"
 
 
 def _current_history_period(config: Config) -> int:
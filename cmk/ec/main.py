@@ -29,6 +29,7 @@ import threading
 import time
 import traceback
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
 from functools import partial
 from logging import getLogger, Logger
 from pathlib import Path
@@ -56,6 +57,7 @@ from .config import Config, ConfigFromWATO, Count, ECRulePack, MatchGroups, Rule
 from .core_queries import HostInfo, query_hosts_scheduled_downtime_depth, query_timeperiods_in
 from .crash_reporting import CrashReportStore, ECCrashReport
 from .event import create_event_from_line, Event
+from .event_store import breed_key, EventStore
 from .helpers import ECLock
 from .history import (
     ActiveHistoryPeriod,
@@ -68,19 +70,15 @@ from .history import (
 )
 from .host_config import HostConfig
 from .perfcounters import Perfcounters
+from .pipeline import OrderedPipeline
 from .query import filter_operator_in, MKClientError, Query, QueryCOMMAND, QueryGET, QueryREPLICATE
 from .rule_matcher import compile_rule, match, MatchFailure, MatchResult, MatchSuccess, RuleMatcher
 from .rule_packs import load_config as load_config_using
+from .rule_prefilter import RulePrefilter
 from .settings import FileDescriptor, PortNumber, Settings
 from .settings import settings as create_settings
 from .snmp import SNMPTrapEngine
-
-
-class PackedEventStatus(TypedDict):
-    next_event_id: int
-    events: list[Event]
-    rule_stats: dict[str, int]
-    interval_starts: dict[str, int]
+from .status_journal import JournalEntry, PackedEventStatus, StatusJournal
 
 
 class SlaveStatus(TypedDict):
@@ -96,6 +94,21 @@ Response = Iterable[list[object]] | dict[str, object] | None
 
 LimitKind = Literal["overall", "by_rule", "by_host"]
 
+# Receiving and matching the incoming messages happens concurrently, but the
+# worker threads mainly overlap I/O (e.g. livestatus queries) of the matching.
+_INGEST_WORKERS = 4
+_INGEST_QUEUE_SIZE = 10000
+
+
+@dataclass(frozen=True)
+class RuleMatch:
+    """The result of EventServer.match_event, the rule is None if no rule matches"""
+
+    message_line: bytes | None  # for the message log
+    rule: Rule | None = None
+    result: MatchSuccess | None = None
+    dropped: bool = False
+
 
 class SyslogPriority:
     NAMES: Mapping[int, str] = {
@@ -698,7 +711,34 @@ class EventServer(ECServerThread):
     def handle_snmptrap(self, trap: Iterable[tuple[str, str]], ipaddress_: str) -> None:
         self.process_event(create_event_from_trap(trap, ipaddress_))
 
-    def serve(self) -> None:  # pylint: disable=too-many-branches
+    def serve(self) -> None:
+        pipeline = OrderedPipeline(
+            self._logger, self._perfcounters, _INGEST_WORKERS, _INGEST_QUEUE_SIZE
+        )
+        pipeline.start()
+        try:
+            self._receive(pipeline)
+        finally:
+            pipeline.stop()
+
+    def _receive(self, pipeline: OrderedPipeline) -> None:  # pylint: disable=too-many-branches
+        """Receive the incoming messages and hand them over to the pipeline
+
+        Datagrams (syslog via UDP, SNMP traps) are dropped if the pipeline is
+        full, all other sources wait for the pipeline to catch up."""
+
+        def submit_lines(data: bytes, address: tuple[str, int] | None, block: bool = True) -> None:
+            pipeline.submit(partial(self.match_raw_lines, data, address), block)
+
+        def submit_trap(message: bytes, address: tuple[str, int]) -> None:
+            # The SNMP engine is not thread safe: Traps are completely processed when they are
+            # committed, i.e. one after another.
+            commit = partial(
+                self.process_raw_data,
+                partial(self._snmp_trap_engine.process_snmptrap, message, address),
+            )
+            pipeline.submit(lambda: commit, block=False)
+
         pipe_fragment = b""
         pipe = self.open_pipe()
         listen_list = [
@@ -770,14 +810,14 @@ class EventServer(ECServerThread):
                         # Do we have any complete messages?
                         if b"\n" in data:
                             complete, rest = data.rsplit(b"\n", 1)
-                            self.process_raw_lines(complete + b"\n", address)
+                            submit_lines(complete + b"\n", address)
                         else:
                             rest = data  # keep for next time
 
                     # Only complete messages
                     else:
                         if data:
-                            self.process_raw_lines(data, address)
+                            submit_lines(data, address)
                         rest = b""
 
                     # Connection still open?
@@ -800,11 +840,11 @@ class EventServer(ECServerThread):
                         if data[-1:] != b"\n":
                             if b"\n" in data:  # at least one complete message contained
                                 messages, pipe_fragment = data.rsplit(b"\n", 1)
-                                self.process_raw_lines(messages + b"\n", None)  # got lost in split
+                                submit_lines(messages + b"\n", None)  # got lost in split
                             else:
                                 pipe_fragment = data  # keep beginning of message, wait for \n
                         else:
-                            self.process_raw_lines(data, None)
+                            submit_lines(data, None)
                     else:  # EOF
                         os.close(pipe)
                         pipe = self.open_pipe()
@@ -830,7 +870,7 @@ class EventServer(ECServerThread):
                     raise ValueError(
                         f"Invalid remote address '{address!r}' for syslog socket (UDP)"
                     )
-                self.process_raw_lines(message, (unmap_ipv4_address(address[0]), address[1]))
+                submit_lines(message, (unmap_ipv4_address(address[0]), address[1]), block=False)
 
             # Read events from builtin snmptrap server
             if self._snmptrap is not None and self._snmptrap in readable:
@@ -844,13 +884,7 @@ class EventServer(ECServerThread):
                         and isinstance(address[1], int)
                     ):
                         raise ValueError(f"Invalid remote address '{address!r}' for SNMP trap")
-                    self.process_raw_data(
-                        partial(
-                            self._snmp_trap_engine.process_snmptrap,
-                            message,
-                            (unmap_ipv4_address(address[0]), address[1]),
-                        )
-                    )
+                    submit_trap(message, (unmap_ipv4_address(address[0]), address[1]))
                 except Exception:
                     self._logger.exception(
                         "exception while handling an SNMP trap, skipping this one"
@@ -859,12 +893,15 @@ class EventServer(ECServerThread):
             if spool_files := sorted(
                 self.settings.paths.spool_dir.value.glob("[!.]*"), key=lambda x: x.stat().st_mtime
             ):
-                self.process_raw_lines(spool_files[0].read_bytes(), None)
+                submit_lines(spool_files[0].read_bytes(), None)
                 spool_files[0].unlink()
                 select_timeout = 0  # enable fast processing to process further files
             else:
                 select_timeout = 1  # restore default select timeout
 
+            # The history entries of the last events would wait for further events otherwise
+            self._history.write_pending()
+
     def process_raw_data(self, handler: Callable[[], None]) -> None:
         """
         Processes incoming data, just a wrapper between the real data and the
@@ -872,26 +909,53 @@ class EventServer(ECServerThread):
         """
         self._perfcounters.count("messages")
         before = time.time()
-        # In replication slave mode (when not took over), ignore all events
-        if not is_replication_slave(self._config) or self._slave_status["mode"] != "sync":
+        if not self._ignores_events():
             handler()
-        elif self.settings.options.debug:
-            self._logger.info("Replication: we are in slave mode, ignoring event")
         elapsed = time.time() - before
         self._perfcounters.count_time("processing", elapsed)
 
+    def _ignores_events(self) -> bool:
+        # In replication slave mode (when not took over), ignore all events
+        if not is_replication_slave(self._config) or self._slave_status["mode"] != "sync":
+            return False
+        if self.settings.options.debug:
+            self._logger.info("Replication: we are in slave mode, ignoring event")
+        return True
+
     def process_raw_lines(self, data: bytes, address: tuple[str, int] | None) -> None:
         """Takes several lines of messages, handles encoding and processes them separated."""
+        self.match_raw_lines(data, address)()
+
+    def match_raw_lines(self, data: bytes, address: tuple[str, int] | None) -> Callable[[], None]:
+        """The first part of process_raw_lines, returns the second part
+
+        The first part does not change the event status and may run concurrently for
+        different data. The second part applies the results to the event status, it has
+        to be called in the order the data has been received."""
+        matches: list[tuple[Event, RuleMatch, float]] = []
         for line_bytes in data.splitlines():
             if line := scrub_string(line_bytes.rstrip().decode("utf-8")):
+                self._perfcounters.count("messages")
+                before = time.time()
                 try:
+                    if not self._ignores_events():
+                        event = self._create_event_from_line(line, address)
+                        matches.append((event, self.match_event(event), time.time() - before))
+                        continue
+                except Exception:
+                    self._logger.exception("Exception handling a log line (skipping this one)")
+                self._perfcounters.count_time("processing", time.time() - before)
 
-                    def handler(line: str = line) -> None:
-                        self.process_line(line, address)
-
-                    self.process_raw_data(handler)
+        def apply_rule_matches() -> None:
+            for event, rule_match, elapsed in matches:
+                before = time.time()
+                try:
+                    self.apply_rule_match(event, rule_match)
                 except Exception:
                     self._logger.exception("Exception handling a log line (skipping this one)")
+                self._perfcounters.count_time("processing", elapsed + time.time() - before)
+
+        return apply_rule_matches
 
     def do_housekeeping(self) -> None:
         with self._event_status.lock, self._lock_configuration:
@@ -994,6 +1058,8 @@ class EventServer(ECServerThread):
                                 )
                                 event["phase"] = "closed"
                                 events_to_delete.append((event, "COUNTFAILED"))
+                            else:
+                                self._event_status.event_changed(event)
 
                     else:  # algorithm 'interval'
                         if event["first"] + count["period"] <= now:  # End of period reached
@@ -1039,6 +1105,7 @@ class EventServer(ECServerThread):
                         self._logger.info(
                             "Cannot do rule action: rule %s not present anymore.", event["rule_id"]
                         )
+                    self._event_status.event_changed(event)
 
             # Handle events with a limited lifetime
             elif "live_until" in event and now >= event["live_until"]:
@@ -1099,9 +1166,8 @@ class EventServer(ECServerThread):
                 # First look for case 1: rule that already have at least one hit
                 # and this events in the state "counting" exist.
                 events_to_delete: list[tuple[Event, HistoryWhat]] = []
-                events = self._event_status.events()
-                for event in events:
-                    if event["rule_id"] == rule["id"] and event["phase"] == "counting":
+                for event in self._event_status.events_of_rule(rule["id"]):
+                    if event["phase"] == "counting":
                         # time has elapsed. Now lets see if we have reached
                         # the necessary count:
                         if event["count"] < expected_count:  # no -> trigger alarm
@@ -1154,10 +1220,8 @@ class EventServer(ECServerThread):
             merge, reset_ack = merge
 
         if merge != "never":
-            for event in self._event_status.events():
-                if event["rule_id"] == rule["id"] and (
-                    event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked")
-                ):
+            for event in self._event_status.events_of_rule(rule["id"]):
+                if event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked"):
                     merge_event = event
                     break
 
@@ -1176,6 +1240,7 @@ class EventServer(ECServerThread):
             # Better rewrite (again). Rule might have changed. Also we have changed
             # the text and the user might have his own text added via set_text.
             self.rewrite_event(rule, merge_event, {}, set_first=False)
+            self._event_status.event_changed(merge_event)
             self._history.add(merge_event, "COUNTFAILED")
         else:
             # Create artificial event from scratch. Make sure that all important
@@ -1217,6 +1282,8 @@ class EventServer(ECServerThread):
             if rule.get("autodelete"):
                 event["phase"] = "closed"
                 self._event_status.remove_event(event, "AUTODELETE")
+            else:
+                self._event_status.event_changed(event)
 
     def reload_configuration(self, config: Config) -> None:
         self._config = config
@@ -1284,6 +1351,8 @@ class EventServer(ECServerThread):
                         ):
                             count_unspecific += 1
 
+        self._rule_prefilter = RulePrefilter(self._rules)
+
         self._logger.info(
             "Compiled %d active rules (ignoring %d disabled rules)", count_rules, count_disabled
         )
@@ -1358,166 +1427,207 @@ class EventServer(ECServerThread):
             )
 
     def process_line(self, line: str, address: tuple[str, int] | None) -> None:
-        self.process_event(
-            create_event_from_line(line, address, self._logger, verbose=self._config["debug_rules"])
+        self.process_event(self._create_event_from_line(line, address))
+
+    def _create_event_from_line(self, line: str, address: tuple[str, int] | None) -> Event:
+        return create_event_from_line(
+            line, address, self._logger, verbose=self._config["debug_rules"]
         )
 
-    def process_event(self, event: Event) -> None:  # pylint: disable=too-many-branches
+    def process_event(self, event: Event) -> None:
+        self.apply_rule_match(event, self.match_event(event))
+
+    def match_event(self, event: Event) -> RuleMatch:  # pylint: disable=too-many-branches
+        """Find the rule handling the event and prepare the event for it
+
+        This does not change the event status, see apply_rule_match."""
         self.do_translate_hostname(event)
 
-        # Log all incoming messages into a syslog-like text file if that is enabled
-        if self._config["log_messages"]:
-            self.log_message(event)
+        # Log all incoming messages into a syslog-like text file if that is enabled. The line
+        # is written when the match is applied, so the lines keep the order of the events.
+        message_line = self._message_line(event) if self._config["log_messages"] else None
 
         # Rule optimizer
         if self._config["rule_optimizer"]:
             self._hash_stats[event["facility"]][event["priority"]] += 1
             rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+            # Keep the output of all tried rules when debugging
+            if not self._config["debug_rules"]:
+                rule_candidates = self._rule_prefilter.candidates(rule_candidates, event)
         else:
             rule_candidates = self._rules
 
-        skip_pack = None
-        for rule in rule_candidates:
-            if skip_pack and rule["pack"] == skip_pack:
-                continue  # still in the rule pack that we want to skip
-            skip_pack = None  # new pack, reset skipping
+        # Counted once per event, the status lock is not taken for each evaluated rule
+        evaluated_rule_ids: list[str] = []
+        try:
+            skip_pack = None
+            for rule in rule_candidates:
+                if skip_pack and rule["pack"] == skip_pack:
+                    continue  # still in the rule pack that we want to skip
+                skip_pack = None  # new pack, reset skipping
 
-            try:
-                result = self.event_rule_matches(rule, event)
-            except Exception as e:
-                result = MatchFailure(
-                    reason=f"Rule would match, but due to inverted matching does not. {e}"
-                )
-                self._logger.exception(result.reason)
+                evaluated_rule_ids.append(rule["id"])
+                try:
+                    result = self.event_rule_matches(rule, event)
+                except Exception as e:
+                    result = MatchFailure(
+                        reason=f"Rule would match, but due to inverted matching does not. {e}"
+                    )
+                    self._logger.exception(result.reason)
 
-            if isinstance(result, MatchSuccess):
-                self._perfcounters.count("rule_hits")
-                if self._config["debug_rules"]:
-                    self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
+                if isinstance(result, MatchSuccess):
+                    self._perfcounters.count("rule_hits")
+                    if self._config["debug_rules"]:
+                        self._logger.info(
+                            "  matching groups:\n%s", pprint.pformat(result.match_groups)
+                        )
 
-                self._event_status.count_rule_match(rule["id"])
-                if self._config["log_rulehits"]:
-                    self._logger.info(
-                        "Rule '%s/%s' hit by message %s/%s - '%s'.",
-                        rule["pack"],
-                        rule["id"],
-                        SyslogFacility(event["facility"]),
-                        SyslogPriority(event["priority"]),
-                        event["text"],
-                    )
+                    self._event_status.count_rule_match(rule["id"])
+                    if self._config["log_rulehits"]:
+                        self._logger.info(
+                            "Rule '%s/%s' hit by message %s/%s - '%s'.",
+                            rule["pack"],
+                            rule["id"],
+                            SyslogFacility(event["facility"]),
+                            SyslogPriority(event["priority"]),
+                            event["text"],
+                        )
 
-                if rule.get("drop"):
-                    if rule["drop"] == "skip_pack":
-                        skip_pack = rule["pack"]
-                        if self._config["debug_rules"]:
-                            self._logger.info("  skipping this rule pack (%s)", skip_pack)
-                        continue
-                    self._perfcounters.count("drops")
-                    return
+                    if rule.get("drop"):
+                        if rule["drop"] == "skip_pack":
+                            skip_pack = rule["pack"]
+                            if self._config["debug_rules"]:
+                                self._logger.info("  skipping this rule pack (%s)", skip_pack)
+                            continue
+                        self._perfcounters.count("drops")
+                        return RuleMatch(message_line, dropped=True)
+
+                    if not result.cancelling:
+                        self._prepare_new_event(rule, event, result)
+                    return RuleMatch(message_line, rule=rule, result=result)
+
+            # End of loop over rules.
+            return RuleMatch(message_line)
+        finally:
+            self._event_status.count_rule_evaluations(evaluated_rule_ids)
+
+    def _prepare_new_event(self, rule: Rule, event: Event, result: MatchSuccess) -> None:
+        # Remember the rule id that this event originated from
+        event["rule_id"] = rule["id"]
+
+        # Attach optional contact group information for visibility
+        # and eventually for notifications
+        self._add_rule_contact_groups_to_event(rule, event)
+
+        # Store groups from matching this event. In order to make
+        # persistence easier, we do not save them as list but join
+        # them on ASCII-1.
+        match_groups_message = result.match_groups.get("match_groups_message", ())
+        assert match_groups_message is not False
+        event["match_groups"] = match_groups_message
+
+        match_groups_syslog_application = result.match_groups.get(
+            "match_groups_syslog_application", ()
+        )
+        assert match_groups_syslog_application is not False
+        event["match_groups_syslog_application"] = match_groups_syslog_application
 
-                if result.cancelling:
-                    self._event_status.cancel_events(
-                        self, self._event_columns, event, result.match_groups, rule
-                    )
-                    return
+        self.rewrite_event(rule, event, result.match_groups)
 
-                # Remember the rule id that this event originated from
-                event["rule_id"] = rule["id"]
+        # Lookup the monitoring core hosts and add the core host
+        # name to the event when one can be matched.
+        #
+        # Needs to be done AFTER event rewriting, because the rewriting
+        # may change the "host" field.
+        #
+        # For the moment we have no rule/condition matching on this
+        # field. So we only add the core host info for matched events.
+        self._add_core_host_to_new_event(event)
 
-                # Attach optional contact group information for visibility
-                # and eventually for notifications
-                self._add_rule_contact_groups_to_event(rule, event)
+    def apply_rule_match(self, event: Event, rule_match: RuleMatch) -> None:
+        """Apply the result of match_event to the event status
 
-                # Store groups from matching this event. In order to make
-                # persistence easier, we do not save them as list but join
-                # them on ASCII-1.
-                match_groups_message = result.match_groups.get("match_groups_message", ())
-                assert match_groups_message is not False
-                event["match_groups"] = match_groups_message
+        The matches have to be applied in the order of the incoming events."""
+        if rule_match.message_line is not None:
+            self._write_message_line(rule_match.message_line)
 
-                match_groups_syslog_application = result.match_groups.get(
-                    "match_groups_syslog_application", ()
-                )
-                assert match_groups_syslog_application is not False
-                event["match_groups_syslog_application"] = match_groups_syslog_application
-
-                self.rewrite_event(rule, event, result.match_groups)
-
-                # Lookup the monitoring core hosts and add the core host
-                # name to the event when one can be matched.
-                #
-                # Needs to be done AFTER event rewriting, because the rewriting
-                # may change the "host" field.
-                #
-                # For the moment we have no rule/condition matching on this
-                # field. So we only add the core host info for matched events.
-                self._add_core_host_to_new_event(event)
-
-                if "count" in rule:
-                    count = rule["count"]
-                    # Check if a matching event already exists that we need to
-                    # count up. If the count reaches the limit, the event will
-                    # be opened and its rule actions performed.
-                    existing_event = self._event_status.count_event(self, event, rule, count)
-                    if existing_event:
-                        if "delay" in rule:
-                            if self._config["debug_rules"]:
-                                self._logger.info(
-                                    "Event opening will be delayed for %d seconds", rule["delay"]
-                                )
-                            existing_event["delay_until"] = time.time() + rule["delay"]
-                            existing_event["phase"] = "delayed"
-                        else:
-                            event_has_opened(
-                                self._history,
-                                self.settings,
-                                self._config,
-                                self._logger,
-                                self.host_config,
-                                self._event_columns,
-                                rule,
-                                existing_event,
-                            )
+        if rule_match.dropped:
+            return
 
-                        self._history.add(existing_event, "COUNTREACHED")
+        if rule_match.rule is None or rule_match.result is None:
+            if self._config["archive_orphans"]:
+                self._event_status.archive_event(event)
+            return
 
-                        if "delay" not in rule and rule.get("autodelete"):
-                            existing_event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(existing_event, "AUTODELETE")
-                elif "expect" in rule:
-                    self._event_status.count_expected_event(self, event)
-                else:
-                    if "delay" in rule:
-                        if self._config["debug_rules"]:
-                            self._logger.info(
-                                "Event opening will be delayed for %d seconds", rule["delay"]
-                            )
-                        event["delay_until"] = time.time() + rule["delay"]
-                        event["phase"] = "delayed"
-                    else:
-                        event["phase"] = "open"
+        rule = rule_match.rule
+        if rule_match.result.cancelling:
+            self._event_status.cancel_events(
+                self, self._event_columns, event, rule_match.result.match_groups, rule
+            )
+            return
 
-                    if self.new_event_respecting_limits(event) and event["phase"] == "open":
-                        event_has_opened(
-                            self._history,
-                            self.settings,
-                            self._config,
-                            self._logger,
-                            self.host_config,
-                            self._event_columns,
-                            rule,
-                            event,
+        if "count" in rule:
+            count = rule["count"]
+            # Check if a matching event already exists that we need to
+            # count up. If the count reaches the limit, the event will
+            # be opened and its rule actions performed.
+            existing_event = self._event_status.count_event(self, event, rule, count)
+            if existing_event:
+                if "delay" in rule:
+                    if self._config["debug_rules"]:
+                        self._logger.info(
+                            "Event opening will be delayed for %d seconds", rule["delay"]
                         )
-                        if rule.get("autodelete"):
-                            event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(event, "AUTODELETE")
-                return
+                    existing_event["delay_until"] = time.time() + rule["delay"]
+                    existing_event["phase"] = "delayed"
+                else:
+                    event_has_opened(
+                        self._history,
+                        self.settings,
+                        self._config,
+                        self._logger,
+                        self.host_config,
+                        self._event_columns,
+                        rule,
+                        existing_event,
+                    )
+
+                self._history.add(existing_event, "COUNTREACHED")
 
-        # End of loop over rules.
-        if self._config["archive_orphans"]:
-            self._event_status.archive_event(event)
+                if "delay" not in rule and rule.get("autodelete"):
+                    existing_event["phase"] = "closed"
+                    with self._event_status.lock:
+                        self._event_status.remove_event(existing_event, "AUTODELETE")
+                else:
+                    self._event_status.event_changed(existing_event)
+        elif "expect" in rule:
+            self._event_status.count_expected_event(self, event)
+        else:
+            if "delay" in rule:
+                if self._config["debug_rules"]:
+                    self._logger.info("Event opening will be delayed for %d seconds", rule["delay"])
+                event["delay_until"] = time.time() + rule["delay"]
+                event["phase"] = "delayed"
+            else:
+                event["phase"] = "open"
+
+            if self.new_event_respecting_limits(event) and event["phase"] == "open":
+                event_has_opened(
+                    self._history,
+                    self.settings,
+                    self._config,
+                    self._logger,
+                    self.host_config,
+                    self._event_columns,
+                    rule,
+                    event,
+                )
+                if rule.get("autodelete"):
+                    event["phase"] = "closed"
+                    with self._event_status.lock:
+                        self._event_status.remove_event(event, "AUTODELETE")
+                else:
+                    self._event_status.event_changed(event)
 
     def _add_rule_contact_groups_to_event(self, rule: Rule, event: Event) -> None:
         if rule.get("contact_groups") is None:
@@ -1624,23 +1734,29 @@ class EventServer(ECServerThread):
                 self._logger.exception('Unable to parse host "%s"', event.get("host"))
             event["host"] = HostName("")
 
-    def log_message(self, event: Event) -> None:
+    def _message_line(self, event: Event) -> bytes | None:
+        try:
+            return (
+                "%s %s %s%s: %s\n"
+                % (
+                    time.strftime("%b %d %H:%M:%S", time.localtime(event["time"])),
+                    event["host"],
+                    event["application"],
+                    f'[{event["pid"]}]' if event["pid"] else "",
+                    event["text"],
+                )
+            ).encode()
+        except Exception:
+            if self.settings.options.debug:
+                raise
+            return None
+
+    def _write_message_line(self, line: bytes) -> None:
         try:
             with get_logfile(
                 self._config, self.settings.paths.messages_dir.value, self._message_period
             ).open(mode="ab") as f:
-                f.write(
-                    (
-                        "%s %s %s%s: %s\n"
-                        % (
-                            time.strftime("%b %d %H:%M:%S", time.localtime(event["time"])),
-                            event["host"],
-                            event["application"],
-                            f'[{event["pid"]}]' if event["pid"] else "",
-                            event["text"],
-                        )
-                    ).encode()
-                )
+                f.write(line)
         except Exception:
             if self.settings.options.debug:
                 raise
@@ -2087,6 +2203,7 @@ class StatusTableRules(StatusTable):
     columns: Columns = [
         ("rule_id", ""),
         ("rule_hits", 0),
+        ("rule_evaluations", 0),
     ]
 
     def __init__(self, logger: Logger, event_status: EventStatus) -> None:
@@ -2448,6 +2565,7 @@ class StatusServer(ECServerThread):
                 event["contact"] = contact
             if user:
                 event["owner"] = user
+            self._event_status.event_changed(event)
             self._history.add(event, "UPDATE", user)
 
     def handle_command_create(self, arguments: list[str]) -> None:
@@ -2468,6 +2586,7 @@ class StatusServer(ECServerThread):
             event["state"] = int(newstate)
             if user:
                 event["owner"] = user
+            self._event_status.event_changed(event)
             self._history.add(event, "CHANGESTATE", user)
 
     def handle_command_reload(self) -> None:
@@ -2515,6 +2634,7 @@ class StatusServer(ECServerThread):
         event: Event | None = self._event_status.event(int(event_id))
         if user and event is not None:
             event["owner"] = user
+            self._event_status.event_changed(event)
 
         # TODO: De-duplicate code from do_event_actions()
         if action_id == "@NOTIFY" and event is not None:
@@ -2682,6 +2802,7 @@ def run_eventd(  # pylint: disable=too-many-branches
     # Now wait for termination of the server threads
     event_server.join()
     status_server.join()
+    history.close()
 
 
 # .
@@ -2718,16 +2839,25 @@ class EventStatus:
         self.lock = threading.Lock()
         self._history = history
         self._logger = logger
+        self._journal = StatusJournal(settings.paths.status_file.value, logger)
+        # The changes since the last save, protected by their own lock as events are
+        # changed without holding self.lock, too
+        self._changes_lock = threading.Lock()
         self.flush()
 
     def reload_configuration(self, config: Config) -> None:
         self._config = config
 
     def flush(self) -> None:
-        # TODO: Improve types!
-        self._events: list[Event] = []
+        with self._changes_lock:
+            self._changed_events: dict[int, Event] = {}
+            self._removed_event_ids: set[int] = set()
+            self._snapshot_needed = True
+        self._events = EventStore()
         self._next_event_id = 1
         self._rule_stats: dict[str, int] = {}
+        # Not persisted, they depend on the rule prefilter of the EventServer
+        self._rule_evaluations: dict[str, int] = {}
         # needed for expecting rules
         self._interval_starts: dict[str, int] = {}
         self._initialize_event_limit_status()
@@ -2738,14 +2868,24 @@ class EventStatus:
         # - number of rule misses
 
     def events(self) -> list[Event]:
-        # TODO: Improve type!
-        return self._events
+        return self._events.events()
+
+    def events_of_rule(self, rule_id: str) -> list[Event]:
+        return list(self._events.events_of_rule(rule_id))
 
     def event(self, eid: int) -> Event | None:
-        for event in self._events:
-            if event["id"] == eid:
-                return event
-        return None
+        return self._events.get(eid)
+
+    def event_changed(self, event: Event) -> None:
+        """Needs to be called after fields of a stored event changed
+
+        This updates the indexes of the events and saves the event with the next
+        save_status()."""
+        if event not in self._events:
+            return
+        self._events.update(event)
+        with self._changes_lock:
+            self._changed_events[event["id"]] = event
 
     def interval_start(self, rule_id: str, interval: int) -> int:
         """
@@ -2794,55 +2934,84 @@ class EventStatus:
     def pack_status(self) -> PackedEventStatus:
         return {
             "next_event_id": self._next_event_id,
-            "events": self._events,
+            "events": self._events.events(),
             "rule_stats": self._rule_stats,
             "interval_starts": self._interval_starts,
         }
 
     def unpack_status(self, status: PackedEventStatus) -> None:
+        with self._changes_lock:
+            self._snapshot_needed = True
         self._next_event_id = status["next_event_id"]
-        self._events = status["events"]
+        self._events = EventStore(status["events"])
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
 
     def save_status(self) -> None:
+        """Save the changes since the last save, the complete status only if needed"""
         now = time.time()
-        status = self.pack_status()
-        path = self.settings.paths.status_file.value
-        path_new = path.parent / (path.name + ".new")
-        # Believe it or not: cPickle is more than two times slower than repr()
-        with path_new.open(mode="wb") as f:
-            f.write((repr(status) + "\n").encode("utf-8"))
-            f.flush()
-            os.fsync(f.fileno())
-        path_new.rename(path)
+        with self._changes_lock:
+            changed_events, self._changed_events = self._changed_events, {}
+            removed_event_ids, self._removed_event_ids = self._removed_event_ids, set()
+            snapshot_needed, self._snapshot_needed = self._snapshot_needed, False
+        try:
+            if snapshot_needed:
+                self._journal.write_snapshot(self.pack_status())
+            else:
+                self._journal.append(
+                    JournalEntry(
+                        next_event_id=self._next_event_id,
+                        changed_events=list(changed_events.values()),
+                        removed_event_ids=sorted(removed_event_ids),
+                        rule_stats=self._rule_stats,
+                        interval_starts=self._interval_starts,
+                    )
+                )
+        except Exception:
+            # The changes are lost for the journal, the next save needs to save everything
+            with self._changes_lock:
+                self._snapshot_needed = True
+            raise
         elapsed = time.time() - now
-        self._logger.log(VERBOSE, "Saved event state to %s in %.3fms.", path, elapsed * 1000)
+        self._logger.log(
+            VERBOSE,
+            "Saved event state to %s in %.3fms (%s).",
+            self.settings.paths.status_file.value,
+            elapsed * 1000,
+            "complete"
+            if snapshot_needed
+            else f"{len(changed_events)} changed, {len(removed_event_ids)} removed events",
+        )
 
     def reset_counters(self, rule_id: str | None) -> None:
         if rule_id:
-            if rule_id in self._rule_stats:
-                del self._rule_stats[rule_id]
+            self._rule_stats.pop(rule_id, None)
+            self._rule_evaluations.pop(rule_id, None)
         else:
             self._rule_stats = {}
+            self._rule_evaluations = {}
         self.save_status()
 
     def load_status(self, event_server: EventServer) -> None:
         path = self.settings.paths.status_file.value
-        if path.exists():
-            try:
-                status = ast.literal_eval(path.read_text(encoding="utf-8"))
-                self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
-                self._rule_stats = status["rule_stats"]
-                self._interval_starts = status.get("interval_starts", {})
-                self._logger.info("Loaded event state from %s.", path)
-            except Exception:
-                self._logger.exception(f"Error loading event state from {path}")
-                raise
+        try:
+            status = self._journal.load()
+        except Exception:
+            self._logger.exception(f"Error loading event state from {path}")
+            raise
+        if status is not None:
+            self._next_event_id = status["next_event_id"]
+            events: list[Event] = status["events"]
+            self._rule_stats = status["rule_stats"]
+            self._interval_starts = status.get("interval_starts", {})
+            self._logger.info("Loaded event state from %s.", path)
+            with self._changes_lock:
+                self._snapshot_needed = False
+        else:
+            events = self._events.events()
 
         # Add new columns and fix broken events
-        for event in self._events:
+        for event in events:
             event.setdefault("ipaddress", "")
             event.setdefault("host", HostName(""))
             event.setdefault("application", "")
@@ -2851,6 +3020,7 @@ class EventStatus:
             if "core_host" not in event:
                 event_server.add_core_host_to_event(event)
                 event["host_in_downtime"] = False
+        self._events = EventStore(events)
 
         # core_host is needed to initialize the status
         self._initialize_event_limit_status()
@@ -2865,7 +3035,7 @@ class EventStatus:
 
         self.num_existing_events_by_host: dict[tuple[str, HostName | None], int] = {}
         self.num_existing_events_by_rule: dict[Any, int] = {}
-        for event in self._events:
+        for event in self._events.events():
             self._count_event_add(event)
 
     def _count_event_add(self, event: Event) -> None:
@@ -2891,7 +3061,9 @@ class EventStatus:
         self._perfcounters.count("events")
         event["id"] = self._next_event_id
         self._next_event_id += 1
-        self._events.append(event)
+        self._events.add(event)
+        with self._changes_lock:
+            self._changed_events[event["id"]] = event
         self.num_existing_events += 1
         self._count_event_add(event)
         self._history.add(event, "NEW")
@@ -2906,17 +3078,20 @@ class EventStatus:
     def remove_event(self, event: Event, delete_reason: HistoryWhat, user: str = "") -> None:
         try:
             self._events.remove(event)
+            with self._changes_lock:
+                self._changed_events.pop(event["id"], None)
+                self._removed_event_ids.add(event["id"])
             self._history.add(event, delete_reason, user)
             self._count_event_remove(event)
-        except ValueError:
+        except KeyError:
             self._logger.exception("Cannot remove event %d: not present", event["id"])
 
     # protected by self.lock
     def remove_oldest_event(self, ty: LimitKind, event: Event) -> None:
         if ty == "overall":
             self._logger.log(VERBOSE, "  Removing oldest event")
-            oldest_event = self._events[0]
-            self.remove_event(oldest_event, "AUTODELETE")
+            if (oldest_event := self._events.oldest()) is not None:
+                self.remove_event(oldest_event, "AUTODELETE")
         elif ty == "by_rule" and event["rule_id"] is not None:
             self._logger.log(VERBOSE, '  Removing oldest event of rule "%s"', event["rule_id"])
             self._remove_oldest_event_of_rule(event["rule_id"])
@@ -2926,17 +3101,13 @@ class EventStatus:
 
     # protected by self.lock
     def _remove_oldest_event_of_rule(self, rule_id: str) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event, "AUTODELETE")
-                return
+        if (event := self._events.oldest_of_rule(rule_id)) is not None:
+            self.remove_event(event, "AUTODELETE")
 
     # protected by self.lock
     def _remove_oldest_event_of_host(self, hostname: str) -> None:
-        for event in self._events:
-            if event["host"] == hostname:
-                self.remove_event(event, "AUTODELETE")
-                return
+        if (event := self._events.oldest_of_host(hostname)) is not None:
+            self.remove_event(event, "AUTODELETE")
 
     # protected by self.lock
     def get_num_existing_events_by(self, ty: LimitKind, event: Event) -> int:
@@ -2962,10 +3133,9 @@ class EventStatus:
         """
         with self.lock:
             to_delete = []
-            for event in self._events:
-                if event["rule_id"] == rule["id"] and self.cancelling_match(
-                    match_groups, new_event, event, rule
-                ):
+            host = self._cancelling_host(match_groups, new_event, rule)
+            for event in self._events.events_of_rule_and_host(rule["id"], host):
+                if self.cancelling_match(match_groups, new_event, event, rule):
                     # Fill a few fields of the cancelled event with data from
                     # the cancelling event so that action scripts have useful
                     # values and the logfile entry if more relevant.
@@ -3012,11 +3182,9 @@ class EventStatus:
             for e in to_delete:
                 self.remove_event(e, "CANCELLED")
 
-    def cancelling_match(  # pylint: disable=too-many-branches
-        self, match_groups: MatchGroups, new_event: Event, event: Event, rule: Rule
-    ) -> bool:
-        debug = self._config["debug_rules"]
-
+    @staticmethod
+    def _cancelling_host(match_groups: MatchGroups, new_event: Event, rule: Rule) -> HostName:
+        """The host of the events cancelled by the new event"""
         # The match_groups of the canceling match only contain the *_ok match groups
         # Since the rewrite definitions are based on the positive match, we need to
         # create some missing keys. O.o
@@ -3031,7 +3199,14 @@ class EventStatus:
         host = new_event["host"]
         if "set_host" in rule:
             host = HostName(replace_groups(rule["set_host"], host, match_groups))
+        return host
 
+    def cancelling_match(  # pylint: disable=too-many-branches
+        self, match_groups: MatchGroups, new_event: Event, event: Event, rule: Rule
+    ) -> bool:
+        debug = self._config["debug_rules"]
+
+        host = self._cancelling_host(match_groups, new_event, rule)
         if event["host"] != host:
             if debug:
                 self._logger.info(
@@ -3122,6 +3297,13 @@ class EventStatus:
             self._rule_stats.setdefault(rule_id, 0)
             self._rule_stats[rule_id] += 1
 
+    def count_rule_evaluations(self, rule_ids: Sequence[str]) -> None:
+        if not rule_ids:
+            return
+        with self.lock:
+            for rule_id in rule_ids:
+                self._rule_evaluations[rule_id] = self._rule_evaluations.get(rule_id, 0) + 1
+
     def count_event_up(self, found: Event, event: Event) -> None:
         """
         Update event with new information from new occurrence,
@@ -3141,10 +3323,12 @@ class EventStatus:
                 preserve["contact"] = found["contact"]
         found.update(event)
         found.update(preserve)
+        # Callers stop iterating over the events right after this
+        self.event_changed(found)
 
     def count_expected_event(self, event_server: EventServer, event: Event) -> None:
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self._events.events_of_rule(event["rule_id"]):
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -3154,7 +3338,7 @@ class EventStatus:
         event_server.new_event_respecting_limits(event)
 
     def count_event(
-        self, event_server: EventServer, event: Event, rule: str, count: Count
+        self, event_server: EventServer, event: Event, rule: Rule, count: Count
     ) -> Event | None:
         """
         Find previous occurrence of this event and account for
@@ -3163,31 +3347,38 @@ class EventStatus:
         since the event has been created because the count was too
         low in the specified period of time.
         """
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
+        # The separation of the events by breed is optional, see the checks below
+        candidates = (
+            self._events.events_of_breed(breed_key(event))
+            if count["separate_host"]
+            and count["separate_application"]
+            and count["separate_match_groups"]
+            else self._events.events_of_rule(event["rule_id"])
+        )
+        for ev in candidates:
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+            if count["separate_host"] and ev["host"] != event["host"]:
+                continue  # treat events with separated hosts separately
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                count_duration = count.get("count_duration")
-                if count_duration is not None and ev["first"] + count_duration < event["time"]:
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            count_duration = count.get("count_duration")
+            if count_duration is not None and ev["first"] + count_duration < event["time"]:
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3197,11 +3388,12 @@ class EventStatus:
         # Did we just count the event that was just one too much?
         if found["phase"] == "counting" and found["count"] >= count["count"]:
             found["phase"] = "open"
+            self.event_changed(found)
             return found  # do event action, return found copy of event
         return None  # do not do event action
 
     def delete_events_by(self, predicate: Callable[[Event], bool], user: str) -> None:
-        for event in self._events[:]:
+        for event in self._events.events():
             if predicate(event):
                 event["phase"] = "closed"
                 if user:
@@ -3209,10 +3401,13 @@ class EventStatus:
                 self.remove_event(event, "DELETE", user)
 
     def get_events(self) -> list[Any]:
-        return self._events
+        return self._events.events()
 
     def get_rule_stats(self) -> Iterable[Any]:
-        return sorted(self._rule_stats.items(), key=lambda x: x[0])
+        return [
+            [rule_id, self._rule_stats.get(rule_id, 0), self._rule_evaluations.get(rule_id, 0)]
+            for rule_id in sorted(self._rule_stats.keys() | self._rule_evaluations.keys())
+        ]
 
 
 # .
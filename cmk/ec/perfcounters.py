@@ -27,6 +27,13 @@ class Perfcounters:
         "overflows",
         "events",
         "connects",
+        "queue_drops",  # messages not processed because the ingest queue is full
+    ]
+
+    # Current values, e.g. the number of waiting messages per stage of the ingest pipeline
+    _gauge_names = [
+        "match_queue_length",
+        "commit_queue_length",
     ]
 
     # Average processing times
@@ -42,6 +49,7 @@ class Perfcounters:
 
         # Initialize counters
         self._counters = {n: 0 for n in self._counter_names}
+        self._gauges = {n: 0 for n in self._gauge_names}
         self._old_counters: dict[str, int] = {}
         self._rates: dict[str, float] = {}
         self._average_rates: dict[str, float] = {}
@@ -61,6 +69,10 @@ class Perfcounters:
             else:
                 self._times[counter] = ptime
 
+    def set_gauge(self, gauge: str, value: int) -> None:
+        with self._lock:
+            self._gauges[gauge] = value
+
     def do_statistics(self) -> None:
         with self._lock:
             now = time.time()
@@ -98,6 +110,9 @@ class Perfcounters:
         for name in cls._weights:
             columns.append((f"status_average_{name}_time", 0.0))
 
+        for name in cls._gauge_names:
+            columns.append((f"status_{name}", 0))
+
         return columns
 
     def get_status(self) -> list[float]:
@@ -116,4 +131,7 @@ class Perfcounters:
             for name in self._weights:
                 row.append(self._times.get(name, 0.0))
 
+            for name in self._gauge_names:
+                row.append(self._gauges[name])
+
             return row
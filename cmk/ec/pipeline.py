@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Process incoming messages concurrently, but apply the results in their original order
+
+The receiving thread submits jobs to a bounded queue. Each job is run by one of
+the worker threads and returns a commit function, which is called by a single
+commit thread in the order the jobs have been submitted. This way a job waiting
+for I/O (e.g. a livestatus query) does not stall the receiving of further
+messages, while the changes of the event status still happen one after another.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable
+from logging import Logger
+
+from .perfcounters import Perfcounters
+
+Commit = Callable[[], None]
+Job = Callable[[], Commit]
+
+
+def _skip() -> None:
+    pass
+
+
+class OrderedPipeline:
+    """A bounded pool of worker threads, followed by a commit thread keeping the order
+
+    At most max_queued jobs wait for a worker and at most max_queued commits wait
+    for older jobs to be finished. Jobs may only be submitted by a single thread."""
+
+    def __init__(
+        self, logger: Logger, perfcounters: Perfcounters, num_workers: int, max_queued: int
+    ) -> None:
+        self._logger = logger
+        self._perfcounters = perfcounters
+        self._max_queued = max_queued
+        self._jobs: queue.Queue[tuple[int, Job] | None] = queue.Queue(max_queued)
+        self._next_job = 0
+        self._condition = threading.Condition()
+        self._commits: dict[int, Commit] = {}
+        self._next_commit = 0
+        self._workers_stopped = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"{threading.current_thread().name}-{num}")
+            for num in range(num_workers)
+        ]
+        self._committer = threading.Thread(
+            target=self._commit, name=f"{threading.current_thread().name}-commit"
+        )
+
+    def start(self) -> None:
+        for thread in self._workers:
+            thread.start()
+        self._committer.start()
+
+    def stop(self) -> None:
+        """Wait for all submitted jobs to be processed and committed"""
+        for _thread in self._workers:
+            self._jobs.put(None)
+        for thread in self._workers:
+            thread.join()
+        with self._condition:
+            self._workers_stopped = True
+            self._condition.notify_all()
+        self._committer.join()
+
+    def submit(self, job: Job, block: bool) -> bool:
+        """Queue the job, returns False if it has been dropped because the queue is full"""
+        try:
+            self._jobs.put((self._next_job, job), block=block)
+        except queue.Full:
+            self._perfcounters.count("queue_drops")
+            return False
+        self._next_job += 1
+        return True
+
+    def _work(self) -> None:
+        while (item := self._jobs.get()) is not None:
+            num, job = item
+            try:
+                commit = job()
+            except Exception:
+                self._logger.exception("Exception processing a message (skipping this one)")
+                commit = _skip
+            with self._condition:
+                # The next job to commit never waits here, so this can not dead lock
+                while num >= self._next_commit + self._max_queued:
+                    self._condition.wait()
+                self._commits[num] = commit
+                self._condition.notify_all()
+
+    def _commit(self) -> None:
+        while True:
+            with self._condition:
+                while (commit := self._commits.pop(self._next_commit, None)) is None:
+                    if self._workers_stopped:
+                        return  # All jobs are done, nothing left to commit
+                    self._condition.wait()
+                self._next_commit += 1
+                self._condition.notify_all()
+                num_commits = len(self._commits)
+            self._perfcounters.set_gauge("match_queue_length", self._jobs.qsize())
+            self._perfcounters.set_gauge("commit_queue_length", num_commits)
+            try:
+                commit()
+            except Exception:
+                self._logger.exception("Exception applying a message (skipping this one)")
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Skip the rules which can not match an event because of missing literal strings
+
+For each text pattern of a rule a literal string is determined which occurs in
+every text matched by the pattern. All literals of all rules are searched in a
+message (host name, application) at once with a single regex, which is
+structured like a trie of the literals. Only the rules whose literals have been
+found need to be evaluated by the RuleMatcher.
+
+The patterns match case insensitively, the literals are searched in the lower
+case version of the fields. The case insensitive matching of regexes is not
+restricted to ASCII (e.g. "k" matches the Kelvin sign), so nothing is skipped
+for events with non-ASCII fields.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Sequence
+from typing import Final, Literal
+
+from .config import Rule, TextPattern
+from .event import Event
+
+_Field = Literal["text", "host", "application"]
+
+# Longer literals are truncated, a prefix of a required literal is required, too
+_MAX_LITERAL_LENGTH: Final = 32
+
+_ESCAPE: Final = re.compile(
+    r"\\(?:x[0-9a-fA-F]{0,2}|u[0-9a-fA-F]{0,4}|U[0-9a-fA-F]{0,8}|N\{[^}]*\}?|[0-9]{1,3}|.)",
+    re.DOTALL,
+)
+_REPEAT: Final = re.compile(r"\{([0-9]*),?[0-9]*\}")
+
+
+def required_literal(pattern: TextPattern) -> str | None:
+    """A lower case string contained in the lower case version of each matching ASCII text
+
+    Returns None if no such string is known. Plain text patterns are matched as
+    they are (see rule_matcher.match). For regexes only characters outside of
+    groups, character classes and repetitions with a minimum of zero count, the
+    longest sequence of them is taken.
+
+    >>> required_literal("kernel: oops")
+    'kernel: oops'
+    >>> required_literal(re.compile(r"^Disk (\\d+) on [a-z]+ FAILED\\.", re.IGNORECASE))
+    ' failed.'
+    >>> required_literal(re.compile(r"ab?cde*f{0,3}g+", re.IGNORECASE))
+    'cd'
+    >>> required_literal(re.compile(r"foo|bar", re.IGNORECASE)) is None
+    True
+    """
+    if isinstance(pattern, str):
+        return pattern[:_MAX_LITERAL_LENGTH] or None
+    if pattern.flags & re.VERBOSE:
+        return None
+    try:
+        literals = _literal_runs(pattern.pattern)
+    except ValueError:
+        return None
+    longest = max(literals, key=len, default="")
+    return longest[:_MAX_LITERAL_LENGTH].lower() or None
+
+
+def _literal_runs(regex: str) -> list[str]:
+    """Raises ValueError if the regex is not handled here"""
+    runs: list[str] = []
+    run = ""
+    pos = 0
+    while pos < len(regex):
+        char = regex[pos]
+        atom: str | None = None  # A literal character or None for anything else
+        if char == "|" or char == ")":
+            raise ValueError(regex)  # Alternatives of the whole regex or an invalid one
+        if char == "\\":
+            if (escape := _ESCAPE.match(regex, pos)) is None:
+                raise ValueError(regex)
+            if len(escaped := escape.group()[1:]) == 1 and escaped.isascii():
+                atom = None if escaped.isalnum() else escaped
+            pos = escape.end()
+        elif char == "[":
+            pos = _skip_class(regex, pos)
+        elif char == "(":
+            pos = _skip_group(regex, pos)
+        elif char in ".^$":
+            pos += 1
+        elif char in "*+?" or _REPEAT.match(regex, pos):
+            raise ValueError(regex)  # Repetition of nothing, e.g. of a lookaround
+        else:
+            atom = char if char.isascii() else None
+            pos += 1
+
+        if pos < len(regex) and regex[pos] in "*+?":
+            min_count = 1 if regex[pos] == "+" else 0
+            pos += 1
+        elif repeat := _REPEAT.match(regex, pos):
+            min_count = int(repeat.group(1) or 0)
+            pos = repeat.end()
+        elif atom is not None:
+            run += atom
+            continue
+        else:
+            runs.append(run)
+            run = ""
+            continue
+
+        if pos < len(regex) and regex[pos] in "?+":
+            pos += 1  # Lazy or possessive repetition
+        # A repeated atom ends the run, it is part of it only if it is required
+        if atom is not None and min_count:
+            run += atom
+        runs.append(run)
+        run = ""
+
+    runs.append(run)
+    return runs
+
+
+def _skip_class(regex: str, pos: int) -> int:
+    pos += 1
+    if regex.startswith("^", pos):
+        pos += 1
+    if regex.startswith("]", pos):
+        pos += 1
+    while pos < len(regex):
+        if regex[pos] == "\\":
+            pos += 2
+        elif regex[pos] == "]":
+            return pos + 1
+        else:
+            pos += 1
+    raise ValueError(regex)
+
+
+def _skip_group(regex: str, pos: int) -> int:
+    depth = 0
+    while pos < len(regex):
+        if regex.startswith("(?#", pos):
+            pos = regex.index(")", pos) + 1
+            if depth == 0:
+                return pos
+        elif regex[pos] == "\\":
+            pos += 2
+        elif regex[pos] == "[":
+            pos = _skip_class(regex, pos)
+        else:
+            if regex[pos] == "(":
+                depth += 1
+            elif regex[pos] == ")":
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            pos += 1
+    raise ValueError(regex)
+
+
+_Trie = dict[str, "_Trie"]  # The key "" marks the end of a literal
+
+
+class LiteralMatcher:
+    """Finds all literals of a fixed set occurring in a text at once"""
+
+    def __init__(self, literals: Iterable[str]) -> None:
+        literals = set(literals)
+        trie: _Trie = {}
+        for literal in literals:
+            node = trie
+            for char in literal:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        # At each position of the text the longest literal starting there is found...
+        self._regex = re.compile(f"(?=({_trie_regex(trie)}))", re.DOTALL) if trie else None
+        # ... which implies all literals being a prefix of it
+        self._implied = {
+            literal: frozenset(
+                literal[:length]
+                for length in range(1, len(literal) + 1)
+                if literal[:length] in literals
+            )
+            for literal in literals
+        }
+
+    def find(self, text: str) -> set[str]:
+        if self._regex is None:
+            return set()
+        return set().union(*(self._implied[m.group(1)] for m in self._regex.finditer(text)))
+
+
+def _trie_regex(node: _Trie) -> str:
+    """
+    >>> _trie_regex({"a": {"b": {"": {}, "c": {"": {}}}, "d": {"": {}}}})
+    'a(?:b(?:c)?|d)'
+    """
+    alternatives = [
+        re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char
+    ]
+    if not alternatives:
+        return ""
+    regex = alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+    # The literal may end here, the longer match is tried first
+    return f"(?:{regex})?" if "" in node else regex
+
+
+# The alternative literals per field, each field needs to contain one of its literals
+_Requirements = Sequence[tuple[_Field, frozenset[str]]]
+
+
+def rule_requirements(rule: Rule) -> _Requirements:
+    """The literals needed for the rule to match
+
+    This follows RuleMatcher.event_rule_matches_non_inverted: The text has to
+    match "match" or "match_ok", the syslog application "match_application" or
+    "cancel_application" and the host "match_host". Missing patterns match
+    everything."""
+    if rule.get("invert_matching"):
+        return []
+    fields: list[tuple[_Field, list[TextPattern]]] = []
+    if "match" in rule:
+        fields.append(("text", [rule["match"]]))
+        if "match_ok" in rule:
+            fields[-1][1].append(rule["match_ok"])
+    if "match_application" in rule or "cancel_application" in rule:
+        fields.append(("application", []))
+        if "match_application" in rule:
+            fields[-1][1].append(rule["match_application"])
+        if "cancel_application" in rule:
+            fields[-1][1].append(rule["cancel_application"])
+    if "match_host" in rule:
+        fields.append(("host", [rule["match_host"]]))
+
+    requirements = []
+    for field, patterns in fields:
+        literals = [required_literal(pattern) for pattern in patterns]
+        if all(literals):
+            requirements.append((field, frozenset(literal for literal in literals if literal)))
+    return requirements
+
+
+class RulePrefilter:
+    """Selects the rules which may match an event
+
+    The rules with requirements are indexed by the literals of their first
+    requirement, only the further requirements of the rules found this way
+    are checked one by one."""
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self._by_literal: dict[_Field, dict[str, list[int]]] = {}
+        self._further_requirements: dict[int, _Requirements] = {}
+        literals: dict[_Field, set[str]] = {}
+        for rule in rules:
+            if not (requirements := rule_requirements(rule)):
+                continue
+            field, alternatives = requirements[0]
+            for literal in alternatives:
+                self._by_literal.setdefault(field, {}).setdefault(literal, []).append(id(rule))
+            self._further_requirements[id(rule)] = requirements[1:]
+            for field, alternatives in requirements:
+                literals.setdefault(field, set()).update(alternatives)
+        self._matchers = {
+            field: LiteralMatcher(field_literals) for field, field_literals in literals.items()
+        }
+        # Per list of rules: The list, the positions of the rules without requirements and
+        # the positions of the rules with requirements by their id
+        self._layouts: dict[int, tuple[Sequence[Rule], list[int], dict[int, int]]] = {}
+
+    def candidates(self, rules: Sequence[Rule], event: Event) -> Sequence[Rule]:
+        """The rules which may match the event, in their original order"""
+        if (passed := self._passed(event)) is None:
+            return rules
+        _rules, positions, positions_by_id = self._layout(rules)
+        positions = positions + [
+            position for rule_id in passed if (position := positions_by_id.get(rule_id)) is not None
+        ]
+        positions.sort()
+        return [rules[position] for position in positions]
+
+    def _passed(self, event: Event) -> set[int] | None:
+        """The ids of the rules with requirements which may match the event"""
+        if not self._matchers:
+            return None
+        found: dict[_Field, set[str]] = {}
+        for field, matcher in self._matchers.items():
+            if not (value := event[field]).isascii():
+                return None
+            found[field] = matcher.find(value.lower())
+
+        passed = set()
+        for field, by_literal in self._by_literal.items():
+            for literal in found[field]:
+                for rule_id in by_literal.get(literal, ()):
+                    if all(
+                        not alternatives.isdisjoint(found[further_field])
+                        for further_field, alternatives in self._further_requirements[rule_id]
+                    ):
+                        passed.add(rule_id)
+        return passed
+
+    def _layout(self, rules: Sequence[Rule]) -> tuple[Sequence[Rule], list[int], dict[int, int]]:
+        # The lists of rules live as long as the compiled rules, i.e. as this prefilter
+        if (layout := self._layouts.get(id(rules))) is not None and layout[0] is rules:
+            return layout
+        layout = self._layouts[id(rules)] = (
+            rules,
+            [pos for pos, rule in enumerate(rules) if id(rule) not in self._further_requirements],
+            {
+                id(rule): pos
+                for pos, rule in enumerate(rules)
+                if id(rule) in self._further_requirements
+            },
+        )
+        return layout
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Persist the event status incrementally
+
+The status file holds a snapshot of the complete event status. Each save appends
+an entry with the changes since the previous save to a journal next to it: the
+new and changed events, the ids of the removed events and the small status
+fields. Loading replays the journal on the snapshot.
+
+Once the journal is larger than the snapshot, it is merged into a new snapshot
+by a background thread. This works on the files only, the events in memory are
+not involved. Replaying an entry twice gives the same result, so a crash during
+the merge loses nothing.
+
+Snapshot and journal entries are stored with pickle, which is several times
+faster than repr() and ast.literal_eval() and keeps tuples as well. The protocol
+is fixed, so the files stay readable after an update of Python. Snapshots
+written by repr() (before the journal existed) are still read.
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+import pickle
+import threading
+import time
+from collections.abc import Iterator
+from logging import Logger
+from pathlib import Path
+from typing import Final, TypedDict
+
+from .event import Event
+
+# Merge small journals only together with other changes
+_MIN_MERGE_SIZE: Final = 1024 * 1024
+
+# Supported by all Python versions we ship, don't change without changing the header
+_PICKLE_PROTOCOL: Final = 4
+
+_SNAPSHOT_HEADER: Final = b"mkeventd status 2\n"
+
+
+class PackedEventStatus(TypedDict):
+    next_event_id: int
+    events: list[Event]
+    rule_stats: dict[str, int]
+    interval_starts: dict[str, int]
+
+
+class JournalEntry(TypedDict):
+    next_event_id: int
+    changed_events: list[Event]  # new or changed
+    removed_event_ids: list[int]
+    rule_stats: dict[str, int]
+    interval_starts: dict[str, int]
+
+
+class StatusJournal:
+    def __init__(self, path: Path, logger: Logger) -> None:
+        self._path = path
+        self._journal_path = path.with_name(path.name + ".journal")
+        # The part of the journal currently merged into the snapshot
+        self._merging_path = path.with_name(path.name + ".journal.merging")
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._merger: threading.Thread | None = None
+
+    def load(self) -> PackedEventStatus | None:
+        """The snapshot with the journal replayed on it, None if there is no snapshot"""
+        with self._lock:
+            if not self._path.exists():
+                return None
+            return self._replay(self._read_snapshot(), self._merging_path, self._journal_path)
+
+    def write_snapshot(self, status: PackedEventStatus) -> None:
+        """Replace the snapshot and the journal by the given status"""
+        with self._lock:
+            if self._merger is not None:
+                self._merger.join()
+                self._merger = None
+            self._write_snapshot(status)
+            self._journal_path.unlink(missing_ok=True)
+            self._merging_path.unlink(missing_ok=True)
+
+    def append(self, entry: JournalEntry) -> None:
+        """Append the changes since the last entry, the snapshot needs to exist"""
+        with self._lock:
+            with self._journal_path.open(mode="ab") as f:
+                pickle.dump(dict(entry), f, protocol=_PICKLE_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+                journal_size = f.tell()
+            if journal_size > max(_MIN_MERGE_SIZE, self._path.stat().st_size):
+                self._start_merge()
+
+    def _start_merge(self) -> None:
+        if self._merger is not None and self._merger.is_alive():
+            return
+        if not self._merging_path.exists():  # otherwise an interrupted merge is repeated first
+            self._journal_path.rename(self._merging_path)
+        self._merger = threading.Thread(target=self._merge, name="StatusJournal")
+        self._merger.start()
+
+    def _merge(self) -> None:
+        try:
+            before = time.time()
+            self._write_snapshot(self._replay(self._read_snapshot(), self._merging_path))
+            self._merging_path.unlink()
+            self._logger.info(
+                "Merged event state journal into %s in %.3fms.",
+                self._path,
+                (time.time() - before) * 1000,
+            )
+        except Exception:
+            self._logger.exception("Error merging the event state journal into %s", self._path)
+
+    def _read_snapshot(self) -> PackedEventStatus:
+        raw = self._path.read_bytes()
+        if not raw.startswith(_SNAPSHOT_HEADER):  # written by repr()
+            return ast.literal_eval(raw.decode("utf-8"))
+        return pickle.loads(raw[len(_SNAPSHOT_HEADER) :])
+
+    def _write_snapshot(self, status: PackedEventStatus) -> None:
+        path_new = self._path.parent / (self._path.name + ".new")
+        with path_new.open(mode="wb") as f:
+            f.write(_SNAPSHOT_HEADER)
+            pickle.dump(dict(status), f, protocol=_PICKLE_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        path_new.rename(self._path)
+
+    def _replay(self, status: PackedEventStatus, *paths: Path) -> PackedEventStatus:
+        # New events have higher ids than all others, so the events stay ordered by their id
+        events = {event["id"]: event for event in status["events"]}
+        for path in paths:
+            for entry in self._read_entries(path):
+                events.update((event["id"], event) for event in entry["changed_events"])
+                for event_id in entry["removed_event_ids"]:
+                    events.pop(event_id, None)
+                status = PackedEventStatus(
+                    next_event_id=entry["next_event_id"],
+                    events=[],
+                    rule_stats=entry["rule_stats"],
+                    interval_starts=entry["interval_starts"],
+                )
+        status["events"] = list(events.values())
+        return status
+
+    def _read_entries(self, path: Path) -> Iterator[JournalEntry]:
+        try:
+            f = path.open(mode="r+b")
+        except FileNotFoundError:
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            while (position := f.tell()) < size:
+                try:
+                    entry: JournalEntry = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    # The process has been killed while writing the last entry. Remove it,
+                    # further entries are appended to the last complete one.
+                    self._logger.warning("Removing incomplete last entry of %s", path)
+                    f.truncate(position)
+                    return
+                yield entry
@@ -5,6 +5,7 @@
 """SNMP caching"""
 
 import os
+import threading
 
 import cmk.utils.cleanup
 import cmk.utils.paths
@@ -13,39 +14,44 @@ from cmk.utils.hostaddress import HostAddress, HostName
 
 from cmk.snmplib import OID, SNMPDecodedString
 
+
 # TODO: Replace this by generic caching
-_g_single_oid_hostname: HostName | None = None
-_g_single_oid_ipaddress: HostAddress | None = None
-_g_single_oid_cache: dict[OID, SNMPDecodedString | None] | None = None
+class _SingleOIDCache(threading.local):
+    # One per thread: the sources of the nodes of a cluster may be fetched concurrently
+    def __init__(self) -> None:
+        self.hostname: HostName | None = None
+        self.ipaddress: HostAddress | None = None
+        self.cache: dict[OID, SNMPDecodedString | None] | None = None
+
+
+_g_single_oid = _SingleOIDCache()
 
 
 def initialize_single_oid_cache(
     host_name: HostName, ipaddress: HostAddress | None, from_disk: bool = False
 ) -> None:
-    global _g_single_oid_cache, _g_single_oid_ipaddress, _g_single_oid_hostname
-
     if (
-        _g_single_oid_hostname != host_name
-        or _g_single_oid_ipaddress != ipaddress
-        or _g_single_oid_cache is None
+        _g_single_oid.hostname != host_name
+        or _g_single_oid.ipaddress != ipaddress
+        or _g_single_oid.cache is None
     ):
-        _g_single_oid_hostname = host_name
-        _g_single_oid_ipaddress = ipaddress
+        _g_single_oid.hostname = host_name
+        _g_single_oid.ipaddress = ipaddress
         if from_disk:
-            _g_single_oid_cache = _load_single_oid_cache(host_name, ipaddress)
+            _g_single_oid.cache = _load_single_oid_cache(host_name, ipaddress)
         else:
-            _g_single_oid_cache = {}
+            _g_single_oid.cache = {}
 
 
 def write_single_oid_cache(host_name: HostName, ipaddress: HostAddress | None) -> None:
-    if not _g_single_oid_cache:
+    if not _g_single_oid.cache:
         return
 
     cache_dir = cmk.utils.paths.snmp_scan_cache_dir
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
     cache_path = f"{cache_dir}/{host_name}.{ipaddress}"
-    store.save_object_to_file(cache_path, _g_single_oid_cache, pretty=False)
+    store.save_object_to_file(cache_path, _g_single_oid.cache, pretty=False)
 
 
 def _load_single_oid_cache(
@@ -56,8 +62,8 @@ def _load_single_oid_cache(
 
 
 def single_oid_cache() -> dict[OID, SNMPDecodedString | None]:
-    assert _g_single_oid_cache is not None
-    return _g_single_oid_cache
+    assert _g_single_oid.cache is not None
+    return _g_single_oid.cache
 
 
 def cleanup_host_caches() -> None:
@@ -68,8 +74,7 @@ cmk.utils.cleanup.register_cleanup(cleanup_host_caches)
 
 
 def _clear_other_hosts_oid_cache(hostname: HostName | None) -> None:
-    global _g_single_oid_cache, _g_single_oid_ipaddress, _g_single_oid_hostname
-    if _g_single_oid_hostname != hostname:
-        _g_single_oid_cache = None
-        _g_single_oid_hostname = hostname
-        _g_single_oid_ipaddress = None
+    if _g_single_oid.hostname != hostname:
+        _g_single_oid.cache = None
+        _g_single_oid.hostname = hostname
+        _g_single_oid.ipaddress = None
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Encode and decode the SNMP messages used by the native backend
+
+Only the small subset of BER (X.690) needed for SNMP (RFC 1157, RFC 3416 and
+RFC 3412) is implemented. Varbind values are handled as complete TLVs, the
+values of received varbinds are rendered the same way as by the other backends.
+"""
+
+from collections.abc import Sequence
+from typing import NamedTuple
+
+from cmk.snmplib import OID, SNMPRawValue
+
+__all__ = [
+    "PDU",
+    "ScopedPDU",
+    "USMParameters",
+    "V3Message",
+    "decode_community_message",
+    "decode_pdu",
+    "decode_scoped_pdu",
+    "decode_usm_parameters",
+    "decode_v3_message",
+    "encode_community_message",
+    "encode_integer",
+    "encode_octet_string",
+    "encode_oid",
+    "encode_pdu",
+    "encode_scoped_pdu",
+    "encode_tlv",
+    "encode_usm_parameters",
+    "encode_v3_message",
+    "render_value",
+]
+
+INTEGER = 0x02
+OCTET_STRING = 0x04
+NULL = 0x05
+OBJECT_IDENTIFIER = 0x06
+SEQUENCE = 0x30
+IP_ADDRESS = 0x40
+COUNTER32 = 0x41
+GAUGE32 = 0x42
+TIME_TICKS = 0x43
+OPAQUE = 0x44
+COUNTER64 = 0x46
+# Exceptions instead of values in responses (SNMPv2c and SNMPv3 only)
+NO_SUCH_OBJECT = 0x80
+NO_SUCH_INSTANCE = 0x81
+END_OF_MIB_VIEW = 0x82
+
+GET_REQUEST = 0xA0
+GET_NEXT_REQUEST = 0xA1
+RESPONSE = 0xA2
+GET_BULK_REQUEST = 0xA5
+REPORT = 0xA8
+
+TOO_BIG = 1
+# The error status "noSuchName" marks the end of a walk in SNMPv1
+NO_SUCH_NAME = 2
+
+NULL_VALUE = b"\x05\x00"
+
+_UNSIGNED_TYPES = frozenset({COUNTER32, GAUGE32, TIME_TICKS, COUNTER64})
+
+
+class PDU(NamedTuple):
+    type: int
+    request_id: int
+    # non-repeaters and max-repetitions in case of a GetBulkRequest
+    error_status: int
+    error_index: int
+    varbinds: Sequence[tuple[OID, bytes]]  # OID and the complete TLV of the value
+
+
+class ScopedPDU(NamedTuple):
+    context_engine_id: bytes
+    context_name: bytes
+    pdu: bytes
+
+
+class USMParameters(NamedTuple):
+    engine_id: bytes
+    engine_boots: int
+    engine_time: int
+    user_name: bytes
+    auth_parameters: bytes
+    priv_parameters: bytes
+
+
+class V3Message(NamedTuple):
+    msg_id: int
+    max_size: int
+    flags: int
+    security_parameters: bytes
+    # The plain scoped PDU (TLV) or the content of the encrypted one
+    scoped_pdu: bytes
+    # Position of the authentication parameters within the complete message
+    auth_parameters_offset: int
+
+
+def encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes((length,))
+    raw = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes((0x80 | len(raw),)) + raw
+
+
+def encode_tlv(tag: int, content: bytes) -> bytes:
+    return bytes((tag,)) + encode_length(len(content)) + content
+
+
+def encode_integer(value: int, tag: int = INTEGER) -> bytes:
+    # Two's complement, also for the unsigned types (with a leading zero byte if needed)
+    length = (value + (value < 0)).bit_length() // 8 + 1
+    return encode_tlv(tag, value.to_bytes(length, "big", signed=True))
+
+
+def encode_octet_string(value: bytes) -> bytes:
+    return encode_tlv(OCTET_STRING, value)
+
+
+def encode_oid(oid: OID) -> bytes:
+    arcs = [int(arc) for arc in oid.strip(".").split(".")]
+    if len(arcs) < 2:
+        arcs.append(0)
+    content = bytearray()
+    for arc in [40 * arcs[0] + arcs[1], *arcs[2:]]:
+        chunk = [arc & 0x7F]
+        while arc := arc >> 7:
+            chunk.append(0x80 | (arc & 0x7F))
+        content.extend(reversed(chunk))
+    return encode_tlv(OBJECT_IDENTIFIER, bytes(content))
+
+
+def encode_pdu(
+    pdu_type: int,
+    request_id: int,
+    varbinds: Sequence[tuple[OID, bytes]],
+    error_status: int = 0,
+    error_index: int = 0,
+) -> bytes:
+    return encode_tlv(
+        pdu_type,
+        encode_integer(request_id)
+        + encode_integer(error_status)
+        + encode_integer(error_index)
+        + encode_tlv(
+            SEQUENCE,
+            b"".join(encode_tlv(SEQUENCE, encode_oid(oid) + value) for oid, value in varbinds),
+        ),
+    )
+
+
+def encode_community_message(version: int, community: bytes, pdu: bytes) -> bytes:
+    return encode_tlv(SEQUENCE, encode_integer(version) + encode_octet_string(community) + pdu)
+
+
+def encode_scoped_pdu(scoped_pdu: ScopedPDU) -> bytes:
+    return encode_tlv(
+        SEQUENCE,
+        encode_octet_string(scoped_pdu.context_engine_id)
+        + encode_octet_string(scoped_pdu.context_name)
+        + scoped_pdu.pdu,
+    )
+
+
+def encode_usm_parameters(parameters: USMParameters) -> bytes:
+    return encode_tlv(
+        SEQUENCE,
+        encode_octet_string(parameters.engine_id)
+        + encode_integer(parameters.engine_boots)
+        + encode_integer(parameters.engine_time)
+        + encode_octet_string(parameters.user_name)
+        + encode_octet_string(parameters.auth_parameters)
+        + encode_octet_string(parameters.priv_parameters),
+    )
+
+
+def encode_v3_message(
+    msg_id: int,
+    max_size: int,
+    flags: int,
+    parameters: USMParameters,
+    scoped_pdu: bytes,
+) -> tuple[bytes, int]:
+    """The message and the position of the authentication parameters in it
+
+    The scoped PDU is either the complete TLV or an encrypted one (octet string)."""
+    header = encode_integer(3) + encode_tlv(
+        SEQUENCE,
+        encode_integer(msg_id)
+        + encode_integer(max_size)
+        + encode_octet_string(bytes((flags,)))
+        + encode_integer(3),  # user-based security model
+    )
+    security_parameters = encode_usm_parameters(parameters)
+    content = header + encode_octet_string(security_parameters) + scoped_pdu
+    message = encode_tlv(SEQUENCE, content)
+    # The authentication and privacy parameters are the last fields of the security parameters
+    auth_parameters_offset = (
+        len(message)
+        - len(content)
+        + len(header)
+        + len(encode_length(len(security_parameters)))
+        + 1
+        + len(security_parameters)
+        - len(encode_octet_string(parameters.priv_parameters))
+        - len(parameters.auth_parameters)
+    )
+    return message, auth_parameters_offset
+
+
+def read_tlv(data: bytes, offset: int) -> tuple[int, int, int]:
+    """Tag, start and end of the content of the TLV at the given offset"""
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        num = length & 0x7F
+        length = int.from_bytes(data[offset : offset + num], "big")
+        offset += num
+    if (end := offset + length) > len(data):
+        raise ValueError("Truncated SNMP message")
+    return tag, offset, end
+
+
+def _read_expected(data: bytes, offset: int, expected: int) -> tuple[int, int]:
+    tag, start, end = read_tlv(data, offset)
+    if tag != expected:
+        raise ValueError(f"Unexpected tag 0x{tag:02x} in SNMP message (expected 0x{expected:02x})")
+    return start, end
+
+
+def _read_integer(data: bytes, offset: int) -> tuple[int, int]:
+    start, end = _read_expected(data, offset, INTEGER)
+    return int.from_bytes(data[start:end], "big", signed=True), end
+
+
+def _read_octet_string(data: bytes, offset: int) -> tuple[bytes, int]:
+    start, end = _read_expected(data, offset, OCTET_STRING)
+    return data[start:end], end
+
+
+def decode_oid(content: bytes) -> OID:
+    arcs = []
+    arc = 0
+    for byte in content:
+        arc = (arc << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(arc)
+            arc = 0
+    if not arcs:
+        return ""
+    first = min(arcs[0] // 40, 2)
+    return "." + ".".join(map(str, [first, arcs[0] - 40 * first, *arcs[1:]]))
+
+
+def decode_pdu(data: bytes, offset: int = 0) -> PDU:
+    pdu_type, start, end = read_tlv(data, offset)
+    request_id, offset = _read_integer(data, start)
+    error_status, offset = _read_integer(data, offset)
+    error_index, offset = _read_integer(data, offset)
+    offset, varbinds_end = _read_expected(data, offset, SEQUENCE)
+    varbinds = []
+    while offset < varbinds_end:
+        offset, varbind_end = _read_expected(data, offset, SEQUENCE)
+        oid_start, oid_end = _read_expected(data, offset, OBJECT_IDENTIFIER)
+        varbinds.append((decode_oid(data[oid_start:oid_end]), data[oid_end:varbind_end]))
+        offset = varbind_end
+    return PDU(pdu_type, request_id, error_status, error_index, varbinds)
+
+
+def decode_community_message(data: bytes) -> tuple[int, bytes, PDU]:
+    """Version, community and PDU of an SNMPv1 or SNMPv2c message"""
+    offset, _end = _read_expected(data, 0, SEQUENCE)
+    version, offset = _read_integer(data, offset)
+    community, offset = _read_octet_string(data, offset)
+    return version, community, decode_pdu(data, offset)
+
+
+def decode_scoped_pdu(data: bytes) -> ScopedPDU:
+    offset, end = _read_expected(data, 0, SEQUENCE)
+    context_engine_id, offset = _read_octet_string(data, offset)
+    context_name, offset = _read_octet_string(data, offset)
+    return ScopedPDU(context_engine_id, context_name, data[offset:end])
+
+
+def decode_usm_parameters(data: bytes) -> USMParameters:
+    offset, _end = _read_expected(data, 0, SEQUENCE)
+    engine_id, offset = _read_octet_string(data, offset)
+    engine_boots, offset = _read_integer(data, offset)
+    engine_time, offset = _read_integer(data, offset)
+    user_name, offset = _read_octet_string(data, offset)
+    auth_parameters, offset = _read_octet_string(data, offset)
+    priv_parameters, offset = _read_octet_string(data, offset)
+    return USMParameters(
+        engine_id, engine_boots, engine_time, user_name, auth_parameters, priv_parameters
+    )
+
+
+def decode_v3_message(data: bytes) -> V3Message:
+    offset, _end = _read_expected(data, 0, SEQUENCE)
+    version, offset = _read_integer(data, offset)
+    if version != 3:
+        raise ValueError(f"Unexpected SNMP version {version}")
+    offset, _global_end = _read_expected(data, offset, SEQUENCE)
+    msg_id, offset = _read_integer(data, offset)
+    max_size, offset = _read_integer(data, offset)
+    flags, offset = _read_octet_string(data, offset)
+    _security_model, offset = _read_integer(data, offset)
+    parameters_start, offset = _read_expected(data, offset, OCTET_STRING)
+    # Find the authentication parameters: skip engine ID, boots, time and user name
+    position, _parameters_end = _read_expected(data, parameters_start, SEQUENCE)
+    for _field in range(4):
+        position = read_tlv(data, position)[2]
+    auth_parameters_offset = _read_expected(data, position, OCTET_STRING)[0]
+    tag, start, end = read_tlv(data, offset)
+    return V3Message(
+        msg_id=msg_id,
+        max_size=max_size,
+        flags=flags[0] if flags else 0,
+        security_parameters=data[parameters_start:offset],
+        scoped_pdu=data[start:end] if tag == OCTET_STRING else data[offset:end],
+        auth_parameters_offset=auth_parameters_offset,
+    )
+
+
+def render_value(value: bytes) -> SNMPRawValue | None:
+    """The value of a varbind as returned by the backends, None for exceptions"""
+    tag, start, end = read_tlv(value, 0)
+    content = value[start:end]
+    if tag in (OCTET_STRING, OPAQUE):
+        return content
+    if tag == INTEGER:
+        return str(int.from_bytes(content, "big", signed=True)).encode()
+    if tag in _UNSIGNED_TYPES:
+        return str(int.from_bytes(content, "big")).encode()
+    if tag == OBJECT_IDENTIFIER:
+        return decode_oid(content).encode()
+    if tag == IP_ADDRESS:
+        return ".".join(map(str, content)).encode()
+    if tag == NULL:
+        return b""
+    return None
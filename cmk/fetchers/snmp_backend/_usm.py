@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""The user-based security model of SNMPv3 for the native backend
+
+Implements key localization and authentication (RFC 3414, RFC 7860) as well as
+privacy with DES (RFC 3414) and AES (RFC 3826, extended to 192 and 256 bit keys
+the same way Net-SNMP does).
+"""
+
+import hashlib
+import hmac
+import os
+import time
+from typing import Final
+
+from cryptography.hazmat.primitives.ciphers import algorithms, Cipher, modes
+
+from cmk.utils.exceptions import MKGeneralException, MKSNMPError
+
+from cmk.snmplib import SNMPCredentials
+
+from ._ber import (
+    decode_usm_parameters,
+    decode_v3_message,
+    encode_octet_string,
+    encode_v3_message,
+    USMParameters,
+)
+
+__all__ = ["USM"]
+
+_MAX_MESSAGE_SIZE: Final = 65507
+
+_FLAG_AUTH: Final = 0x01
+_FLAG_PRIV: Final = 0x02
+_FLAG_REPORTABLE: Final = 0x04
+
+# Hash function and length of the authentication parameters
+_AUTH_PROTOCOLS: Final = {
+    "md5": ("md5", 12),
+    "sha": ("sha1", 12),
+    "SHA-224": ("sha224", 16),
+    "SHA-256": ("sha256", 24),
+    "SHA-384": ("sha384", 32),
+    "SHA-512": ("sha512", 48),
+}
+
+# Length of the privacy keys
+_PRIV_PROTOCOLS: Final = {"DES": 16, "AES": 16, "AES-192": 24, "AES-256": 32}
+
+
+def _localized_key(hash_name: str, password: bytes, engine_id: bytes) -> bytes:
+    if not password:
+        raise MKGeneralException("Invalid empty SNMPv3 password")
+    repeated = password * (1048576 // len(password) + 1)
+    key = hashlib.new(hash_name, repeated[:1048576]).digest()
+    return hashlib.new(hash_name, key + engine_id + key).digest()
+
+
+def _extended_key(hash_name: str, key: bytes, length: int) -> bytes:
+    while len(key) < length:
+        key += hashlib.new(hash_name, key).digest()
+    return key[:length]
+
+
+class USM:
+    """The security of the messages exchanged with one SNMP engine
+
+    The credentials are a 2-tuple (security level, user name), a 4-tuple with
+    the authentication protocol and password added in between, or a 6-tuple
+    with the privacy protocol and password added at the end."""
+
+    def __init__(self, credentials: SNMPCredentials) -> None:
+        if not isinstance(credentials, tuple) or len(credentials) not in (2, 4, 6):
+            raise MKGeneralException(f"Invalid SNMPv3 credentials: {credentials!r}")
+        self._security_level = credentials[0]
+        self._user_name = (credentials[-1] if len(credentials) == 2 else credentials[2]).encode()
+        self._auth_protocol = credentials[1] if len(credentials) > 2 else None
+        self._auth_password = credentials[3].encode() if len(credentials) > 2 else b""
+        self._priv_protocol = credentials[4] if len(credentials) > 4 else None
+        self._priv_password = credentials[5].encode() if len(credentials) > 4 else b""
+        if self._auth_protocol is not None and self._auth_protocol not in _AUTH_PROTOCOLS:
+            raise MKGeneralException(f"Invalid SNMP auth protocol: {self._auth_protocol}")
+        if self._priv_protocol is not None and self._priv_protocol not in _PRIV_PROTOCOLS:
+            raise MKGeneralException(f"Invalid SNMP priv protocol: {self._priv_protocol}")
+
+        self._flags = {"authNoPriv": _FLAG_AUTH, "authPriv": _FLAG_AUTH | _FLAG_PRIV}.get(
+            self._security_level, 0
+        )
+        self.engine_id = b""
+        self._engine_boots = 0
+        self._engine_time = 0
+        self._synchronized_at = 0.0
+        self._auth_key = b""
+        self._priv_key = b""
+        self._salt = int.from_bytes(os.urandom(8), "big")
+
+    @property
+    def is_discovered(self) -> bool:
+        return bool(self.engine_id)
+
+    def discovery_message(self, msg_id: int, scoped_pdu: bytes) -> bytes:
+        """An unauthenticated request to learn the ID and time of the engine"""
+        return encode_v3_message(
+            msg_id,
+            _MAX_MESSAGE_SIZE,
+            _FLAG_REPORTABLE,
+            USMParameters(b"", 0, 0, b"", b"", b""),
+            scoped_pdu,
+        )[0]
+
+    def synchronize(self, parameters: USMParameters) -> None:
+        """Take the engine ID and time from the security parameters of a report"""
+        if parameters.engine_id != self.engine_id:
+            self.engine_id = parameters.engine_id
+            if self._auth_protocol is not None:
+                hash_name = _AUTH_PROTOCOLS[self._auth_protocol][0]
+                self._auth_key = _localized_key(hash_name, self._auth_password, self.engine_id)
+                if self._priv_protocol is not None:
+                    self._priv_key = _extended_key(
+                        hash_name,
+                        _localized_key(hash_name, self._priv_password, self.engine_id),
+                        _PRIV_PROTOCOLS[self._priv_protocol],
+                    )
+        self._engine_boots = parameters.engine_boots
+        self._engine_time = parameters.engine_time
+        self._synchronized_at = time.monotonic()
+
+    def encode(self, msg_id: int, scoped_pdu: bytes) -> bytes:
+        engine_time = self._engine_time + int(time.monotonic() - self._synchronized_at)
+        priv_parameters = b""
+        if self._flags & _FLAG_PRIV:
+            scoped_pdu, priv_parameters = self._encrypt(scoped_pdu, engine_time)
+            scoped_pdu = encode_octet_string(scoped_pdu)
+        auth_length = _AUTH_PROTOCOLS[self._auth_protocol][1] if self._auth_protocol else 0
+        message, auth_offset = encode_v3_message(
+            msg_id,
+            _MAX_MESSAGE_SIZE,
+            self._flags | _FLAG_REPORTABLE,
+            USMParameters(
+                self.engine_id,
+                self._engine_boots,
+                engine_time,
+                self._user_name,
+                bytes(auth_length if self._flags & _FLAG_AUTH else 0),
+                priv_parameters,
+            ),
+            scoped_pdu,
+        )
+        if self._flags & _FLAG_AUTH:
+            message = (
+                message[:auth_offset] + self._digest(message) + message[auth_offset + auth_length :]
+            )
+        return message
+
+    def decode(self, data: bytes) -> tuple[int, USMParameters, bytes | None]:
+        """Message ID, security parameters and scoped PDU of a received message
+
+        Messages without authentication (e.g. reports during the discovery) are
+        accepted. The scoped PDU is None if it is encrypted without privacy configured."""
+        message = decode_v3_message(data)
+        parameters = decode_usm_parameters(message.security_parameters)
+        if not self._flags & _FLAG_AUTH or not message.flags & _FLAG_AUTH:
+            if message.flags & _FLAG_PRIV:
+                return message.msg_id, parameters, None
+            return message.msg_id, parameters, message.scoped_pdu
+
+        auth_length = len(parameters.auth_parameters)
+        offset = message.auth_parameters_offset
+        if not hmac.compare_digest(
+            self._digest(data[:offset] + bytes(auth_length) + data[offset + auth_length :]),
+            parameters.auth_parameters,
+        ):
+            raise MKSNMPError("Wrong digest of an SNMPv3 response")
+        if not message.flags & _FLAG_PRIV:
+            return message.msg_id, parameters, message.scoped_pdu
+        return message.msg_id, parameters, self._decrypt(message.scoped_pdu, parameters)
+
+    def _digest(self, message: bytes) -> bytes:
+        assert self._auth_protocol is not None
+        hash_name, length = _AUTH_PROTOCOLS[self._auth_protocol]
+        return hmac.new(self._auth_key, message, hash_name).digest()[:length]
+
+    def _encrypt(self, scoped_pdu: bytes, engine_time: int) -> tuple[bytes, bytes]:
+        self._salt = (self._salt + 1) & 0xFFFFFFFFFFFFFFFF
+        if self._priv_protocol == "DES":
+            salt = self._engine_boots.to_bytes(4, "big") + (self._salt & 0xFFFFFFFF).to_bytes(
+                4, "big"
+            )
+            encryptor = self._des(salt).encryptor()
+            padding = bytes(-len(scoped_pdu) % 8)
+            return encryptor.update(scoped_pdu + padding) + encryptor.finalize(), salt
+        salt = self._salt.to_bytes(8, "big")
+        encryptor = self._aes(self._engine_boots, engine_time, salt).encryptor()
+        return encryptor.update(scoped_pdu) + encryptor.finalize(), salt
+
+    def _decrypt(self, encrypted: bytes, parameters: USMParameters) -> bytes:
+        if self._priv_protocol == "DES":
+            decryptor = self._des(parameters.priv_parameters).decryptor()
+        else:
+            decryptor = self._aes(
+                parameters.engine_boots, parameters.engine_time, parameters.priv_parameters
+            ).decryptor()
+        # Padding (DES) after the scoped PDU is ignored when decoding it
+        return decryptor.update(encrypted) + decryptor.finalize()
+
+    def _des(self, salt: bytes) -> Cipher:
+        iv = bytes(a ^ b for a, b in zip(self._priv_key[8:16], salt))
+        return Cipher(algorithms.TripleDES(self._priv_key[:8]), modes.CBC(iv))
+
+    def _aes(self, engine_boots: int, engine_time: int, salt: bytes) -> Cipher:
+        iv = engine_boots.to_bytes(4, "big") + engine_time.to_bytes(4, "big") + salt
+        return Cipher(algorithms.AES(self._priv_key), modes.CFB(iv))
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""A precompiled, memory-mapped index of a stored walk
+
+The text walk is converted once into a binary file: a header, the offsets of the
+entries and the entries sorted by OID. Each entry holds the key of the OID, the
+OID itself and the value as the backend returns it. The key encodes each number
+of the OID with a byte holding its length followed by the number in big endian,
+so comparing keys byte by byte orders them like the OIDs, and the keys of all
+OIDs below a prefix start with the key of that prefix.
+
+The file is mapped into memory, so all processes replaying the same walk share
+its pages, and a prefix is looked up with a binary search on the keys without
+parsing any line. The header records the modification time and the size of the
+text walk; the index is rebuilt when they change.
+"""
+
+import functools
+import mmap
+import struct
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Final
+
+import cmk.utils.agent_simulator as agent_simulator
+import cmk.utils.store as store
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.exceptions import MKGeneralException
+from cmk.utils.log import console
+
+from cmk.snmplib import OID, SNMPRowInfo
+
+from ._utils import strip_snmp_value
+
+__all__ = ["WalkIndex", "compile_walk", "oid_key", "read_text_walk"]
+
+_MAGIC: Final = b"CMKWALK1"
+# Magic, modification time (ns) and size of the text walk, number of entries
+_HEADER: Final = struct.Struct("<8sQQQ")
+_OFFSET: Final = struct.Struct("<Q")
+# Start of the key, the OID and the value of an entry
+_ENTRY: Final = struct.Struct("<QQQ")
+
+
+def oid_key(oid: OID) -> bytes:
+    """The key of an OID, with or without the leading dot"""
+    parent, _dot, number = oid.strip(".").rpartition(".")
+    try:
+        # The rows of a table share all numbers but the last
+        return (_parent_key(parent) if parent else b"") + _number_key(number)
+    except ValueError:
+        raise MKGeneralException("Invalid OID %s" % oid)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parent_key(parent: str) -> bytes:
+    return b"".join(map(_number_key, parent.split(".")))
+
+
+def _number_key(text: str) -> bytes:
+    number = int(text)
+    # The SMI restricts the numbers to 32 bit, anything beyond 64 bit breaks the keys
+    if number < 0 or number.bit_length() > 64:
+        raise ValueError(text)
+    length = max(1, (number.bit_length() + 7) // 8)
+    return bytes((length,)) + number.to_bytes(length, "big")
+
+
+def read_text_walk(path: Path) -> Sequence[str]:
+    """The lines of a text walk, each starting with an OID"""
+    console.vverbose(f"  Opening {path}\n")
+    lines = []
+    with path.open() as f:
+        # Sometimes there are newlines in the data of snmpwalks.
+        # Append the data to the last OID rather than throwing it away/skipping it.
+        for line in f.readlines():
+            if line.startswith("."):
+                lines.append(line)
+            elif lines:
+                lines[-1] += line
+    return lines
+
+
+def compile_walk(lines: Iterable[str], mtime_ns: int = 0, size: int = 0) -> bytes:
+    """Convert the lines of a text walk into the binary format
+
+    The lines are the ones returned by read_text_walk."""
+    entries = []
+    for line in lines:
+        parts = line.split(None, 1)
+        oid = parts[0].removeprefix(".")
+        if len(parts) > 1:
+            value = agent_simulator.process(AgentRawData(parts[1].encode())).decode()
+        else:
+            value = ""
+        entries.append((oid_key(oid), ("." + oid).encode(), strip_snmp_value(value)))
+    # The walks are usually sorted already, keep the order of duplicate OIDs
+    entries.sort(key=lambda entry: entry[0])
+
+    offsets = []
+    data: list[bytes] = []
+    position = _HEADER.size + _ENTRY.size * len(entries) + _OFFSET.size
+    for key, oid_bytes, value_bytes in entries:
+        offsets.append(
+            _ENTRY.pack(position, position + len(key), position + len(key) + len(oid_bytes))
+        )
+        data += (key, oid_bytes, value_bytes)
+        position += len(key) + len(oid_bytes) + len(value_bytes)
+    return b"".join(
+        (
+            _HEADER.pack(_MAGIC, mtime_ns, size, len(entries)),
+            *offsets,
+            _OFFSET.pack(position),
+            *data,
+        )
+    )
+
+
+class WalkIndex:
+    """Lookups in a compiled walk, either mapped from a file or in memory"""
+
+    def __init__(self, buffer: bytes | mmap.mmap) -> None:
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Truncated walk index")
+        magic, self.mtime_ns, self.size, self._length = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC or len(buffer) < (
+            _HEADER.size + _ENTRY.size * self._length + _OFFSET.size
+        ):
+            raise ValueError("Invalid walk index")
+        self._buffer = buffer
+
+    def __len__(self) -> int:
+        return self._length
+
+    @classmethod
+    def load(cls, walk_path: Path, index_path: Path) -> "WalkIndex":
+        """The index of a text walk, compiled first if it is missing or outdated
+
+        The index is replaced by renaming, so mappings of an outdated index stay
+        valid. If the index can not be written, the compiled walk is kept in memory."""
+        stat = walk_path.stat()
+        try:
+            index = cls._map(index_path)
+            if index.mtime_ns == stat.st_mtime_ns and index.size == stat.st_size:
+                return index
+        except (OSError, ValueError):
+            pass
+
+        compiled = compile_walk(read_text_walk(walk_path), stat.st_mtime_ns, stat.st_size)
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            store.save_bytes_to_file(index_path, compiled)
+            return cls._map(index_path)
+        except (OSError, ValueError, MKGeneralException):
+            return cls(compiled)
+
+    @classmethod
+    def _map(cls, path: Path) -> "WalkIndex":
+        with path.open("rb") as f:
+            # The mapping stays valid after closing the file
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _entry(self, position: int) -> tuple[int, int, int, int]:
+        offset = _HEADER.size + _ENTRY.size * position
+        key, oid, value = _ENTRY.unpack_from(self._buffer, offset)
+        (end,) = _OFFSET.unpack_from(self._buffer, offset + _ENTRY.size)
+        return key, oid, value, end
+
+    def _key(self, position: int) -> bytes:
+        key, oid, _value, _end = self._entry(position)
+        return self._buffer[key:oid]
+
+    def _bisect_left(self, key: bytes) -> int:
+        low, high = 0, self._length
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, oid: OID) -> SNMPRowInfo:
+        """All entries of the OID and below it, in the order of the OIDs"""
+        prefix = oid_key(oid)
+        # The length bytes in the keys are at most 8, so nothing below the prefix is larger
+        begin = self._bisect_left(prefix)
+        end = self._bisect_left(prefix + b"\xff")
+        rows = []
+        for position in range(begin, end):
+            _key, oid_start, value, next_key = self._entry(position)
+            rows.append(
+                (
+                    self._buffer[oid_start:value].decode(),
+                    self._buffer[value:next_key],
+                )
+            )
+        return rows
+
+    def first(self, oid: OID) -> SNMPRowInfo:
+        """The first entry below the OID (excluding the OID itself)"""
+        prefix = oid_key(oid)
+        position = self._bisect_left(prefix)
+        while position < self._length and self._key(position) == prefix:
+            position += 1
+        if position < self._length and self._key(position).startswith(prefix):
+            _key, oid_start, value, next_key = self._entry(position)
+            return [(self._buffer[oid_start:value].decode(), self._buffer[value:next_key])]
+        return []
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""SNMP backend speaking SNMP itself, without Net-SNMP
+
+All requests of one call are sent over a single UDP socket driven by asyncio.
+The OIDs walked at once (e.g. the columns of a table) are merged: each request
+carries a varbind per OID, so a GetBulkRequest returns several rows of a table
+with one round-trip. Several of these merged walks are in flight at the same
+time, at most "concurrent_walks" of the timing settings per host.
+"""
+
+import asyncio
+import itertools
+import random
+import socket
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Final, TypeVar
+
+import cmk.utils.tty as tty
+from cmk.utils.exceptions import MKSNMPError
+from cmk.utils.log import console
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import OID, SNMPBackend, SNMPContextName, SNMPRawValue, SNMPRowInfo
+
+from ._ber import (
+    decode_community_message,
+    decode_pdu,
+    decode_scoped_pdu,
+    encode_community_message,
+    encode_pdu,
+    encode_scoped_pdu,
+    END_OF_MIB_VIEW,
+    GET_BULK_REQUEST,
+    GET_NEXT_REQUEST,
+    GET_REQUEST,
+    NO_SUCH_NAME,
+    NULL_VALUE,
+    PDU,
+    render_value,
+    REPORT,
+    ScopedPDU,
+    TOO_BIG,
+)
+from ._usm import USM
+from ._walk_index import oid_key
+
+__all__ = ["NativeSNMPBackend"]
+
+_T = TypeVar("_T")
+
+# Same defaults as the Net-SNMP tools
+_DEFAULT_TIMEOUT: Final = 1.0
+_DEFAULT_RETRIES: Final = 5
+
+_DEFAULT_CONCURRENT_WALKS: Final = 4
+
+# OIDs walked together with one request per step (e.g. the columns of a table)
+_MAX_MERGED_WALKS: Final = 10
+
+_USM_STATS_NOT_IN_TIME_WINDOWS: Final = ".1.3.6.1.6.3.15.1.1.2.0"
+
+
+class NativeSNMPBackend(SNMPBackend):
+    def get(self, oid: OID, context_name: SNMPContextName | None = None) -> SNMPRawValue | None:
+        try:
+            return self._run(lambda session: session.get(oid, context_name))
+        except MKSNMPError as e:
+            console.verbose(f"{tty.red}{tty.bold}ERROR: {tty.normal}SNMP error: {e}\n")
+            return None
+
+    def walk(
+        self,
+        oid: OID,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+        context_name: SNMPContextName | None = None,
+    ) -> SNMPRowInfo:
+        return self._run(lambda session: session.walk(oid, context_name))
+
+    def walk_many(
+        self,
+        oids: Sequence[OID],
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+        context_name: SNMPContextName | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        return self._run(lambda session: session.walk_many(oids, context_name))
+
+    def _run(self, action: Callable[["_Session"], Awaitable[_T]]) -> _T:
+        async def run() -> _T:
+            session = _Session(self)
+            await session.open()
+            try:
+                return await action(session)
+            finally:
+                session.close()
+
+        return asyncio.run(run())
+
+
+class _Walk:
+    """The state of walking one OID"""
+
+    def __init__(self, oid: OID) -> None:
+        self.oid = oid
+        self.next_oid = oid
+        self.rowinfo: SNMPRowInfo = []
+        self._prefix = "." + oid.strip(".") + "."
+
+    def add(self, varbinds: Sequence[tuple[OID, bytes]]) -> bool:
+        """Add the varbinds of a response, returns False if the walk is complete"""
+        if not varbinds:
+            return True  # truncated response, continue with the next request
+        last_key = oid_key(self.next_oid)
+        for found_oid, value in varbinds:
+            if not found_oid.startswith(self._prefix) or value[0] == END_OF_MIB_VIEW:
+                return False
+            if (found_key := oid_key(found_oid)) <= last_key:
+                # Like snmpwalk: a broken agent would make us walk in circles
+                console.verbose(
+                    f"{tty.red}{tty.bold}ERROR: {tty.normal}OID not increasing: "
+                    f"{self.next_oid} >= {found_oid}\n"
+                )
+                return False
+            if (raw := render_value(value)) is not None:
+                self.rowinfo.append((found_oid, raw))
+            self.next_oid, last_key = found_oid, found_key
+        return True
+
+
+class _Protocol(asyncio.DatagramProtocol):
+    def __init__(self, on_message: Callable[[bytes], None]) -> None:
+        self._on_message = on_message
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self._on_message(data)
+
+    def error_received(self, exc: Exception) -> None:
+        # e.g. ICMP port unreachable, the request runs into its timeout
+        console.vverbose(f"SNMP socket error: {exc}\n")
+
+
+class _Session:
+    """The requests of one call of the backend"""
+
+    def __init__(self, backend: NativeSNMPBackend) -> None:
+        config = backend.config
+        self._config = config
+        if not config.ipaddress:
+            raise MKSNMPError(f"Cannot use SNMP on {config.hostname}: no IP address")
+        self._address = config.ipaddress
+        self._timeout = float(config.timing.get("timeout", _DEFAULT_TIMEOUT))
+        self._retries = int(config.timing.get("retries", _DEFAULT_RETRIES))
+        self._concurrent_walks = asyncio.Semaphore(
+            int(config.timing.get("concurrent_walks", _DEFAULT_CONCURRENT_WALKS))
+        )
+        if config.is_snmpv3_host:
+            self._version = 3
+            self._usm: USM | None = USM(config.credentials)
+        else:
+            if not isinstance(config.credentials, str):
+                raise TypeError()
+            self._community = config.credentials.encode()
+            self._version = (
+                1
+                if not config.is_bulkwalk_host and not config.is_snmpv2or3_without_bulkwalk_host
+                else 2
+            )
+            self._usm = None
+        self._request_ids = itertools.count(random.randrange(1, 0x3FFFFFFF))
+        self._pending: dict[int, asyncio.Future[bytes | None]] = {}
+        self._transport: asyncio.DatagramTransport | None = None
+
+    async def open(self) -> None:
+        self._transport, _protocol = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _Protocol(self._on_message),
+            remote_addr=(self._address, self._config.port),
+            family=socket.AF_INET6 if self._config.is_ipv6_primary else socket.AF_INET,
+        )
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    async def get(self, oid: OID, context_name: SNMPContextName | None) -> SNMPRawValue | None:
+        if oid.endswith(".*"):
+            oid_prefix = oid[:-2]
+            pdu = await self._request(GET_NEXT_REQUEST, [oid_prefix], context_name)
+        else:
+            oid_prefix = oid
+            pdu = await self._request(GET_REQUEST, [oid], context_name)
+        if pdu.error_status or not pdu.varbinds:
+            return None
+        found_oid, value = pdu.varbinds[0]
+        if oid.endswith(".*") and not found_oid.startswith(oid_prefix + "."):
+            return None
+        return render_value(value)
+
+    async def walk_many(
+        self, oids: Sequence[OID], context_name: SNMPContextName | None
+    ) -> Sequence[SNMPRowInfo]:
+        walks = [_Walk(oid) for oid in oids]
+        await asyncio.gather(
+            *(
+                self._walk_merged(walks[start : start + _MAX_MERGED_WALKS], context_name)
+                for start in range(0, len(walks), _MAX_MERGED_WALKS)
+            )
+        )
+        return [walk.rowinfo for walk in walks]
+
+    async def walk(self, oid: OID, context_name: SNMPContextName | None) -> SNMPRowInfo:
+        walk = _Walk(oid)
+        await self._walk_merged([walk], context_name)
+        return walk.rowinfo
+
+    async def _walk_merged(
+        self, walks: Sequence["_Walk"], context_name: SNMPContextName | None
+    ) -> None:
+        async with self._concurrent_walks:
+            console.vverbose(
+                f"Walking {', '.join(walk.oid for walk in walks)} on {self._address} (native)\n"
+            )
+            await self._walk_columns(walks, context_name)
+
+        for walk in walks:
+            if not walk.rowinfo:
+                # Like snmpwalk: try the OID itself, it may be a scalar
+                if (value := await self.get(walk.oid, context_name)) is not None:
+                    walk.rowinfo.append(("." + walk.oid.strip("."), value))
+
+    async def _walk_columns(
+        self, walks: Sequence["_Walk"], context_name: SNMPContextName | None
+    ) -> None:
+        """Walk the OIDs in one stream of requests, each with a varbind per OID
+
+        For a GetBulkRequest the response contains the varbinds of all OIDs one
+        repetition after another, e.g. a row of a table for each repetition."""
+        bulk = self._version > 1 and self._config.is_bulkwalk_host
+        max_repetitions = self._config.bulk_walk_size_of
+        active = list(walks)
+        while active:
+            pdu = await self._request(
+                GET_BULK_REQUEST if bulk else GET_NEXT_REQUEST,
+                [walk.next_oid for walk in active],
+                context_name,
+                max_repetitions if bulk else 0,
+            )
+            if pdu.error_status == TOO_BIG and bulk and max_repetitions > 1:
+                max_repetitions //= 2
+                continue
+            if pdu.error_status == TOO_BIG and len(active) > 1:
+                half = len(active) // 2
+                await self._walk_columns(active[:half], context_name)
+                await self._walk_columns(active[half:], context_name)
+                return
+            if pdu.error_status == NO_SUCH_NAME and self._version == 1:
+                # End of the MIB for the OID at the error index, continue with the others
+                if not 0 < pdu.error_index <= len(active):
+                    return
+                del active[pdu.error_index - 1]
+                continue
+            if pdu.error_status:
+                raise MKSNMPError(
+                    f"SNMP Error on {self._address}: error status {pdu.error_status} "
+                    f"walking {', '.join(walk.oid for walk in active)}"
+                )
+            if not pdu.varbinds:
+                return
+            active = [
+                walk
+                for position, walk in enumerate(active)
+                if walk.add(pdu.varbinds[position :: len(active)])
+            ]
+
+    async def _request(
+        self,
+        pdu_type: int,
+        oids: Sequence[OID],
+        context_name: SNMPContextName | None,
+        max_repetitions: int = 0,
+    ) -> PDU:
+        request_id = next(self._request_ids) & 0x7FFFFFFF
+        pdu = encode_pdu(
+            pdu_type, request_id, [(oid, NULL_VALUE) for oid in oids], 0, max_repetitions
+        )
+        if self._usm is None:
+            message = encode_community_message(self._version - 1, self._community, pdu)
+            response = await self._send(request_id, lambda: message)
+            _version, _community, response_pdu = decode_community_message(response)
+            return response_pdu
+        return await self._request_v3(request_id, pdu, context_name)
+
+    async def _request_v3(
+        self, request_id: int, pdu: bytes, context_name: SNMPContextName | None
+    ) -> PDU:
+        assert self._usm is not None
+        usm = self._usm
+        if not usm.is_discovered:
+            await self._discover()
+        for _attempt in range(2):
+            scoped_pdu = encode_scoped_pdu(
+                ScopedPDU(usm.engine_id, (context_name or "").encode(), pdu)
+            )
+            response = decode_pdu(
+                await self._send(request_id, lambda: usm.encode(request_id, scoped_pdu))
+            )
+            if response.type != REPORT:
+                return response
+            if response.varbinds and response.varbinds[0][0] == _USM_STATS_NOT_IN_TIME_WINDOWS:
+                continue  # the time has been synchronized, try again
+            raise MKSNMPError(
+                f"SNMP Error on {self._address}: report "
+                f"{response.varbinds[0][0] if response.varbinds else '(empty)'}"
+            )
+        raise MKSNMPError(f"SNMP Error on {self._address}: not in time window")
+
+    async def _discover(self) -> None:
+        assert self._usm is not None
+        usm = self._usm
+        request_id = next(self._request_ids) & 0x7FFFFFFF
+        discovery = usm.discovery_message(
+            request_id,
+            encode_scoped_pdu(ScopedPDU(b"", b"", encode_pdu(GET_REQUEST, request_id, []))),
+        )
+        await self._send(request_id, lambda: discovery)
+        if not usm.is_discovered:
+            raise MKSNMPError(f"SNMP Error on {self._address}: engine discovery failed")
+
+    async def _send(self, request_id: int, encode: Callable[[], bytes]) -> bytes:
+        """Send the request until the response arrives
+
+        Returns the complete message for SNMPv1/v2c, the decrypted PDU for SNMPv3.
+        The message is encoded again for each retry, SNMPv3 messages contain the time."""
+        assert self._transport is not None
+        loop = asyncio.get_running_loop()
+        try:
+            for _attempt in range(self._retries + 1):
+                self._pending[request_id] = future = loop.create_future()
+                self._transport.sendto(encode())
+                try:
+                    response = await asyncio.wait_for(future, self._timeout)
+                except asyncio.TimeoutError:
+                    continue
+                if response is not None:
+                    return response
+        finally:
+            self._pending.pop(request_id, None)
+        raise MKSNMPError(f"Timeout: No Response from {self._address}")
+
+    def _on_message(self, data: bytes) -> None:
+        try:
+            if self._usm is None:
+                _version, _community, pdu = decode_community_message(data)
+                request_id, response = pdu.request_id, data
+            else:
+                request_id, parameters, scoped_pdu = self._usm.decode(data)
+                if scoped_pdu is None:
+                    return
+                response = decode_scoped_pdu(scoped_pdu).pdu
+                if decode_pdu(response).type == REPORT:
+                    self._usm.synchronize(parameters)
+        except (ValueError, IndexError, MKSNMPError) as e:
+            console.vverbose(f"Ignoring invalid SNMP message: {e}\n")
+            return
+        if (future := self._pending.get(request_id)) is not None and not future.done():
+            future.set_result(response)
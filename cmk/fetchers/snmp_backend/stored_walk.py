@@ -9,23 +9,31 @@ from collections.abc import Sequence
 from pathlib import Path
 from typing import Final
 
-import cmk.utils.agent_simulator as agent_simulator
 import cmk.utils.paths
-from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.exceptions import MKGeneralException, MKSNMPError
 from cmk.utils.log import console
 from cmk.utils.sectionname import SectionName
 
 from cmk.snmplib import OID, SNMPBackend, SNMPContextName, SNMPHostConfig, SNMPRawValue, SNMPRowInfo
 
-from ._utils import strip_snmp_value
+from ._walk_index import read_text_walk, WalkIndex
 
 __all__ = ["StoredWalkSNMPBackend"]
 
 
 class StoredWalkSNMPBackend(SNMPBackend):
+    """Replays a walk stored in the text format of snmpwalk
+
+    The walk is compiled into a WalkIndex once, which is mapped into memory by
+    each backend replaying it. The index of a walk given by its path is placed
+    next to it unless an index path is given."""
+
     def __init__(
-        self, snmp_config: SNMPHostConfig, logger: logging.Logger, path: Path | None = None
+        self,
+        snmp_config: SNMPHostConfig,
+        logger: logging.Logger,
+        path: Path | None = None,
+        index_path: Path | None = None,
     ) -> None:
         super().__init__(snmp_config, logger)
         self.path: Final = (
@@ -33,6 +41,14 @@ class StoredWalkSNMPBackend(SNMPBackend):
         )
         if not self.path.exists():
             raise MKSNMPError(f"No snmpwalk file {self.path}")
+        self.index_path: Final = (
+            index_path
+            if index_path is not None
+            else Path(cmk.utils.paths.snmpwalks_index_dir) / self.hostname
+            if path is None
+            else path.with_name(f"{path.name}.idx")
+        )
+        self._index: WalkIndex | None = None
 
     def get(self, oid: OID, context_name: SNMPContextName | None = None) -> SNMPRawValue | None:
         walk = self.walk(oid)
@@ -54,56 +70,22 @@ class StoredWalkSNMPBackend(SNMPBackend):
         if oid.startswith("."):
             oid = oid[1:]
 
+        console.vverbose(f"  Loading {oid}")
         if oid.endswith(".*"):
-            oid_prefix = oid[:-2]
-            dot_star = True
-        else:
-            oid_prefix = oid
-            dot_star = False
+            return self._load_index().first(oid[:-2])
+        return self._load_index().lookup(oid)
 
-        console.vverbose(f"  Loading {oid}")
-        lines = self.read_walk_data()
-
-        begin = 0
-        end = len(lines)
-        hit = None
-        while end - begin > 0:
-            current = (begin + end) // 2
-            parts = lines[current].split(None, 1)
-            comp = parts[0]
-            hit = StoredWalkSNMPBackend._compare_oids(oid_prefix, comp)
-            if hit == 0:
-                break
-            if hit == 1:  # we are too low
-                begin = current + 1
-            else:
-                end = current
-
-        if hit != 0:
-            return []  # not found
-
-        rowinfo = StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current, -1)
-        rowinfo.reverse()
-        rowinfo += StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current + 1, 1)
-
-        if dot_star:
-            return [rowinfo[0]]
-
-        return rowinfo
+    def _load_index(self) -> WalkIndex:
+        if self._index is None:
+            try:
+                self._index = WalkIndex.load(self.path, self.index_path)
+            except OSError:
+                raise MKSNMPError("No snmpwalk file %s" % self.path)
+        return self._index
 
     @staticmethod
     def read_walk_from_path(path: Path) -> Sequence[str]:
-        console.vverbose(f"  Opening {path}\n")
-        lines = []
-        with path.open() as f:
-            # Sometimes there are newlines in the data of snmpwalks.
-            # Append the data to the last OID rather than throwing it away/skipping it.
-            for line in f.readlines():
-                if line.startswith("."):
-                    lines.append(line)
-                elif lines:
-                    lines[-1] += line
-        return lines
+        return read_text_walk(path)
 
     def read_walk_data(self) -> Sequence[str]:
         try:
@@ -127,38 +109,3 @@ class StoredWalkSNMPBackend(SNMPBackend):
             return tuple(map(int, oid.strip(".").split(".")))
         except Exception:
             raise MKGeneralException("Invalid OID %s" % oid)
-
-    @staticmethod
-    def _collect_until(
-        oid: OID, oid_prefix: OID, lines: Sequence[str], index: int, direction: int
-    ) -> SNMPRowInfo:
-        rows = []
-        # Handle case, where we run after the end of the lines list
-        if index >= len(lines):
-            if direction > 0:
-                return []
-            index -= 1
-        while True:
-            line = lines[index]
-            parts = line.split(None, 1)
-            o = parts[0]
-            if o.startswith("."):
-                o = o[1:]
-            if o == oid or o.startswith(oid_prefix + "."):
-                if len(parts) > 1:
-                    # FIXME: This encoding ping-pong is horrible...
-                    value = agent_simulator.process(
-                        AgentRawData(
-                            parts[1].encode(),
-                        ),
-                    ).decode()
-                else:
-                    value = ""
-                # Fix for missing starting oids
-                rows.append(("." + o, strip_snmp_value(value)))
-                index += direction
-                if index < 0 or index >= len(lines):
-                    break
-            else:
-                break
-        return rows
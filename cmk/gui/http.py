@@ -10,7 +10,7 @@ import urllib.parse
 from collections.abc import Iterator, Mapping
 from contextlib import contextmanager
 from enum import auto, StrEnum
-from typing import Any, cast, Literal, overload, Protocol, TypeVar
+from typing import Any, cast, IO, Literal, overload, Protocol, TypeVar
 
 import flask
 from flask import request as flask_request
@@ -181,6 +181,13 @@ class LegacyUploadMixin:
 
         return upload
 
+    def uploaded_file_stream(self, name: str) -> IO[bytes]:
+        """The content of an uploaded file, for reading large files without keeping them in memory"""
+        f = self.files.get(name)  # type: ignore[attr-defined]
+        if not f:
+            raise MKUserError(name, _("Please choose a file to upload."))
+        return f.stream
+
 
 class LegacyDeprecatedMixin:
     """Some wrappers which are still used while their use is considered deprecated.
@@ -234,7 +234,7 @@ def _get_topology_frontend_configuration_for_filter(
         return {}
 
     found_topology_hash = store.try_load_file_from_pickle_cache(
-        topology_settings_lookup, default={}
+        topology_settings_lookup, default={}, in_memory=True
     ).get(query_identifier.identifier)
     if found_topology_hash is None:
         return {}
@@ -234,6 +234,10 @@ class CREConfig:
     # not reachable.
     show_livestatus_errors: bool = True
 
+    # Sites not answering a query to several sites within this time are
+    # considered dead for the rest of the request
+    livestatus_response_timeout: float = 30.0
+
     # Whether the livestatu proxy daemon is available
     liveproxyd_enabled: bool = False
 
@@ -592,6 +596,7 @@ class CREConfig:
             "aggregations": {},
         }
     )
+    bi_num_workers: int = 1
 
     # Deprecated. Kept for compatibility.
     bi_compile_log: str | None = None
@@ -380,6 +380,33 @@ class ConfigVariableSlowViewsDurationThreshold(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableBINumWorkers(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupUserInterface
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainGUI
+
+    def ident(self) -> str:
+        return "bi_num_workers"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Number of processes for BI"),
+            help=_(
+                "The BI aggregations are compiled in this number of processes. Using several "
+                "processes speeds up the compilation of large BI configurations on systems "
+                "with several CPU cores. The processes are only started while the "
+                "aggregations are compiled again, e.g. after a configuration change. Keep the "
+                "number below the number of CPU cores of the site."
+            ),
+            default_value=1,
+            minvalue=1,
+            size=3,
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableDebug(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
@@ -504,6 +531,31 @@ class ConfigVariableShowLivestatusErrors(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableLivestatusResponseTimeout(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupUserInterface
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainGUI
+
+    def ident(self) -> str:
+        return "livestatus_response_timeout"
+
+    def valuespec(self) -> ValueSpec:
+        return Float(
+            title=_("Timeout for Livestatus responses of sites"),
+            help=_(
+                "The GUI queries all sites in parallel. Sites that have not answered within this "
+                "time are shown as unreachable for the rest of the page, the data of the other "
+                "sites is shown without waiting for them."
+            ),
+            minvalue=1.0,
+            unit="sec",
+            display_format="%.1f",
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableEnableSounds(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
@@ -2785,6 +2837,32 @@ class ConfigVariableDelayPrecompile(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableMaxConcurrentFetches(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainCore
+
+    def ident(self) -> str:
+        return "max_concurrent_fetches"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Maximum number of concurrently fetched data sources"),
+            help=_(
+                "Checkmk fetches the data sources of a host (e.g. the agent, SNMP, special "
+                "agents and piggyback data) one after the other, for a cluster those of all "
+                "of its nodes. With a value larger than one, up to that many data sources "
+                "are fetched at the same time, so the time needed is about the one of the "
+                "slowest data source instead of the sum of all of them. The time each data "
+                "source took is shown in the details of the <i>Check_MK</i> service."
+            ),
+            minvalue=1,
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableClusterMaxCachefileAge(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
@@ -2885,20 +2963,25 @@ class ConfigVariableUseDNSCache(ConfigVariable):
 
 
 def transform_snmp_backend_default_to_valuespec(
-    backend: Literal["classic", "inline"]
+    backend: Literal["classic", "inline", "native"]
 ) -> SNMPBackendEnum:
     return {
         "classic": SNMPBackendEnum.CLASSIC,
         "inline": SNMPBackendEnum.INLINE,
+        "native": SNMPBackendEnum.NATIVE,
     }[backend]
 
 
-def transform_snmp_backend_from_valuespec(backend: SNMPBackendEnum) -> Literal["classic", "inline"]:
+def transform_snmp_backend_from_valuespec(
+    backend: SNMPBackendEnum,
+) -> Literal["classic", "inline", "native"]:
     match backend:
         case SNMPBackendEnum.CLASSIC:
             return "classic"
         case SNMPBackendEnum.INLINE:
             return "inline"
+        case SNMPBackendEnum.NATIVE:
+            return "native"
         case _:
             raise MKConfigError("SNMPBackendEnum %r not implemented" % backend)
 
@@ -2923,6 +3006,7 @@ class ConfigVariableChooseSNMPBackend(ConfigVariable):
                 choices=[
                     (SNMPBackendEnum.CLASSIC, _("Use Classic SNMP Backend")),
                     (SNMPBackendEnum.INLINE, _("Use Inline SNMP Backend")),
+                    (SNMPBackendEnum.NATIVE, _("Use Native SNMP Backend")),
                 ],
                 help=_(
                     "By default Checkmk uses command line calls of Net-SNMP tools like snmpget or "
@@ -2931,7 +3015,8 @@ class ConfigVariableChooseSNMPBackend(ConfigVariable):
                     "which calls the respective libraries directly via its python bindings. This "
                     "should increase the performance of SNMP checks in a significant way. Both "
                     "SNMP modes are features which improve the performance for large installations and are "
-                    "only available via our subscription."
+                    "only available via our subscription. The Native SNMP backend speaks SNMP itself "
+                    "without Net-SNMP and walks several OIDs of a device concurrently."
                 ),
             ),
             to_valuespec=transform_snmp_backend_hosts_to_valuespec,
@@ -5116,6 +5201,21 @@ def _valuespec_snmp_timing():
                     maxvalue=50,
                 ),
             ),
+            (
+                "concurrent_walks",
+                Integer(
+                    title=_("Number of concurrent walks"),
+                    help=_(
+                        "The native SNMP backend walks several OIDs (e.g. the columns of a "
+                        "table) of a device at the same time. This is the maximum number of "
+                        "walks in flight. Use 1 for devices which can not handle concurrent "
+                        "requests. The other backends always walk one OID after another."
+                    ),
+                    default_value=4,
+                    minvalue=1,
+                    maxvalue=64,
+                ),
+            ),
         ],
     )
 
@@ -5172,6 +5272,8 @@ def transform_snmp_backend_hosts_to_valuespec(backend):
         # We dropped pysnmp during the 2.1 beta because it is currently slow
         # and unreliable.
         return SNMPBackendEnum.CLASSIC
+    if backend == "native":
+        return SNMPBackendEnum.NATIVE
     raise MKConfigError("SNMPBackendEnum %r not implemented" % backend)
 
 
@@ -5182,6 +5284,7 @@ def _valuespec_snmp_backend():
             choices=[
                 (SNMPBackendEnum.INLINE, _("Use Inline SNMP Backend")),
                 (SNMPBackendEnum.CLASSIC, _("Use Classic Backend")),
+                (SNMPBackendEnum.NATIVE, _("Use Native SNMP Backend")),
             ],
         ),
         to_valuespec=transform_snmp_backend_hosts_to_valuespec,
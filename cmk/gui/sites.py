@@ -284,6 +284,9 @@ def _connect_multiple_sites(user: LoggedInUser) -> None:
     else:
         g.live = MultiSiteConnection(enabled_sites, disabled_sites)
 
+    # A hanging site must not keep the page of the user from showing the other sites
+    g.live.set_response_timeout(active_config.livestatus_response_timeout)
+
     # Fetch status of sites by querying the version of Nagios and livestatus
     # This may be cached by a proxy for up to the next configuration reload.
     g.live.set_prepend_site(True)
@@ -19,13 +19,14 @@ import ast
 import enum
 import errno
 import hashlib
-import io
 import logging
 import multiprocessing
 import os
 import re
 import shutil
 import subprocess
+import tempfile
+import threading
 import time
 import traceback
 from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
@@ -33,7 +34,7 @@ from dataclasses import asdict, dataclass
 from itertools import filterfalse
 from multiprocessing.pool import AsyncResult, ThreadPool
 from pathlib import Path
-from typing import Any, NamedTuple, TypedDict
+from typing import Any, IO, NamedTuple, TypedDict
 
 from setproctitle import setthreadtitle
 
@@ -138,6 +139,10 @@ ACTIVATION_PERISTED_DIR = cmk.utils.paths.var_dir + "/wato/activation"
 
 var_dir = cmk.utils.paths.var_dir + "/wato/"
 
+# Creating and transferring the sync archives of many sites at once saturates the CPU and the
+# uplink of the central site
+_MAX_PARALLEL_SYNC_TRANSFERS = 10
+_sync_transfer_slots = threading.BoundedSemaphore(_MAX_PARALLEL_SYNC_TRANSFERS)
 
 GENERAL_DIR_EXCLUDE = "__pycache__"
 
@@ -498,6 +503,20 @@ def update_activation_time(site_id: SiteId, time_key: str, duration: float) -> N
         _save_site_replication_status(site_id, repl_status)
 
 
+def update_transfer_statistics(site_id: SiteId, num_bytes: int, duration: float) -> None:
+    """Remember the size and throughput of the last transfer of a sync archive"""
+    _update_replication_status(
+        site_id,
+        {
+            "last_transfer": {
+                "bytes": num_bytes,
+                "duration": duration,
+                "bytes_per_second": num_bytes / duration if duration else 0.0,
+            }
+        },
+    )
+
+
 def _calc_status_details(
     time_started: float,
     time_ended: float,
@@ -611,7 +630,7 @@ def _set_sync_state(
 
 def _get_config_sync_state(
     site_id: SiteId, replication_paths: Sequence[ReplicationPath]
-) -> tuple[ConfigSyncFileInfos, int]:
+) -> tuple[ConfigSyncFileInfos, int, Sequence[SyncArchiveCompression]]:
     """Get the config file states from the remote sites
 
     Calls the automation call "get-config-sync-state" on the remote site,
@@ -624,7 +643,16 @@ def _get_config_sync_state(
     )
 
     assert isinstance(response, tuple)
-    return {k: ConfigSyncFileInfo(*v) for k, v in response[0].items()}, response[1]
+    # Remote sites of older versions do not report the compressions they can unpack
+    known_compressions = {c.value for c in SyncArchiveCompression}
+    remote_compressions = [
+        SyncArchiveCompression(c) for c in (response[2:3] or [[]])[0] if c in known_compressions
+    ]
+    return (
+        {k: ConfigSyncFileInfo(*v) for k, v in response[0].items()},
+        response[1],
+        remote_compressions,
+    )
 
 
 def _synchronize_files(
@@ -633,36 +661,53 @@ def _synchronize_files(
     files_to_delete: list[str],
     remote_config_generation: int,
     site_config_dir: Path,
+    compression: SyncArchiveCompression | None = None,
 ) -> None:
     """Pack the files in a simple tar archive and send it to the remote site
 
     We build a simple tar archive containing all files to be synchronized.  The list of file to
     be deleted and the current config generation is handed over using dedicated HTTP parameters.
+    The archive is written to a temporary file and streamed from there to the remote site.
     """
-
-    sync_archive = _get_sync_archive(files_to_sync, site_config_dir)
-
-    site = get_site_config(site_id)
-    response = cmk.gui.watolib.automations.do_remote_automation(
-        site,
-        "receive-config-sync",
-        [
-            ("site_id", site_id),
-            ("to_delete", repr(files_to_delete)),
-            ("config_generation", "%d" % remote_config_generation),
-        ],
-        files={"sync_archive": io.BytesIO(sync_archive)},
-    )
+    site_logger = logger.getChild(f"site[{site_id}]")
+    vars_ = [
+        ("site_id", site_id),
+        ("to_delete", repr(files_to_delete)),
+        ("config_generation", "%d" % remote_config_generation),
+    ]
+    if compression is not None:
+        vars_.append(("sync_archive_compression", str(compression)))
+
+    with _sync_transfer_slots:
+        with _get_sync_archive(files_to_sync, site_config_dir, compression) as sync_archive:
+            archive_size = os.fstat(sync_archive.fileno()).st_size
+            transfer_start = time.time()
+            response = cmk.gui.watolib.automations.do_remote_automation(
+                get_site_config(site_id),
+                "receive-config-sync",
+                vars_,
+                files={"sync_archive": sync_archive},
+            )
+            transfer_duration = time.time() - transfer_start
 
     if response is not True:
         raise MKGeneralException(_("Failed to synchronize with site: %s") % response)
 
+    site_logger.debug(
+        "Transferred %d bytes (%s) in %.2f seconds",
+        archive_size,
+        compression or "uncompressed",
+        transfer_duration,
+    )
+    update_transfer_statistics(site_id, archive_size, transfer_duration)
+
 
 @dataclass(frozen=True)
 class SyncState:
     central_file_infos: ConfigSyncFileInfos
     remote_file_infos: ConfigSyncFileInfos
     remote_config_generation: int
+    remote_compressions: Sequence[SyncArchiveCompression] = ()
 
 
 def fetch_sync_state(
@@ -680,9 +725,11 @@ def fetch_sync_state(
         _set_sync_state(site_activation_state, _("Fetching sync state"))
         site_logger.debug(site_activation_state, "Starting config sync")
 
-        remote_file_infos, remote_config_generation = _get_config_sync_state(
-            site_id, replication_paths
-        )
+        (
+            remote_file_infos,
+            remote_config_generation,
+            remote_compressions,
+        ) = _get_config_sync_state(site_id, replication_paths)
         site_logger.debug("Received %d file infos from remote", len(remote_file_infos))
 
         return (
@@ -690,6 +737,7 @@ def fetch_sync_state(
                 central_file_infos=central_file_infos,
                 remote_file_infos=remote_file_infos,
                 remote_config_generation=remote_config_generation,
+                remote_compressions=remote_compressions,
             ),
             site_activation_state,
             sync_start,
@@ -732,6 +780,7 @@ def synchronize_files(
     site_config_dir: Path,
     site_activation_state: SiteActivationState,
     sync_start: float,
+    compression: SyncArchiveCompression | None = None,
 ) -> SiteActivationState | None:
     site_id = site_activation_state["_site_id"]
     site_logger = logger.getChild(f"site[{site_id}]")
@@ -760,6 +809,7 @@ def synchronize_files(
             sync_delta.to_delete,
             remote_config_generation,
             site_config_dir,
+            compression,
         )
         site_logger.debug("Finished config sync")
         return site_activation_state
@@ -1991,6 +2041,7 @@ class ReplicationPathType(enum.StrEnum):
 
 def _get_config_sync_file_infos_per_inode(
     replication_paths: Sequence[ReplicationPath],
+    file_hashes: ConfigSyncFileHashes | None = None,
 ) -> Mapping[int, ConfigSyncFileInfo]:
     inode_sync_states = {}
 
@@ -2002,11 +2053,11 @@ def _get_config_sync_file_infos_per_inode(
 
         if replication_path.ty == ReplicationPathType.FILE:
             inode_sync_states[os.stat(replication_path_full).st_ino] = _get_config_sync_file_info(
-                replication_path_full
+                replication_path_full, file_hashes
             )
         elif replication_path.ty == ReplicationPathType.DIR:
             _get_replication_dir_config_sync_file_infos_per_inode(
-                inode_sync_states, replication_path_full, replication_path.excludes
+                inode_sync_states, replication_path_full, replication_path.excludes, file_hashes
             )
         else:
             raise NotImplementedError()
@@ -2018,6 +2069,7 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
     inode_sync_states: MutableMapping[int, ConfigSyncFileInfo],
     replication_path: str,
     replication_path_excludes: Sequence[str],
+    file_hashes: ConfigSyncFileHashes | None,
 ) -> None:
     # Use os functionality instead of pathlib since it is faster
     for root, dir_names, file_names in os.walk(replication_path):
@@ -2032,12 +2084,16 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
                 and os.path.islink(dir_path)
                 and not dir_name == GENERAL_DIR_EXCLUDE
             ):
-                inode_sync_states[os.stat(dir_path).st_ino] = _get_config_sync_file_info(dir_path)
+                inode_sync_states[os.stat(dir_path).st_ino] = _get_config_sync_file_info(
+                    dir_path, file_hashes
+                )
 
         for file_name in file_names:
             file_path = os.path.join(root, file_name)
             if os.path.exists(file_path):
-                inode_sync_states[os.stat(file_path).st_ino] = _get_config_sync_file_info(file_path)
+                inode_sync_states[os.stat(file_path).st_ino] = _get_config_sync_file_info(
+                    file_path, file_hashes
+                )
 
 
 def _prepare_for_activation_tasks(
@@ -2046,9 +2102,13 @@ def _prepare_for_activation_tasks(
     site_snapshot_settings: Mapping[SiteId, SnapshotSettings],
     time_started: float,
 ) -> tuple[Mapping[SiteId, ConfigSyncFileInfos], Mapping[SiteId, SiteActivationState]]:
+    # The hard links of the site config directories are recreated on each activation, which
+    # changes the change times of the central files
+    file_hashes = ConfigSyncFileHashes(_config_sync_hashes_path(), check_ctime=False)
     config_sync_file_infos_per_inode = _get_config_sync_file_infos_per_inode(
-        get_replication_paths()
+        get_replication_paths(), file_hashes
     )
+    file_hashes.save()
     central_file_infos_per_site = {}
     site_activation_states_per_site = {}
     for site_id, snapshot_settings in sorted(site_snapshot_settings.items(), key=lambda e: e[0]):
@@ -2183,7 +2243,7 @@ def sync_and_activate(
                 )
                 active_tasks["activate_remote_changes"][site_id] = async_result
 
-        remote_config_generation_per_site: MutableMapping[SiteId, int] = {}
+        sync_state_per_site: MutableMapping[SiteId, SyncState] = {}
         # we want to mostly parallelize the activation steps, but if one site takes longer,
         # it should not hold up the other sites
         # -> monitor active tasks to handle results as soon as one finishes and start a task for
@@ -2200,7 +2260,7 @@ def sync_and_activate(
                 activate_changes,
                 file_filter_func,
                 prevent_activate,
-                remote_config_generation_per_site,
+                sync_state_per_site,
                 site_snapshot_settings,
                 task_pool,
             )
@@ -2226,7 +2286,7 @@ def _handle_active_tasks(
     activate_changes: ActivateChanges,
     file_filter_func: FileFilterFunc,
     prevent_activate: bool,
-    remote_config_generation_per_site: MutableMapping[SiteId, int],
+    sync_state_per_site: MutableMapping[SiteId, SyncState],
     site_snapshot_settings: Mapping[SiteId, SnapshotSettings],
     task_pool: ThreadPool,
 ) -> None:
@@ -2239,7 +2299,7 @@ def _handle_active_tasks(
             return  # exception handling happens in thread
 
         sync_state, activation_state, sync_start_time = fetch_sync_state_results
-        remote_config_generation_per_site[site_id] = sync_state.remote_config_generation
+        sync_state_per_site[site_id] = sync_state
 
         active_tasks["calc_sync_delta"][site_id] = task_pool.apply_async(
             func=copy_request_context(calc_sync_delta),
@@ -2256,14 +2316,16 @@ def _handle_active_tasks(
             return  # exception handling happens in thread
 
         sync_delta, activation_state, sync_start_time = calc_sync_delta_result
+        sync_state = sync_state_per_site[site_id]
         active_tasks["synchronize_files"][site_id] = task_pool.apply_async(
             func=copy_request_context(synchronize_files),
             args=(
                 sync_delta,
-                remote_config_generation_per_site[site_id],
+                sync_state.remote_config_generation,
                 Path(site_snapshot_settings[site_id].work_dir),
                 activation_state,
                 sync_start_time,
+                _negotiate_sync_archive_compression(sync_state.remote_compressions),
             ),
             error_callback=_error_callback,
         )
@@ -2712,66 +2774,109 @@ def _filter_remote_files(remote_files: set[str]) -> set[str]:
     return remote_files_to_keep
 
 
-def _get_sync_archive(to_sync: list[str], base_dir: Path) -> bytes:
-    # Use native tar instead of python tarfile for performance reasons
-    completed_process = subprocess.run(
-        [
-            "tar",
-            "-c",
-            "-C",
-            str(base_dir),
-            "-f",
-            "-",
-            "--null",
-            "-T",
-            "-",
-            "--preserve-permissions",
-        ],
-        input=b"\0".join(f.encode() for f in to_sync),
-        capture_output=True,
-        close_fds=True,
-        shell=False,
-        check=False,
-    )
+class SyncArchiveCompression(enum.StrEnum):
+    # In the order of preference
+    ZSTD = "zstd"
+    GZIP = "gzip"
 
-    # Since we don't stream the archive to the remote site (we could probably do this) it should be
-    # no problem to buffer it in memory for the moment
 
-    if completed_process.returncode:
-        raise MKGeneralException(
-            _("Failed to create sync archive [%d]: %s")
-            % (completed_process.returncode, completed_process.stderr.decode())
-        )
+def _sync_archive_compressions() -> Sequence[SyncArchiveCompression]:
+    """The compressions tar can handle on this site (it calls the program of the same name)"""
+    return [c for c in SyncArchiveCompression if shutil.which(c.value)]
 
-    return completed_process.stdout
 
+def _negotiate_sync_archive_compression(
+    remote_compressions: Sequence[SyncArchiveCompression],
+) -> SyncArchiveCompression | None:
+    return next((c for c in _sync_archive_compressions() if c in remote_compressions), None)
 
-def _unpack_sync_archive(sync_archive: bytes, base_dir: Path) -> None:
-    completed_process = subprocess.run(
-        [
-            "tar",
-            "-x",
-            "-C",
-            str(base_dir),
-            "-f",
-            "-",
-            "-U",
-            "--recursive-unlink",
-            "--preserve-permissions",
-        ],
-        input=sync_archive,
-        capture_output=True,
-        close_fds=True,
-        shell=False,
-        check=False,
-    )
 
-    if completed_process.returncode:
-        raise MKGeneralException(
-            _("Failed to create sync archive [%d]: %s")
-            % (completed_process.returncode, completed_process.stderr.decode())
+def _tar_compression_options(compression: SyncArchiveCompression | None) -> list[str]:
+    return [] if compression is None else ["--use-compress-program", compression.value]
+
+
+def _get_sync_archive(
+    to_sync: list[str], base_dir: Path, compression: SyncArchiveCompression | None = None
+) -> IO[bytes]:
+    """Create the archive in a temporary file, which is removed when closed"""
+    # The archive can get large (e.g. with MKPs or baked agents), keep it out of the memory
+    sync_archive = tempfile.TemporaryFile()  # pylint: disable=consider-using-with
+    try:
+        # Use native tar instead of python tarfile for performance reasons
+        completed_process = subprocess.run(
+            [
+                "tar",
+                "-c",
+                "-C",
+                str(base_dir),
+                "-f",
+                "-",
+                "--null",
+                "-T",
+                "-",
+                "--preserve-permissions",
+                *_tar_compression_options(compression),
+            ],
+            input=b"\0".join(f.encode() for f in to_sync),
+            stdout=sync_archive,
+            stderr=subprocess.PIPE,
+            close_fds=True,
+            shell=False,
+            check=False,
         )
 
+        if completed_process.returncode:
+            raise MKGeneralException(
+                _("Failed to create sync archive [%d]: %s")
+                % (completed_process.returncode, completed_process.stderr.decode())
+            )
+    except BaseException:
+        sync_archive.close()
+        raise
+
+    sync_archive.seek(0)
+    return sync_archive
+
+
+def _unpack_sync_archive(
+    sync_archive: IO[bytes], base_dir: Path, compression: SyncArchiveCompression | None = None
+) -> None:
+    """Unpack the archive while reading it, e.g. from the request"""
+    # The error output is not read while the archive is passed to tar, don't block it
+    with tempfile.TemporaryFile() as stderr:
+        try:
+            with subprocess.Popen(
+                [
+                    "tar",
+                    "-x",
+                    "-C",
+                    str(base_dir),
+                    "-f",
+                    "-",
+                    "-U",
+                    "--recursive-unlink",
+                    "--preserve-permissions",
+                    *_tar_compression_options(compression),
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr,
+                close_fds=True,
+                shell=False,
+            ) as process:
+                assert process.stdin is not None
+                while chunk := sync_archive.read(65536):
+                    process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # tar failed, reported below
+
+        if process.returncode:
+            stderr.seek(0)
+            raise MKGeneralException(
+                _("Failed to create sync archive [%d]: %s")
+                % (process.returncode, stderr.read().decode())
+            )
+
 
 class ConfigSyncFileInfo(NamedTuple):
     st_mode: int
@@ -2786,7 +2891,9 @@ class ConfigSyncFileInfo(NamedTuple):
 #    ("file_infos", dict[str, ConfigSyncFileInfo]),
 #    ("config_generation", int),
 # ])
-GetConfigSyncStateResponse = tuple[dict[str, tuple[int, int, str | None, str | None]], int]
+GetConfigSyncStateResponse = tuple[
+    dict[str, tuple[int, int, str | None, str | None]], int, list[str]
+]
 
 ConfigSyncFileInfos = dict[str, ConfigSyncFileInfo]
 
@@ -2805,7 +2912,8 @@ class AutomationGetConfigSyncState(AutomationCommand):
     The central site hands over the list of replication paths it will try to synchronize later.  The
     remote site computes the list of replication files and sends it back together with the current
     configuration generation ID. The config generation ID is increased on every Setup modification
-    and ensures that nothing is changed between the two config sync steps.
+    and ensures that nothing is changed between the two config sync steps. The compressions of the
+    sync archive the remote site can unpack are added, the central site chooses one of them.
     """
 
     def command_name(self):
@@ -2819,11 +2927,19 @@ class AutomationGetConfigSyncState(AutomationCommand):
 
     def execute(self, api_request: list[ReplicationPath]) -> GetConfigSyncStateResponse:
         with store.lock_checkmk_configuration():
-            file_infos = _get_config_sync_file_infos(api_request, base_dir=cmk.utils.paths.omd_root)
+            file_hashes = ConfigSyncFileHashes(_config_sync_hashes_path())
+            file_infos = _get_config_sync_file_infos(
+                api_request, base_dir=cmk.utils.paths.omd_root, file_hashes=file_hashes
+            )
+            file_hashes.save()
             transport_file_infos = {
                 k: (v.st_mode, v.st_size, v.link_target, v.file_hash) for k, v in file_infos.items()
             }
-            return (transport_file_infos, _get_current_config_generation())
+            return (
+                transport_file_infos,
+                _get_current_config_generation(),
+                [str(c) for c in _sync_archive_compressions()],
+            )
 
 
 def _get_config_sync_paths(
@@ -2859,6 +2975,7 @@ def _get_config_sync_file_infos(
     replication_paths: list[ReplicationPath],
     base_dir: Path,
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo] | None = None,
+    file_hashes: ConfigSyncFileHashes | None = None,
 ) -> ConfigSyncFileInfos:
     """Scans the given replication paths for the information needed for the config sync
 
@@ -2878,7 +2995,9 @@ def _get_config_sync_file_infos(
             continue  # Only report back existing things
 
         if replication_path.ty == ReplicationPathType.FILE:
-            infos[replication_path.site_path] = _get_config_sync_file_info(replication_path_full)
+            infos[replication_path.site_path] = _get_config_sync_file_info(
+                replication_path_full, file_hashes
+            )
 
         elif replication_path.ty == ReplicationPathType.DIR:
             _get_replication_dir_config_sync_file_infos(
@@ -2887,6 +3006,7 @@ def _get_config_sync_file_infos(
                 base_dir,
                 replication_path_full,
                 replication_path.excludes,
+                file_hashes,
             )
         else:
             raise NotImplementedError()
@@ -2899,6 +3019,7 @@ def _get_replication_dir_config_sync_file_infos(
     base_dir: Path,
     replication_path: str,
     replication_path_excludes: Sequence[str],
+    file_hashes: ConfigSyncFileHashes | None,
 ) -> None:
     # Use os functionality instead of pathlib since it is faster
     for root, dir_names, file_names in os.walk(replication_path):
@@ -2918,22 +3039,83 @@ def _get_replication_dir_config_sync_file_infos(
                 ):
                     infos[valid_site_path] = sync_file_info
                 else:
-                    infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                    infos[valid_site_path] = _get_config_sync_file_info(
+                        config_sync_path, file_hashes
+                    )
             except FileNotFoundError:  # e.g. broken symlinks
-                infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                infos[valid_site_path] = _get_config_sync_file_info(config_sync_path, file_hashes)
 
 
-def _get_config_sync_file_info(file_path: str) -> ConfigSyncFileInfo:
+def _get_config_sync_file_info(
+    file_path: str, file_hashes: ConfigSyncFileHashes | None = None
+) -> ConfigSyncFileInfo:
     stat = os.lstat(file_path)
     is_symlink = os.path.islink(file_path)
+    if is_symlink:
+        file_hash = None
+    elif file_hashes is not None:
+        file_hash = file_hashes.file_hash(file_path, stat)
+    else:
+        file_hash = _create_config_sync_file_hash(file_path)
     return ConfigSyncFileInfo(
         stat.st_mode,
         stat.st_size,
         os.readlink(str(file_path)) if is_symlink else None,
-        _create_config_sync_file_hash(file_path) if not is_symlink else None,
+        file_hash,
     )
 
 
+# Inode, size, modification and change time of a file
+_FileSignature = tuple[int, int, int, int]
+
+
+class ConfigSyncFileHashes:
+    """The hashes of the synchronized files, kept from one activation to the next
+
+    Hashing all files on each activation takes long on larger sites, although hardly any of them
+    changed in the meantime. The hashes are stored together with the inode, size, modification
+    and change time of each file and only computed again when one of them changed.
+    """
+
+    def __init__(self, path: Path, *, check_ctime: bool = True) -> None:
+        self._path = path
+        self._check_ctime = check_ctime
+        self._stored: Mapping[str, tuple[_FileSignature, str]] = store.load_object_from_pickle_file(
+            path, default={}
+        )
+        self._current: dict[str, tuple[_FileSignature, str]] = {}
+
+    def file_hash(self, file_path: str, stat: os.stat_result) -> str:
+        # A file changed while it is hashed gets a new signature and is hashed again next time
+        signature = (
+            stat.st_ino,
+            stat.st_size,
+            stat.st_mtime_ns,
+            stat.st_ctime_ns if self._check_ctime else 0,
+        )
+        entry = self._stored.get(file_path)
+        if entry is None or entry[0] != signature:
+            entry = (signature, _create_config_sync_file_hash(file_path))
+        self._current[file_path] = entry
+        return entry[1]
+
+    def save(self) -> None:
+        # Keep the hashes of the existing files not looked at this time, e.g. of replication
+        # paths only requested by other central sites
+        hashes = {
+            file_path: entry
+            for file_path, entry in self._stored.items()
+            if file_path not in self._current and os.path.exists(file_path)
+        }
+        hashes.update(self._current)
+        if hashes != self._stored:
+            store.save_object_to_pickle_file(self._path, hashes)
+
+
+def _config_sync_hashes_path() -> Path:
+    return wato_var_dir() / "config-sync-hashes.pickle"
+
+
 def _create_config_sync_file_hash(file_path: str) -> str:
     sha256 = hashlib.sha256()
     with open(file_path, "rb") as f:
@@ -2967,9 +3149,10 @@ def _config_generation_path() -> Path:
 
 class ReceiveConfigSyncRequest(NamedTuple):
     site_id: SiteId
-    sync_archive: bytes
+    sync_archive: IO[bytes]
     to_delete: list[str]
     config_generation: int
+    compression: SyncArchiveCompression | None = None
 
 
 @automation_command_registry.register
@@ -2990,9 +3173,12 @@ class AutomationReceiveConfigSync(AutomationCommand):
 
         return ReceiveConfigSyncRequest(
             site_id,
-            _request.uploaded_file("sync_archive")[2],
+            _request.uploaded_file_stream("sync_archive"),
             ast.literal_eval(_request.get_str_input_mandatory("to_delete")),
             _request.get_integer_input_mandatory("config_generation"),
+            SyncArchiveCompression(compression)
+            if (compression := _request.get_ascii_input("sync_archive_compression"))
+            else None,
         )
 
     def execute(self, api_request: ReceiveConfigSyncRequest) -> bool:
@@ -3007,7 +3193,9 @@ class AutomationReceiveConfigSync(AutomationCommand):
                 )
 
             logger.debug("Updating configuration from sync snapshot")
-            self._update_config_on_remote_site(api_request.sync_archive, api_request.to_delete)
+            self._update_config_on_remote_site(
+                api_request.sync_archive, api_request.to_delete, api_request.compression
+            )
 
             logger.debug("Executing post sync actions")
             _execute_post_config_sync_actions(api_request.site_id)
@@ -3015,7 +3203,12 @@ class AutomationReceiveConfigSync(AutomationCommand):
             logger.debug("Done")
             return True
 
-    def _update_config_on_remote_site(self, sync_archive: bytes, to_delete: list[str]) -> None:
+    def _update_config_on_remote_site(
+        self,
+        sync_archive: IO[bytes],
+        to_delete: list[str],
+        compression: SyncArchiveCompression | None = None,
+    ) -> None:
         """Use the given tar archive and list of files to be deleted to update the local files"""
         base_dir = cmk.utils.paths.omd_root
 
@@ -3030,7 +3223,7 @@ class AutomationReceiveConfigSync(AutomationCommand):
                 # errno.ENOTDIR - dir with files was replaced by e.g. symlink
                 pass
 
-        _unpack_sync_archive(sync_archive, base_dir)
+        _unpack_sync_archive(sync_archive, base_dir, compression)
 
 
 @dataclass
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Make the automation helper load the configuration changed by the GUI"""
+
+from pathlib import Path
+
+import cmk.utils.paths
+
+from cmk.automations.helper import bump_config_generation
+
+from cmk.gui.ctx_stack import g
+from cmk.gui.hooks import register_builtin
+
+
+def need_automation_helper_reload() -> None:
+    # The helper stops executing calls with the configuration loaded before. Some
+    # files are written after the change was recorded, bump the generation again
+    # once they are written.
+    _bump_config_generation()
+    g.need_automation_helper_reload = True
+
+
+def reload_automation_helper_if_needed() -> None:
+    """Called before local automation calls and at the end of each request"""
+    if "need_automation_helper_reload" in g and g.need_automation_helper_reload:
+        _bump_config_generation()
+        g.need_automation_helper_reload = False
+
+
+def _bump_config_generation() -> None:
+    bump_config_generation(Path(cmk.utils.paths.automation_helper_generation_file))
+
+
+register_builtin("request-end", reload_automation_helper_if_needed)
@@ -9,20 +9,21 @@ and similar things."""
 from __future__ import annotations
 
 import ast
+import io
 import logging
 import re
 import subprocess
 import uuid
-from collections.abc import Callable, Iterable, Mapping, Sequence
-from io import BytesIO
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from pathlib import Path
-from typing import NamedTuple
+from typing import IO, NamedTuple
 
 import requests
 import urllib3
 
 from livestatus import SiteConfiguration, SiteId
 
+import cmk.utils.paths as paths
 import cmk.utils.store as store
 import cmk.utils.version as cmk_version
 from cmk.utils.exceptions import MKGeneralException
@@ -31,6 +32,7 @@ from cmk.utils.licensing.registry import get_license_state
 from cmk.utils.log import VERBOSE
 from cmk.utils.user import UserId
 
+from cmk.automations.helper import call_helper, HelperRequest
 from cmk.automations.results import result_type_registry, SerializedResult
 
 import cmk.gui.hooks as hooks
@@ -57,6 +59,7 @@ from cmk.gui.utils.compatibility import (
 )
 from cmk.gui.utils.urls import urlencode_vars
 from cmk.gui.watolib.automation_commands import automation_command_registry, AutomationCommand
+from cmk.gui.watolib.automation_helper import reload_automation_helper_if_needed
 from cmk.gui.watolib.automation_types import PhaseOneResult
 from cmk.gui.watolib.utils import mk_repr
 
@@ -96,10 +99,13 @@ def check_mk_local_automation_serialized(
 
     cmd = ["check_mk"]
 
+    verbosity = 0
     if auto_logger.isEnabledFor(logging.DEBUG):
         cmd.append("-vv")
+        verbosity = 2
     elif auto_logger.isEnabledFor(VERBOSE):
         cmd.append("-v")
+        verbosity = 1
 
     cmd += ["--automation", command] + new_args
 
@@ -114,13 +120,9 @@ def check_mk_local_automation_serialized(
     auto_logger.info("STDIN: %r" % stdin_data)
 
     try:
-        completed_process = subprocess.run(
+        completed_process = _run_local_automation(
             cmd,
-            capture_output=True,
-            close_fds=True,
-            encoding="utf-8",
-            input=stdin_data,
-            check=False,
+            HelperRequest(command=command, args=new_args, stdin=stdin_data, verbosity=verbosity),
         )
     except Exception as e:
         raise local_automation_failure(command=command, cmdline=cmd, exc=e)
@@ -159,6 +161,31 @@ def check_mk_local_automation_serialized(
     return cmd, SerializedResult(completed_process.stdout)
 
 
+def _run_local_automation(
+    cmdline: Sequence[str], request: HelperRequest
+) -> subprocess.CompletedProcess[str]:
+    # The automation helper has the configuration loaded already. Restarting the core takes
+    # much longer than loading it, keep doing that in a process of its own. The call is only
+    # executed here if the helper did not accept it, e.g. because all workers are busy.
+    if request.command not in ["restart", "reload"]:
+        reload_automation_helper_if_needed()
+        response = call_helper(Path(paths.automation_helper_socket), request)
+        if response is not None:
+            auto_logger.info("Executed by the automation helper")
+            return subprocess.CompletedProcess(
+                cmdline, response.returncode, response.stdout, response.stderr
+            )
+
+    return subprocess.run(
+        cmdline,
+        capture_output=True,
+        close_fds=True,
+        encoding="utf-8",
+        input=request.stdin,
+        check=False,
+    )
+
+
 def local_automation_failure(
     command: str,
     cmdline: Iterable[str],
@@ -270,7 +297,7 @@ def _do_remote_automation_serialized(
     site: SiteConfiguration,
     command: str,
     vars_: Sequence[tuple[str, str]],
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> str:
     auto_logger.info("RUN [%s]: %s", site, command)
@@ -324,7 +351,7 @@ def do_remote_automation(
     site: SiteConfiguration,
     command: str,
     vars_: Sequence[tuple[str, str]],
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> object:
     serialized_response = _do_remote_automation_serialized(
@@ -352,22 +379,29 @@ def get_url_raw(
     insecure: bool,
     auth: tuple[str, str] | None = None,
     data: Mapping[str, str] | None = None,
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> requests.Response:
-    response = requests.post(
-        url,
-        data=data,
-        verify=not insecure,
-        auth=auth,
-        files=files,
-        timeout=timeout,
-        headers={
-            "x-checkmk-version": cmk_version.__version__,
-            "x-checkmk-edition": cmk_version.edition().short,
-            "x-checkmk-license-state": get_license_state().readable,
-        },
-    )
+    headers = {
+        "x-checkmk-version": cmk_version.__version__,
+        "x-checkmk-edition": cmk_version.edition().short,
+        "x-checkmk-license-state": get_license_state().readable,
+    }
+    if not files:
+        response = requests.post(
+            url, data=data, verify=not insecure, auth=auth, timeout=timeout, headers=headers
+        )
+    else:
+        # Requests would build the whole body in memory, the files can be large
+        body = _MultipartBody(data or {}, files)
+        response = requests.post(
+            url,
+            data=body,
+            verify=not insecure,
+            auth=auth,
+            timeout=timeout,
+            headers={**headers, "Content-Type": body.content_type},
+        )
 
     response.encoding = "utf-8"  # Always decode with utf-8
 
@@ -484,12 +518,63 @@ def parse_license_state(raw_license_state: str) -> LicenseState | None:
         return None
 
 
+class _MultipartBody:
+    """A multipart/form-data request body reading the files while it is sent
+
+    Requests sends it with a Content-Length, because its length is known in advance. The web
+    server of the remote site does not accept chunked request bodies."""
+
+    def __init__(self, data: Mapping[str, str], files: Mapping[str, IO[bytes]]) -> None:
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._parts: list[IO[bytes]] = []
+        for name, value in data.items():
+            self._parts.append(
+                io.BytesIO(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                    f"{value}\r\n".encode()
+                )
+            )
+        for name, file in files.items():
+            self._parts += [
+                io.BytesIO(
+                    f"--{boundary}\r\n"
+                    f'Content-Disposition: form-data; name="{name}"; filename="{name}"\r\n'
+                    "Content-Type: application/octet-stream\r\n\r\n".encode()
+                ),
+                file,
+                io.BytesIO(b"\r\n"),
+            ]
+        self._parts.append(io.BytesIO(f"--{boundary}--\r\n".encode()))
+        self._length = sum(_remaining_size(part) for part in self._parts)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(lambda: self.read(65536), b"")
+
+    def read(self, size: int = -1) -> bytes:
+        while self._parts:
+            if chunk := self._parts[0].read(size):
+                return chunk
+            self._parts.pop(0)
+        return b""
+
+
+def _remaining_size(file: IO[bytes]) -> int:
+    position = file.tell()
+    size = file.seek(0, io.SEEK_END) - position
+    file.seek(position)
+    return size
+
+
 def get_url(
     url: str,
     insecure: bool,
     auth: tuple[str, str] | None = None,
     data: Mapping[str, str] | None = None,
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> str:
     return get_url_raw(url, insecure, auth, data, files, timeout).text
@@ -500,7 +585,7 @@ def get_url_json(
     insecure: bool,
     auth: tuple[str, str] | None = None,
     data: Mapping[str, str] | None = None,
-    files: Mapping[str, BytesIO] | None = None,
+    files: Mapping[str, IO[bytes]] | None = None,
     timeout: float | None = None,
 ) -> object:
     return get_url_raw(url, insecure, auth, data, files, timeout).json()
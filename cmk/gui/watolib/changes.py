@@ -22,6 +22,7 @@ from cmk.gui.site_config import site_is_local
 from cmk.gui.user_sites import activation_sites
 from cmk.gui.utils import escaping
 from cmk.gui.watolib.audit_log import log_audit, LogMessage
+from cmk.gui.watolib.automation_helper import need_automation_helper_reload
 from cmk.gui.watolib.config_domain_name import (
     ABCConfigDomain,
     config_domain_registry,
@@ -56,6 +57,7 @@ def add_change(
         diff_text=diff_text,
     )
     cmk.gui.watolib.sidebar_reload.need_sidebar_reload()
+    need_automation_helper_reload()
 
     request_index_update(action_name)
 
@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import functools
 import http.client as http_client
+import logging
 import traceback
 from collections.abc import Callable
 from typing import TYPE_CHECKING
@@ -159,7 +160,17 @@ class CheckmkApp(AbstractWSGIApp):
     def wsgi_app(self, environ: WSGIEnvironment, start_response: StartResponse) -> WSGIResponse:
         """Is called by the WSGI server to serve the current page"""
         with cmk.utils.store.cleanup_locks(), sites.cleanup_connections():
-            return _process_request(environ, start_response, debug=self.debug)
+            try:
+                return _process_request(environ, start_response, debug=self.debug)
+            finally:
+                _log_pickle_cache_stats()
+
+
+def _log_pickle_cache_stats() -> None:
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    for temp_dir, stats in cmk.utils.store.pickle_cache_stats().items():
+        logger.debug("Pickle cache in %s (since start of the process): %s", temp_dir, stats)
 
 
 def _process_request(  # pylint: disable=too-many-branches
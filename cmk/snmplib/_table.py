@@ -5,8 +5,7 @@
 """Provide methods to get an snmp table with or without caching
 """
 
-import contextlib
-from collections.abc import Callable, MutableMapping, Sequence
+from collections.abc import Callable, Mapping, MutableMapping, Sequence
 from typing import assert_never
 
 from cmk.utils.exceptions import MKGeneralException
@@ -54,6 +53,18 @@ def get_snmp_table(
     max_len = 0
     max_len_col = -1
 
+    rowinfos = _get_snmpwalks(
+        section_name,
+        tree.base,
+        [
+            (f"{tree.base}.{oid.column}", oid.save_to_cache)
+            for oid in tree.oids
+            if not isinstance(oid.column, SpecialColumn)
+        ],
+        walk_cache=walk_cache,
+        backend=backend,
+    )
+
     for oid in tree.oids:
         fetchoid: OID = f"{tree.base}.{oid.column}"
         # column may be integer or string like "1.5.4.2.3"
@@ -74,14 +85,7 @@ def get_snmp_table(
             index_column = len(columns)
             index_format = oid.column
         else:
-            rowinfo = _get_snmpwalk(
-                section_name,
-                tree.base,
-                fetchoid,
-                walk_cache=walk_cache,
-                save_walk_cache=oid.save_to_cache,
-                backend=backend,
-            )
+            rowinfo = rowinfos[fetchoid]
             if len(rowinfo) > max_len:
                 max_len_col = len(columns)
 
@@ -164,60 +168,71 @@ def _key_oid_pairs(pair1: tuple[OID, SNMPRawValue]) -> list[int]:
     return _oid_to_intlist(pair1[0].lstrip("."))
 
 
-def _get_snmpwalk(
+def _get_snmpwalks(
     section_name: SectionName | None,
     base: str,
-    fetchoid: OID,
+    fetchoids: Sequence[tuple[OID, bool]],
     *,
     walk_cache: MutableMapping[str, tuple[bool, SNMPRowInfo]],
-    save_walk_cache: bool,
     backend: SNMPBackend,
-) -> SNMPRowInfo:
-    with contextlib.suppress(KeyError):
-        cache_info = walk_cache[fetchoid][1]
-        console.vverbose(f"Already fetched OID: {fetchoid}\n")
-        return cache_info
-    info = _perform_snmpwalk(section_name, base, fetchoid, backend=backend)
-    walk_cache[fetchoid] = (save_walk_cache, info)
-    return info
+) -> Mapping[OID, SNMPRowInfo]:
+    """Walk the OIDs not already in the cache at once, the backend may do this concurrently"""
+    missing: dict[OID, bool] = {}
+    for fetchoid, save_walk_cache in fetchoids:
+        if fetchoid in walk_cache:
+            console.vverbose(f"Already fetched OID: {fetchoid}\n")
+        else:
+            missing.setdefault(fetchoid, save_walk_cache)
+
+    for (fetchoid, save_walk_cache), info in zip(
+        missing.items(), _perform_snmpwalks(section_name, base, list(missing), backend=backend)
+    ):
+        walk_cache[fetchoid] = (save_walk_cache, info)
+    return {fetchoid: walk_cache[fetchoid][1] for fetchoid, _save_walk_cache in fetchoids}
 
 
-def _perform_snmpwalk(
+def _perform_snmpwalks(
     section_name: SectionName | None,
     base_oid: str,
-    fetchoid: OID,
+    fetchoids: Sequence[OID],
     *,
     backend: SNMPBackend,
-) -> SNMPRowInfo:
-    added_oids: set[OID] = set()
-    rowinfo: SNMPRowInfo = []
+) -> Sequence[SNMPRowInfo]:
+    if not fetchoids:
+        return []
+
+    added_oids: list[set[OID]] = [set() for _fetchoid in fetchoids]
+    rowinfos: list[SNMPRowInfo] = [[] for _fetchoid in fetchoids]
 
     for context_name in backend.config.snmpv3_contexts_of(section_name):
-        rows = backend.walk(
-            oid=fetchoid,
-            section_name=section_name,
-            table_base_oid=base_oid,
-            context_name=context_name,
-        )
-
-        # I've seen a broken device (Mikrotik Router), that broke after an
-        # update to RouterOS v6.22. It would return 9 time the same OID when
-        # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
-        # by removing any duplicate OID information
-        if len(rows) > 1 and rows[0][0] == rows[1][0]:
-            console.vverbose(
-                "Detected broken SNMP agent. Ignoring duplicate OID %s.\n" % rows[0][0]
-            )
-            rows = rows[:1]
-
-        for row_oid, val in rows:
-            if row_oid in added_oids:
-                console.vverbose(f"Duplicate OID found: {row_oid} ({val!r})\n")
-            else:
-                rowinfo.append((row_oid, val))
-                added_oids.add(row_oid)
-
-    return rowinfo
+        for rows, added, rowinfo in zip(
+            backend.walk_many(
+                oids=fetchoids,
+                section_name=section_name,
+                table_base_oid=base_oid,
+                context_name=context_name,
+            ),
+            added_oids,
+            rowinfos,
+        ):
+            # I've seen a broken device (Mikrotik Router), that broke after an
+            # update to RouterOS v6.22. It would return 9 time the same OID when
+            # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
+            # by removing any duplicate OID information
+            if len(rows) > 1 and rows[0][0] == rows[1][0]:
+                console.vverbose(
+                    "Detected broken SNMP agent. Ignoring duplicate OID %s.\n" % rows[0][0]
+                )
+                rows = rows[:1]
+
+            for row_oid, val in rows:
+                if row_oid in added:
+                    console.vverbose(f"Duplicate OID found: {row_oid} ({val!r})\n")
+                else:
+                    rowinfo.append((row_oid, val))
+                    added.add(row_oid)
+
+    return rowinfos
 
 
 def _sanitize_snmp_encoding(
@@ -51,6 +51,7 @@ class SNMPBackendEnum(enum.Enum):
     INLINE = "Inline"
     CLASSIC = "Classic"
     STORED_WALK = "StoredWalk"
+    NATIVE = "Native"
 
     def serialize(self) -> str:
         return self.name
@@ -160,6 +161,16 @@ class SNMPBackend(abc.ABC):
     ) -> SNMPRowInfo:
         return []
 
+    def walk_many(
+        self,
+        oids: Sequence[OID],
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+        context_name: SNMPContextName | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        """Walk all the given OIDs, the backend may do this concurrently"""
+        return [self.walk(oid, section_name, table_base_oid, context_name) for oid in oids]
+
 
 class SpecialColumn(enum.IntEnum):
     # Until we remove all but the first, its worth having an enum
@@ -7,7 +7,9 @@ from __future__ import annotations
 
 import os
 import posix
+import resource
 from dataclasses import dataclass
+from typing import Final
 
 from cmk.utils.log import console
 
@@ -28,6 +30,26 @@ class Snapshot:
     def take(cls) -> Snapshot:
         return cls(os.times())
 
+    @classmethod
+    def take_thread(cls) -> Snapshot:
+        """Like take() but with the user and system time of the calling thread only
+
+        The times of the children can not be told apart per thread, they are the
+        ones of the process."""
+        times = os.times()
+        usage = resource.getrusage(resource.RUSAGE_THREAD)
+        return cls(
+            posix.times_result(
+                (
+                    usage.ru_utime,
+                    usage.ru_stime,
+                    times.children_user,
+                    times.children_system,
+                    times.elapsed,
+                )
+            )
+        )
+
     @classmethod
     def deserialize(cls, serialized: object) -> Snapshot:
         try:
@@ -54,8 +76,9 @@ class Snapshot:
 
 
 class CPUTracker:
-    def __init__(self) -> None:
+    def __init__(self, *, per_thread: bool = False) -> None:
         super().__init__()
+        self._take: Final = Snapshot.take_thread if per_thread else Snapshot.take
         self._start: Snapshot = Snapshot.null()
         self._end: Snapshot = Snapshot.null()
 
@@ -63,12 +86,12 @@ class CPUTracker:
         return "%s()" % type(self).__name__
 
     def __enter__(self) -> CPUTracker:
-        self._start = Snapshot.take()
+        self._start = self._take()
         console.vverbose("[cpu_tracking] Start [%x]\n", id(self))
         return self
 
     def __exit__(self, *exc_info: object) -> None:
-        self._end = Snapshot.take()
+        self._end = self._take()
         console.vverbose("[cpu_tracking] Stop [%x - %s]\n", id(self), self.duration)
 
     @property
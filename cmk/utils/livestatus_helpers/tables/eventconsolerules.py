@@ -10,6 +10,13 @@ from cmk.utils.livestatus_helpers.types import Column, Table
 class Eventconsolerules(Table):
     __tablename__ = 'eventconsolerules'
 
+    rule_evaluations = Column(
+        'rule_evaluations',
+        col_type='int',
+        description='The times the rule was evaluated for an incoming message since the start of the Event Console',
+    )
+    """The times the rule was evaluated for an incoming message since the start of the Event Console"""
+
     rule_hits = Column(
         'rule_hits',
         col_type='int',
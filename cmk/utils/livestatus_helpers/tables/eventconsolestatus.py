@@ -52,6 +52,13 @@ class Eventconsolestatus(Table):
     )
     """The average incoming message processing time"""
 
+    status_average_queue_drop_rate = Column(
+        'status_average_queue_drop_rate',
+        col_type='float',
+        description='The average rate of messages dropped because of a full ingest queue',
+    )
+    """The average rate of messages dropped because of a full ingest queue"""
+
     status_average_request_time = Column(
         'status_average_request_time',
         col_type='float',
@@ -80,6 +87,13 @@ class Eventconsolestatus(Table):
     )
     """The average sync time"""
 
+    status_commit_queue_length = Column(
+        'status_commit_queue_length',
+        col_type='int',
+        description='The number of processed messages waiting to be applied to the event status',
+    )
+    """The number of processed messages waiting to be applied to the event status"""
+
     status_config_load_time = Column(
         'status_config_load_time',
         col_type='int',
@@ -171,6 +185,13 @@ class Eventconsolestatus(Table):
     )
     """The number of events received since startup of the Event Console"""
 
+    status_match_queue_length = Column(
+        'status_match_queue_length',
+        col_type='int',
+        description='The number of received messages waiting to be processed',
+    )
+    """The number of received messages waiting to be processed"""
+
     status_message_rate = Column(
         'status_message_rate',
         col_type='float',
@@ -206,6 +227,20 @@ class Eventconsolestatus(Table):
     )
     """The number of message overflows, i.e. messages simply dropped due to an overflow of the Event Console"""
 
+    status_queue_drop_rate = Column(
+        'status_queue_drop_rate',
+        col_type='float',
+        description='The rate of messages dropped because of a full ingest queue',
+    )
+    """The rate of messages dropped because of a full ingest queue"""
+
+    status_queue_drops = Column(
+        'status_queue_drops',
+        col_type='int',
+        description='The number of messages dropped because of a full ingest queue since startup of the Event Console',
+    )
+    """The number of messages dropped because of a full ingest queue since startup of the Event Console"""
+
     status_replication_last_sync = Column(
         'status_replication_last_sync',
         col_type='time',
@@ -55,6 +55,7 @@ counters_dir = _omd_path_str("tmp/check_mk/counters")
 tcp_cache_dir = _omd_path_str("tmp/check_mk/cache")
 data_source_cache_dir = _omd_path_str("tmp/check_mk/data_source_cache")
 snmp_scan_cache_dir = _omd_path_str("tmp/check_mk/snmp_scan_cache")
+snmpwalks_index_dir = _omd_path_str("tmp/check_mk/snmpwalks_index")
 include_cache_dir = _omd_path_str("tmp/check_mk/check_includes")
 tmp_dir = _omd_path("tmp/check_mk")
 logwatch_dir = _omd_path_str("var/check_mk/logwatch")
@@ -69,6 +70,8 @@ nagios_binary = _omd_path_str("bin/nagios")
 apache_config_dir = _omd_path_str("etc/apache")
 htpasswd_file = _omd_path_str("etc/htpasswd")
 livestatus_unix_socket = _omd_path_str("tmp/run/live")
+automation_helper_socket = _omd_path_str("tmp/run/automation-helper")
+automation_helper_generation_file = _omd_path_str("tmp/check_mk/automation-helper-generation")
 livebackendsdir = _omd_path_str("share/check_mk/livestatus")
 inventory_output_dir = _omd_path_str("var/check_mk/inventory")
 inventory_archive_dir = _omd_path_str("var/check_mk/inventory_archive")
@@ -5,10 +5,14 @@
 
 import errno
 import logging
+import mmap
 import os
+import struct
 import tempfile
+import time
+import uuid
 from collections.abc import Container, Iterable, Iterator, Mapping, Sequence
-from contextlib import suppress
+from contextlib import contextmanager, suppress
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Final, NamedTuple
@@ -17,6 +21,7 @@ import cmk.utils
 import cmk.utils.paths
 import cmk.utils.store as store
 from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.exceptions import MKGeneralException
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.log import VERBOSE
 from cmk.utils.regex import regex
@@ -65,6 +70,12 @@ _PiggybackTimeSettingsMap = Mapping[tuple[str | None, str], int]
 # "source_hostname":
 # - Path(tmp/check_mk/piggyback/HOST/SOURCE).name
 # - Path(tmp/check_mk/piggyback_sources/SOURCE).name
+#
+# "piggyback_index":
+# - tmp/check_mk/piggyback/.index
+#
+# "piggyback_segment":
+# - tmp/check_mk/piggyback/.segments/SOURCE
 
 
 def get_piggyback_raw_data(
@@ -80,7 +91,10 @@ def get_piggyback_raw_data(
     if not piggybacked_hostname:
         return []
 
-    piggyback_file_infos = _get_piggyback_processed_file_infos(piggybacked_hostname, time_settings)
+    index = _load_index()
+    piggyback_file_infos = _get_piggyback_processed_file_infos(
+        piggybacked_hostname, time_settings, index
+    )
     if not piggyback_file_infos:
         logger.log(
             VERBOSE,
@@ -95,7 +109,7 @@ def get_piggyback_raw_data(
             # Raw data is always stored as bytes. Later the content is
             # converted to unicode in abstact.py:_parse_info which respects
             # 'encoding' in section options.
-            raw_data = AgentRawData(store.load_bytes_from_file(file_info.file_path))
+            raw_data = AgentRawData(_load_raw_data(file_info, piggybacked_hostname, index))
 
         except OSError as e:
             reason = f"Cannot read piggyback raw data from source '{file_info.source_hostname}'"
@@ -140,19 +154,35 @@ def get_piggyback_raw_data(
     return piggyback_data
 
 
+def _load_raw_data(
+    file_info: PiggybackFileInfo,
+    piggybacked_hostname: HostName | HostAddress,
+    index: "_PiggybackIndex | None",
+) -> bytes:
+    if (
+        index is None
+        or (entry := index.entry(file_info.source_hostname, piggybacked_hostname)) is None
+        or not entry.segment
+    ):
+        return store.load_bytes_from_file(file_info.file_path)
+    return _read_from_segment(file_info.source_hostname, piggybacked_hostname, entry)
+
+
 def get_source_and_piggyback_hosts(
     time_settings: PiggybackTimeSettings,
 ) -> Iterator[tuple[HostName, HostName]]:
     """Generates all piggyback pig/piggybacked host pairs that have up-to-date data"""
 
-    for piggybacked_host_folder in _get_piggybacked_host_folders():
+    index = _load_index()
+    for piggybacked_hostname in _get_piggybacked_hostnames(index):
         for file_info in _get_piggyback_processed_file_infos(
-            HostName(piggybacked_host_folder.name),
+            piggybacked_hostname,
             time_settings,
+            index,
         ):
             if not file_info.successfully_processed:
                 continue
-            yield HostName(file_info.source_hostname), HostName(piggybacked_host_folder.name)
+            yield HostName(file_info.source_hostname), piggybacked_hostname
 
 
 def has_piggyback_raw_data(
@@ -161,7 +191,9 @@ def has_piggyback_raw_data(
 ) -> bool:
     return any(
         fi.successfully_processed
-        for fi in _get_piggyback_processed_file_infos(piggybacked_hostname, time_settings)
+        for fi in _get_piggyback_processed_file_infos(
+            piggybacked_hostname, time_settings, _load_index()
+        )
     )
 
 
@@ -228,6 +260,7 @@ class _TimeSettingsMap:
 def _get_piggyback_processed_file_infos(
     piggybacked_hostname: HostName | HostAddress,
     time_settings: PiggybackTimeSettings,
+    index: "_PiggybackIndex | None",
 ) -> Sequence[PiggybackFileInfo]:
     """Gather a list of piggyback files to read for further processing.
 
@@ -236,34 +269,67 @@ def _get_piggyback_processed_file_infos(
     functions. Therefor all these functions needs to deal with suddenly vanishing or
     updated files/directories.
     """
-    source_hostnames = get_source_hostnames(piggybacked_hostname)
+    source_hostnames = _get_source_hostnames(piggybacked_hostname, index)
     expanded_time_settings = _TimeSettingsMap(source_hostnames, piggybacked_hostname, time_settings)
     return [
         _get_piggyback_processed_file_info(
             source_hostname,
             piggybacked_hostname=piggybacked_hostname,
-            piggyback_file_path=_get_piggybacked_file_path(source_hostname, piggybacked_hostname),
+            piggyback_file_path=_get_piggyback_data_path(
+                source_hostname, piggybacked_hostname, index
+            ),
             settings=expanded_time_settings,
+            index=index,
         )
         for source_hostname in source_hostnames
         if not source_hostname.startswith(".")
     ]
 
 
+class _FileState(NamedTuple):
+    age: float
+    source_sending: bool
+    outdated: bool
+
+
+def _get_file_state(
+    source_hostname: HostName,
+    piggybacked_hostname: HostName | HostAddress,
+    piggyback_file_path: Path,
+    index: "_PiggybackIndex | None",
+) -> _FileState | None:
+    if index is not None:
+        return index.file_state(source_hostname, piggybacked_hostname)
+
+    try:
+        file_age = cmk.utils.cachefile_age(piggyback_file_path)
+    except FileNotFoundError:
+        return None
+
+    status_file_path = _get_source_status_file_path(source_hostname)
+    if not status_file_path.exists():
+        return _FileState(file_age, False, True)
+
+    return _FileState(
+        file_age, True, _is_piggyback_file_outdated(status_file_path, piggyback_file_path)
+    )
+
+
 def _get_piggyback_processed_file_info(
     source_hostname: HostName,
     *,
     piggybacked_hostname: HostName | HostAddress,
     piggyback_file_path: Path,
     settings: _TimeSettingsMap,
+    index: "_PiggybackIndex | None",
 ) -> PiggybackFileInfo:
-    try:
-        file_age = cmk.utils.cachefile_age(piggyback_file_path)
-    except FileNotFoundError:
+    file_state = _get_file_state(source_hostname, piggybacked_hostname, piggyback_file_path, index)
+    if file_state is None:
         return PiggybackFileInfo(
             source_hostname, piggyback_file_path, False, "Piggyback file is missing", 0
         )
 
+    file_age = file_state.age
     if (outdated := file_age - settings.max_cache_age(source_hostname, piggybacked_hostname)) > 0:
         return PiggybackFileInfo(
             source_hostname,
@@ -276,8 +342,7 @@ def _get_piggyback_processed_file_info(
     validity_period = settings.validity_period(source_hostname, piggybacked_hostname)
     validity_state = settings.validity_state(source_hostname, piggybacked_hostname)
 
-    status_file_path = _get_source_status_file_path(source_hostname)
-    if not status_file_path.exists():
+    if not file_state.source_sending:
         valid_msg = _validity_period_message(file_age, validity_period)
         return PiggybackFileInfo(
             source_hostname,
@@ -287,7 +352,7 @@ def _get_piggyback_processed_file_info(
             validity_state if valid_msg else 0,
         )
 
-    if _is_piggyback_file_outdated(status_file_path, piggyback_file_path):
+    if file_state.outdated:
         valid_msg = _validity_period_message(file_age, validity_period)
         return PiggybackFileInfo(
             source_hostname,
@@ -341,14 +406,23 @@ def remove_source_status_file(source_hostname: HostName) -> bool:
     """Remove the source_status_file of this piggyback host which will
     mark the piggyback data from this source as outdated."""
     source_status_path = _get_source_status_file_path(source_hostname)
-    return _remove_piggyback_file(source_status_path)
+    removed = _remove_piggyback_file(source_status_path)
+    with _updated_index() as (index, records):
+        if index.is_source_sending(source_hostname):
+            records.append(index.status_removed_record(source_hostname))
+    return removed
 
 
 def store_piggyback_raw_data(
     source_hostname: HostName,
     piggybacked_raw_data: Mapping[HostName, Sequence[bytes]],
 ) -> None:
+    if len(piggybacked_raw_data) >= _SEGMENT_MIN_PIGGYBACKED_HOSTS:
+        _store_piggyback_segment(source_hostname, piggybacked_raw_data)
+        return
+
     piggyback_file_paths = []
+    stored_files: list[_StoredData] = []
     for piggybacked_hostname, lines in piggybacked_raw_data.items():
         piggyback_file_path = _get_piggybacked_file_path(source_hostname, piggybacked_hostname)
         logger.log(
@@ -359,8 +433,10 @@ def store_piggyback_raw_data(
         # Raw data is always stored as bytes. Later the content is
         # converted to unicode in abstact.py:_parse_info which respects
         # 'encoding' in section options.
-        store.save_bytes_to_file(piggyback_file_path, b"%s\n" % b"\n".join(lines))
+        raw_data = b"%s\n" % b"\n".join(lines)
+        store.save_bytes_to_file(piggyback_file_path, raw_data)
         piggyback_file_paths.append(piggyback_file_path)
+        stored_files.append((piggybacked_hostname, 0, 0, len(raw_data)))
 
     # Store the last contact with this piggyback source to be able to filter outdated data later
     # We use the mtime of this file later for comparison.
@@ -370,16 +446,95 @@ def store_piggyback_raw_data(
         logger.log(VERBOSE, "Received piggyback data for %d hosts", len(piggybacked_raw_data))
 
         status_file_path = _get_source_status_file_path(source_hostname)
-        _store_status_file_of(status_file_path, piggyback_file_paths)
+        status_mtime = _store_status_file_of(status_file_path, piggyback_file_paths)
+        with _updated_index() as (index, records):
+            records.append(
+                _stored_data_record(
+                    "S",
+                    source_hostname,
+                    status_mtime,
+                    index.next_generation(source_hostname),
+                    stored_files,
+                )
+            )
     else:
         logger.debug("Received no piggyback data")
         remove_source_status_file(source_hostname)
 
 
+def _store_piggyback_segment(
+    source_hostname: HostName,
+    piggybacked_raw_data: Mapping[HostName, Sequence[bytes]],
+) -> None:
+    """Store the data of all piggybacked hosts in one segment file of the source
+
+    This saves creating and replacing a file per piggybacked host. The data of piggybacked hosts
+    which has been stored before and is not updated this time is copied from the previous
+    segment, until it is removed by the clean up."""
+    logger.log(
+        VERBOSE,
+        "Storing piggyback data for %d hosts in segment",
+        len(piggybacked_raw_data),
+    )
+
+    with _updated_index() as (index, _records):
+        generation = index.next_generation(source_hostname)
+        previous_entries = index.source_entries(source_hostname)
+
+    kept_data = []
+    for piggybacked_hostname, entry in previous_entries.items():
+        if not entry.segment or piggybacked_hostname in piggybacked_raw_data:
+            continue
+        try:
+            kept_data.append(
+                (
+                    piggybacked_hostname,
+                    entry,
+                    _read_from_segment(source_hostname, piggybacked_hostname, entry),
+                )
+            )
+        except OSError:
+            continue
+
+    segment_path = _get_segment_path(source_hostname)
+    stored_data, kept_data_by_time = _write_segment(
+        segment_path,
+        generation,
+        {
+            # See store_piggyback_raw_data()
+            piggybacked_hostname: b"%s\n" % b"\n".join(lines)
+            for piggybacked_hostname, lines in piggybacked_raw_data.items()
+        },
+        kept_data,
+    )
+
+    status_mtime = _store_status_file_of(
+        _get_source_status_file_path(source_hostname), [segment_path]
+    )
+    with _updated_index() as (_index, records):
+        records.extend(
+            _stored_data_record("F", source_hostname, mtime, kept_generation, kept_entries)
+            for (mtime, kept_generation), kept_entries in kept_data_by_time.items()
+        )
+        records.append(
+            _stored_data_record("S", source_hostname, status_mtime, generation, stored_data)
+        )
+
+    # The data of these hosts has been stored in a piggybacked host file before
+    for piggybacked_hostname, entry in previous_entries.items():
+        if entry.segment or piggybacked_hostname not in piggybacked_raw_data:
+            continue
+        piggyback_file_path = _get_piggybacked_file_path(source_hostname, piggybacked_hostname)
+        _remove_piggyback_file(piggyback_file_path)
+        with suppress(OSError):
+            piggyback_file_path.parent.rmdir()
+
+
 def _store_status_file_of(
     status_file_path: Path,
     piggyback_file_paths: Iterable[Path],
-) -> None:
+) -> float:
+    """Returns the mtime of the status file, which is also set for all piggyback files"""
     store.makedirs(status_file_path.parent)
 
     # Cannot use store.save_bytes_to_file like:
@@ -407,6 +562,7 @@ def _store_status_file_of(
             except FileNotFoundError:
                 continue
     os.rename(tmp_path, str(status_file_path))
+    return tmp_stats.st_mtime
 
 
 #   .--folders/files-------------------------------------------------------.
@@ -422,6 +578,16 @@ def _store_status_file_of(
 def get_source_hostnames(
     piggybacked_hostname: HostName | HostAddress | None = None,
 ) -> Sequence[HostName]:
+    return _get_source_hostnames(piggybacked_hostname, _load_index())
+
+
+def _get_source_hostnames(
+    piggybacked_hostname: HostName | HostAddress | None,
+    index: "_PiggybackIndex | None",
+) -> Sequence[HostName]:
+    if index is not None:
+        return index.source_hostnames(piggybacked_hostname)
+
     if piggybacked_hostname is None:
         return [
             HostName(source_host.name)
@@ -433,6 +599,12 @@ def get_source_hostnames(
     return [HostName(source_host.name) for source_host in _files_in(piggybacked_host_folder)]
 
 
+def _get_piggybacked_hostnames(index: "_PiggybackIndex | None") -> Sequence[HostName]:
+    if index is not None:
+        return list(index.entries)
+    return [HostName(folder.name) for folder in _get_piggybacked_host_folders()]
+
+
 def _get_piggybacked_host_folders() -> Sequence[Path]:
     return _files_in(cmk.utils.paths.piggyback_dir)
 
@@ -459,6 +631,562 @@ def _get_piggybacked_file_path(
     return cmk.utils.paths.piggyback_dir / piggybacked_hostname / source_hostname
 
 
+def _get_segments_dir() -> Path:
+    return cmk.utils.paths.piggyback_dir / ".segments"
+
+
+def _get_segment_path(source_hostname: HostName) -> Path:
+    return _get_segments_dir() / source_hostname
+
+
+def _get_piggyback_data_path(
+    source_hostname: HostName,
+    piggybacked_hostname: HostName | HostAddress,
+    index: "_PiggybackIndex | None",
+) -> Path:
+    """The piggybacked host file or the segment file of the source containing the data"""
+    if (
+        index is not None
+        and (entry := index.entry(source_hostname, piggybacked_hostname)) is not None
+        and entry.segment
+    ):
+        return _get_segment_path(source_hostname)
+    return _get_piggybacked_file_path(source_hostname, piggybacked_hostname)
+
+
+# .
+#   .--index---------------------------------------------------------------.
+#   |                       _           _                                  |
+#   |                      (_)_ __   __| | _____  __                       |
+#   |                      | | '_ \ / _` |/ _ \ \/ /                       |
+#   |                      | | | | | (_| |  __/>  <                        |
+#   |                      |_|_| |_|\__,_|\___/_/\_\                       |
+#   |                                                                      |
+#   '----------------------------------------------------------------------'
+
+# The piggyback index is an append-only log of all stored piggyback data and source status
+# files. Instead of listing the piggyback directories and stat-ing every single file, the
+# readers replay the log, and long running processes only read the records which have been
+# appended since their last lookup. The log is written while holding the index lock by
+# store_piggyback_raw_data(), remove_source_status_file() and the clean up. If it grows too
+# much, it is compacted by writing a new index file.
+#
+# In case there is no index file, the readers fall back to the piggybacked host files and the
+# next writer rebuilds the index from the existing files.
+#
+# The first line identifies the index file, all further lines are records (fields separated
+# by tabs):
+#
+#   S SOURCE MTIME GENERATION [TARGET SEGMENT OFFSET LENGTH]...  data stored, status updated
+#   F SOURCE MTIME GENERATION [TARGET SEGMENT OFFSET LENGTH]...  data stored before
+#   R SOURCE GENERATION                                          status file removed
+#   D SOURCE [TARGET]...                                         piggyback data removed
+#
+# Every store of a source starts a new generation: Data of the source with an older generation
+# has not been updated by the source and is outdated. SEGMENT is the generation of the segment
+# file containing the data or 0 for piggybacked host files.
+
+_INDEX_VERSION: Final = "2"
+
+# Compact the index if it contains this many more records than piggyback data
+_INDEX_COMPACTION_SLACK: Final = 10000
+
+
+class _IndexEntry(NamedTuple):
+    mtime: float
+    generation: int
+    segment: int
+    offset: int
+    length: int
+
+
+class _SourceStatus(NamedTuple):
+    mtime: float | None  # None: status file does not exist
+    generation: int
+
+
+# piggybacked host name, segment, offset, length
+_StoredData = tuple[HostName, int, int, int]
+
+
+class _PiggybackIndex:
+    def __init__(self) -> None:
+        self.entries: dict[HostName, dict[HostName, _IndexEntry]] = {}
+        self.sources: dict[HostName, _SourceStatus] = {}
+        self.num_records = 0
+
+    def apply(self, record: str) -> None:
+        kind, source_name, *fields = record.split("\t")
+        source_hostname = HostName(source_name)
+        if kind in ("S", "F"):
+            mtime = float(fields[0])
+            generation = int(fields[1])
+            for target, segment, offset, length in zip(*[iter(fields[2:])] * 4):
+                self.entries.setdefault(HostName(target), {})[source_hostname] = _IndexEntry(
+                    mtime, generation, int(segment), int(offset), int(length)
+                )
+            if kind == "S":
+                self.sources[source_hostname] = _SourceStatus(mtime, generation)
+            self.num_records += 1 + len(fields) // 4
+        elif kind == "R":
+            self.sources[source_hostname] = _SourceStatus(None, int(fields[0]))
+            self.num_records += 1
+        elif kind == "D":
+            for target in fields:
+                if (source_entries := self.entries.get(HostName(target))) is None:
+                    continue
+                source_entries.pop(source_hostname, None)
+                if not source_entries:
+                    del self.entries[HostName(target)]
+            self.num_records += 1 + len(fields)
+        else:
+            raise ValueError(record)
+
+    def num_files(self) -> int:
+        return sum(len(source_entries) for source_entries in self.entries.values())
+
+    def entry(
+        self, source_hostname: HostName, piggybacked_hostname: HostName | HostAddress
+    ) -> _IndexEntry | None:
+        return self.entries.get(HostName(piggybacked_hostname), {}).get(source_hostname)
+
+    def source_entries(self, source_hostname: HostName) -> Mapping[HostName, _IndexEntry]:
+        return {
+            piggybacked_hostname: entry
+            for piggybacked_hostname, source_entries in self.entries.items()
+            if (entry := source_entries.get(source_hostname)) is not None
+        }
+
+    def source_hostnames(
+        self, piggybacked_hostname: HostName | HostAddress | None
+    ) -> Sequence[HostName]:
+        if piggybacked_hostname is None:
+            return [
+                source_hostname
+                for source_entries in self.entries.values()
+                for source_hostname in source_entries
+            ]
+        return list(self.entries.get(HostName(piggybacked_hostname), ()))
+
+    def is_source_sending(self, source_hostname: HostName) -> bool:
+        return (status := self.sources.get(source_hostname)) is not None and (
+            status.mtime is not None
+        )
+
+    def file_state(
+        self, source_hostname: HostName, piggybacked_hostname: HostName | HostAddress
+    ) -> _FileState | None:
+        if (entry := self.entry(source_hostname, piggybacked_hostname)) is None:
+            return None
+
+        age = time.time() - entry.mtime
+        if (status := self.sources.get(source_hostname)) is None or status.mtime is None:
+            return _FileState(age, False, True)
+        return _FileState(age, True, entry.generation != status.generation)
+
+    def next_generation(self, source_hostname: HostName) -> int:
+        status = self.sources.get(source_hostname)
+        return 1 if status is None else status.generation + 1
+
+    def status_removed_record(self, source_hostname: HostName) -> str:
+        status = self.sources.get(source_hostname)
+        return f"R\t{source_hostname}\t{0 if status is None else status.generation}"
+
+    @staticmethod
+    def data_removed_record(
+        source_hostname: HostName, piggybacked_hostnames: Iterable[HostName]
+    ) -> str:
+        return "\t".join(["D", source_hostname, *piggybacked_hostnames])
+
+    def records(self) -> Iterator[str]:
+        """The records needed to restore the current state"""
+        entries_by_source: dict[HostName, dict[tuple[float, int], list[_StoredData]]] = {}
+        for piggybacked_hostname, source_entries in self.entries.items():
+            for source_hostname, entry in source_entries.items():
+                entries_by_source.setdefault(source_hostname, {}).setdefault(
+                    (entry.mtime, entry.generation), []
+                ).append((piggybacked_hostname, entry.segment, entry.offset, entry.length))
+
+        for source_hostname in sorted(set(self.sources) | set(entries_by_source)):
+            status = self.sources.get(source_hostname, _SourceStatus(None, 0))
+            entries = entries_by_source.get(source_hostname, {})
+            current_data = (
+                [] if status.mtime is None else entries.pop((status.mtime, status.generation), [])
+            )
+            for (mtime, generation), stored_data in entries.items():
+                yield _stored_data_record("F", source_hostname, mtime, generation, stored_data)
+            if status.mtime is not None:
+                yield _stored_data_record(
+                    "S", source_hostname, status.mtime, status.generation, current_data
+                )
+            elif entries:
+                yield self.status_removed_record(source_hostname)
+
+
+def _stored_data_record(
+    kind: str,
+    source_hostname: HostName,
+    mtime: float,
+    generation: int,
+    stored_data: Iterable[_StoredData],
+) -> str:
+    return "\t".join(
+        [
+            kind,
+            source_hostname,
+            repr(mtime),
+            str(generation),
+            *(
+                field
+                for piggybacked_hostname, segment, offset, length in stored_data
+                for field in (piggybacked_hostname, str(segment), str(offset), str(length))
+            ),
+        ]
+    )
+
+
+class _IndexReader:
+    """Replays the index file, reading only the records appended since the last load"""
+
+    def __init__(self, path: Path) -> None:
+        self.path: Final = path
+        self._file_id: tuple[int, int] | None = None
+        self._header = b""
+        self._offset = 0
+        self._index = _PiggybackIndex()
+
+    def load(self) -> _PiggybackIndex | None:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+
+        try:
+            stat = os.fstat(fd)
+            if (
+                (stat.st_dev, stat.st_ino) != self._file_id
+                or stat.st_size < self._offset
+                # Do not get fooled by reused inodes
+                or (
+                    stat.st_size > self._offset
+                    and os.pread(fd, len(self._header), 0) != self._header
+                )
+            ):
+                self._file_id = (stat.st_dev, stat.st_ino)
+                self._header = b""
+                self._offset = 0
+                self._index = _PiggybackIndex()
+
+            if stat.st_size > self._offset:
+                data = os.pread(fd, stat.st_size - self._offset, self._offset)
+                # Ignore an incomplete last record, it is read again with the next load
+                complete = data.rfind(b"\n") + 1
+                lines = data[:complete].decode("utf-8").splitlines()
+                if not self._header:
+                    if not lines or not lines[0].startswith(f"V\t{_INDEX_VERSION}\t"):
+                        return None
+                    self._header = lines.pop(0).encode("utf-8") + b"\n"
+                for line in lines:
+                    self._index.apply(line)
+                self._offset += complete
+        finally:
+            os.close(fd)
+
+        return self._index
+
+
+_index_reader: _IndexReader | None = None
+
+
+def _get_index_path() -> Path:
+    return cmk.utils.paths.piggyback_dir / ".index"
+
+
+def _get_index_lock_path() -> Path:
+    return cmk.utils.paths.piggyback_dir / ".index.lock"
+
+
+def _load_index() -> _PiggybackIndex | None:
+    global _index_reader
+
+    index_path = _get_index_path()
+    if _index_reader is None or _index_reader.path != index_path:
+        _index_reader = _IndexReader(index_path)
+    return _index_reader.load()
+
+
+@contextmanager
+def _updated_index() -> Iterator[tuple[_PiggybackIndex, list[str]]]:
+    """Lock the index and append the records collected by the caller
+
+    The index is built from the existing files in case it does not exist."""
+    with store.locked(_get_index_lock_path()):
+        if (index := _load_index()) is None:
+            _write_index(_scan_piggyback_files().records())
+            if (index := _load_index()) is None:
+                raise MKGeneralException(f"Cannot load piggyback index {_get_index_path()}")
+
+        records: list[str] = []
+        yield index, records
+        if not records:
+            return
+
+        with _get_index_path().open("ab", buffering=0) as f:
+            f.write("".join(f"{record}\n" for record in records).encode("utf-8"))
+
+        if (index := _load_index()) is not None and (
+            index.num_records > 2 * index.num_files() + _INDEX_COMPACTION_SLACK
+        ):
+            _write_index(index.records())
+
+
+def _write_index(records: Iterable[str]) -> None:
+    index_path = _get_index_path()
+    with tempfile.NamedTemporaryFile(
+        "wb", dir=str(index_path.parent), prefix=f"{index_path.name}.new", delete=False
+    ) as tmp:
+        tmp.write(f"V\t{_INDEX_VERSION}\t{uuid.uuid4().hex}\n".encode("utf-8"))
+        for record in records:
+            tmp.write(f"{record}\n".encode("utf-8"))
+    os.rename(tmp.name, str(index_path))
+
+
+def _scan_piggyback_files() -> _PiggybackIndex:
+    index = _PiggybackIndex()
+    status_mtimes: dict[HostName, tuple[float, float]] = {}
+    for source_state_file in _get_source_state_files():
+        try:
+            stat = os.stat(str(source_state_file))
+        except FileNotFoundError:
+            continue
+        status_mtimes[HostName(source_state_file.name)] = (stat.st_mtime, stat[8])
+
+    # The generation of the last store is the one of the segment or the next one in case the
+    # piggybacked host files have been stored after the segment.
+    generations: dict[HostName, int] = {}
+    current_segments = set()
+    for segment_path in _files_in(_get_segments_dir()):
+        source_hostname = HostName(segment_path.name)
+        try:
+            stat = os.stat(str(segment_path))
+            segment = _Segment(segment_path)
+        except OSError:
+            continue
+        try:
+            segment_directory = list(segment.directory())
+        finally:
+            segment.close()
+
+        status_mtime = status_mtimes.get(source_hostname)
+        # Same as _is_piggyback_file_outdated()
+        if status_mtime is not None and status_mtime[1] <= stat[8]:
+            current_segments.add(source_hostname)
+            generations[source_hostname] = segment.generation
+        else:
+            generations[source_hostname] = segment.generation + 1
+        for piggybacked_hostname, mtime, generation, offset, length in segment_directory:
+            index.entries.setdefault(piggybacked_hostname, {})[source_hostname] = _IndexEntry(
+                stat.st_mtime if mtime is None else mtime,
+                generation,
+                segment.generation,
+                offset,
+                length,
+            )
+
+    for source_hostname, generation in generations.items():
+        index.sources[source_hostname] = _SourceStatus(None, generation)
+    for source_hostname, (mtime, _mtime_secs) in status_mtimes.items():
+        index.sources[source_hostname] = _SourceStatus(mtime, generations.get(source_hostname, 1))
+
+    for piggybacked_host_folder in _get_piggybacked_host_folders():
+        for piggybacked_host_source in _files_in(piggybacked_host_folder):
+            source_hostname = HostName(piggybacked_host_source.name)
+            try:
+                stat = os.stat(str(piggybacked_host_source))
+            except FileNotFoundError:
+                continue
+            # Same as _is_piggyback_file_outdated()
+            status_mtime = status_mtimes.get(source_hostname)
+            is_current = (
+                status_mtime is not None
+                and status_mtime[1] <= stat[8]
+                and source_hostname not in current_segments
+            )
+            index.entries.setdefault(HostName(piggybacked_host_folder.name), {})[
+                source_hostname
+            ] = _IndexEntry(
+                stat.st_mtime,
+                index.sources[source_hostname].generation if is_current else 0,
+                0,
+                0,
+                stat.st_size,
+            )
+
+    return index
+
+
+def rebuild_piggyback_index() -> None:
+    """Rebuild the index after the piggyback files have been changed without updating it"""
+    with store.locked(_get_index_lock_path()):
+        _write_index(_scan_piggyback_files().records())
+
+
+# .
+#   .--segments------------------------------------------------------------.
+#   |                                                 _                    |
+#   |             ___  ___  __ _ _ __ ___   ___ _ __ | |_ ___              |
+#   |            / __|/ _ \/ _` | '_ ` _ \ / _ \ '_ \| __/ __|             |
+#   |            \__ \  __/ (_| | | | | | |  __/ | | | |_\__ \             |
+#   |            |___/\___|\__, |_| |_| |_|\___|_| |_|\__|___/             |
+#   |                      |___/                                           |
+#   '----------------------------------------------------------------------'
+
+# Sources sending data for many piggybacked hosts store all of it in one segment file, instead
+# of one file per piggybacked host. The index refers to the data by offset and length, the
+# readers map the segment file and only copy the slice they need.
+#
+# File layout (all integers in native byte order, the file is local to the site):
+#
+#   header:     magic, version, generation of the store, size of the directory
+#   directory:  TARGET MTIME GENERATION OFFSET LENGTH lines, the offsets are relative to the
+#               start of the data, MTIME is empty for the data of this store (see the mtime
+#               of the segment file)
+#   data:       the piggyback data of all piggybacked hosts
+
+_SEGMENT_MAGIC: Final = b"CMKP"
+_SEGMENT_VERSION: Final = 1
+_SEGMENT_HEADER: Final = struct.Struct("=4sIQQ")
+
+# Sources with less piggybacked hosts store one file per piggybacked host
+_SEGMENT_MIN_PIGGYBACKED_HOSTS: Final = 100
+
+
+class _Segment:
+    """A memory mapped segment file"""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # Empty file
+                raise OSError(f"Invalid piggyback segment: {path}") from e
+
+        try:
+            magic, version, generation, directory_size = _SEGMENT_HEADER.unpack_from(self._data)
+        except struct.error as e:
+            self._data.close()
+            raise OSError(f"Invalid piggyback segment: {path}") from e
+        if magic != _SEGMENT_MAGIC or version != _SEGMENT_VERSION:
+            self._data.close()
+            raise OSError(f"Invalid piggyback segment: {path}")
+
+        self.generation: Final[int] = generation
+        self._data_start: Final = _SEGMENT_HEADER.size + directory_size
+
+    def close(self) -> None:
+        self._data.close()
+
+    def directory(self) -> Iterator[tuple[HostName, float | None, int, int, int]]:
+        directory = self._data[_SEGMENT_HEADER.size : self._data_start].decode("utf-8")
+        for line in directory.splitlines():
+            piggybacked_hostname, mtime, generation, offset, length = line.split("\t")
+            yield (
+                HostName(piggybacked_hostname),
+                float(mtime) if mtime else None,
+                int(generation),
+                self._data_start + int(offset),
+                int(length),
+            )
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self._data[offset : offset + length]
+
+
+def _write_segment(
+    segment_path: Path,
+    generation: int,
+    raw_data_by_host: Mapping[HostName, bytes],
+    kept_data: Iterable[tuple[HostName, _IndexEntry, bytes]],
+) -> tuple[Sequence[_StoredData], Mapping[tuple[float, int], Sequence[_StoredData]]]:
+    """Write a segment file and return the index entries of the new and the kept data"""
+    directory = []
+    data = []
+    size = 0
+    for piggybacked_hostname, raw_data in raw_data_by_host.items():
+        directory.append(f"{piggybacked_hostname}\t\t{generation}\t{size}\t{len(raw_data)}\n")
+        data.append(raw_data)
+        size += len(raw_data)
+
+    kept = []
+    for piggybacked_hostname, entry, raw_data in kept_data:
+        directory.append(
+            f"{piggybacked_hostname}\t{entry.mtime!r}\t{entry.generation}"
+            f"\t{size}\t{len(raw_data)}\n"
+        )
+        kept.append((piggybacked_hostname, entry, size, len(raw_data)))
+        data.append(raw_data)
+        size += len(raw_data)
+
+    encoded_directory = "".join(directory).encode("utf-8")
+    data_start = _SEGMENT_HEADER.size + len(encoded_directory)
+
+    store.makedirs(segment_path.parent)
+    store.save_bytes_to_file(
+        segment_path,
+        b"".join(
+            [
+                _SEGMENT_HEADER.pack(
+                    _SEGMENT_MAGIC, _SEGMENT_VERSION, generation, len(encoded_directory)
+                ),
+                encoded_directory,
+                *data,
+            ]
+        ),
+    )
+
+    stored_data = []
+    offset = data_start
+    for piggybacked_hostname, raw_data in raw_data_by_host.items():
+        stored_data.append((piggybacked_hostname, generation, offset, len(raw_data)))
+        offset += len(raw_data)
+
+    kept_data_by_time: dict[tuple[float, int], list[_StoredData]] = {}
+    for piggybacked_hostname, entry, kept_offset, length in kept:
+        kept_data_by_time.setdefault((entry.mtime, entry.generation), []).append(
+            (piggybacked_hostname, generation, data_start + kept_offset, length)
+        )
+
+    return stored_data, kept_data_by_time
+
+
+# The segments mapped by this process
+_mapped_segments: dict[Path, _Segment] = {}
+
+
+def _read_from_segment(
+    source_hostname: HostName,
+    piggybacked_hostname: HostName | HostAddress,
+    entry: _IndexEntry,
+) -> bytes:
+    segment_path = _get_segment_path(source_hostname)
+    if (segment := _mapped_segments.get(segment_path)) is None or (
+        segment.generation != entry.segment
+    ):
+        if segment is not None:
+            del _mapped_segments[segment_path]
+            segment.close()
+        segment = _mapped_segments[segment_path] = _Segment(segment_path)
+
+    if segment.generation == entry.segment:
+        return segment.read(entry.offset, entry.length)
+
+    # The segment has been replaced after the index has been loaded
+    for name, _mtime, _generation, offset, length in segment.directory():
+        if name == piggybacked_hostname:
+            return segment.read(offset, length)
+    raise FileNotFoundError(f"No piggyback data for '{piggybacked_hostname}' in {segment_path}")
+
+
 # .
 #   .--clean up------------------------------------------------------------.
 #   |                     _                                                |
@@ -484,21 +1212,26 @@ def cleanup_piggyback_files(time_settings: PiggybackTimeSettings) -> None:
         time_settings,
     )
 
-    piggybacked_hosts_settings = _get_piggybacked_hosts_settings(time_settings)
+    with _updated_index() as (index, records):
+        piggybacked_hosts_settings = _get_piggybacked_hosts_settings(time_settings, index)
+        records.extend(_cleanup_old_source_status_files(piggybacked_hosts_settings, index))
 
-    _cleanup_old_source_status_files(piggybacked_hosts_settings)
-    _cleanup_old_piggybacked_files(piggybacked_hosts_settings)
+    # The removed status files have to be known to the index when checking the piggyback files
+    with _updated_index() as (index, records):
+        records.extend(_cleanup_old_piggybacked_files(piggybacked_hosts_settings, index))
 
 
 def _get_piggybacked_hosts_settings(
     time_settings: PiggybackTimeSettings,
+    index: _PiggybackIndex,
 ) -> Sequence[tuple[Path, Sequence[Path], _TimeSettingsMap]]:
     piggybacked_hosts_settings = []
-    for piggybacked_host_folder in _get_piggybacked_host_folders():
-        source_hosts = _files_in(piggybacked_host_folder)
+    for piggybacked_hostname, source_entries in index.entries.items():
+        piggybacked_host_folder = cmk.utils.paths.piggyback_dir / piggybacked_hostname
+        source_hosts = [piggybacked_host_folder / source_host for source_host in source_entries]
         time_settings_map = _TimeSettingsMap(
-            [HostName(source_host.name) for source_host in source_hosts],
-            HostName(piggybacked_host_folder.name),
+            list(source_entries),
+            piggybacked_hostname,
             time_settings,
         )
         piggybacked_hosts_settings.append(
@@ -508,11 +1241,14 @@ def _get_piggybacked_hosts_settings(
 
 
 def _cleanup_old_source_status_files(
-    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path], _TimeSettingsMap]]
-) -> None:
+    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path], _TimeSettingsMap]],
+    index: _PiggybackIndex,
+) -> Sequence[str]:
     """Remove source status files which exceed configured maximum cache age.
     There may be several 'Piggybacked Host Files' rules where the max age is configured.
-    We simply use the greatest one per source."""
+    We simply use the greatest one per source.
+
+    Returns the index records of the removed files."""
 
     max_cache_age_by_sources: dict[str, int] = {}
     for piggybacked_host_folder, source_hosts, time_settings in piggybacked_hosts_settings:
@@ -526,19 +1262,21 @@ def _cleanup_old_source_status_files(
             if max_cache_age_of_source is None or max_cache_age_of_source <= max_cache_age:
                 max_cache_age_by_sources[source_host.name] = max_cache_age
 
-    for source_state_file in _get_source_state_files():
-        try:
-            file_age = cmk.utils.cachefile_age(source_state_file)
-        except FileNotFoundError:
+    records = []
+    for source_hostname, status in index.sources.items():
+        if status.mtime is None:
             continue  # File has been removed, that's OK.
 
+        source_state_file = _get_source_status_file_path(source_hostname)
+        file_age = time.time() - status.mtime
+
         # No entry -> no file
-        max_cache_age_of_source = max_cache_age_by_sources.get(source_state_file.name)
+        max_cache_age_of_source = max_cache_age_by_sources.get(source_hostname)
         if max_cache_age_of_source is None:
             logger.log(
                 VERBOSE,
                 "No piggyback data from source '%s'",
-                source_state_file.name,
+                source_hostname,
             )
             continue
 
@@ -550,20 +1288,28 @@ def _cleanup_old_source_status_files(
                 Age(file_age - max_cache_age_of_source),
             )
             _remove_piggyback_file(source_state_file)
+            records.append(index.status_removed_record(source_hostname))
+    return records
 
 
 def _cleanup_old_piggybacked_files(
-    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path], _TimeSettingsMap]]
-) -> None:
-    """Remove piggybacked data files which exceed configured maximum cache age."""
+    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path], _TimeSettingsMap]],
+    index: _PiggybackIndex,
+) -> Sequence[str]:
+    """Remove piggybacked data files which exceed configured maximum cache age.
+
+    Returns the index records of the removed files."""
 
+    removed_by_sources: dict[HostName, list[HostName]] = {}
     for piggybacked_host_folder, source_hosts, time_settings in piggybacked_hosts_settings:
+        num_kept = 0
         for piggybacked_host_source in source_hosts:
             file_info = _get_piggyback_processed_file_info(
                 HostName(piggybacked_host_source.name),
                 piggybacked_hostname=HostName(piggybacked_host_folder.name),
                 piggyback_file_path=piggybacked_host_source,
                 settings=time_settings,
+                index=index,
             )
 
             if not file_info.successfully_processed:
@@ -573,13 +1319,27 @@ def _cleanup_old_piggybacked_files(
                     piggybacked_host_source,
                     file_info.message,
                 )
-                _remove_piggyback_file(piggybacked_host_source)
+                if (
+                    entry := index.entry(
+                        HostName(piggybacked_host_source.name),
+                        HostName(piggybacked_host_folder.name),
+                    )
+                ) is None or not entry.segment:
+                    _remove_piggyback_file(piggybacked_host_source)
+                removed_by_sources.setdefault(HostName(piggybacked_host_source.name), []).append(
+                    HostName(piggybacked_host_folder.name)
+                )
+            else:
+                num_kept += 1
+
+        if num_kept:
+            continue
 
         # Remove empty backed host directory
         try:
             piggybacked_host_folder.rmdir()
         except OSError as e:
-            if e.errno == errno.ENOTEMPTY:
+            if e.errno in (errno.ENOTEMPTY, errno.ENOENT):
                 continue
             raise
         logger.log(
@@ -587,3 +1347,51 @@ def _cleanup_old_piggybacked_files(
             "Piggyback folder '%s' is empty. Removed it.",
             piggybacked_host_folder,
         )
+
+    _cleanup_unused_segments(index, removed_by_sources)
+
+    return [
+        index.data_removed_record(source_hostname, piggybacked_hostnames)
+        for source_hostname, piggybacked_hostnames in removed_by_sources.items()
+    ]
+
+
+def _cleanup_unused_segments(
+    index: _PiggybackIndex,
+    removed_by_sources: Mapping[HostName, Iterable[HostName]],
+) -> None:
+    """Remove segment files which do not contain any piggyback data in use anymore"""
+    removed = {
+        (source_hostname, piggybacked_hostname)
+        for source_hostname, piggybacked_hostnames in removed_by_sources.items()
+        for piggybacked_hostname in piggybacked_hostnames
+    }
+    sources_in_use = {
+        source_hostname
+        for piggybacked_hostname, source_entries in index.entries.items()
+        for source_hostname, entry in source_entries.items()
+        if entry.segment and (source_hostname, piggybacked_hostname) not in removed
+    }
+
+    for segment_path in _files_in(_get_segments_dir()):
+        source_hostname = HostName(segment_path.name)
+        if source_hostname in sources_in_use:
+            continue
+
+        # Keep segments which have been written after loading the index
+        if (status := index.sources.get(source_hostname)) is None:
+            continue
+        try:
+            segment = _Segment(segment_path)
+        except OSError:
+            continue
+        segment.close()
+        if segment.generation > status.generation:
+            continue
+
+        logger.log(
+            VERBOSE,
+            "Piggyback segment '%s' contains no data in use. Remove it.",
+            segment_path,
+        )
+        _remove_piggyback_file(segment_path)
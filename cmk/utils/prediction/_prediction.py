@@ -56,6 +56,10 @@ DataStats = list[_DataStat]
 
 _GroupByFunction = Callable[[Timestamp], tuple[Timegroup, Timestamp]]
 
+# Series with at least this number of points are processed using numpy (see _vectorized.py). For
+# smaller series, the overhead of converting them to arrays (and of importing numpy) dominates.
+_NUMPY_MIN_POINTS = 2000
+
 
 @dataclass(frozen=True)
 class _RRDResponse:
@@ -184,8 +188,16 @@ class TimeSeries:
         upsa = []
         i = 0
         start, end, step = twindow
-        current_times = rrd_timestamps(self.twindow)
         if start != self.start or end != self.end or step != self.step:
+            if len(self.values) >= _NUMPY_MIN_POINTS:
+                from ._vectorized import bfill_upsample
+
+                if (
+                    upsampled := bfill_upsample(self.twindow, self.values, twindow, shift)
+                ) is not None:
+                    return upsampled
+
+            current_times = rrd_timestamps(self.twindow)
             for t in range(start, end, step):
                 if t >= current_times[i] + shift:
                     i += 1
@@ -208,8 +220,14 @@ class TimeSeries:
         dwsa = []
         co: TimeSeriesValues = []
         start, end, step = twindow
-        desired_times = rrd_timestamps(twindow)
         if start != self.start or end != self.end or step != self.step:
+            if len(self.values) >= _NUMPY_MIN_POINTS:
+                from ._vectorized import downsample
+
+                if (downsampled := downsample(self.twindow, self.values, twindow, cf)) is not None:
+                    return downsampled
+
+            desired_times = rrd_timestamps(twindow)
             i = 0
             for t, val in self.time_data_pairs():
                 if t > desired_times[i]:
@@ -535,19 +553,47 @@ def get_timegroup_relative_time(
 def _calculate_data_for_prediction(
     raw_slices: Sequence[tuple[TimeSeries, int]],
 ) -> PredictionData:
-    twindow, slices = _upsample(raw_slices)
+    if sum(len(ts) for ts, _shift in raw_slices) >= _NUMPY_MIN_POINTS:
+        twindow, points = _upsampled_data_stats_numpy(raw_slices)
+    else:
+        twindow, slices = _upsample(raw_slices)
+        points = _data_stats(slices)
 
     return PredictionData(
         columns=["average", "min", "max", "stdev"],
-        points=_data_stats(slices),
+        points=points,
         data_twindow=list(twindow[:2]),
         step=twindow[2],
     )
 
 
+def _upsampled_data_stats_numpy(
+    raw_slices: Sequence[tuple[TimeSeries, int]],
+) -> tuple[TimeWindow, DataStats]:
+    """Same as _upsample and _data_stats, without creating the upsampled lists"""
+    from ._vectorized import data_stats, upsampled_array
+
+    twindow = raw_slices[0][0].twindow
+    if twindow[2] == 0:
+        raise RuntimeError("Got no historic metrics")
+
+    if (
+        upsampled := upsampled_array(
+            [(ts.twindow, ts.values, shift) for ts, shift in raw_slices], twindow
+        )
+    ) is None:
+        return twindow, _data_stats(_upsample(raw_slices)[1])
+    return twindow, data_stats(upsampled)
+
+
 def _data_stats(slices: list[TimeSeriesValues]) -> DataStats:
     "Statistically summarize all the upsampled RRD data"
 
+    if sum(len(s) for s in slices) >= _NUMPY_MIN_POINTS:
+        from ._vectorized import slice_stats
+
+        return slice_stats(slices)
+
     descriptors: DataStats = []
 
     for time_column in zip(*slices):
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""NumPy implementations of the time series operations of the prediction
+
+The functions compute the same results as the loops in _prediction.py, missing
+values (None) are represented by NaN. They return None if the input is not
+handled here (e.g. would make the loops fail), the caller then has to use the
+loop implementation.
+
+numpy is imported by _prediction.py only for large inputs, importing it is too
+expensive for processes computing small series only.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from ._prediction import ConsolidationFunctionName, DataStats, TimeSeriesValues, TimeWindow
+
+_FloatArray = npt.NDArray[np.float64]
+_IntArray = npt.NDArray[np.int64]
+
+
+def _follow(limits: _IntArray) -> _IntArray:
+    """Indexes i[k] = i[k-1] + (i[k-1] < limits[k]), starting with i[-1] = 0
+
+    This is how the loops advance through the series: at most one step per
+    iteration. For non-decreasing limits the result is
+    i[k] = min(k + 1, min(limits[j] + k - j for j <= k)).
+
+    >>> _follow(np.array([0, 0, 3, 3, 3, 4])).tolist()
+    [0, 0, 1, 2, 3, 4]
+    """
+    k = np.arange(len(limits), dtype=np.int64)
+    result: _IntArray = np.minimum(np.minimum.accumulate(limits - k) + k, k + 1)
+    return result
+
+
+def _to_array(values: Sequence[float | None]) -> _FloatArray:
+    return np.array(values, dtype=np.float64)  # None becomes NaN
+
+
+def _to_values(array: _FloatArray) -> TimeSeriesValues:
+    return [None if v != v else v for v in array.tolist()]  # v != v: NaN
+
+
+def bfill_indexes(
+    time_window: TimeWindow, num_values: int, twindow: TimeWindow, shift: int
+) -> _IntArray | None:
+    """Indexes of the values of the series for the backward filled target time window"""
+    series_start, series_end, series_step = time_window
+    start, end, step = twindow
+    if series_step <= 0 or step <= 0:
+        return None
+
+    num_times = len(range(series_start, series_end, series_step))
+    target_times = np.arange(start, end, step, dtype=np.int64)
+    # Number of series timestamps t_j with t_j + shift <= t
+    limits = np.maximum((target_times - shift - series_start) // series_step, 0)
+    indexes = _follow(limits)
+    if len(indexes) and indexes[-1] >= min(num_values, num_times):
+        return None
+    return indexes
+
+
+def bfill_upsample(
+    time_window: TimeWindow, values: TimeSeriesValues, twindow: TimeWindow, shift: int
+) -> TimeSeriesValues | None:
+    if (indexes := bfill_indexes(time_window, len(values), twindow, shift)) is None:
+        return None
+    upsampled: TimeSeriesValues = np.array(values, dtype=object)[indexes].tolist()
+    return upsampled
+
+
+def downsample(
+    time_window: TimeWindow,
+    values: TimeSeriesValues,
+    twindow: TimeWindow,
+    cf: ConsolidationFunctionName | None,
+) -> TimeSeriesValues | None:
+    series_start, series_end, series_step = time_window
+    start, end, step = twindow
+    aggr = "max" if cf is None else cf.lower()
+    if series_step <= 0 or step <= 0 or aggr not in ("max", "min", "average"):
+        return None
+
+    num_desired = len(range(start, end, step))
+    series_times = np.arange(series_start, series_end, series_step, dtype=np.int64)[
+        : len(values)
+    ] + np.int64(series_step)
+    if not len(series_times):
+        return None
+    # Number of desired timestamps d_m with d_m < t
+    groups = _follow(np.maximum((series_times - start - 1) // step, 0))
+    num_groups = int(groups[-1]) + 1
+    if num_groups > num_desired:
+        return None
+
+    data = _to_array(values[: len(series_times)])
+    group_starts = np.flatnonzero(np.diff(groups, prepend=-1))
+    consolidated = np.full(num_desired, np.nan)
+    if aggr == "average":
+        missing = np.isnan(data)
+        sums = np.add.reduceat(np.where(missing, 0.0, data), group_starts)
+        counts = np.add.reduceat((~missing).astype(np.int64), group_starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            consolidated[groups[group_starts]] = np.where(counts > 0, sums / counts, np.nan)
+    elif aggr == "max":
+        consolidated[groups[group_starts]] = np.fmax.reduceat(data, group_starts)
+    else:
+        consolidated[groups[group_starts]] = np.fmin.reduceat(data, group_starts)
+
+    return _to_values(consolidated)
+
+
+def data_stats(data: _FloatArray) -> DataStats:
+    """Statistically summarize the columns of the upsampled slices (one slice per row)"""
+    missing = np.isnan(data)
+    counts = (~missing).sum(axis=0)
+    present = np.where(missing, 0.0, data)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average = present.sum(axis=0) / counts
+        std_dev = np.where(
+            counts == 1,
+            np.abs(average),
+            np.sqrt(np.abs((present**2).sum(axis=0) - average**2 * counts) / (counts - 1.0)),
+        )
+    columns = np.column_stack(
+        (average, np.fmin.reduce(data, axis=0), np.fmax.reduce(data, axis=0), std_dev)
+    ).tolist()
+    return [
+        stats if count else [None, None, None, None]
+        for stats, count in zip(columns, counts.tolist())
+    ]
+
+
+def upsampled_array(
+    slices: Sequence[tuple[TimeWindow, TimeSeriesValues, int]], twindow: TimeWindow
+) -> _FloatArray | None:
+    """Upsample all slices to twindow, each slice becomes a row of the result"""
+    rows: list[_FloatArray] = []
+    for time_window, values, shift in slices:
+        if time_window == twindow:
+            rows.append(_to_array(values))
+        elif (indexes := bfill_indexes(time_window, len(values), twindow, shift)) is None:
+            return None
+        else:
+            rows.append(_to_array(values)[indexes])
+
+    length = min((len(row) for row in rows), default=0)
+    return np.array([row[:length] for row in rows], dtype=np.float64).reshape(len(rows), length)
+
+
+def slice_stats(data: Sequence[TimeSeriesValues]) -> DataStats:
+    length = min((len(row) for row in data), default=0)
+    array = np.array([row[:length] for row in data], dtype=np.float64)
+    return data_stats(array.reshape(len(data), length))
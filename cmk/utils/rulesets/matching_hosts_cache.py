@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Persisted cache of the hosts matching the host conditions of rules
+
+Computing the hosts matching the conditions of all rules is done again by
+every process loading the configuration. The results only depend on the
+condition itself and on the configured hosts, their tags and folders. They
+are written to a binary file once (during the core config creation) and can
+then be reused by all other processes until the host configuration changes.
+
+The file name is derived from a hash of the host configuration, the entries
+are addressed by a hash of the condition. The file is memory mapped and only
+the entries which are really needed are read.
+
+File layout (all integers in native byte order, the file is local to the site):
+
+    header:  magic, version, number of hosts, number of entries
+    index:   (condition hash, offset, number of hosts) for each entry, sorted by hash
+    data:    sorted uint32 indexes into the sorted host names for each entry
+"""
+
+import bisect
+import hashlib
+import mmap
+import struct
+from array import array
+from collections.abc import Collection, Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import Final
+
+import cmk.utils.store as store
+from cmk.utils.hostaddress import HostName
+from cmk.utils.tags import TagGroupID, TagID
+
+__all__ = ["MatchingHostsCache", "condition_key"]
+
+_MAGIC: Final = b"CMKR"
+_VERSION: Final = 1
+_HEADER: Final = struct.Struct("=4sIII")
+_INDEX_ENTRY: Final = struct.Struct("=16sQI4x")
+_KEY_SIZE: Final = 16
+# Scopes smaller than the matching hosts by this factor are looked up host by host
+_LOOKUP_FACTOR: Final = 16
+
+
+def condition_key(condition_cache_id: object) -> bytes:
+    """Hash of a condition, as computed by RulesetOptimizer._condition_cache_id"""
+    return hashlib.blake2b(repr(condition_cache_id).encode("utf-8"), digest_size=_KEY_SIZE).digest()
+
+
+def _host_config_hash(
+    host_names: Sequence[HostName],
+    host_tags: Mapping[HostName, Iterable[tuple[TagGroupID, TagID]]],
+    host_paths: Mapping[HostName, str],
+) -> str:
+    digest = hashlib.sha256()
+    for host_name in host_names:
+        digest.update(
+            repr(
+                (host_name, sorted(host_tags.get(host_name, ())), host_paths.get(host_name, "/"))
+            ).encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+class MatchingHostsCache:
+    """Lazily loaded, persisted matching hosts of host conditions"""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        all_configured_hosts: Iterable[HostName],
+        host_tags: Mapping[HostName, Iterable[tuple[TagGroupID, TagID]]],
+        host_paths: Mapping[HostName, str],
+    ) -> None:
+        super().__init__()
+        self._cache_dir = cache_dir
+        self._configured_hosts = all_configured_hosts
+        self._host_tags = host_tags
+        self._host_paths = host_paths
+
+        # Everything below is initialized on first access
+        self._host_names: Sequence[HostName] | None = None
+        self._path: Path | None = None
+        self._loaded = False
+        self._index_keys: list[bytes] = []
+        self._index_entries: list[tuple[int, int]] = []
+        self._data: memoryview | None = None
+        self._new_entries: dict[bytes, set[HostName]] = {}
+
+    @property
+    def path(self) -> Path:
+        if self._path is None:
+            self._path = (
+                self._cache_dir
+                / f"{_host_config_hash(self._sorted_host_names(), self._host_tags, self._host_paths)}.bin"
+            )
+        return self._path
+
+    def _sorted_host_names(self) -> Sequence[HostName]:
+        if self._host_names is None:
+            self._host_names = sorted(self._configured_hosts)
+        return self._host_names
+
+    def _load(self) -> None:
+        self._loaded = True
+        try:
+            with self.path.open("rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: Empty file
+            return
+
+        try:
+            magic, version, num_hosts, num_entries = _HEADER.unpack_from(data, 0)
+        except struct.error:
+            return
+        if (
+            magic != _MAGIC
+            or version != _VERSION
+            or num_hosts != len(self._sorted_host_names())
+            or len(data) < _HEADER.size + num_entries * _INDEX_ENTRY.size
+        ):
+            return
+
+        keys: list[bytes] = []
+        entries: list[tuple[int, int]] = []
+        for key, offset, num_matching in _INDEX_ENTRY.iter_unpack(
+            data[_HEADER.size : _HEADER.size + num_entries * _INDEX_ENTRY.size]
+        ):
+            keys.append(key)
+            entries.append((offset, num_matching))
+
+        self._index_keys = keys
+        self._index_entries = entries
+        self._data = memoryview(data)
+
+    def _host_indexes(self, key: bytes) -> memoryview | None:
+        if not self._loaded:
+            self._load()
+
+        if self._data is None:
+            return None
+
+        pos = bisect.bisect_left(self._index_keys, key)
+        if pos == len(self._index_keys) or self._index_keys[pos] != key:
+            return None
+
+        offset, num_matching = self._index_entries[pos]
+        return self._data[offset : offset + 4 * num_matching].cast("I")
+
+    def get(self, key: bytes, scope: Collection[HostName] | None = None) -> set[HostName] | None:
+        """Return the matching hosts of a condition or None if not cached
+
+        With a scope only the matching hosts within it are returned. For a few hosts they are
+        looked up in the sorted entry instead of decoding all matching hosts."""
+        if (new_entry := self._new_entries.get(key)) is not None:
+            return set(new_entry) if scope is None else new_entry.intersection(scope)
+
+        if (host_indexes := self._host_indexes(key)) is None:
+            return None
+
+        host_names = self._sorted_host_names()
+        if scope is None:
+            return set(map(host_names.__getitem__, host_indexes))
+        if _LOOKUP_FACTOR * len(scope) >= len(host_indexes):
+            return set(map(host_names.__getitem__, host_indexes)).intersection(scope)
+
+        matching = set()
+        for host_name in scope:
+            host_index = bisect.bisect_left(host_names, host_name)
+            if host_index == len(host_names) or host_names[host_index] != host_name:
+                continue
+            pos = bisect.bisect_left(host_indexes, host_index)
+            if pos < len(host_indexes) and host_indexes[pos] == host_index:
+                matching.add(host_name)
+        return matching
+
+    def add(self, key: bytes, matching_hosts: set[HostName]) -> None:
+        """Remember the matching hosts (of all configured hosts) of a condition"""
+        self._new_entries[key] = matching_hosts
+
+    def save(self) -> None:
+        """Write the loaded and the new entries to a new cache file
+
+        The cache files of other host configurations are removed."""
+        if not self._new_entries:
+            return
+
+        host_names = self._sorted_host_names()
+        host_index = {host_name: idx for idx, host_name in enumerate(host_names)}
+
+        entries: dict[bytes, array] = {}
+        if not self._loaded:
+            self._load()
+        for key in self._index_keys:
+            if (host_indexes := self._host_indexes(key)) is not None:
+                entries[key] = array("I", host_indexes)
+        for key, matching_hosts in self._new_entries.items():
+            entries[key] = array("I", sorted(host_index[h] for h in matching_hosts))
+
+        header = _HEADER.pack(_MAGIC, _VERSION, len(host_names), len(entries))
+        index = bytearray()
+        data = bytearray()
+        offset = _HEADER.size + len(entries) * _INDEX_ENTRY.size
+        for key, entry in sorted(entries.items()):
+            index += _INDEX_ENTRY.pack(key, offset + len(data), len(entry))
+            data += entry.tobytes()
+
+        store.makedirs(self._cache_dir)
+        store.save_bytes_to_file(self.path, header + bytes(index) + bytes(data))
+
+        for path in self._cache_dir.glob("*.bin"):
+            if path != self.path:
+                path.unlink(missing_ok=True)
@@ -4,7 +4,9 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """This module provides generic Check_MK ruleset processing functionality"""
 
+import re
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
 from re import Pattern
 from typing import cast, Generic, Literal, NamedTuple, Required, TypeAlias, TypedDict, TypeVar
 
@@ -25,6 +27,7 @@ from cmk.utils.servicename import ServiceName
 from cmk.utils.tags import TagConfig, TagGroupID, TagID
 
 from .conditions import HostOrServiceConditions, HostOrServiceConditionsSimple
+from .matching_hosts_cache import condition_key, MatchingHostsCache
 
 RulesetName = str  # Could move to a less cluttered module as it is often used on its own.
 TRuleValue = TypeVar("TRuleValue")
@@ -177,6 +180,7 @@ class RulesetMatcher:
         all_configured_hosts: set[HostName],
         clusters_of: dict[HostName, list[HostName]],
         nodes_of: dict[HostName, list[HostName]],
+        matching_hosts_cache_dir: Path | None = None,
     ) -> None:
         super().__init__()
 
@@ -190,19 +194,14 @@ class RulesetMatcher:
             all_configured_hosts,
             clusters_of,
             nodes_of,
+            matching_hosts_cache_dir,
         )
         self.labels_of_host = self.ruleset_optimizer.labels_of_host
         self.labels_of_service = self.ruleset_optimizer.labels_of_service
         self.label_sources_of_host = self.ruleset_optimizer.label_sources_of_host
         self.label_sources_of_service = self.ruleset_optimizer.label_sources_of_service
         self.clear_caches = self.ruleset_optimizer.clear_caches
-
-        self._service_match_cache: dict[
-            tuple[
-                tuple[ServiceName | None, int], PreprocessedPattern, tuple[tuple[str, object], ...]
-            ],
-            object,
-        ] = {}
+        self.save_matching_hosts_cache = self.ruleset_optimizer.save_matching_hosts_cache
 
     def is_matching_host_ruleset(
         self, match_object: RulesetMatchObject, ruleset: Iterable[RuleSpec[bool]]
@@ -298,72 +297,21 @@ class RulesetMatcher:
         Replaces service_extra_conf"""
         self.tuple_transformer.transform_in_place(ruleset, is_service=True, is_binary=is_binary)
 
+        if match_object.host_name is None or match_object.service_description is None:
+            return
+
         with_foreign_hosts = (
             match_object.host_name not in self.ruleset_optimizer.all_processed_hosts()
         )
-        optimized_ruleset = self.ruleset_optimizer.get_service_ruleset(ruleset, with_foreign_hosts)
-
-        for (
-            value,
-            hosts,
-            service_labels_condition,
-            service_labels_condition_cache_id,
-            service_description_condition,
-        ) in optimized_ruleset:
-            if match_object.service_description is None:
-                continue
-
-            if match_object.host_name not in hosts:
-                continue
-
-            service_cache_id = (
-                match_object.service_cache_id,
-                service_description_condition,
-                service_labels_condition_cache_id,
-            )
-
-            if service_cache_id in self._service_match_cache:
-                match = self._service_match_cache[service_cache_id]
-            else:
-                match = self._matches_service_conditions(
-                    service_description_condition, service_labels_condition, match_object
-                )
-                self._service_match_cache[service_cache_id] = match
-
-            if match:
-                yield value
-
-    def _matches_service_conditions(
-        self,
-        service_description_condition: tuple[bool, Pattern[str]],
-        service_labels_condition: Mapping[str, object],
-        match_object: RulesetMatchObject,
-    ) -> bool:
-        if not self._matches_service_description_condition(
-            service_description_condition, match_object
-        ):
-            return False
-
-        if service_labels_condition and not matches_labels(
-            match_object.service_labels, service_labels_condition
-        ):
-            return False
-
-        return True
-
-    def _matches_service_description_condition(
-        self,
-        service_description_condition: tuple[bool, Pattern[str]],
-        match_object: RulesetMatchObject,
-    ) -> bool:
-        negate, pattern = service_description_condition
+        compiled_ruleset = self.ruleset_optimizer.get_compiled_service_ruleset(
+            ruleset, with_foreign_hosts
+        )
 
-        if (
-            match_object.service_description is not None
-            and pattern.match(match_object.service_description) is not None
-        ):
-            return not negate
-        return negate
+        yield from compiled_ruleset.matching_values(
+            match_object.host_name,
+            match_object.service_description,
+            match_object.service_labels,
+        )
 
     def get_values_for_generic_agent(
         self, ruleset: Iterable[RuleSpec[object]], path_for_rule_matching: str
@@ -420,6 +368,7 @@ class RulesetOptimizer:
         all_configured_hosts: set[HostName],
         clusters_of: dict[HostName, list[HostName]],
         nodes_of: dict[HostName, list[HostName]],
+        matching_hosts_cache_dir: Path | None = None,
     ) -> None:
         super().__init__()
         self._ruleset_matcher = ruleset_matcher
@@ -437,12 +386,8 @@ class RulesetOptimizer:
         # may contain a reduced set of hosts, since each process handles a subset
         self._all_processed_hosts = self._all_configured_hosts
 
-        # A factor which indicates how much hosts share the same host tag configuration (excluding folders).
-        # len(all_processed_hosts) / len(different tag combinations)
-        # It is used to determine the best rule evualation method
-        self._all_processed_hosts_similarity = 1.0
-
         self._service_ruleset_cache: dict[tuple[int, bool], PreprocessedServiceRuleset] = {}
+        self._compiled_service_ruleset_cache: dict[tuple[int, bool], CompiledServiceRuleset] = {}
         self._host_ruleset_cache: dict[tuple[int, bool], PreprocessedHostRuleset[object]] = {}
         self._all_matching_hosts_match_cache: dict[
             tuple[_ConditionCacheID, bool], set[HostName]
@@ -451,21 +396,47 @@ class RulesetOptimizer:
         # Reference dirname -> hosts in this dir including subfolders
         self._folder_host_lookup: dict[tuple[bool, str], set[HostName]] = {}
 
-        # Provides a list of hosts with the same hosttags, excluding the folder
-        self._hosts_grouped_by_tags: dict[tuple[tuple[TagGroupID, TagID], ...], set[HostName]] = {}
-        # Reference hostname -> tag group reference
-        self._host_grouped_ref: dict[HostName, tuple[tuple[TagGroupID, TagID], ...]] = {}
+        # Inverted indexes which are used to compute the matching hosts of a rule
+        # by set operations instead of evaluating the conditions host by host.
+        # Exact folder path -> hosts in exactly this folder
+        self._hosts_by_folder: dict[str, set[HostName]] = {}
+        # (tag group, tag) -> hosts having this tag
+        self._hosts_by_tag: dict[tuple[TagGroupID, TagID | None], set[HostName]] = {}
+        # (label name, label value) -> hosts having this label. The labels of a host are
+        # only computed on demand, so this index is extended with the hosts that are
+        # needed for matching (see _index_labels_of_hosts).
+        self._hosts_by_label: dict[tuple[str, str], set[HostName]] = {}
+        self._label_indexed_hosts: set[HostName] = set()
+
+        # Matching hosts of the label independent conditions, persisted across processes
+        self._matching_hosts_cache = (
+            None
+            if matching_hosts_cache_dir is None
+            else MatchingHostsCache(
+                matching_hosts_cache_dir,
+                self._all_configured_hosts,
+                self._host_tags,
+                self._host_paths,
+            )
+        )
 
-        # TODO: Clean this one up?
         self._initialize_host_lookup()
 
     def clear_ruleset_caches(self) -> None:
         self._host_ruleset_cache.clear()
         self._service_ruleset_cache.clear()
+        self._compiled_service_ruleset_cache.clear()
 
     def clear_caches(self) -> None:
         self._host_ruleset_cache.clear()
         self._all_matching_hosts_match_cache.clear()
+        self._hosts_by_label.clear()
+        self._label_indexed_hosts.clear()
+
+    def save_matching_hosts_cache(self) -> None:
+        """Persist the matching hosts computed so far for the use by other processes"""
+        if self._matching_hosts_cache is not None:
+            self._matching_hosts_cache.save()
 
     def all_processed_hosts(self) -> set[HostName]:
         """Returns a set of all processed hosts"""
@@ -494,24 +465,6 @@ class RulesetOptimizer:
         # lookup are iterated one by one later on in all_matching_hosts
         self._folder_host_lookup = {}
 
-        self._adjust_processed_hosts_similarity()
-
-    def _adjust_processed_hosts_similarity(self) -> None:
-        """This function computes the tag similarities between of the processed hosts
-        The result is a similarity factor, which helps finding the most perfomant operation
-        for the current hostset"""
-        used_groups = {
-            self._host_grouped_ref.get(hostname, ()) for hostname in self._all_processed_hosts
-        }
-
-        if not used_groups:
-            self._all_processed_hosts_similarity = 1.0
-            return
-
-        self._all_processed_hosts_similarity = (
-            1.0 * len(self._all_processed_hosts) / len(used_groups)
-        )
-
     def get_host_ruleset(
         self, ruleset: Iterable[RuleSpec[TRuleValue]], with_foreign_hosts: bool, is_binary: bool
     ) -> PreprocessedHostRuleset[TRuleValue]:
@@ -561,6 +514,20 @@ class RulesetOptimizer:
         self._service_ruleset_cache[cache_id] = cached_ruleset
         return cached_ruleset
 
+    def get_compiled_service_ruleset(
+        self, ruleset: Iterable[RuleSpec[TRuleValue]], with_foreign_hosts: bool
+    ) -> "CompiledServiceRuleset":
+        cache_id = id(ruleset), with_foreign_hosts
+
+        if cache_id in self._compiled_service_ruleset_cache:
+            return self._compiled_service_ruleset_cache[cache_id]
+
+        compiled_ruleset = CompiledServiceRuleset(
+            self.get_service_ruleset(ruleset, with_foreign_hosts)
+        )
+        self._compiled_service_ruleset_cache[cache_id] = compiled_ruleset
+        return compiled_ruleset
+
     def _convert_service_ruleset(
         self, ruleset: Iterable[RuleSpec[TRuleValue]], with_foreign_hosts: bool
     ) -> PreprocessedServiceRuleset:
@@ -614,16 +581,24 @@ class RulesetOptimizer:
 
         return negate, regex("(?:%s)" % "|".join("(?:%s)" % p for p in pattern_parts))
 
-    def _all_matching_hosts(  # pylint: disable=too-many-branches
+    def _all_matching_hosts(
         self, condition: RuleConditionsSpec, with_foreign_hosts: bool
     ) -> set[HostName]:
         """Returns a set containing the names of hosts that match the given
-        tags and hostlist conditions."""
+        tags and hostlist conditions.
+
+        The conditions are evaluated by set operations on the inverted indexes
+        (folder, tags, labels) instead of checking them host by host."""
         hostlist = condition.get("host_name")
         tag_conditions: Mapping[TagGroupID, TagCondition] = condition.get("host_tags", {})
         labels = condition.get("host_labels", {})
         rule_path = condition.get("host_folder", "/")
 
+        if hostlist == []:
+            # Empty host list -> Nothing matches. Note: The cache ID does not distinguish
+            # between an empty host list and no host list at all.
+            return set()
+
         cache_id = (
             self._condition_cache_id(
                 hostlist,
@@ -639,68 +614,71 @@ class RulesetOptimizer:
         except KeyError:
             pass
 
-        if with_foreign_hosts:
-            valid_hosts = self._all_configured_hosts
+        # Only the label independent results can be persisted: The labels may change
+        # without a change of the configuration (discovered labels). The persisted
+        # results are the matching hosts of all configured hosts.
+        if labels or self._matching_hosts_cache is None:
+            matching = self._compute_matching_hosts(
+                hostlist, tag_conditions, labels, rule_path, with_foreign_hosts
+            )
         else:
-            valid_hosts = self._all_processed_hosts
-
-        # Thin out the valid hosts further. If the rule is located in a folder
-        # we only need the intersection of the folders hosts and the previously determined valid_hosts
-        valid_hosts = self.get_hosts_within_folder(rule_path, with_foreign_hosts).intersection(
-            valid_hosts
-        )
-
-        if tag_conditions and hostlist is None and not labels:
-            # TODO: Labels could also be optimized like the tags
-            matched_by_tags = self._match_hosts_by_tags(cache_id, valid_hosts, tag_conditions)
-            if matched_by_tags is not None:
-                return matched_by_tags
-
-        matching: set[HostName] = set()
-        only_specific_hosts = (
-            hostlist is not None
-            and not isinstance(hostlist, dict)
-            and all(not isinstance(x, dict) for x in hostlist)
-        )
-
-        if hostlist == []:
-            pass  # Empty host list -> Nothing matches
-
-        elif not tag_conditions and not labels and not hostlist:
-            # If no tags are specified and the hostlist only include @all (all hosts)
-            matching = valid_hosts
-
-        elif not tag_conditions and not labels and only_specific_hosts and hostlist is not None:
-            # If no tags are specified and there are only specific hosts we already have the matches
-            matching = valid_hosts.intersection(hostlist)
+            matching = self._persisted_matching_hosts(
+                self._matching_hosts_cache,
+                condition_key(cache_id[0]),
+                hostlist,
+                tag_conditions,
+                rule_path,
+                with_foreign_hosts,
+            )
 
-        else:
-            # If the rule has only exact host restrictions, we can thin out the list of hosts to check
-            if only_specific_hosts and hostlist is not None:
-                hosts_to_check = valid_hosts.intersection(hostlist)
-            else:
-                hosts_to_check = valid_hosts
-
-            for hostname in hosts_to_check:
-                # When no tag matching is requested, do not filter by tags. Accept all hosts
-                # and filter only by hostlist
-                if tag_conditions and not self.matches_host_tags(
-                    self._host_tags[hostname],
-                    tag_conditions,
-                ):
-                    continue
+        self._all_matching_hosts_match_cache[cache_id] = matching
+        return matching
 
-                if labels:
-                    host_labels = self.labels_of_host(hostname)
-                    if not matches_labels(host_labels, labels):
-                        continue
+    def _persisted_matching_hosts(
+        self,
+        persisted_cache: MatchingHostsCache,
+        persisted_key: bytes,
+        hostlist: HostOrServiceConditions | None,
+        tag_conditions: Mapping[TagGroupID, TagCondition],
+        rule_path: str,
+        with_foreign_hosts: bool,
+    ) -> set[HostName]:
+        scope = None if with_foreign_hosts else self._all_processed_hosts
+        if (matching := persisted_cache.get(persisted_key, scope)) is not None:
+            return matching
 
-                if not self.matches_host_name(hostlist, hostname):
-                    continue
+        # Processes of a few hosts (e.g. cmk --check or the automations) only compute their
+        # hosts. The results of all hosts are only computed and remembered for the next save
+        # when most of the hosts are processed anyway, like for creating the core config.
+        if scope is not None and 2 * len(scope) < len(self._all_configured_hosts):
+            return self._compute_matching_hosts(
+                hostlist, tag_conditions, {}, rule_path, with_foreign_hosts
+            )
 
-                matching.add(hostname)
+        all_matching = self._compute_matching_hosts(
+            hostlist, tag_conditions, {}, rule_path, with_foreign_hosts=True
+        )
+        persisted_cache.add(persisted_key, all_matching)
+        return all_matching if scope is None else all_matching.intersection(scope)
 
-        self._all_matching_hosts_match_cache[cache_id] = matching
+    def _compute_matching_hosts(
+        self,
+        hostlist: HostOrServiceConditions | None,
+        tag_conditions: Mapping[TagGroupID, TagCondition],
+        labels: LabelConditions,
+        rule_path: str,
+        with_foreign_hosts: bool,
+    ) -> set[HostName]:
+        # The folder hosts are already limited to the relevant hosts
+        matching = set(self.get_hosts_within_folder(rule_path, with_foreign_hosts))
+        if tag_conditions:
+            matching = self._match_hosts_by_tags(matching, tag_conditions)
+        if hostlist:
+            matching = self._match_hosts_by_name(matching, hostlist)
+        # Labels are the most expensive condition to evaluate. Only compute them
+        # for the hosts which are left over.
+        if labels and matching:
+            matching = self._match_hosts_by_labels(matching, labels)
         return matching
 
     def matches_host_name(
@@ -768,87 +746,126 @@ class RulesetOptimizer:
             rule_path,
         )
 
-    # TODO: Generalize this optimization: Build some kind of key out of the tag conditions
-    # (positive, negative, ...). Make it work with the new tag group based "$or" handling.
     def _match_hosts_by_tags(
         self,
-        cache_id: tuple[_ConditionCacheID, bool],
-        valid_hosts: set[HostName],
+        hosts: set[HostName],
         tag_conditions: Mapping[TagGroupID, TagCondition],
-    ) -> set[HostName] | None:
-        matching = set()
-        negative_match_tags = set()
-        positive_match_tags = set()
+    ) -> set[HostName]:
+        """Filter the given hosts by the tag conditions using the tag index
+
+        This works like matches_host_tags, but for a whole set of hosts at once."""
+        matching = hosts
         for taggroup_id, tag_condition in tag_conditions.items():
-            if isinstance(tag_condition, dict):
-                if "$ne" in tag_condition:
-                    negative_match_tags.add(
-                        (
-                            taggroup_id,
-                            cast(TagConditionNE, tag_condition)["$ne"],
-                        )
+            if not matching:
+                break
+
+            if not isinstance(tag_condition, dict):
+                matching = matching.intersection(
+                    self._hosts_by_tag.get((taggroup_id, tag_condition), ())
+                )
+                continue
+
+            if "$ne" in tag_condition:
+                matching = matching.difference(
+                    self._hosts_by_tag.get(
+                        (taggroup_id, cast(TagConditionNE, tag_condition)["$ne"]), ()
                     )
-                    continue
+                )
+                continue
 
-                if "$or" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
+            if "$or" in tag_condition:
+                matching = matching.intersection(
+                    self._hosts_with_any_tag_of(
+                        taggroup_id, cast(TagConditionOR, tag_condition)["$or"]
+                    )
+                )
+                continue
 
-                if "$nor" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
+            if "$nor" in tag_condition:
+                matching = matching.difference(
+                    self._hosts_with_any_tag_of(
+                        taggroup_id, cast(TagConditionNOR, tag_condition)["$nor"]
+                    )
+                )
+                continue
 
-                raise NotImplementedError()
+            raise NotImplementedError()
 
-            positive_match_tags.add((taggroup_id, tag_condition))
+        return matching
 
-        # TODO:
-        # if has_specific_folder_tag or self._all_processed_hosts_similarity < 3.0:
-        if self._all_processed_hosts_similarity < 3.0:
-            # Without shared folders
-            for hostname in valid_hosts:
-                if positive_match_tags <= self._host_tags[
-                    hostname
-                ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                    matching.add(hostname)
+    def _hosts_with_any_tag_of(
+        self, taggroup_id: TagGroupID, tag_ids: Sequence[TagID | None]
+    ) -> set[HostName]:
+        hosts: set[HostName] = set()
+        for tag_id in tag_ids:
+            hosts.update(self._hosts_by_tag.get((taggroup_id, tag_id), ()))
+        return hosts
 
-            self._all_matching_hosts_match_cache[cache_id] = matching
-            return matching
+    def _match_hosts_by_name(
+        self, hosts: set[HostName], hostlist: HostOrServiceConditions
+    ) -> set[HostName]:
+        """Filter the given hosts by the host name condition
 
-        # With shared folders
-        checked_hosts: set[str] = set()
-        for hostname in valid_hosts:
-            if hostname in checked_hosts:
-                continue
+        This works like matches_host_name, but for a whole set of hosts at once.
+        Explicit host names are looked up directly, only the regexes need to be
+        evaluated host by host."""
+        negate, host_entries = parse_negated_condition_list(hostlist)
 
-            hosts_with_same_tag = self._filter_hosts_with_same_tags_as_host(hostname, valid_hosts)
-            checked_hosts.update(hosts_with_same_tag)
+        explicit_hosts = {entry for entry in host_entries if not isinstance(entry, dict)}
+        patterns = [regex(entry["$regex"]) for entry in host_entries if isinstance(entry, dict)]
 
-            if positive_match_tags <= self._host_tags[
+        matched = hosts.intersection(explicit_hosts)
+        if patterns:
+            matched.update(
                 hostname
-            ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                matching.update(hosts_with_same_tag)
+                for hostname in hosts.difference(matched)
+                if any(pattern.match(hostname) is not None for pattern in patterns)
+            )
 
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
+        return hosts.difference(matched) if negate else matched
 
-    def _filter_hosts_with_same_tags_as_host(
-        self,
-        hostname: HostName,
-        hosts: set[HostName],
+    def _match_hosts_by_labels(
+        self, hosts: set[HostName], labels: LabelConditions
     ) -> set[HostName]:
-        return self._hosts_grouped_by_tags[self._host_grouped_ref[hostname]].intersection(hosts)
+        """Filter the given hosts by the label conditions using the label index
+
+        This works like matches_labels, but for a whole set of hosts at once."""
+        self._index_labels_of_hosts(hosts)
+
+        matching = hosts
+        for label_id, label_spec in labels.items():
+            if not matching:
+                break
+
+            if isinstance(label_spec, str):
+                matching = matching.intersection(
+                    self._hosts_by_label.get((label_id, label_spec), ())
+                )
+            else:
+                matching = matching.difference(
+                    self._hosts_by_label.get((label_id, label_spec["$ne"]), ())
+                )
+
+        return matching
+
+    def _index_labels_of_hosts(self, hosts: Iterable[HostName]) -> None:
+        for hostname in hosts:
+            if hostname in self._label_indexed_hosts:
+                continue
+            self._label_indexed_hosts.add(hostname)
+            for label_id, label_value in self.labels_of_host(hostname).items():
+                self._hosts_by_label.setdefault((label_id, label_value), set()).add(hostname)
 
     def get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> set[HostName]:
         cache_id = with_foreign_hosts, folder_path
         if cache_id not in self._folder_host_lookup:
-            hosts_in_folder = set()
-            relevant_hosts = (
-                self._all_configured_hosts if with_foreign_hosts else self._all_processed_hosts
-            )
-
-            for hostname in relevant_hosts:
-                host_path = self._host_paths.get(hostname, "/")
+            hosts_in_folder: set[HostName] = set()
+            for host_path, hosts in self._hosts_by_folder.items():
                 if host_path.startswith(folder_path):
-                    hosts_in_folder.add(hostname)
+                    hosts_in_folder.update(hosts)
+
+            if not with_foreign_hosts:
+                hosts_in_folder.intersection_update(self._all_processed_hosts)
 
             self._folder_host_lookup[cache_id] = hosts_in_folder
             return hosts_in_folder
@@ -857,9 +874,11 @@ class RulesetOptimizer:
 
     def _initialize_host_lookup(self) -> None:
         for hostname in self._all_configured_hosts:
-            group_ref = tuple(sorted(self._host_tags[hostname]))
-            self._hosts_grouped_by_tags.setdefault(group_ref, set()).add(hostname)
-            self._host_grouped_ref[hostname] = group_ref
+            self._hosts_by_folder.setdefault(self._host_paths.get(hostname, "/"), set()).add(
+                hostname
+            )
+            for tag in self._host_tags[hostname]:
+                self._hosts_by_tag.setdefault(tag, set()).add(hostname)
 
     @instance_method_lru_cache(maxsize=None)
     def labels_of_host(self, hostname: HostName) -> Labels:
@@ -953,6 +972,120 @@ class RulesetOptimizer:
         )
 
 
+# Patterns using these constructs can not be merged into a combined regex: Back references
+# and conditionals refer to group numbers or names, which change or clash when merged.
+_NOT_COMBINABLE_PATTERN = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?\(")
+
+
+class CompiledServiceRuleset:
+    """Precompiled decision structure of a preprocessed service ruleset
+
+    The rules are grouped by the matching hosts, so only the rules of the
+    requested host are looked at. The distinct service description patterns
+    of all rules are merged into a single regex which reports all matching
+    patterns with one match() call. The result is cached per service
+    description. Service label conditions are only evaluated for the rules
+    which survived the host and service description matching.
+    """
+
+    def __init__(self, preprocessed_ruleset: PreprocessedServiceRuleset) -> None:
+        super().__init__()
+        pattern_ids: dict[Pattern[str], int] = {}
+        self._rules: list[tuple[object, bool, int, LabelConditions]] = []
+        self._rules_of_host: dict[HostName, list[int]] = {}
+
+        for rule_id, (value, hosts, service_labels_condition, _cache_id, pattern) in enumerate(
+            preprocessed_ruleset
+        ):
+            negate, compiled_pattern = pattern
+            pattern_id = pattern_ids.setdefault(compiled_pattern, len(pattern_ids))
+            self._rules.append((value, negate, pattern_id, service_labels_condition))
+            for hostname in hosts:
+                self._rules_of_host.setdefault(hostname, []).append(rule_id)
+
+        self._combined_pattern, self._marker_groups, self._single_patterns = self._combine(
+            list(pattern_ids)
+        )
+        self._matching_patterns_cache: dict[ServiceName, frozenset[int]] = {}
+
+    @staticmethod
+    def _combine(
+        patterns: Sequence[Pattern[str]],
+    ) -> tuple[Pattern[str] | None, Sequence[tuple[int, int]], Sequence[tuple[int, Pattern[str]]]]:
+        """Merge the patterns into one regex
+
+        Each pattern is put into an optional lookahead, followed by an empty marker
+        group. The lookahead does not consume anything, so all patterns are tried at
+        the start of the string. A marker group took part in the match if and only
+        if its pattern matches."""
+        parts: list[str] = []
+        marker_groups: list[tuple[int, int]] = []
+        single_patterns: list[tuple[int, Pattern[str]]] = []
+
+        num_groups = 0
+        for pattern_id, pattern in enumerate(patterns):
+            # Inline flags like "(?i)" are only allowed at the start of the combined regex
+            if pattern.flags != re.UNICODE or _NOT_COMBINABLE_PATTERN.search(pattern.pattern):
+                single_patterns.append((pattern_id, pattern))
+                continue
+            parts.append("(?:(?=(?:%s)())|)" % pattern.pattern)
+            num_groups += pattern.groups + 1
+            marker_groups.append((pattern_id, num_groups))
+
+        if not parts:
+            return None, [], single_patterns
+
+        try:
+            return re.compile("".join(parts)), marker_groups, single_patterns
+        except (re.error, OverflowError, RecursionError):
+            return None, [], list(enumerate(patterns))
+
+    def matching_values(
+        self,
+        host_name: HostName,
+        service_description: ServiceName,
+        service_labels: Labels | None,
+    ) -> Iterator[object]:
+        if not (rule_ids := self._rules_of_host.get(host_name)):
+            return
+
+        matching_patterns = self._matching_patterns(service_description)
+        for rule_id in rule_ids:
+            value, negate, pattern_id, service_labels_condition = self._rules[rule_id]
+            if (pattern_id in matching_patterns) is negate:
+                continue
+
+            if service_labels_condition and not matches_labels(
+                service_labels, service_labels_condition
+            ):
+                continue
+
+            yield value
+
+    def _matching_patterns(self, service_description: ServiceName) -> frozenset[int]:
+        try:
+            return self._matching_patterns_cache[service_description]
+        except KeyError:
+            pass
+
+        matching: set[int] = set()
+        if self._combined_pattern is not None and (
+            match := self._combined_pattern.match(service_description)
+        ):
+            matching.update(
+                pattern_id
+                for pattern_id, marker_group in self._marker_groups
+                if match.start(marker_group) != -1
+            )
+        matching.update(
+            pattern_id
+            for pattern_id, pattern in self._single_patterns
+            if pattern.match(service_description) is not None
+        )
+
+        return self._matching_patterns_cache.setdefault(service_description, frozenset(matching))
+
+
 def _tags_or_labels_cache_id(tag_or_label_spec: object) -> object:
     if isinstance(tag_or_label_spec, dict):
         if "$ne" in tag_or_label_spec:
@@ -6,9 +6,7 @@
 functionality is the locked file opening realized with the File() context
 manager."""
 import logging
-import pickle
 import pprint
-import shutil
 from collections.abc import Mapping
 from contextlib import nullcontext
 from pathlib import Path
@@ -37,11 +35,14 @@ from cmk.utils.store._locks import (
     try_acquire_lock,
     try_locked,
 )
+from cmk.utils.store._pickle_cache import PickleCache, PickleCacheStats
 
 __all__ = [
     "BytesSerializer",
     "DimSerializer",
     "ObjectStore",
+    "PickleCache",
+    "PickleCacheStats",
     "PickleSerializer",
     "Serializer",
     "PydanticStore",
@@ -260,7 +261,18 @@ def _pickled_files_cache_dir(temp_dir: Path) -> Path:
     return temp_dir / "pickled_files_cache"
 
 
-_pickle_serializer = PickleSerializer[Any]()
+# Maximum size of all pickled files in the cache (located in the tmpfs)
+_PICKLE_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+_pickle_caches: dict[Path, PickleCache] = {}
+
+
+def _pickle_cache(temp_dir: Path) -> PickleCache:
+    if (cache := _pickle_caches.get(temp_dir)) is None:
+        cache = _pickle_caches[temp_dir] = PickleCache(
+            _pickled_files_cache_dir(temp_dir), _PICKLE_CACHE_MAX_SIZE
+        )
+    return cache
 
 
 def try_load_file_from_pickle_cache(
@@ -268,23 +280,22 @@ def try_load_file_from_pickle_cache(
     *,
     default: Any,
     lock: bool = False,
+    in_memory: bool = False,
     temp_dir: Path = _default_temp_dir(),
     root_dir: Path = _default_root_dir(),
 ) -> Any:
     """Try to load a pickled version of the requested file from cache, otherwise load `path`
 
-    This function tries to find a ".pkl" version of the requested filename in the pickle files cache
-    and loads the pickled file, IF the pickled file is more recent.
-    Otherwise, if the requested file exists, it is loaded as a raw python object and added to the
-    pickle cache for next time.
+    The pickled versions are located in the tmpfs directory and are shared by all processes of the
+    site. They are valid as long as inode, modification time and size of the requested file are
+    unchanged. If no valid pickled version exists, the requested file is read and a pickled
+    version of it is written. The least recently used pickled versions are removed once the cache
+    exceeds _PICKLE_CACHE_MAX_SIZE. They are vanishing when the tmpfs is unmounted
+    (reboots/software updates, etc.)
 
-    The pickled versions are located in the tmpfs directory under the same relative site path.
-    They are vanishing when the tmpfs is unmounted (reboots/software updates, etc.)
-    If no pickled version exists or the pickled version is older than the original file,
-    the original file is read and a pickled version of it is written.
-
-    Note: I'm not a big fan of all this pathlib.Path stuff here, os.path >>> pathlib.Path (7 times slower)
-          Let's see how that works out..
+    With in_memory=True the loaded data is additionally kept in the memory of the process. The
+    returned object is then shared by all callers and must not be modified. This has no effect in
+    combination with lock=True, where the caller usually modifies and saves the data.
     """
 
     if lock:
@@ -297,32 +308,28 @@ def try_load_file_from_pickle_cache(
         # No idea why someone is trying to load something outside the sites home directory
         return load_object_from_file(path, default=default, lock=lock)
 
-    pickle_path = (
-        _pickled_files_cache_dir(temp_dir) / relative_path.parent / (relative_path.name + ".pkl")
-    )
     try:
-        if pickle_path.stat().st_mtime > path.stat().st_mtime:
-            # Use pickled version since this file is newer and therefore valid
-            return load_object_from_pickle_file(pickle_path, default=default)
-    except (FileNotFoundError, pickle.UnpicklingError):
-        pass
-
-    # Scenarios depending on lock
-    # lock == True
-    #       The original file always exists -> create pickle file, even an empty one
-    #       in case the original file just came into existence
-    # lock == False
-    #       original-missing/pickle-exists: no pickling, use load_object_from_file
-    #       original-missing/pickle-missing_broken_outdated: no pickling, use load_object_from_file
-    #       original-exists/pickle-missing_broken_outdated: create pickle file
-    data = load_object_from_file(path, default=default, lock=lock)
-    if path.exists():
+        # The stat needs to be taken before loading the file. A file changed in between gets a
+        # new identity and the pickled version of it is never used.
+        stat = path.stat()
+    except FileNotFoundError:
         # Only create the pickled version if an original file actually exists
-        pickle_path.parent.mkdir(exist_ok=True, parents=True)
-        ObjectStore(pickle_path, serializer=_pickle_serializer).write_obj(data)
-    return data
+        return load_object_from_file(path, default=default, lock=lock)
+
+    return _pickle_cache(temp_dir).load(
+        path,
+        relative_path,
+        stat,
+        lambda: load_object_from_file(path, default=default, lock=lock),
+        in_memory=in_memory and not lock,
+    )
+
+
+def pickle_cache_stats() -> Mapping[Path, PickleCacheStats]:
+    """Counters of the pickle caches used by this process since its start, by temp directory"""
+    return {temp_dir: cache.stats for temp_dir, cache in _pickle_caches.items()}
 
 
 def clear_pickled_files_cache(temp_dir: Path = _default_temp_dir()) -> None:
     """Remove all cached pickle files"""
-    shutil.rmtree(_pickled_files_cache_dir(temp_dir), ignore_errors=True)
+    _pickle_cache(temp_dir).clear()
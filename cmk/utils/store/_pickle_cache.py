@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Size bounded cache of pickled versions of python data files
+
+The entries are shared by all processes of the site. They are stored in one
+directory, named by a hash of the relative path of the original file and the
+identity (inode, modification time in nanoseconds, size) of the original file.
+A changed file is never confused with an outdated entry, regardless of the
+resolution of the file system time stamps.
+
+Entries are touched when they are used. Once the cache exceeds its maximum
+size, the least recently used entries are removed.
+
+Optionally the loaded objects are additionally kept in the memory of the
+process, so that a file is unpickled only once per process and version.
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final
+
+from cmk.utils.store._file import ObjectStore, PickleSerializer
+
+__all__ = ["PickleCache", "PickleCacheStats"]
+
+# Don't touch entries more often than this, when they are used
+_TOUCH_INTERVAL: Final = 60.0
+
+_FileIdentity = tuple[int, int, int]
+
+
+@dataclass
+class PickleCacheStats:
+    memory_hits: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class PickleCache:
+    def __init__(self, cache_dir: Path, max_size: int) -> None:
+        self.cache_dir: Final = cache_dir
+        self.max_size: Final = max_size
+        self.stats: Final = PickleCacheStats()
+        self._serializer = PickleSerializer[Any]()
+        self._in_memory: dict[Path, tuple[_FileIdentity, Any]] = {}
+
+    def _entry_path(self, relative_path: Path, identity: _FileIdentity) -> Path:
+        inode, mtime_ns, size = identity
+        path_hash = hashlib.blake2b(str(relative_path).encode("utf-8"), digest_size=8).hexdigest()
+        return self.cache_dir / f"{path_hash}-{inode:x}-{mtime_ns:x}-{size:x}.pkl"
+
+    def load(
+        self,
+        path: Path,
+        relative_path: Path,
+        stat: os.stat_result,
+        load_original: Callable[[], Any],
+        *,
+        in_memory: bool,
+    ) -> Any:
+        """Return the cached data of the original file, call load_original if not cached
+
+        The stat result of the original file must have been taken before loading it. The objects
+        returned with in_memory=True are shared by all callers and must not be modified."""
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if in_memory and (cached := self._in_memory.get(path)) is not None:
+            if cached[0] == identity:
+                self.stats.memory_hits += 1
+                return cached[1]
+
+        entry_path = self._entry_path(relative_path, identity)
+        try:
+            data = self._load_entry(entry_path)
+            self.stats.hits += 1
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            self.stats.misses += 1
+            data = load_original()
+            self._store_entry(entry_path, data)
+
+        if in_memory:
+            self._in_memory[path] = (identity, data)
+        return data
+
+    def _load_entry(self, entry_path: Path) -> Any:
+        entry_stat = entry_path.stat()
+        if entry_stat.st_size == 0:
+            raise EOFError()
+        data = ObjectStore(entry_path, serializer=self._serializer).read_obj(default=None)
+        if entry_stat.st_mtime < time.time() - _TOUCH_INTERVAL:
+            try:
+                os.utime(entry_path)
+            except FileNotFoundError:
+                pass  # Evicted by another process in the meantime
+        return data
+
+    def _store_entry(self, entry_path: Path, data: Any) -> None:
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+        ObjectStore(entry_path, serializer=self._serializer).write_obj(data)
+        self._evict(entry_path)
+
+    def _evict(self, new_entry_path: Path) -> None:
+        """Remove outdated versions of the new entry and the least recently used entries"""
+        path_prefix = new_entry_path.name.split("-", 1)[0] + "-"
+        entries: list[tuple[float, int, str]] = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if not dir_entry.name.endswith(".pkl") or dir_entry.name == new_entry_path.name:
+                    continue
+                try:
+                    entry_stat = dir_entry.stat()
+                except FileNotFoundError:
+                    continue
+                if dir_entry.name.startswith(path_prefix):
+                    _remove_entry(dir_entry.path)
+                    continue
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, dir_entry.path))
+                total_size += entry_stat.st_size
+
+        try:
+            total_size += new_entry_path.stat().st_size
+        except FileNotFoundError:
+            pass
+
+        for _mtime, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            if _remove_entry(entry_path):
+                self.stats.evictions += 1
+            total_size -= size
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._in_memory.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def _remove_entry(entry_path: str) -> bool:
+    try:
+        os.unlink(entry_path)
+    except FileNotFoundError:
+        return False  # Removed by another process in the meantime
+    return True
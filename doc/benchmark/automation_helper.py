@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the round trip of a service discovery preview
+
+A site with the given number of hosts is created in a temporary directory, each
+host has a data source program printing a few sections. The service discovery
+preview of some hosts is requested like the GUI does, once by calling
+"cmk --automation" and once from the automation helper. Reported is the mean
+time of a round trip.
+
+Usage (from the root of the repository):
+
+    OMD_SITE=x PYTHONPATH=. python3 doc/benchmark/automation_helper.py --hosts 1000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.automations.helper import call_helper, HelperRequest
+
+_AGENT_OUTPUT = "\\n".join(
+    [
+        "<<<check_mk>>>",
+        "Version: 2.2.0",
+        "<<<df>>>",
+        "/dev/sda1 ext4 100 50 50 50% /",
+        "<<<uptime>>>",
+        "1000",
+    ]
+)
+
+
+def _create_site(root: Path, num_hosts: int) -> None:
+    for directory in ["etc/check_mk/conf.d", "var/check_mk", "tmp/run", "tmp/check_mk"]:
+        (root / directory).mkdir(parents=True)
+    hosts = [f"host{n:05d}" for n in range(num_hosts)]
+    program = f'printf "{_AGENT_OUTPUT}"'
+    (root / "etc/check_mk/main.mk").write_text(
+        f"all_hosts += {[f'{host}|cmk-agent|prod|tcp' for host in hosts]!r}\n"
+        f"ipaddresses.update({ {host: '127.0.0.1' for host in hosts}!r})\n"
+        f"datasource_programs = [{ {'value': program, 'condition': {}}!r}]\n"
+    )
+
+
+def _subprocess_round_trip(env: dict[str, str], host: str) -> str:
+    return subprocess.run(
+        [sys.executable, "bin/cmk", "--automation", "service-discovery-preview", host],
+        env=env,
+        input="",
+        capture_output=True,
+        encoding="utf-8",
+        check=True,
+    ).stdout
+
+
+def _helper_round_trip(socket_path: Path, host: str) -> str:
+    response = call_helper(socket_path, HelperRequest("service-discovery-preview", [host], ""))
+    assert response is not None and not response.returncode
+    return response.stdout
+
+
+def _wait_for(socket_path: Path, helper: subprocess.Popen) -> float:
+    start = time.perf_counter()
+    while call_helper(socket_path, HelperRequest("notification-get-bulks", ["0"], "")) is None:
+        if helper.poll() is not None:
+            raise RuntimeError("The automation helper failed to start")
+        time.sleep(0.1)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _create_site(root, args.hosts)
+        env = {**os.environ, "OMD_ROOT": str(root), "PYTHONPATH": os.getcwd()}
+        hosts = [f"host{n * args.hosts // args.rounds:05d}" for n in range(args.rounds)]
+        print(f"{args.hosts} hosts, {args.rounds} rounds")
+
+        start = time.perf_counter()
+        for host in hosts:
+            assert "check_table" in _subprocess_round_trip(env, host)
+        wall = (time.perf_counter() - start) / args.rounds
+        print(f"cmk --automation:  {wall * 1000:8.1f}ms per round trip")
+
+        socket_path = root / "tmp/run/automation-helper"
+        with subprocess.Popen(
+            [sys.executable, "bin/cmk", "--automation-helper"],
+            env=env,
+            stdout=subprocess.DEVNULL,
+        ) as helper:
+            try:
+                print(f"helper started in   {_wait_for(socket_path, helper) * 1000:8.1f}ms")
+                start = time.perf_counter()
+                for host in hosts:
+                    assert "check_table" in _helper_round_trip(socket_path, host)
+                wall = (time.perf_counter() - start) / args.rounds
+                print(f"automation helper: {wall * 1000:8.1f}ms per round trip")
+            finally:
+                helper.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark compiling the BI aggregations after a restart of a core
+
+The given number of hosts is spread over the sites and the aggregations, each
+aggregation searches the hosts of its folder and calls a rule for each of them.
+After the first compilation the core of one site is restarted, once without any
+change and once with a changed host. Reported is the time needed by each
+compilation and the number of aggregations compiled again, together with the
+time spent compiling them and the CPU time this process spent on it. Finally
+the states of all aggregations are computed. With --workers the aggregations
+are compiled in this number of processes, the computation always runs in one
+process. The CPU time of this process is the part of the compilation that is
+not distributed, on a single core the wall time includes the workers. For the
+computation the time needed to pickle its input (the compiled aggregations and
+the states) is reported, which is what distributing it to workers not forked
+from this process would cost this process at least.
+
+The site is faked, OMD_ROOT has to point to an empty directory. The lookup of
+the aggregations in redis is not part of the measurement.
+
+Usage (from the root of the repository):
+
+    OMD_ROOT=$(mktemp -d) OMD_SITE=x PYTHONPATH=. python3 doc/benchmark/bi_compilation.py \\
+        --hosts 50000 --aggregations 200 --workers 4
+"""
+
+import argparse
+import pickle
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from livestatus import LivestatusOutputFormat, LivestatusResponse, LivestatusRow, SiteId
+
+import cmk.utils.paths
+
+from cmk.bi.aggregation import BIAggregation
+from cmk.bi.compiler import BICompiler
+from cmk.bi.computer import BIComputer
+from cmk.bi.data_fetcher import BIStatusFetcher
+from cmk.bi.lib import SitesCallback
+from cmk.bi.packs import BIAggregationPacks
+from cmk.bi.searcher import BISearchDependencies
+from cmk.bi.trees import BICompiledAggregation
+
+_SERVICES = ["CPU load", "Memory", "Uptime", "Filesystem /", "Interface 1"]
+
+
+class _FakeSites:
+    def __init__(self, num_sites: int, num_hosts: int, num_folders: int) -> None:
+        self.program_starts = {SiteId(f"site{n}"): 1000 for n in range(num_sites)}
+        self.hosts = {
+            f"host{n:06d}": [f"site{n % num_sites}", f"/wato/folder{n % num_folders}/hosts.mk"]
+            for n in range(num_hosts)
+        }
+
+    def sites(self) -> list[tuple[SiteId, bool]]:
+        return [(site_id, True) for site_id in self.program_starts]
+
+    def query(
+        self,
+        query: str,
+        only_sites: list[SiteId] | None = None,
+        output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+        fetch_full_data: bool = False,
+    ) -> LivestatusResponse:
+        if query.startswith("GET status"):
+            return LivestatusResponse(
+                [LivestatusRow([site_id, start]) for site_id, start in self.program_starts.items()]
+            )
+        sites = set(only_sites or self.program_starts)
+        if query.startswith("GET hosts"):
+            return LivestatusResponse(
+                [
+                    LivestatusRow([site, name, {"tcp": "tcp"}, {}, [], [], name, filename])
+                    for name, (site, filename) in self.hosts.items()
+                    if site in sites
+                ]
+            )
+        return LivestatusResponse(
+            [
+                LivestatusRow([site, name, service, {}, {}])
+                for name, (site, _filename) in self.hosts.items()
+                if site in sites
+                for service in _SERVICES
+            ]
+        )
+
+    def status_rows(self) -> LivestatusResponse:
+        services = [[service, 0, 1, "OK", 0, 1, 1, 0, 0, 1] for service in _SERVICES]
+        return LivestatusResponse(
+            [
+                LivestatusRow([site, name, 0, 1, 0, "OK", 0, 1, 0, services])
+                for name, (site, _filename) in self.hosts.items()
+            ]
+        )
+
+
+class _Packs(BIAggregationPacks):
+    def __init__(self, num_aggregations: int) -> None:
+        super().__init__("")
+        self._load_config(_packs_config(num_aggregations))
+
+    def load_config(self) -> None:
+        pass
+
+
+class _Compiler(BICompiler):
+    num_compiled = 0
+    compile_wall = 0.0
+    compile_cpu = 0.0  # of this process, without the workers
+
+    def _compile_aggregations(
+        self, aggregations: Sequence[BIAggregation]
+    ) -> dict[str, tuple[BICompiledAggregation, dict, BISearchDependencies]]:
+        self.num_compiled += len(aggregations)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            return super()._compile_aggregations(aggregations)
+        finally:
+            self.compile_wall += time.perf_counter() - start_wall
+            self.compile_cpu += time.process_time() - start_cpu
+
+    def _generate_part_of_aggregation_lookup(
+        self, compiled_aggregations: dict[str, BICompiledAggregation]
+    ) -> None:
+        pass
+
+
+def _packs_config(num_aggregations: int) -> dict[str, Any]:
+    rule = {
+        "id": "host",
+        "aggregation_function": {"count": 1, "restrict_state": 2, "type": "worst"},
+        "computation_options": {"disabled": False},
+        "node_visualization": {"style_config": {}, "type": "none"},
+        "nodes": [
+            {
+                "action": {
+                    "host_regex": "$HOSTNAME$",
+                    "service_regex": "|".join(_SERVICES),
+                    "type": "state_of_service",
+                },
+                "search": {"type": "empty"},
+            }
+        ],
+        "params": {"arguments": ["HOSTNAME"]},
+        "properties": {
+            "comment": "",
+            "docu_url": "",
+            "icon": "",
+            "state_messages": {},
+            "title": "Host $HOSTNAME$",
+        },
+    }
+    aggregations = [
+        {
+            "id": f"aggregation{n}",
+            "aggregation_visualization": {
+                "ignore_rule_styles": False,
+                "layout_id": "builtin_default",
+                "line_style": "round",
+            },
+            "computation_options": {
+                "disabled": False,
+                "escalate_downtimes_as_warn": False,
+                "use_hard_states": False,
+            },
+            "groups": {"names": [f"Folder {n}"], "paths": []},
+            "node": {
+                "action": {
+                    "params": {"arguments": ["$HOSTNAME$"]},
+                    "rule_id": "host",
+                    "type": "call_a_rule",
+                },
+                "search": {
+                    "conditions": {
+                        "host_choice": {"type": "all_hosts"},
+                        "host_folder": f"folder{n}",
+                        "host_labels": {},
+                        "host_tags": {"tcp": "tcp"},
+                    },
+                    "refer_to": "host",
+                    "type": "host_search",
+                },
+            },
+        }
+        for n in range(num_aggregations)
+    ]
+    return {
+        "packs": [
+            {
+                "id": "default",
+                "title": "Default",
+                "comment": "",
+                "contact_groups": [],
+                "public": True,
+                "rules": [rule],
+                "aggregations": aggregations,
+            }
+        ]
+    }
+
+
+def _compile(sites: _FakeSites, num_aggregations: int, num_workers: int, what: str) -> BICompiler:
+    # A new compiler for each compilation, like in each request of the GUI
+    compiler = _Compiler(
+        "bi_config.bi", SitesCallback(sites.sites, sites.query, lambda s: s), num_workers
+    )
+    compiler._bi_packs = _Packs(num_aggregations)
+    start = time.perf_counter()
+    compiler.load_compiled_aggregations()
+    wall = time.perf_counter() - start
+    print(
+        f"{what:>28}: {wall * 1000:9.1f}ms, {compiler.num_compiled:4d} aggregations compiled "
+        f"in {compiler.compile_wall * 1000:9.1f}ms ({compiler.compile_cpu * 1000:9.1f}ms CPU "
+        "of this process)"
+    )
+    return compiler
+
+
+def _compute(sites: _FakeSites, compiler: BICompiler) -> None:
+    status_fetcher = BIStatusFetcher(SitesCallback(sites.sites, sites.query, lambda s: s))
+    status_fetcher.states = status_fetcher.create_bi_status_data(sites.status_rows())
+    computer = BIComputer(compiler.compiled_aggregations, status_fetcher)
+    required_aggregations = [
+        (aggregation, aggregation.branches)
+        for aggregation in compiler.compiled_aggregations.values()
+    ]
+    start = time.perf_counter()
+    results = computer.compute_results(required_aggregations)
+    wall = time.perf_counter() - start
+    num_branches = sum(len(bundles) for _aggregation, bundles in results)
+    print(f"{'computation':>28}: {wall * 1000:9.1f}ms, {num_branches:4d} branches computed")
+
+    # What a worker not forked from this process would need to get for the computation
+    start = time.perf_counter()
+    pickle.dumps((required_aggregations, status_fetcher.states), protocol=pickle.HIGHEST_PROTOCOL)
+    wall = time.perf_counter() - start
+    print(f"{'pickling its input':>28}: {wall * 1000:9.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--hosts", type=int, default=50000)
+    parser.add_argument("--aggregations", type=int, default=200)
+    parser.add_argument("--sites", type=int, default=80)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    Path(cmk.utils.paths.default_config_dir, "multisite.d").mkdir(parents=True, exist_ok=True)
+    Path(cmk.utils.paths.var_dir).mkdir(parents=True, exist_ok=True)
+    sites = _FakeSites(args.sites, args.hosts, args.aggregations)
+    print(
+        f"{args.hosts} hosts on {args.sites} sites, {args.aggregations} aggregations, "
+        f"{args.workers} processes"
+    )
+
+    _compile(sites, args.aggregations, args.workers, "first compilation")
+
+    sites.program_starts[SiteId("site0")] += 1
+    _compile(sites, args.aggregations, args.workers, "restart without changes")
+
+    sites.program_starts[SiteId("site0")] += 1
+    sites.hosts["host000000"][1] = "/wato/folder1/hosts.mk"
+    compiler = _compile(sites, args.aggregations, args.workers, "restart with a moved host")
+
+    _compute(sites, compiler)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark creating the archive of a config sync
+
+A configuration of the given number of hosts is written, one hosts.mk per
+folder like WATO does. The sync archive of all files is created like for the
+first synchronization of a remote site, once for each compression available.
+Reported are the time needed and the size of the archive to transfer.
+
+Usage (from the root of the repository):
+
+    OMD_SITE=x PYTHONPATH=. python3 doc/benchmark/config_sync_archive.py --hosts 60000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.gui.watolib.activate_changes import _get_sync_archive, _sync_archive_compressions
+
+_HOSTS_PER_FOLDER = 500
+
+
+def _create_config(base_dir: Path, num_hosts: int) -> list[str]:
+    files = []
+    for folder in range(0, num_hosts, _HOSTS_PER_FOLDER):
+        hosts = [f"host{n:06d}" for n in range(folder, min(folder + _HOSTS_PER_FOLDER, num_hosts))]
+        path = Path("etc/check_mk/conf.d/wato", f"folder{folder:06d}", "hosts.mk")
+        (base_dir / path).parent.mkdir(parents=True)
+        (base_dir / path).write_text(
+            f"all_hosts += {[f'{h}|lan|prod|cmk-agent|tcp|wato|/' + str(path) for h in hosts]!r}\n"
+            f"ipaddresses.update({ {h: '10.0.0.1' for h in hosts}!r})\n"
+            f"host_attributes.update({ {h: {'alias': f'Alias of {h}'} for h in hosts}!r})\n"
+        )
+        files.append(str(path))
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--hosts", type=int, default=60000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base_dir = Path(tmpdir)
+        files = _create_config(base_dir, args.hosts)
+        print(f"{args.hosts} hosts in {len(files)} files")
+        for compression in [None, *_sync_archive_compressions()]:
+            start = time.perf_counter()
+            with _get_sync_archive(files, base_dir, compression) as sync_archive:
+                size = os.fstat(sync_archive.fileno()).st_size
+            wall = time.perf_counter() - start
+            print(
+                f"{compression or 'uncompressed':>12}: {wall * 1000:8.1f}ms, {size / 1e6:7.2f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
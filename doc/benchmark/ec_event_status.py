@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the processing of syslog messages by the Event Console with many open events
+
+A synthetic syslog stream is replayed through the event server: first the
+given number of open events is created, then a mix of messages counted into
+existing events, problems, recoveries cancelling open problems and plain new
+events is processed. The throughput and the latency of the second phase are
+reported.
+
+Usage (from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/ec_event_status.py --open-events 100000
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import cmk.ec.export as ec
+from cmk.ec.config import Count, Rule, ServiceLevel
+from cmk.ec.defaults import default_rule_pack
+from cmk.ec.helpers import ECLock
+from cmk.ec.history import History
+from cmk.ec.host_config import HostConfig
+from cmk.ec.main import (
+    default_slave_status_master,
+    EventServer,
+    EventStatus,
+    make_config,
+    StatusTableEvents,
+    StatusTableHistory,
+)
+from cmk.ec.perfcounters import Perfcounters
+
+_NUM_HOSTS = 1000
+
+
+def _rule(rule_id: str, **kwargs: object) -> Rule:
+    rule = Rule(
+        actions=[],
+        actions_in_downtime=True,
+        autodelete=False,
+        cancel_action_phases="always",
+        cancel_actions=[],
+        disabled=False,
+        id=rule_id,
+        invert_matching=False,
+        sl=ServiceLevel(precedence="message", value=0),
+        state=1,
+    )
+    rule.update(kwargs)  # type: ignore[typeddict-item]
+    return rule
+
+
+_RULES = [
+    _rule(
+        "count",
+        match="^count (\\d+)",
+        count=Count(
+            count=1000000,
+            period=86400,
+            algorithm="interval",
+            count_duration=None,
+            count_ack=False,
+            separate_host=True,
+            separate_application=True,
+            separate_match_groups=True,
+        ),
+    ),
+    _rule("problem", match="^problem (\\d+)", match_ok="^recovered (\\d+)"),
+    _rule("other", match=""),
+]
+
+
+def _line(host: int, text: str) -> str:
+    return f"<13>Oct 18 10:00:00 host-{host} app[42]: {text}"
+
+
+def _fill_line(rand: random.Random, num: int) -> str:
+    host = rand.randrange(_NUM_HOSTS)
+    if num % 2:
+        return _line(host, f"count {num % 10000}")
+    return _line(host, f"problem {num}")
+
+
+def _measured_line(rand: random.Random, num_open: int) -> str:
+    host = rand.randrange(_NUM_HOSTS)
+    kind = rand.random()
+    if kind < 0.4:
+        return _line(host, f"count {rand.randrange(10000)}")
+    if kind < 0.7:
+        return _line(host, f"problem {num_open + rand.randrange(1000000)}")
+    if kind < 0.9:
+        return _line(host, f"recovered {rand.randrange(num_open)}")
+    return _line(host, "something else")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--open-events", type=int, default=100000)
+    parser.add_argument("--messages", type=int, default=10000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    logger.setLevel(logging.CRITICAL)
+    rand = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(
+        HostConfig, "get_canonical_name", return_value=None
+    ):
+        settings = ec.settings("1.2.3i45", Path(tmp_dir), Path(tmp_dir), ["mkeventd"])
+        config = make_config(ec.default_config())
+        config["rule_packs"] = [default_rule_pack(_RULES)]
+        config["event_limit"]["by_host"]["limit"] = 10 * args.open_events
+        config["event_limit"]["by_rule"]["limit"] = 10 * args.open_events
+        config["event_limit"]["overall"]["limit"] = 10 * args.open_events
+        history = History(
+            settings, config, logger, StatusTableEvents.columns, StatusTableHistory.columns
+        )
+        perfcounters = Perfcounters(logger)
+        event_status = EventStatus(settings, config, perfcounters, history, logger)
+        event_server = EventServer(
+            logger,
+            settings,
+            config,
+            default_slave_status_master(),
+            perfcounters,
+            ECLock(logger),
+            history,
+            event_status,
+            StatusTableEvents.columns,
+            False,
+        )
+        event_server.reload_configuration(config)
+        num = 0
+        while event_status.num_existing_events < args.open_events:
+            event_server.process_line(_fill_line(rand, num), None)
+            num += 1
+
+        latencies = []
+        start = time.perf_counter()
+        for _num in range(args.messages):
+            line = _measured_line(rand, num)
+            message_start = time.perf_counter()
+            event_server.process_line(line, None)
+            latencies.append(time.perf_counter() - message_start)
+        duration = time.perf_counter() - start
+
+    latencies.sort()
+    print(
+        f"{args.open_events} open events: {args.messages / duration:8.0f} msg/s, "
+        f"p50 {latencies[len(latencies) // 2] * 1000:7.3f}ms, "
+        f"p99 {latencies[len(latencies) * 99 // 100] * 1000:7.3f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the event history of the Event Console with the file and the SQLite backend
+
+A synthetic history with the given number of events per day (100 events per
+second) is written to a temporary directory, one history period (log file or
+segment) per day. Then typical queries of the GUI are answered.
+
+Usage (from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/ec_history.py --days 30 --events-per-day 20000
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from typing import Literal
+from unittest import mock
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.history import History
+from cmk.ec.main import make_config, StatusTableEvents, StatusTableHistory
+from cmk.ec.query import QueryGET
+
+_DAY = 86400
+
+
+def _timed(func: Callable[[], object]) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def _query(history: History, lines: list[str]) -> list[object]:
+    status_server = mock.Mock()
+    status_server.table.return_value = StatusTableHistory(logging.getLogger("benchmark"), history)
+    return list(history.get(QueryGET(status_server, lines, logging.getLogger("benchmark"))))
+
+
+def _run(archive_mode: Literal["file", "sqlite"], days: int, events_per_day: int) -> None:
+    # Keep the history within its lifetime
+    start = float((int(time.time()) // _DAY - days) * _DAY)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings = ec.settings("1.2.3i45", Path(tmp_dir), Path(tmp_dir), ["mkeventd"])
+        config = make_config(ec.default_config())
+        config["archive_mode"] = archive_mode
+        history = History(
+            settings,
+            config,
+            logging.getLogger("benchmark"),
+            StatusTableEvents.columns,
+            StatusTableHistory.columns,
+        )
+
+        def _add() -> None:
+            for day in range(days):
+                now = start + day * _DAY
+                with mock.patch("time.localtime", lambda now=now: time.gmtime(now)):
+                    for num in range(events_per_day):
+                        with mock.patch("time.time", lambda num=num, now=now: now + num / 100):
+                            history.add(
+                                {
+                                    "id": day * events_per_day + num,
+                                    "host": HostName(f"host-{num % 1000}"),
+                                    "text": f"Something happened {num}",
+                                    "rule_id": f"rule-{num % 50}",
+                                    "phase": "open",
+                                },
+                                "NEW",
+                            )
+            history.housekeeping()
+
+        add_time, _result = _timed(_add)
+        end = start + days * _DAY
+        queries = {
+            "host, last day": [
+                "GET history",
+                f"Filter: history_time >= {end - _DAY}",
+                "Filter: event_host = host-42",
+            ],
+            "host, all days": ["GET history", "Filter: event_host = host-42"],
+            "event id": ["GET history", f"Filter: event_id = {days * events_per_day // 2}"],
+            "text, limit": ["GET history", "Filter: event_text ~ happened 123", "Limit: 100"],
+        }
+        timings = []
+        for name, lines in queries.items():
+            query_time, rows = _timed(partial(_query, history, lines))
+            assert isinstance(rows, list) and rows, name
+            timings.append(f"{name} {query_time:7.3f}s ({len(rows)} rows)")
+        history.close()
+
+    print(f"{archive_mode:<6}: add {add_time:7.3f}s, " + ", ".join(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--events-per-day", type=int, default=20000)
+    args = parser.parse_args()
+
+    _run("file", args.days, args.events_per_day)
+    _run("sqlite", args.days, args.events_per_day)
+
+
+if __name__ == "__main__":
+    main()
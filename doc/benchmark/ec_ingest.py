@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the sustained syslog throughput of the Event Console via UDP
+
+An event server with the built-in UDP syslog server is started on localhost.
+A separate process sends syslog messages with the given rate, each message
+opens an event. The lookup of the host in the monitoring core (livestatus) is
+simulated with the given latency. Reported are the events created per second
+and the messages lost, either by the kernel (full socket buffer) or by the
+event server (full ingest queue).
+
+Usage (from the root of the repository):
+
+    OMD_SITE=heute PYTHONPATH=. python3 doc/benchmark/ec_ingest.py --rate 20000
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import cmk.ec.export as ec
+from cmk.ec.config import Rule, ServiceLevel
+from cmk.ec.defaults import default_rule_pack
+from cmk.ec.helpers import ECLock
+from cmk.ec.history import History
+from cmk.ec.host_config import HostConfig
+from cmk.ec.main import (
+    default_slave_status_master,
+    EventServer,
+    EventStatus,
+    make_config,
+    StatusTableEvents,
+    StatusTableHistory,
+)
+from cmk.ec.perfcounters import Perfcounters
+
+_NUM_RULES = 50
+
+
+def _rules() -> list[Rule]:
+    rules = [
+        Rule(
+            actions=[],
+            autodelete=False,
+            disabled=False,
+            id=f"rule-{num}",
+            invert_matching=False,
+            match=f"component-{num} failed",
+            sl=ServiceLevel(precedence="message", value=0),
+            state=2,
+        )
+        for num in range(_NUM_RULES)
+    ]
+    rules.append(
+        Rule(
+            actions=[],
+            autodelete=False,
+            disabled=False,
+            id="other",
+            invert_matching=False,
+            sl=ServiceLevel(precedence="message", value=0),
+            state=1,
+        )
+    )
+    return rules
+
+
+def _send(port: int, rate: int, num_messages: int) -> None:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        start = time.perf_counter()
+        for num in range(num_messages):
+            if (ahead := num / rate - (time.perf_counter() - start)) > 0:
+                time.sleep(ahead)
+            sock.sendto(
+                f"<11>Oct 18 10:00:00 host-{num % 1000} app[42]: "
+                f"component-{num % (2 * _NUM_RULES)} failed".encode(),
+                ("127.0.0.1", port),
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--rate", type=int, default=20000, help="messages per second")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--lookup-latency", type=float, default=0.0002, help="in seconds")
+    args = parser.parse_args()
+
+    def lookup_host(_self: HostConfig, _host_name: str) -> None:
+        time.sleep(args.lookup_latency)
+
+    logger = logging.getLogger("benchmark")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(
+        HostConfig, "get_canonical_name", lookup_host
+    ), socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as syslog_udp:
+        syslog_udp.bind(("127.0.0.1", 0))
+        port = syslog_udp.getsockname()[1]
+        settings = ec.settings(
+            "1.2.3i45",
+            Path(tmp_dir),
+            Path(tmp_dir),
+            ["mkeventd", "--syslog", "--syslog-fd", str(os.dup(syslog_udp.fileno()))],
+        )
+        settings.paths.event_pipe.value.parent.mkdir(parents=True, exist_ok=True)
+        config = make_config(ec.default_config())
+        config["rule_packs"] = [default_rule_pack(_rules())]
+        config["event_limit"]["by_host"]["limit"] = 10 * args.messages
+        config["event_limit"]["by_rule"]["limit"] = 10 * args.messages
+        config["event_limit"]["overall"]["limit"] = 10 * args.messages
+        history = History(
+            settings, config, logger, StatusTableEvents.columns, StatusTableHistory.columns
+        )
+        perfcounters = Perfcounters(logger)
+        event_status = EventStatus(settings, config, perfcounters, history, logger)
+        event_server = EventServer(
+            logger,
+            settings,
+            config,
+            default_slave_status_master(),
+            perfcounters,
+            ECLock(logger),
+            history,
+            event_status,
+            StatusTableEvents.columns,
+            True,
+        )
+        event_server.reload_configuration(config)
+        event_server.start()
+
+        sender = multiprocessing.Process(target=_send, args=(port, args.rate, args.messages))
+        start = time.perf_counter()
+        sender.start()
+        # Wait until no more events are created
+        last_events, last_change = 0, start
+        while sender.is_alive() or time.perf_counter() - last_change < 1:
+            if (events := event_status.num_existing_events) != last_events:
+                last_events, last_change = events, time.perf_counter()
+            time.sleep(0.001)
+        duration = last_change - start
+        event_server.terminate()
+        event_server.join()
+
+    events = event_status.num_existing_events
+    queue_drops = perfcounters._counters.get("queue_drops", 0)
+    print(
+        f"{args.rate} msg/s sent: {events / duration:8.0f} events/s, "
+        f"{queue_drops} dropped by the queue, "
+        f"{args.messages - events - queue_drops} lost in the kernel "
+        f"(of {args.messages} messages)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the rule matching of the Event Console with and without the rule prefilter
+
+Synthetic messages are processed by an event server with the given number of
+rules. Most rules match a specific message text of an application, some match
+on the host only. The rule hits of both runs are compared.
+
+Usage (from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/ec_rule_matching.py --rules 3000
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import cmk.ec.export as ec
+from cmk.ec.config import Rule, ServiceLevel
+from cmk.ec.defaults import default_rule_pack
+from cmk.ec.helpers import ECLock
+from cmk.ec.history import History
+from cmk.ec.host_config import HostConfig
+from cmk.ec.main import (
+    default_slave_status_master,
+    EventServer,
+    EventStatus,
+    make_config,
+    StatusTableEvents,
+    StatusTableHistory,
+)
+from cmk.ec.perfcounters import Perfcounters
+from cmk.ec.rule_prefilter import RulePrefilter
+
+_APPLICATIONS = ["kernel", "sshd", "cron", "postfix", "nginx", "java", "systemd", "ntpd"]
+
+
+def _rules(num_rules: int) -> list[Rule]:
+    rules = []
+    for num in range(num_rules):
+        rule = Rule(
+            actions=[],
+            autodelete=False,
+            disabled=False,
+            id=f"rule-{num}",
+            invert_matching=False,
+            sl=ServiceLevel(precedence="message", value=0),
+            state=2,
+        )
+        if num % 10 == 9:
+            rule["match_host"] = f"^host-{num}\\d*$"
+        else:
+            rule["match"] = f"component-{num} (failed|crashed) with code (\\d+)"
+            rule["match_application"] = _APPLICATIONS[num % len(_APPLICATIONS)]
+        rules.append(rule)
+    return rules
+
+
+def _lines(num_rules: int, num_messages: int) -> list[str]:
+    rand = random.Random(42)
+    lines = []
+    for _num in range(num_messages):
+        component = rand.randrange(num_rules * 2)  # Half of the messages match no rule
+        application = _APPLICATIONS[rand.randrange(len(_APPLICATIONS))]
+        lines.append(
+            f"<11>Oct 18 10:00:00 host-{rand.randrange(1000)} {application}[42]: "
+            f"component-{component} failed with code {rand.randrange(256)}"
+        )
+    return lines
+
+
+def _run(num_rules: int, lines: list[str], prefilter: bool) -> tuple[float, list[list]]:
+    logger = logging.getLogger("benchmark")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.object(
+        HostConfig, "get_canonical_name", return_value=None
+    ):
+        settings = ec.settings("1.2.3i45", Path(tmp_dir), Path(tmp_dir), ["mkeventd"])
+        config = make_config(ec.default_config())
+        config["rule_packs"] = [default_rule_pack(_rules(num_rules))]
+        history = History(
+            settings, config, logger, StatusTableEvents.columns, StatusTableHistory.columns
+        )
+        perfcounters = Perfcounters(logger)
+        event_status = EventStatus(settings, config, perfcounters, history, logger)
+        event_server = EventServer(
+            logger,
+            settings,
+            config,
+            default_slave_status_master(),
+            perfcounters,
+            ECLock(logger),
+            history,
+            event_status,
+            StatusTableEvents.columns,
+            False,
+        )
+        event_server.reload_configuration(config)
+        if not prefilter:
+            event_server._rule_prefilter = RulePrefilter([])
+
+        start = time.perf_counter()
+        for line in lines:
+            event_server.process_line(line, None)
+        duration = time.perf_counter() - start
+        return duration, list(event_status.get_rule_stats())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--rules", type=int, default=3000)
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+
+    lines = _lines(args.rules, args.messages)
+    hits = []
+    for prefilter in (False, True):
+        duration, stats = _run(args.rules, lines, prefilter)
+        print(
+            f"prefilter {'on' if prefilter else 'off':>3}: {len(lines) / duration:8.0f} msg/s, "
+            f"{sum(evaluations for _rule_id, _hits, evaluations in stats) / len(lines):7.1f} "
+            "rule evaluations per message"
+        )
+        hits.append(
+            [(rule_id, rule_hits) for rule_id, rule_hits, _evaluations in stats if rule_hits]
+        )
+    assert hits[0] == hits[1], "different rule hits"
+
+
+if __name__ == "__main__":
+    main()
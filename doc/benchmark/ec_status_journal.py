@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark saving and restoring the event status of the Event Console
+
+For each number of open events the complete status is saved (this is what
+every save did before the journal), then the given number of saves with a few
+changed, new and removed events each is appended to the journal. Reported are
+the durations of the complete save, of one incremental save, of restoring the
+complete status and of restoring it with the journal replayed.
+
+Usage (from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/ec_status_journal.py --events 10000 100000 500000
+"""
+
+import argparse
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ec.event import Event
+from cmk.ec.status_journal import JournalEntry, PackedEventStatus, StatusJournal
+
+
+def _event(event_id: int, now: float) -> Event:
+    return {
+        "id": event_id,
+        "rule_id": f"rule-{event_id % 100}",
+        "text": f"component-{event_id} failed with code {event_id % 256}",
+        "phase": "open",
+        "count": 1,
+        "time": now,
+        "first": now,
+        "last": now,
+        "comment": "",
+        "host": HostName(f"host-{event_id % 1000}"),
+        "ipaddress": "10.0.0.1",
+        "application": "app",
+        "pid": 4711,
+        "priority": 3,
+        "facility": 1,
+        "match_groups": (str(event_id), "failed"),
+        "match_groups_syslog_application": (),
+        "core_host": HostName(f"host-{event_id % 1000}"),
+        "host_in_downtime": False,
+        "contact_groups": None,
+        "contact_groups_notify": False,
+        "contact_groups_precedence": "host",
+        "state": 2,
+        "sl": 0,
+    }
+
+
+def _measure(num_events: int, num_saves: int, changes_per_save: int) -> None:
+    rand = random.Random(42)
+    now = time.time()
+    status = PackedEventStatus(
+        next_event_id=num_events + 1,
+        events=[_event(event_id, now) for event_id in range(1, num_events + 1)],
+        rule_stats={f"rule-{num}": num for num in range(100)},
+        interval_starts={},
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal = StatusJournal(Path(tmp_dir) / "status", logging.getLogger("benchmark"))
+        start = time.perf_counter()
+        journal.write_snapshot(status)
+        complete_save = time.perf_counter() - start
+
+        start = time.perf_counter()
+        journal.load()
+        complete_restore = time.perf_counter() - start
+
+        incremental_saves = []
+        next_event_id = num_events + 1
+        for _num in range(num_saves):
+            changed = []
+            for event in rand.sample(status["events"], changes_per_save):
+                event["phase"] = "ack"
+                changed.append(event)
+            new = [_event(event_id, now) for event_id in range(next_event_id, next_event_id + 10)]
+            next_event_id += 10
+            start = time.perf_counter()
+            journal.append(
+                JournalEntry(
+                    next_event_id=next_event_id,
+                    changed_events=changed + new,
+                    removed_event_ids=[rand.randrange(1, next_event_id) for _i in range(10)],
+                    rule_stats=status["rule_stats"],
+                    interval_starts=status["interval_starts"],
+                )
+            )
+            incremental_saves.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        journal.load()
+        journal_restore = time.perf_counter() - start
+
+    print(
+        f"{num_events:7d} events: complete save {complete_save * 1000:8.1f}ms, "
+        f"incremental save {sum(incremental_saves) / num_saves * 1000:6.1f}ms, "
+        f"restore {complete_restore * 1000:8.1f}ms, "
+        f"with {num_saves} journal entries {journal_restore * 1000:8.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--saves", type=int, default=20)
+    parser.add_argument("--changes", type=int, default=100, help="changed events per save")
+    args = parser.parse_args()
+    for num_events in args.events:
+        _measure(num_events, args.saves, args.changes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark fetching the data sources of a cluster
+
+Each node of the simulated cluster has a data source program which answers
+after the given latency, like an agent behind a slow link. The sources of all
+nodes are fetched like for the Checkmk service of the cluster, once for each
+given number of concurrent fetches. Reported are the wall time and the times
+shown per source.
+
+Usage (from the root of the repository):
+
+    OMD_SITE=x PYTHONPATH=. python3 doc/benchmark/fetch_all.py --nodes 8 --latency 0.5
+"""
+
+import argparse
+import time
+
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.hostaddress import HostName
+
+from cmk.fetchers import Fetcher, FetcherType, Mode, ProgramFetcher
+from cmk.fetchers.filecache import FileCache, FileCacheOptions, NoCache
+
+from cmk.checkengine.fetcher import SourceInfo, SourceType
+
+from cmk.base.checkers import _fetch_all
+from cmk.base.sources import Source
+
+
+class _NodeSource(Source[AgentRawData]):
+    def __init__(self, node: HostName, latency: float) -> None:
+        self.node = node
+        self.latency = latency
+
+    def source_info(self) -> SourceInfo:
+        return SourceInfo(self.node, None, "agent", FetcherType.PROGRAM, SourceType.HOST)
+
+    def fetcher(self) -> Fetcher[AgentRawData]:
+        return ProgramFetcher(
+            cmdline=f"sleep {self.latency}; echo '<<<check_mk>>>'; echo 'Version: 2.2.0'",
+            stdin=None,
+            is_cmc=False,
+        )
+
+    def file_cache(
+        self, *, simulation: bool, file_cache_options: FileCacheOptions
+    ) -> FileCache[AgentRawData]:
+        return NoCache(self.node)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--nodes", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="in seconds")
+    parser.add_argument("--concurrent-fetches", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    sources = [_NodeSource(HostName(f"node{n}"), args.latency) for n in range(args.nodes)]
+    print(f"{args.nodes} nodes, {args.latency * 1000:.0f}ms latency per source")
+    for concurrent in args.concurrent_fetches:
+        start = time.perf_counter()
+        fetched = _fetch_all(
+            sources,
+            simulation=False,
+            file_cache_options=FileCacheOptions(),
+            mode=Mode.CHECKING,
+            max_concurrent_fetches=concurrent,
+        )
+        wall = time.perf_counter() - start
+        assert all(raw_data.is_ok() for _source, raw_data, _duration in fetched)
+        per_source = max(duration.process.elapsed for _source, _raw_data, duration in fetched)
+        print(
+            f"{concurrent:2d} concurrent fetches: wall {wall * 1000:8.1f}ms, "
+            f"slowest source {per_source * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark reading the packed configuration of the helpers
+
+A packed configuration of the given number of hosts is written, with the host
+variables as WATO creates them (tags, labels, paths, attributes and addresses).
+A new process reads it and looks up the address and the attributes of a few
+hosts, like a helper checking them. Reported are the time needed and the growth
+of the resident memory of that process.
+
+Usage (from the root of the repository):
+
+    OMD_SITE=x PYTHONPATH=. python3 doc/benchmark/packed_config.py --hosts 60000
+"""
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.base.config import PackedConfigStore
+
+
+def _helper_config(num_hosts: int) -> dict[str, Any]:
+    hosts = [HostName(f"host{n:06d}.example.com") for n in range(num_hosts)]
+    return {
+        "all_hosts": [f"{h}|lan|prod|cmk-agent|tcp|wato|/wato/site/" for h in hosts],
+        "host_tags": {
+            h: {"site": "site", "address_family": "ip-v4-only", "agent": "cmk-agent"} for h in hosts
+        },
+        "host_labels": {h: {"cmk/os_family": "linux"} for h in hosts},
+        "host_paths": {h: "/wato/site/hosts.mk" for h in hosts},
+        "ipaddresses": {
+            h: f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}" for n, h in enumerate(hosts)
+        },
+        "host_attributes": {
+            h: {
+                "alias": f"Host {n} in the data center",
+                "meta_data": {"created_at": 1690000000.0, "created_by": "automation"},
+                "additional_ipv4addresses": [],
+                "additional_ipv6addresses": [],
+                "contactgroups": {"groups": ["admins"], "use": True},
+            }
+            for n, h in enumerate(hosts)
+        },
+        "management_protocol": {h: "snmp" for h in hosts[::10]},
+    }
+
+
+def _rss() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize()
+
+
+def _read(path: Path, num_hosts: int, lookups: int) -> None:
+    rss_before = _rss()
+    start = time.perf_counter()
+    packed = PackedConfigStore(path).read()
+    for n in range(0, num_hosts, max(1, num_hosts // lookups)):
+        host_name = HostName(f"host{n:06d}.example.com")
+        assert packed["ipaddresses"].get(host_name) is not None
+        assert packed["host_attributes"].get(host_name, {}).get("alias")
+    wall = time.perf_counter() - start
+    rss = _rss() - rss_before
+    print(f"read and {lookups} lookups: {wall * 1000:8.1f}ms, RSS +{rss / 1e6:7.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--hosts", type=int, default=60000)
+    parser.add_argument("--lookups", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "precompiled_check_config.mk"
+        start = time.perf_counter()
+        PackedConfigStore(path).write(_helper_config(args.hosts))
+        print(
+            f"{args.hosts} hosts, {path.stat().st_size / 1e6:.1f} MB, "
+            f"written in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        helper = multiprocessing.get_context("spawn").Process(
+            target=_read, args=(path, args.hosts, args.lookups)
+        )
+        helper.start()
+        helper.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark storing and looking up piggyback data
+
+The piggyback data of a synthetic set of sources is stored to a temporary
+directory and looked up for all piggybacked hosts. This is done in the modes
+
+ * files:   piggybacked host files, looked up in the file system (no index)
+ * index:   piggybacked host files, looked up using the piggyback index
+ * segment: one segment file per source, looked up using the piggyback index
+
+Usage (as site user or with OMD_SITE set, from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/piggyback.py --scenario 1x20000 500x40
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import cmk.utils.paths
+import cmk.utils.piggyback as piggyback
+from cmk.utils.hostaddress import HostName
+
+_TIME_SETTINGS: piggyback.PiggybackTimeSettings = [(None, "max_cache_age", 3600)]
+_MODES = ["files", "index", "segment"]
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _lookup_all(piggybacked_hostnames: list[HostName]) -> None:
+    for piggybacked_hostname in piggybacked_hostnames:
+        assert piggyback.get_piggyback_raw_data(piggybacked_hostname, _TIME_SETTINGS)
+
+
+def _check_all(piggybacked_hostnames: list[HostName]) -> None:
+    for piggybacked_hostname in piggybacked_hostnames:
+        assert piggyback.has_piggyback_raw_data(piggybacked_hostname, _TIME_SETTINGS)
+
+
+def _run(mode: str, num_sources: int, num_targets: int) -> None:
+    # Force the storage layout of the mode, independent of the number of piggybacked hosts
+    piggyback._SEGMENT_MIN_PIGGYBACKED_HOSTS = 1 if mode == "segment" else 1 << 32  # type: ignore[misc]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cmk.utils.paths.piggyback_dir = Path(tmp_dir, "piggyback")
+        cmk.utils.paths.piggyback_source_dir = Path(tmp_dir, "piggyback_sources")
+
+        piggybacked_hostnames = [
+            HostName(f"pig-{source_nr}-{target_nr}")
+            for source_nr in range(num_sources)
+            for target_nr in range(num_targets)
+        ]
+
+        def _store() -> None:
+            for source_nr in range(num_sources):
+                piggyback.store_piggyback_raw_data(
+                    HostName(f"source-{source_nr}"),
+                    {
+                        piggybacked_hostname: [b"<<<local:sep(0)>>>", b"0 Service - OK"]
+                        for piggybacked_hostname in piggybacked_hostnames[
+                            source_nr * num_targets : (source_nr + 1) * num_targets
+                        ]
+                    },
+                )
+
+        store_time = _timed(_store)
+        if mode == "files":
+            (cmk.utils.paths.piggyback_dir / ".index").unlink()
+        check_time = _timed(lambda: _check_all(piggybacked_hostnames))
+        lookup_time = _timed(lambda: _lookup_all(piggybacked_hostnames))
+        hosts_time = _timed(lambda: list(piggyback.get_source_and_piggyback_hosts(_TIME_SETTINGS)))
+        cleanup_time = _timed(lambda: piggyback.cleanup_piggyback_files(_TIME_SETTINGS))
+
+    print(
+        f"{num_sources:>4} sources x {num_targets:>5} targets, {mode:<7}: "
+        f"store {store_time:7.3f}s, check {check_time:7.3f}s, lookup {lookup_time:7.3f}s, "
+        f"all hosts {hosts_time:7.3f}s, cleanup {cleanup_time:7.3f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument(
+        "--scenario",
+        nargs="+",
+        default=["1x20000", "500x40"],
+        help="SOURCESxTARGETS",
+    )
+    parser.add_argument("--mode", nargs="+", default=_MODES, choices=_MODES)
+    args = parser.parse_args()
+
+    for scenario in args.scenario:
+        num_sources, num_targets = (int(n) for n in scenario.split("x"))
+        for mode in args.mode:
+            _run(mode, num_sources, num_targets)
+
+
+if __name__ == "__main__":
+    main()
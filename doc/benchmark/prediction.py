@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the time series operations of the prediction with and without numpy
+
+A synthetic series of one year with one minute steps (including gaps) is
+upsampled, downsampled and summarized per day, as done when computing the
+prediction with a horizon of one year. The results of both implementations
+are compared.
+
+Usage (from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/prediction.py
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections.abc import Callable
+
+import numpy  # noqa: F401 # Imported in advance, this is not part of the measurements
+
+from cmk.utils.prediction import _prediction
+
+_STEP = 60
+_DAY = 86400
+
+
+def _timed(func: Callable[[], object]) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def _assert_equivalent(result: object, expected: object) -> None:
+    if isinstance(expected, _prediction.PredictionData):
+        assert isinstance(result, _prediction.PredictionData)
+        _assert_equivalent(result.dict(), expected.dict())
+    elif isinstance(expected, dict):
+        assert isinstance(result, dict) and result.keys() == expected.keys()
+        for key, value in expected.items():
+            _assert_equivalent(result[key], value)
+    elif isinstance(expected, (list, tuple)):
+        assert isinstance(result, (list, tuple)) and len(result) == len(expected)
+        for item, expected_item in zip(result, expected):
+            _assert_equivalent(item, expected_item)
+    elif isinstance(expected, float):
+        assert isinstance(result, float)
+        assert math.isclose(result, expected, rel_tol=1e-12, abs_tol=1e-12), (result, expected)
+    else:
+        assert result == expected, (result, expected)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    rand = random.Random(42)
+    start = 1672531200
+    num_points = args.days * _DAY // _STEP
+    series = _prediction.TimeSeries(
+        [None if rand.random() < 0.05 else rand.uniform(0, 100) for _i in range(num_points)],
+        (start, start + num_points * _STEP, _STEP),
+    )
+    # Daily slices: one minute resolution for the latest day, coarser for the older ones
+    slices = [
+        (
+            _prediction.TimeSeries(
+                series.values[day * _DAY // _STEP : (day + 1) * _DAY // _STEP : 5],
+                (start + day * _DAY, start + (day + 1) * _DAY, 5 * _STEP),
+            ),
+            (args.days - 1 - day) * _DAY,
+        )
+        for day in range(args.days - 1)
+    ]
+    slices.append(
+        (
+            _prediction.TimeSeries(
+                series.values[-_DAY // _STEP :],
+                (start + (args.days - 1) * _DAY, start + args.days * _DAY, _STEP),
+            ),
+            0,
+        )
+    )
+    slices.reverse()  # The youngest slice determines the resolution
+
+    operations: list[tuple[str, Callable[[], object]]] = [
+        (
+            "upsample to 30s",
+            lambda: series.bfill_upsample((series.start, series.end, _STEP // 2), 0),
+        ),
+        (
+            "downsample to 5min max",
+            lambda: series.downsample((series.start, series.end, 5 * _STEP), "max"),
+        ),
+        (
+            "downsample to 1h average",
+            lambda: series.downsample((series.start, series.end, 3600), "average"),
+        ),
+        ("prediction data", lambda: _prediction._calculate_data_for_prediction(slices)),
+    ]
+
+    for name, operation in operations:
+        _prediction._NUMPY_MIN_POINTS = sys.maxsize  # type: ignore[misc]
+        python_time, expected = _timed(operation)
+        _prediction._NUMPY_MIN_POINTS = 0  # type: ignore[misc]
+        numpy_time, result = _timed(operation)
+        _assert_equivalent(result, expected)
+        print(
+            f"{name:<25}: python {python_time:7.3f}s, numpy {numpy_time:7.3f}s "
+            f"({python_time / numpy_time:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
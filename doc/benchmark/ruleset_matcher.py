@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark the host ruleset evaluation of the RulesetMatcher
+
+This mimics the ruleset evaluation done during "cmk -U": All rulesets are
+matched against all hosts of a synthetic configuration.
+
+Usage (as site user or with OMD_SITE set, from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/ruleset_matcher.py --hosts 10000 50000 100000
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Sequence
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.rulesets.ruleset_matcher import (
+    LabelManager,
+    RulesetMatcher,
+    RulesetMatchObject,
+    RuleSpec,
+)
+from cmk.utils.tags import TagGroupID, TagID
+
+_TAG_GROUPS = {
+    TagGroupID("criticality"): [TagID("prod"), TagID("critical"), TagID("test"), TagID("offline")],
+    TagGroupID("networking"): [TagID("lan"), TagID("wan"), TagID("dmz")],
+    TagGroupID("agent"): [TagID("cmk-agent"), TagID("no-agent"), TagID("special-agents")],
+    TagGroupID("location"): [TagID("loc%d" % i) for i in range(20)],
+}
+_NUM_FOLDERS = 200
+
+
+def _make_hosts(
+    num_hosts: int, rng: random.Random
+) -> tuple[
+    dict[HostName, dict[TagGroupID, TagID]], dict[HostName, str], dict[HostName, dict[str, str]]
+]:
+    host_tags: dict[HostName, dict[TagGroupID, TagID]] = {}
+    host_paths: dict[HostName, str] = {}
+    host_labels: dict[HostName, dict[str, str]] = {}
+    for nr in range(num_hosts):
+        hostname = HostName("host%06d" % nr)
+        host_tags[hostname] = {
+            group_id: rng.choice(tag_ids) for group_id, tag_ids in _TAG_GROUPS.items()
+        }
+        host_paths[hostname] = "/wato/dc%d/folder%d/hosts.mk" % (
+            nr % 4,
+            nr % _NUM_FOLDERS,
+        )
+        host_labels[hostname] = {
+            "os": rng.choice(["linux", "windows", "aix"]),
+            "team": "team%d" % rng.randrange(30),
+        }
+    return host_tags, host_paths, host_labels
+
+
+def _make_rulesets(
+    num_rulesets: int, rules_per_ruleset: int, rng: random.Random
+) -> list[Sequence[RuleSpec[object]]]:
+    def _condition() -> dict:
+        kind = rng.randrange(6)
+        group_id = rng.choice(list(_TAG_GROUPS))
+        if kind == 0:
+            return {"host_tags": {group_id: rng.choice(_TAG_GROUPS[group_id])}}
+        if kind == 1:
+            return {
+                "host_tags": {group_id: {"$or": rng.sample(_TAG_GROUPS[group_id], 2)}},
+                "host_folder": "/wato/dc%d/" % rng.randrange(4),
+            }
+        if kind == 2:
+            return {"host_labels": {"os": rng.choice(["linux", "windows"])}}
+        if kind == 3:
+            return {
+                "host_labels": {"team": {"$ne": "team%d" % rng.randrange(30)}},
+                "host_tags": {group_id: {"$ne": rng.choice(_TAG_GROUPS[group_id])}},
+            }
+        if kind == 4:
+            return {"host_name": [{"$regex": "host%d" % rng.randrange(10)}]}
+        return {"host_folder": "/wato/dc%d/folder%d/" % (rng.randrange(4), rng.randrange(200))}
+
+    return [
+        [
+            {"id": f"{r}-{n}", "value": n, "condition": _condition()}
+            for n in range(rules_per_ruleset)
+        ]
+        for r in range(num_rulesets)
+    ]
+
+
+def _run(num_hosts: int, num_rulesets: int, rules_per_ruleset: int) -> None:
+    rng = random.Random(num_hosts)
+    host_tags, host_paths, host_labels = _make_hosts(num_hosts, rng)
+    rulesets = _make_rulesets(num_rulesets, rules_per_ruleset, rng)
+
+    start = time.perf_counter()
+    matcher = RulesetMatcher(
+        tag_to_group_map={},
+        host_tags=host_tags,  # type: ignore[arg-type]
+        host_paths=host_paths,
+        labels=LabelManager(host_labels, [], [], lambda h, s: {}),  # type: ignore[arg-type]
+        all_configured_hosts=set(host_tags),
+        clusters_of={},
+        nodes_of={},
+    )
+    init_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matches = 0
+    for ruleset in rulesets:
+        for hostname in host_tags:
+            matches += len(
+                list(
+                    matcher.get_host_ruleset_values(
+                        RulesetMatchObject(hostname), ruleset, is_binary=False
+                    )
+                )
+            )
+    eval_time = time.perf_counter() - start
+
+    print(
+        f"{num_hosts:>7} hosts, {num_rulesets} rulesets x {rules_per_ruleset} rules: "
+        f"init {init_time:7.3f}s, evaluation {eval_time:7.3f}s, {matches} matches"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--hosts", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--rulesets", type=int, default=50)
+    parser.add_argument("--rules", type=int, default=20, help="rules per ruleset")
+    args = parser.parse_args()
+
+    for num_hosts in args.hosts:
+        _run(num_hosts, args.rulesets, args.rules)
+
+
+if __name__ == "__main__":
+    main()
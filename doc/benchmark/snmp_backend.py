@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark fetching SNMP tables with the classic and the native backend
+
+A simulated SNMPv2c agent is started on localhost. It serves an interface table
+(22 columns) and answers each request after the given latency, like a device
+behind a WAN link. The native backend walks up to 10 columns with each request. The table is fetched with get_snmp_table by each backend,
+reported are the wall time and the CPU time (including the snmpwalk processes
+of the classic backend). The classic backend is skipped if the Net-SNMP tools
+are not installed.
+
+Usage (from the root of the repository):
+
+    PYTHONPATH=. python3 doc/benchmark/snmp_backend.py --interfaces 200 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import bisect
+import logging
+import multiprocessing
+import resource
+import shutil
+import socket
+import time
+from collections.abc import Sequence
+from typing import cast
+
+from cmk.utils.hostaddress import HostAddress, HostName
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import (
+    BackendOIDSpec,
+    BackendSNMPTree,
+    get_snmp_table,
+    OID,
+    SNMPBackend,
+    SNMPBackendEnum,
+    SNMPHostConfig,
+)
+
+import cmk.fetchers.snmp_backend._ber as ber
+from cmk.fetchers.snmp_backend import ClassicSNMPBackend, NativeSNMPBackend
+
+_IF_ENTRY = ".1.3.6.1.2.1.2.2.1"
+_NUM_COLUMNS = 22
+
+
+def _mib(num_interfaces: int) -> dict[OID, bytes]:
+    mib = {}
+    for column in range(1, _NUM_COLUMNS + 1):
+        for index in range(1, num_interfaces + 1):
+            mib[f"{_IF_ENTRY}.{column}.{index}"] = (
+                ber.encode_octet_string(b"GigabitEthernet0/%d" % index)
+                if column in (2, 6)
+                else ber.encode_integer(index * column, ber.COUNTER32)
+            )
+    # Something after the table, as on real devices
+    mib[".1.3.6.1.2.1.2.3.0"] = ber.encode_integer(0)
+    return mib
+
+
+def _key(oid: OID) -> tuple[int, ...]:
+    return tuple(map(int, oid.strip(".").split(".")))
+
+
+class _AgentProtocol(asyncio.DatagramProtocol):
+    def __init__(self, mib: dict[OID, bytes], latency: float) -> None:
+        self._oids = sorted(mib, key=_key)
+        self._keys = [_key(oid) for oid in self._oids]
+        self._mib = mib
+        self._latency = latency
+        self._transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = cast(asyncio.DatagramTransport, transport)
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        assert self._transport is not None
+        version, community, request = ber.decode_community_message(data)
+        response = ber.encode_community_message(version, community, self._response(request))
+        asyncio.get_running_loop().call_later(self._latency, self._transport.sendto, response, addr)
+
+    def _response(self, request: ber.PDU) -> bytes:
+        varbinds: list[tuple[OID, bytes]] = []
+        if request.type == ber.GET_REQUEST:
+            for oid, _value in request.varbinds:
+                varbinds.append((oid, self._mib.get(oid, b"\x80\x00")))
+        else:
+            repetitions = request.error_index if request.type == ber.GET_BULK_REQUEST else 1
+            cursors = [oid for oid, _value in request.varbinds]
+            for _repetition in range(repetitions):
+                for num, oid in enumerate(cursors):
+                    position = bisect.bisect_right(self._keys, _key(oid))
+                    if position < len(self._oids):
+                        cursors[num] = self._oids[position]
+                        varbinds.append((cursors[num], self._mib[cursors[num]]))
+                    else:
+                        varbinds.append((oid, b"\x82\x00"))
+        return ber.encode_pdu(ber.RESPONSE, request.request_id, varbinds)
+
+
+def _serve(sock: socket.socket, num_interfaces: int, latency: float) -> None:
+    async def serve() -> None:
+        await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _AgentProtocol(_mib(num_interfaces), latency), sock=sock
+        )
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def _config(port: int, backend: SNMPBackendEnum, concurrent_walks: int) -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("simulated"),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials="public",
+        port=port,
+        is_bulkwalk_host=True,
+        is_snmpv2or3_without_bulkwalk_host=False,
+        bulk_walk_size_of=10,
+        timing={"timeout": 5, "retries": 0, "concurrent_walks": concurrent_walks},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=backend,
+    )
+
+
+def _measure(name: str, backend: SNMPBackend, tree: BackendSNMPTree, rounds: int) -> None:
+    cpu_start = time.process_time()
+    children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    for _round in range(rounds):
+        table = get_snmp_table(
+            section_name=SectionName("interfaces"), tree=tree, walk_cache={}, backend=backend
+        )
+    wall = (time.perf_counter() - start) / rounds
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (
+        time.process_time()
+        - cpu_start
+        + children.ru_utime
+        - children_start.ru_utime
+        + children.ru_stime
+        - children_start.ru_stime
+    ) / rounds
+    print(f"{name:30s} {len(table):5d} rows: wall {wall * 1000:8.1f}ms, CPU {cpu * 1000:8.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--interfaces", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005, help="in seconds")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrent-walks", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    tree = BackendSNMPTree(
+        base=_IF_ENTRY,
+        oids=[
+            BackendOIDSpec(str(column), "string", False) for column in range(1, _NUM_COLUMNS + 1)
+        ],
+    )
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    agent = multiprocessing.Process(
+        target=_serve, args=(sock, args.interfaces, args.latency), daemon=True
+    )
+    agent.start()
+
+    print(
+        f"{args.interfaces} interfaces, {_NUM_COLUMNS} columns, "
+        f"{args.latency * 1000:.1f}ms latency per request"
+    )
+    backends: Sequence[tuple[str, SNMPBackend]] = [
+        (
+            f"native, {concurrent} concurrent walks",
+            NativeSNMPBackend(_config(port, SNMPBackendEnum.NATIVE, concurrent), logger),
+        )
+        for concurrent in args.concurrent_walks
+    ]
+    if shutil.which("snmpbulkwalk"):
+        backends = [
+            ("classic", ClassicSNMPBackend(_config(port, SNMPBackendEnum.CLASSIC, 1), logger)),
+            *backends,
+        ]
+    else:
+        print("snmpbulkwalk not found, skipping the classic backend")
+    for name, backend in backends:
+        _measure(name, backend, tree, args.rounds)
+    agent.terminate()
+
+
+if __name__ == "__main__":
+    main()
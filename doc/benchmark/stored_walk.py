@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmark replaying a stored walk
+
+A walk with interface tables of the given number of interfaces is written to a
+temporary directory. Like a fetcher, each round creates a backend and walks the
+columns of the interface table and a few scalars. The first round includes
+compiling the walk (if the backend does so) and is reported separately.
+
+Usage (from the root of the repository):
+
+    OMD_SITE=x PYTHONPATH=. python3 doc/benchmark/stored_walk.py --interfaces 100000
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig
+
+from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
+
+_IF_ENTRY = ".1.3.6.1.2.1.2.2.1"
+_NUM_COLUMNS = 22
+
+_CONFIG = SNMPHostConfig(
+    is_ipv6_primary=False,
+    hostname=HostName("replayed"),
+    ipaddress=HostAddress("127.0.0.1"),
+    credentials="public",
+    port=161,
+    is_bulkwalk_host=False,
+    is_snmpv2or3_without_bulkwalk_host=False,
+    bulk_walk_size_of=0,
+    timing={},
+    oid_range_limits={},
+    snmpv3_contexts=[],
+    character_encoding=None,
+    snmp_backend=SNMPBackendEnum.STORED_WALK,
+)
+
+
+def _write_walk(path: Path, num_interfaces: int) -> None:
+    with path.open("w") as f:
+        f.write('.1.3.6.1.2.1.1.1.0 "Simulated device"\n')
+        f.write(".1.3.6.1.2.1.1.2.0 .1.3.6.1.4.1.8072.3.2.10\n")
+        for column in range(1, _NUM_COLUMNS + 1):
+            for index in range(1, num_interfaces + 1):
+                if column in (2, 6):
+                    f.write(f'{_IF_ENTRY}.{column}.{index} "GigabitEthernet0/{index}"\n')
+                else:
+                    f.write(f"{_IF_ENTRY}.{column}.{index} {index * column}\n")
+        f.write(".1.3.6.1.2.1.2.3.0 0\n")
+
+
+def _round(path: Path, columns: int) -> int:
+    backend = StoredWalkSNMPBackend(_CONFIG, logging.getLogger("benchmark"), path)
+    rows = 0
+    backend.get(".1.3.6.1.2.1.1.1.0")
+    backend.get(".1.3.6.1.2.1.1.2.0")
+    for column in range(1, columns + 1):
+        rows += len(backend.walk(f"{_IF_ENTRY}.{column}"))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--interfaces", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=3, help="columns walked per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "replayed"
+        _write_walk(path, args.interfaces)
+        print(
+            f"{args.interfaces} interfaces, {path.stat().st_size / 1e6:.1f} MB, "
+            f"{args.columns} columns walked per round"
+        )
+        start = time.perf_counter()
+        rows = _round(path, args.columns)
+        print(f"first round: {(time.perf_counter() - start) * 1000:8.1f}ms ({rows} rows)")
+        start = time.perf_counter()
+        for _round_number in range(args.rounds):
+            _round(path, args.columns)
+        wall = (time.perf_counter() - start) / args.rounds
+        print(f"next rounds: {wall * 1000:8.1f}ms per round")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,12 @@ import json
 import os
 import re
 import select
+import selectors
 import socket
 import ssl
 import threading
 import time
-from collections.abc import Iterator, Sequence
+from collections.abc import Generator, Iterator, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
 from functools import cache
@@ -152,6 +153,12 @@ remove_cache_regex = re.compile("\nCache:[^\n]*")
 # Pattern for allowed UserId values
 validate_user_id_regex = re.compile(r"^[\w$][-@.\w$]*$", re.UNICODE)
 
+# Timeout for receiving the data of a response, once its header has been received
+_RESPONSE_DATA_TIMEOUT = 30
+
+# Size of the chunks the response data is received in by the streaming queries
+_STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class MKLivestatusException(Exception):
     pass
@@ -736,34 +743,20 @@ class SingleSiteConnection(Helpers):
         timeout_at: float | None = None,
     ) -> bytes:
         try:
-            # Headers are always ASCII encoded
             resp = self.receive_data(16)
-            code = resp[0:3].decode("ascii")
             try:
-                length = int(resp[4:15].lstrip())
-            except Exception:
+                code, length = _parse_response_header(resp)
+            except MKLivestatusSocketError:
                 self.disconnect()
-                raise MKLivestatusSocketError(
-                    f"Malformed response header {resp!r}. Livestatus TCP socket might be unreachable or wrong encryption settings are used."
-                )
+                raise
 
             # Apply a lower timeout for the content because the data is already available
             # in the socket. The liveproxyd (same system) has the complete data available
             # while the data from a standard connection can still take some time.
             # 30 seconds should be more than enough for the maximum telegram size of 100MB
-            data = self.receive_data(length, 30)
-
-            if code == "200":
-                return data
-
-            error_info = data.decode("utf-8")
-            if code == "404":
-                raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
-
-            if code == "502":
-                raise MKLivestatusBadGatewayError(error_info)
+            data = self.receive_data(length, _RESPONSE_DATA_TIMEOUT)
 
-            raise MKLivestatusQueryError(f"{code}: {error_info}")
+            return _response_data(code, data)
 
         except (MKLivestatusSocketClosed, OSError) as e:
             # In case of an IO error or the other side having
@@ -845,6 +838,88 @@ class SingleSiteConnection(Helpers):
                 row.insert(0, b"")
         return response
 
+    def query_iter(
+        self, query: QueryTypes, add_headers: str = ""
+    ) -> Generator[LivestatusRow, None, None]:
+        """Yield the rows of the response while it is received
+
+        In contrast to query() the response is neither buffered nor decoded as a whole, the memory
+        needed does not grow with the number of rows. If the iteration is stopped before the end of
+        the response, the connection is closed."""
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        if self.limit is not None:
+            normalized_query = Query(
+                "%sLimit: %d\n" % (normalized_query, self.limit),
+                normalized_query.suppress_exceptions,
+            )
+
+        with _livestatus_output_format_switcher(normalized_query, self):
+            str_query = self.build_query(normalized_query, add_headers)
+        self.send_query(str_query)
+        code, length = self._receive_stream_header(str_query)
+        if code != "200":
+            _response_data(code, self.receive_data(length, _RESPONSE_DATA_TIMEOUT))
+
+        parse_row = (
+            _parse_json_row if normalized_query.supports_json_format() else _parse_python_row
+        )
+        completed = False
+        try:
+            for line_nr, line in enumerate(self._receive_lines(length)):
+                # The rows are separated by ",\n", the response is enclosed in "[" and "]\n"
+                if not (raw_row := line[1 if line_nr == 0 else 0 : -1]):
+                    continue
+                try:
+                    row = parse_row(raw_row)
+                except (ValueError, SyntaxError):
+                    raise MKLivestatusQueryError("Malformed raw response output")
+                if self.prepend_site:
+                    row.insert(0, b"")
+                yield row
+            completed = True
+        finally:
+            if not completed:
+                # The rest of the response is still pending on the socket
+                self.disconnect()
+
+    def _receive_stream_header(self, query: str) -> tuple[str, int]:
+        """Receive the response header, reconnect and send the query again (once) if needed"""
+        for retry in (True, False):
+            try:
+                return _parse_response_header(self.receive_data(16))
+            except MKLivestatusSocketClosed:
+                self.disconnect()
+                if not retry:
+                    raise
+            except OSError as e:
+                self.disconnect()
+                if not retry:
+                    raise MKLivestatusSocketError(str(e))
+            except MKLivestatusSocketError:
+                self.disconnect()
+                raise
+            # E.g. a timeout of the keepalive connection, see receive_raw_response()
+            time.sleep(0.1)
+            self.connect()
+            self.send_query(query)
+        raise AssertionError("unreachable")
+
+    def _receive_lines(self, length: int) -> Iterator[bytes]:
+        """Yield the lines of the response data while it is received"""
+        pending = bytearray()
+        while length > 0:
+            chunk = self.receive_data(min(length, _STREAM_CHUNK_SIZE), _RESPONSE_DATA_TIMEOUT)
+            length -= len(chunk)
+            # Only search the new data: a line may be larger than many chunks
+            if (end := chunk.rfind(b"\n")) == -1:
+                pending += chunk
+                continue
+            pending += chunk[:end]
+            yield from bytes(pending).split(b"\n")
+            pending = bytearray(chunk[end + 1 :])
+        if pending:
+            yield bytes(pending)
+
     def command(self, command: str, site: SiteId | None = None) -> None:
         command_str = command.rstrip("\n")
         if not command_str.startswith("["):
@@ -914,6 +989,47 @@ class ConnectedSite(NamedTuple):
 ConnectedSites = list[ConnectedSite]
 
 
+class _PendingResponse:
+    """The response of a site to a query, received from the non-blocking socket as data arrives"""
+
+    def __init__(self, connected_site: ConnectedSite, query: str, timeout_at: float | None) -> None:
+        self.connected_site = connected_site
+        self.query = query
+        self.timeout_at = timeout_at
+        self.reconnected = False
+        self._code: str | None = None
+        self._size = 16  # Size of the response header
+        self._data = bytearray()
+
+    def receive(self, sock: socket.socket) -> bytes | None:
+        """Receive the available data, return the data of the response once it is complete"""
+        while len(self._data) < self._size:
+            try:
+                packet = sock.recv(self._size - len(self._data))
+            except (BlockingIOError, ssl.SSLWantReadError):
+                return None
+            if not packet:
+                raise MKLivestatusSocketClosed(
+                    "Read zero data from socket, remote peer closed connection."
+                )
+            self._data += packet
+
+            if self._code is None and len(self._data) >= self._size:
+                self._code, self._size = _parse_response_header(bytes(self._data))
+                self._data = bytearray()
+                data_timeout_at = time.time() + _RESPONSE_DATA_TIMEOUT
+                if self.timeout_at is None or self.timeout_at > data_timeout_at:
+                    self.timeout_at = data_timeout_at
+
+        assert self._code is not None
+        return _response_data(self._code, bytes(self._data))
+
+    def restart(self) -> None:
+        self._code = None
+        self._size = 16
+        self._data = bytearray()
+
+
 class MultiSiteConnection(Helpers):
     def __init__(  # pylint: disable=too-many-branches
         self, sites: SiteConfigurations, disabled_sites: SiteConfigurations | None = None
@@ -927,6 +1043,7 @@ class MultiSiteConnection(Helpers):
         self.prepend_site = False
         self.only_sites: OnlySites = None
         self.limit: int | None = None
+        self.response_timeout: float | None = None
         self.parallelize = True
 
         # Status host: A status host helps to prevent trying to connect
@@ -1102,6 +1219,10 @@ class MultiSiteConnection(Helpers):
         """Impose Limit on number of returned datasets (distributed among sites)"""
         self.limit = limit
 
+    def set_response_timeout(self, timeout: float | None = None) -> None:
+        """Consider sites dead which do not respond within this time to a parallel query"""
+        self.response_timeout = timeout
+
     def dead_sites(self) -> dict[SiteId, DeadSite]:
         return self.deadsites
 
@@ -1176,6 +1297,42 @@ class MultiSiteConnection(Helpers):
         self.connections = stillalive
         return result
 
+    def query_iter(
+        self, query: QueryTypes, add_headers: str = ""
+    ) -> Generator[LivestatusRow, None, None]:
+        """Yield the rows of the sites one after another while they are received
+
+        See SingleSiteConnection.query_iter(). The sites are queried sequentially, the Limit is
+        handled like by query_non_parallel(). Failing sites are moved to the dead sites, the rows
+        already yielded for them are not taken back."""
+        failed: set[SiteId] = set()
+        limit = self.limit
+        try:
+            for connected_site in self.connections:
+                if self.only_sites is not None and connected_site.id not in self.only_sites:
+                    continue
+                limit_header = "" if limit is None else "Limit: %d\n" % limit
+                try:
+                    for row in connected_site.connection.query_iter(
+                        query, add_headers + limit_header
+                    ):
+                        if self.prepend_site:
+                            row.insert(0, connected_site.id)
+                        if limit is not None:
+                            limit -= 1  # Account for portion of limit used by this site
+                        yield row
+                except LivestatusTestingError:
+                    raise
+                except Exception as e:
+                    connected_site.connection.disconnect()
+                    self.deadsites[connected_site.id] = {
+                        "exception": e,
+                        "site": connected_site.config,
+                    }
+                    failed.add(connected_site.id)
+        finally:
+            self.connections = [c for c in self.connections if c.id not in failed]
+
     # New parallelized version of query(). The semantics differs in the handling
     # of Limit: since all sites are queried in parallel, the Limit: is simply
     # applied to all sites - resulting in possibly more results then Limit requests.
@@ -1213,56 +1370,140 @@ class MultiSiteConnection(Helpers):
                     "site": connected_site.config,
                 }
 
-        # Then retrieve all raw responses. We will be as slow as the slowest of all connections.
-        site_responses: list[tuple[ConnectedSite, bytes]] = []
-        for str_query, connected_site in retrieve_responses:
-            try:
-                site_responses.append(
-                    (
-                        connected_site,
-                        connected_site.connection.receive_raw_response(
-                            str_query, query.suppress_exceptions
-                        ),
-                    )
-                )
-            except query.suppress_exceptions:
-                # Mostly handles exception types MKLivestatusTableNotFoundError
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+        # Then receive the responses of all sites at once. Each response is parsed as soon as it
+        # is complete, while the responses of the slower sites are still arriving.
+        timeout_at = None if self.response_timeout is None else time.time() + self.response_timeout
+        site_rows = self._receive_parallel(
+            [
+                _PendingResponse(connected_site, str_query, timeout_at)
+                for str_query, connected_site in retrieve_responses
+            ],
+            query,
+        )
 
-        # Convert responses to python format
         result = LivestatusResponse([])
-        for connected_site, raw_response in site_responses:
-            try:
-                rows = connected_site.connection.parse_raw_response(raw_response, query)
-                stillalive.append(connected_site)
-                if self.prepend_site:
-                    for row in rows:
-                        row.insert(0, connected_site.id)
+        for _str_query, connected_site in retrieve_responses:
+            if connected_site.id not in site_rows:
+                continue  # dead
+            stillalive.append(connected_site)
+            if (rows := site_rows[connected_site.id]) is not None:
                 result.extend(rows)
-            except query.suppress_exceptions:
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
 
         self.connections = stillalive
         return result
 
+    def _receive_parallel(
+        self, pending_responses: list[_PendingResponse], query: Query
+    ) -> dict[SiteId, LivestatusResponse | None]:
+        """Receive and parse the responses of the sites as their data arrives
+
+        Returns the rows of the sites which are still alive, None for the sites which raised one
+        of the suppressed exceptions. Failed sites are disconnected and added to the dead sites.
+        """
+        site_rows: dict[SiteId, LivestatusResponse | None] = {}
+
+        def _failed(pending: _PendingResponse, exception: Exception) -> None:
+            if isinstance(exception, query.suppress_exceptions):
+                # Mostly handles exception types MKLivestatusTableNotFoundError
+                site_rows[pending.connected_site.id] = None
+                return
+            pending.connected_site.connection.disconnect()
+            self.deadsites[pending.connected_site.id] = {
+                "exception": exception,
+                "site": pending.connected_site.config,
+            }
+
+        with selectors.DefaultSelector() as selector:
+
+            def _wait_for(pending: _PendingResponse) -> None:
+                site_socket = pending.connected_site.connection.socket
+                assert site_socket is not None
+                site_socket.settimeout(0.0)
+                selector.register(site_socket, selectors.EVENT_READ, pending)
+
+            for pending in pending_responses:
+                _wait_for(pending)
+
+            while selector.get_map():
+                timeouts = [
+                    key.data.timeout_at
+                    for key in selector.get_map().values()
+                    if key.data.timeout_at is not None
+                ]
+                ready = selector.select(max(0.0, min(timeouts) - time.time()) if timeouts else None)
+
+                for key, _events in ready:
+                    pending = key.data
+                    connection = pending.connected_site.connection
+                    site_socket = connection.socket
+                    assert site_socket is not None
+                    selector.unregister(site_socket)
+                    try:
+                        raw_response = pending.receive(site_socket)
+                    except LivestatusTestingError:
+                        raise
+                    except (MKLivestatusSocketClosed, OSError) as e:
+                        # In case of an IO error or the other side having closed the socket
+                        # (e.g. timeout during keepalive) do a reconnect and send the query
+                        # again, but only once.
+                        if pending.reconnected:
+                            _failed(pending, MKLivestatusSocketError(str(e)))
+                            continue
+                        try:
+                            connection.disconnect()
+                            connection.connect()
+                            connection.send_query(pending.query)
+                        except Exception as e2:
+                            _failed(pending, MKLivestatusSocketError(str(e2)))
+                            continue
+                        pending.restart()
+                        _wait_for(pending)
+                        continue
+                    except MKLivestatusSocketError as e:
+                        _failed(pending, e)
+                        continue
+                    except Exception as e:
+                        _failed(
+                            pending,
+                            e
+                            if isinstance(e, query.suppress_exceptions)
+                            else MKLivestatusSocketError("Unhandled exception: %s" % e),
+                        )
+                        continue
+
+                    if raw_response is None:
+                        _wait_for(pending)
+                        continue
+
+                    site_socket.settimeout(None)
+                    try:
+                        rows = connection.parse_raw_response(raw_response, query)
+                    except LivestatusTestingError:
+                        raise
+                    except Exception as e:
+                        _failed(pending, e)
+                        continue
+
+                    if self.prepend_site:
+                        for row in rows:
+                            row.insert(0, pending.connected_site.id)
+                    site_rows[pending.connected_site.id] = rows
+
+                now = time.time()
+                for key in list(selector.get_map().values()):
+                    pending = key.data
+                    if pending.timeout_at is not None and pending.timeout_at <= now:
+                        selector.unregister(key.fileobj)
+                        _failed(
+                            pending,
+                            MKLivestatusSocketError(
+                                "Timeout while waiting for the response of site %s"
+                                % pending.connected_site.id
+                            ),
+                        )
+
+        return site_rows
+
     def command(self, command: str, sitename: SiteId | None = SiteId("local")) -> None:
         if sitename in self.deadsites:
             raise MKLivestatusSocketError(
@@ -1386,6 +1627,42 @@ def _combine_query(query: str, headers: str | list[str]) -> str:
     return query + "\n" + headers
 
 
+def _parse_json_row(data: bytes) -> LivestatusRow:
+    row: LivestatusRow = json.loads(data)
+    return row
+
+
+def _parse_python_row(data: bytes) -> LivestatusRow:
+    row: LivestatusRow = ast.literal_eval(data.decode("utf-8"))
+    return row
+
+
+def _parse_response_header(header: bytes) -> tuple[str, int]:
+    """Return the status code and the length of the response data"""
+    # Headers are always ASCII encoded
+    try:
+        return header[0:3].decode("ascii"), int(header[4:15].lstrip())
+    except Exception:
+        raise MKLivestatusSocketError(
+            f"Malformed response header {header!r}. Livestatus TCP socket might be unreachable or wrong encryption settings are used."
+        )
+
+
+def _response_data(code: str, data: bytes) -> bytes:
+    """Return the data of a successful response, raise the error of a failed one"""
+    if code == "200":
+        return data
+
+    error_info = data.decode("utf-8")
+    if code == "404":
+        raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
+
+    if code == "502":
+        raise MKLivestatusBadGatewayError(error_info)
+
+    raise MKLivestatusQueryError(f"{code}: {error_info}")
+
+
 def is_socket_readable(sock: socket.socket, select_timeout: float = 1.0) -> bool:
     # SSL sockets may not return any fileno in the select, since the data lingers around in pending
     # https://stackoverflow.com/questions/3187565/select-and-ssl-in-python
@@ -16,7 +16,7 @@ from cmk.utils.version import edition, Edition
 from cmk.snmplib import get_single_oid, OID, SNMPBackend, SNMPBackendEnum, SNMPHostConfig
 
 import cmk.fetchers._snmpcache as snmp_cache
-from cmk.fetchers.snmp_backend import ClassicSNMPBackend, StoredWalkSNMPBackend
+from cmk.fetchers.snmp_backend import ClassicSNMPBackend, NativeSNMPBackend, StoredWalkSNMPBackend
 
 if edition() is not Edition.CRE:
     from cmk.fetchers.cee.snmp_backend.inline import (  # type: ignore[import] # pylint: disable=import-error,no-name-in-module
@@ -45,6 +45,8 @@ match backend_type:
         backend = ClassicSNMPBackend
     case SNMPBackendEnum.STORED_WALK:
         backend = StoredWalkSNMPBackend
+    case SNMPBackendEnum.NATIVE:
+        backend = NativeSNMPBackend
     case _:
         raise ValueError(backend_type)
 
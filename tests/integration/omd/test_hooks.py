@@ -22,6 +22,7 @@ def test_hooks(site: Site) -> None:
         "LIVESTATUS_TCP_TLS",
         "AGENT_RECEIVER",
         "AGENT_RECEIVER_PORT",
+        "AUTOMATION_HELPER",
         "MKEVENTD",
         "MKEVENTD_SNMPTRAP",
         "MKEVENTD_SYSLOG",
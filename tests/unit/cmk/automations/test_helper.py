@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.exceptions import MKGeneralException
+
+from cmk.automations.helper import (
+    accept_call,
+    bump_config_generation,
+    call_helper,
+    HelperRequest,
+    HelperResponse,
+    read_config_generation,
+    send,
+)
+
+
+def test_request_serialization() -> None:
+    request = HelperRequest(
+        command="service-discovery-preview",
+        args=["--timeout", "10", "heute"],
+        stdin="'ä'",
+        verbosity=1,
+    )
+    assert HelperRequest.deserialize(request.serialize()) == request
+
+
+def test_response_serialization() -> None:
+    response = HelperResponse(returncode=2, stdout="{'a': 1}\n", stderr="Größe\n")
+    assert HelperResponse.deserialize(response.serialize()) == response
+
+
+def _serve_once(
+    listener: socket.socket, accept: bool, answer: bytes, requests: list[HelperRequest | None]
+) -> None:
+    connection, _address = listener.accept()
+    with connection:
+        if not accept:
+            return
+        requests.append(request := accept_call(connection))
+        if request is not None and answer:
+            send(connection, answer)
+
+
+def _call_served_helper(
+    tmp_path: Path, accept: bool, answer: bytes
+) -> tuple[HelperResponse | None, list[HelperRequest | None]]:
+    socket_path = tmp_path / "automation-helper"
+    requests: list[HelperRequest | None] = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(str(socket_path))
+        listener.listen()
+        server = threading.Thread(target=_serve_once, args=(listener, accept, answer, requests))
+        server.start()
+        try:
+            return call_helper(socket_path, HelperRequest("get-configuration", [], "")), requests
+        finally:
+            server.join()
+
+
+def test_call_helper(tmp_path: Path) -> None:
+    response = HelperResponse(returncode=0, stdout="{}\n", stderr="")
+    assert _call_served_helper(tmp_path, True, response.serialize()) == (
+        response,
+        [HelperRequest("get-configuration", [], "")],
+    )
+
+
+def test_call_helper_not_accepted(tmp_path: Path) -> None:
+    assert _call_served_helper(tmp_path, False, b"") == (None, [])
+
+
+def test_call_helper_accepted_not_answering(tmp_path: Path) -> None:
+    # The call may have been executed, it must not be executed again
+    with pytest.raises(MKGeneralException):
+        _call_served_helper(tmp_path, True, b"")
+
+
+def test_call_helper_busy(tmp_path: Path) -> None:
+    socket_path = tmp_path / "automation-helper"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(str(socket_path))
+        listener.listen()
+        request = HelperRequest("get-configuration", [], "")
+        assert call_helper(socket_path, request, accept_timeout=0.1) is None
+
+        # A worker becoming free later on does not execute the call
+        connection, _address = listener.accept()
+        with connection:
+            assert accept_call(connection) is None
+
+
+def test_call_helper_not_running(tmp_path: Path) -> None:
+    assert call_helper(tmp_path / "missing", HelperRequest("get-configuration", [], "")) is None
+
+
+def test_config_generation(tmp_path: Path) -> None:
+    path = tmp_path / "automation-helper-generation"
+    assert read_config_generation(path) == ""
+    bump_config_generation(path)
+    generation = read_config_generation(path)
+    assert generation
+    bump_config_generation(path)
+    assert read_config_generation(path) != generation
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+import cmk.utils.paths
+import cmk.utils.version as cmk_version
+from cmk.utils.log import console
+
+from cmk.automations.helper import bump_config_generation, HelperRequest, HelperResponse
+from cmk.automations.results import GetConfigurationResult, SerializedResult
+
+import cmk.base.automation_helper as automation_helper
+import cmk.base.automations as automations
+
+
+class _AutomationEcho(automations.Automation):
+    cmd = "echo"
+    needs_config = True
+    needs_checks = True
+
+    def execute(self, args: list[str]) -> GetConfigurationResult:
+        if args == ["fail"]:
+            raise automations.MKAutomationError("Failed as requested")
+        console.verbose("Echoing\n")
+        return GetConfigurationResult({"args": args, "stdin": sys.stdin.read()})
+
+
+def _execute_in_child(request: HelperRequest) -> HelperResponse:
+    # The standard input and output of the process are replaced
+    read_fd, write_fd = os.pipe()
+    if not (pid := os.fork()):
+        os.close(read_fd)
+        try:
+            os.write(write_fd, automation_helper.execute(request).serialize())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as pipe:
+        serialized = pipe.read()
+    os.waitpid(pid, 0)
+    return HelperResponse.deserialize(serialized)
+
+
+@pytest.fixture(name="echo_automation")
+def fixture_echo_automation(monkeypatch: pytest.MonkeyPatch) -> None:
+    registry = automations.Automations()
+    registry.register(_AutomationEcho())
+    monkeypatch.setattr(automations, "automations", registry)
+
+
+@pytest.mark.usefixtures("echo_automation")
+def test_execute() -> None:
+    response = _execute_in_child(HelperRequest("echo", ["a", "b"], "'input'", verbosity=1))
+    assert response.returncode == 0
+    # Console logging is disabled for most automations, like in "cmk --automation"
+    assert response.stdout == (
+        GetConfigurationResult({"args": ["a", "b"], "stdin": "'input'"}).serialize(
+            cmk_version.Version.from_str(cmk_version.__version__)
+        )
+        + "\n"
+    )
+    assert GetConfigurationResult.deserialize(SerializedResult(response.stdout)).result == {
+        "args": ["a", "b"],
+        "stdin": "'input'",
+    }
+
+
+@pytest.mark.usefixtures("disable_debug", "echo_automation")
+def test_execute_failing() -> None:
+    response = _execute_in_child(HelperRequest("echo", ["fail"], ""))
+    assert response == HelperResponse(returncode=1, stdout="", stderr="Failed as requested\n")
+
+
+@pytest.mark.usefixtures("disable_debug", "echo_automation")
+def test_execute_unknown() -> None:
+    response = _execute_in_child(HelperRequest("unknown", [], ""))
+    assert response.returncode == 1
+    assert "not implemented" in response.stderr
+
+
+def test_config_generation(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    generation_file = tmp_path / "automation-helper-generation"
+    monkeypatch.setattr(cmk.utils.paths, "automation_helper_generation_file", str(generation_file))
+
+    generation = automation_helper.config_generation()
+    assert automation_helper.config_generation() == generation
+
+    bump_config_generation(generation_file)
+    assert automation_helper.config_generation() != generation
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import signal
+import time
+from collections.abc import Mapping
+from types import FrameType
+from typing import Any
+
+import pytest
+
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.exceptions import MKTimeout
+from cmk.utils.hostaddress import HostName
+
+from cmk.fetchers import Fetcher, FetcherType, Mode
+from cmk.fetchers.filecache import FileCache, FileCacheOptions, NoCache
+
+from cmk.checkengine.fetcher import SourceInfo, SourceType
+
+from cmk.base.checkers import _fetch_all
+from cmk.base.sources import Source
+
+
+class _SleepingFetcher(Fetcher[AgentRawData]):
+    def __init__(self, delay: float, data: AgentRawData) -> None:
+        super().__init__(logger=logging.getLogger("test"))
+        self.delay = delay
+        self.data = data
+
+    @classmethod
+    def _from_json(cls, serialized: Mapping[str, Any]) -> "_SleepingFetcher":
+        return cls(**serialized)
+
+    def to_json(self) -> Mapping[str, Any]:
+        return {"delay": self.delay, "data": self.data}
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+        time.sleep(self.delay)
+        if not self.data:
+            raise ValueError("no data")
+        return self.data
+
+
+class _SleepingSource(Source[AgentRawData]):
+    def __init__(self, node: str, delay: float, data: AgentRawData) -> None:
+        self.node = HostName(node)
+        self.delay = delay
+        self.data = data
+
+    def source_info(self) -> SourceInfo:
+        return SourceInfo(self.node, None, "agent", FetcherType.TCP, SourceType.HOST)
+
+    def fetcher(self) -> Fetcher[AgentRawData]:
+        return _SleepingFetcher(self.delay, self.data)
+
+    def file_cache(
+        self, *, simulation: bool, file_cache_options: FileCacheOptions
+    ) -> FileCache[AgentRawData]:
+        return NoCache(self.node)
+
+
+@pytest.mark.parametrize("max_concurrent_fetches", [1, 4])
+def test_fetch_all_keeps_order(max_concurrent_fetches: int) -> None:
+    sources = [
+        _SleepingSource(f"node{n}", delay, AgentRawData(b"<<<node%d>>>" % n))
+        for n, delay in enumerate([0.05, 0.0, 0.02, 0.0, 0.01])
+    ]
+    fetched = _fetch_all(
+        sources,
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrent_fetches=max_concurrent_fetches,
+    )
+    assert [(info.hostname, raw_data.ok) for info, raw_data, _duration in fetched] == [
+        (f"node{n}", b"<<<node%d>>>" % n) for n in range(5)
+    ]
+
+
+def test_fetch_all_concurrently() -> None:
+    sources = [
+        _SleepingSource(f"node{n}", 0.2, AgentRawData(b"<<<node>>>" if n else b""))
+        for n in range(8)
+    ]
+    start = time.monotonic()
+    fetched = _fetch_all(
+        sources,
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrent_fetches=8,
+    )
+    assert time.monotonic() - start < 8 * 0.2 / 2
+
+    assert fetched[0][1].is_error()
+    assert all(raw_data.is_ok() for _info, raw_data, _duration in fetched[1:])
+    for _info, _raw_data, duration in fetched:
+        # Each source is timed on its own (with the resolution of os.times()),
+        # the sleeping costs no CPU
+        assert duration.process.elapsed >= 0.15
+        assert duration.process.user + duration.process.system < 0.2
+
+
+def test_fetch_all_waits_for_running_fetches_on_timeout() -> None:
+    finished: list[HostName] = []
+
+    class _RecordingSource(_SleepingSource):
+        def fetcher(self) -> Fetcher[AgentRawData]:
+            node = self.node
+
+            class _RecordingFetcher(_SleepingFetcher):
+                def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+                    data = super()._fetch_from_io(mode)
+                    finished.append(node)
+                    return data
+
+            return _RecordingFetcher(self.delay, self.data)
+
+    def _raise_timeout(signum: int, frame: FrameType | None) -> None:
+        raise MKTimeout()
+
+    sources = [_RecordingSource(f"node{n}", 0.3, AgentRawData(b"<<<node>>>")) for n in range(4)]
+    previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, 0.1)
+    try:
+        with pytest.raises(MKTimeout):
+            _fetch_all(
+                sources,
+                simulation=False,
+                file_cache_options=FileCacheOptions(),
+                mode=Mode.CHECKING,
+                max_concurrent_fetches=2,
+            )
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+    # The running fetches are finished, the others are not started
+    assert sorted(finished) == ["node0", "node1"]
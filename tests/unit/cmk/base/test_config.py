@@ -2773,6 +2773,38 @@ class TestPackedConfigStore:
         assert precompiled_check_config.exists()
         assert store.read() == {"abc": 1}
 
+    def test_write_host_variables(self, store: config.PackedConfigStore) -> None:
+        store.write(
+            {
+                "abc": 1,
+                "ipaddresses": {HostName("h2"): "1.2.3.4", HostName("h1"): "1.2.3.5"},
+                "host_attributes": {HostName("h1"): {"alias": "one"}},
+                "explicit_snmp_communities": {},
+                "host_paths": {HostName("h1"): "/wato/"},
+            }
+        )
+        packed = store.read()
+
+        assert packed["abc"] == 1
+        assert packed["host_paths"] == {"h1": "/wato/"}
+        assert isinstance(packed["host_paths"], dict)
+        ipaddresses = packed["ipaddresses"]
+        assert not isinstance(ipaddresses, dict)
+        assert ipaddresses.get(HostName("h1")) == "1.2.3.5"
+        assert ipaddresses.get(HostName("h3")) is None
+        assert packed["host_attributes"].get(HostName("h2"), {}) == {}
+        assert dict(ipaddresses) == {"h1": "1.2.3.5", "h2": "1.2.3.4"}
+        assert dict(packed["host_attributes"]) == {"h1": {"alias": "one"}}
+        assert not packed["explicit_snmp_communities"]
+
+    def test_read_invalid_file(
+        self, store: config.PackedConfigStore, config_path: VersionedConfigPath
+    ) -> None:
+        store.path.parent.mkdir(parents=True, exist_ok=True)
+        store.path.write_bytes(b"garbage and more garbage")
+        with pytest.raises(ValueError):
+            store.read()
+
 
 def test__extract_check_plugins(monkeypatch: MonkeyPatch) -> None:
     duplicate_plugin: dict[str, LegacyCheckDefinition] = {
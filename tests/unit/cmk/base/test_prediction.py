@@ -4,6 +4,7 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import math
+import sys
 import time
 from collections.abc import Callable, Sequence
 from pprint import pprint
@@ -145,6 +146,7 @@ def test_time_slices(
     assert slices == result
 
 
+@pytest.mark.parametrize("min_numpy_points", [sys.maxsize, 0], ids=["python", "numpy"])
 @pytest.mark.parametrize(
     "slices, result",
     [
@@ -196,6 +198,10 @@ def test_time_slices(
     ],
 )
 def test_data_stats(
-    slices: list[_prediction.TimeSeriesValues], result: _prediction.DataStats
+    slices: list[_prediction.TimeSeriesValues],
+    result: _prediction.DataStats,
+    min_numpy_points: int,
+    monkeypatch: pytest.MonkeyPatch,
 ) -> None:
+    monkeypatch.setattr(_prediction, "_NUMPY_MIN_POINTS", min_numpy_points)
     assert _prediction._data_stats(slices) == result
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import copy
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from livestatus import LivestatusOutputFormat, LivestatusResponse, LivestatusRow, SiteId
+
+import cmk.utils.paths
+from cmk.utils.hostaddress import HostName
+
+from cmk.bi import compiler
+from cmk.bi.aggregation import BIAggregation
+from cmk.bi.compiler import BICompiler
+from cmk.bi.lib import SitesCallback
+from cmk.bi.trees import BICompiledAggregation
+
+from .bi_test_data import sample_config
+from .conftest import MockBIAggregationPack
+
+
+class _FakeSite:
+    def __init__(self) -> None:
+        self.program_start = 1000
+        self.hosts = copy.deepcopy(sample_config.bi_structure_states)
+
+    def query(
+        self,
+        query: str,
+        only_sites: list[SiteId] | None = None,
+        output_format: LivestatusOutputFormat = LivestatusOutputFormat.PYTHON,
+        fetch_full_data: bool = False,
+    ) -> LivestatusResponse:
+        if query.startswith("GET status"):
+            return LivestatusResponse([LivestatusRow(["heute", self.program_start])])
+        if query.startswith("GET hosts"):
+            return LivestatusResponse(
+                [
+                    LivestatusRow(
+                        [
+                            site,
+                            name,
+                            dict(tags),
+                            labels,
+                            children,
+                            parents,
+                            alias,
+                            f"/wato/{folder}hosts.mk",
+                        ]
+                    )
+                    for name, (
+                        site,
+                        tags,
+                        labels,
+                        folder,
+                        _services,
+                        children,
+                        parents,
+                        alias,
+                        _name,
+                    ) in self.hosts.items()
+                ]
+            )
+        return LivestatusResponse(
+            [
+                LivestatusRow([host[0], name, description, tags, labels])
+                for name, host in self.hosts.items()
+                for description, (tags, labels) in host[4].items()
+            ]
+        )
+
+
+@pytest.fixture(name="site")
+def _site() -> _FakeSite:
+    return _FakeSite()
+
+
+@pytest.fixture(name="compiled_ids")
+def _compiled_ids(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[str]]:
+    compiled_ids: list[str] = []
+    original_compile = BIAggregation.compile
+
+    def _compile(self: BIAggregation, bi_searcher: Any) -> BICompiledAggregation:
+        compiled_ids.append(self.id)
+        return original_compile(self, bi_searcher)
+
+    monkeypatch.setattr(BIAggregation, "compile", _compile)
+    yield compiled_ids
+
+
+@pytest.fixture(name="bi_compiler")
+def _bi_compiler(monkeypatch: pytest.MonkeyPatch, tmp_path: Path, site: _FakeSite) -> BICompiler:
+    monkeypatch.setattr(compiler, "get_cache_dir", lambda: tmp_path)
+    monkeypatch.setattr(compiler, "frozen_aggregations_dir", tmp_path / "frozen")
+    monkeypatch.setattr(compiler, "default_config_dir", str(tmp_path))
+    (tmp_path / "multisite.d").mkdir()
+    monkeypatch.setattr(
+        BICompiler, "_generate_part_of_aggregation_lookup", lambda self, aggregations: None
+    )
+    monkeypatch.setattr(cmk.utils.paths, "tmp_dir", tmp_path)
+    bi_compiler = BICompiler(
+        "bi_config.bi",
+        SitesCallback(lambda: [(SiteId("heute"), True)], site.query, lambda s: s),
+    )
+    bi_compiler._bi_structure_fetcher._path_site_structure_data = tmp_path
+    monkeypatch.setattr(
+        bi_compiler, "_bi_packs", MockBIAggregationPack(sample_config.bi_packs_config)
+    )
+    return bi_compiler
+
+
+def _branch_titles(bi_compiler: BICompiler) -> set[str]:
+    return {
+        branch.properties.title
+        for aggregation in bi_compiler.compiled_aggregations.values()
+        for branch in aggregation.branches
+    }
+
+
+def test_compile_only_aggregations_of_changed_hosts(
+    bi_compiler: BICompiler, site: _FakeSite, compiled_ids: list[str]
+) -> None:
+    bi_compiler.load_compiled_aggregations()
+    assert compiled_ids == ["default_aggregation"]
+    assert _branch_titles(bi_compiler) == {"Host heute", "Host heute_clone"}
+
+    # The core was restarted, but nothing changed
+    compiled_ids.clear()
+    site.program_start += 1
+    bi_compiler.load_compiled_aggregations()
+    assert not compiled_ids
+    assert _branch_titles(bi_compiler) == {"Host heute", "Host heute_clone"}
+
+    site.program_start += 1
+    site.hosts.pop(HostName("heute_clone"))
+    bi_compiler.load_compiled_aggregations()
+    assert compiled_ids == ["default_aggregation"]
+    assert _branch_titles(bi_compiler) == {"Host heute"}
+
+
+def _packs_config_of_two_aggregations() -> dict[str, Any]:
+    config: dict[str, Any] = copy.deepcopy(sample_config.bi_packs_config)
+    aggregations = config["packs"][0]["aggregations"]
+    aggregations.append(copy.deepcopy(aggregations[0]))
+    aggregations[1]["id"] = "clone_aggregation"
+    for aggregation, pattern in zip(aggregations, ["^heute$", "^heute_clone$"]):
+        aggregation["node"]["search"]["conditions"]["host_choice"] = {
+            "type": "host_name_regex",
+            "pattern": pattern,
+        }
+    return config
+
+
+def test_compile_aggregations_in_processes(
+    bi_compiler: BICompiler, site: _FakeSite, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(
+        bi_compiler, "_bi_packs", MockBIAggregationPack(_packs_config_of_two_aggregations())
+    )
+    bi_compiler.load_compiled_aggregations()
+    expected = {
+        aggr_id: aggregation.serialize()
+        for aggr_id, aggregation in bi_compiler.compiled_aggregations.items()
+    }
+    assert list(expected) == ["default_aggregation", "clone_aggregation"]
+
+    # Compile everything again, this time in two processes
+    (tmp_path / "compilation_dependencies").unlink()
+    site.program_start += 1
+    monkeypatch.setattr(bi_compiler, "_num_workers", 2)
+    monkeypatch.setattr("cmk.bi.compiler._MIN_AGGREGATIONS_PER_WORKER", 1)
+    bi_compiler.load_compiled_aggregations()
+    assert {
+        aggr_id: aggregation.serialize()
+        for aggr_id, aggregation in bi_compiler.compiled_aggregations.items()
+    } == expected
+
+
+def test_compile_all_aggregations_without_previous_site_data(
+    bi_compiler: BICompiler, site: _FakeSite, tmp_path: Path, compiled_ids: list[str]
+) -> None:
+    bi_compiler.load_compiled_aggregations()
+    for path in tmp_path.glob("bi_site_cache.*"):
+        path.unlink()
+
+    compiled_ids.clear()
+    site.program_start += 1
+    bi_compiler.load_compiled_aggregations()
+    assert compiled_ids == ["default_aggregation"]
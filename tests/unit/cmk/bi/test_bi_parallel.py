@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import os
+
+from cmk.bi.parallel import map_in_processes
+
+
+def _parent_pid(offset: int, item: int) -> tuple[int, int]:
+    return offset + item, os.getppid()
+
+
+def test_map_in_processes_in_this_process() -> None:
+    assert map_in_processes(_parent_pid, 10, [1, 2], 1) == [(11, os.getppid()), (12, os.getppid())]
+
+
+def test_map_in_processes_not_forked_from_this_process() -> None:
+    results = map_in_processes(_parent_pid, 10, [1, 2, 3], 2)
+    assert [result for result, _pid in results] == [11, 12, 13]
+    # The workers are forked from the forkserver
+    assert all(parent_pid != os.getpid() for _result, parent_pid in results)
@@ -6,7 +6,7 @@
 import pytest
 
 from cmk.bi.search import BIEmptySearch, BIFixedArgumentsSearch, BIHostSearch, BIServiceSearch
-from cmk.bi.searcher import BISearcher
+from cmk.bi.searcher import _literal_prefix, BISearcher
 
 
 def test_empty_search(bi_searcher: BISearcher) -> None:
@@ -184,3 +184,88 @@ def test_service_search(
     search = BIServiceSearch(schema_config)
     results = search.execute({}, bi_searcher_with_sample_config)
     assert len(results) == expected_matches
+
+
+@pytest.mark.parametrize(
+    "pattern, expected_prefix",
+    [
+        ("heute", "heute"),
+        ("heute_cl.*", "heute_cl"),
+        ("heute_clx?", "heute_cl"),
+        ("heute_clx{0,1}", "heute_cl"),
+        ("heute_clx+", "heute_clx"),
+        ("(heute_cl).*", ""),
+        ("heute|gestern", ""),
+        ("heute\\.de", "heute"),
+    ],
+)
+def test_literal_prefix(pattern: str, expected_prefix: str) -> None:
+    assert _literal_prefix(pattern) == expected_prefix
+
+
+@pytest.mark.parametrize(
+    "conditions",
+    [
+        {"host_tags": {"clone-tag": {"$ne": "clone-tag"}}},
+        {"host_tags": {"clone-tag": {"$or": ["clone-tag", "other-tag"]}}},
+        {"host_tags": {"clone-tag": {"$nor": ["clone-tag"]}, "tcp": "tcp"}},
+        {"host_labels": {"cmk/check_mk_server": {"$ne": "yes"}}},
+        {"host_labels": {"cmk/check_mk_server": "no"}, "host_folder": "subfolder"},
+        {"host_folder": "subfolder", "host_tags": {"tcp": "tcp"}},
+        {"host_folder": "subfold"},
+        {"host_choice": {"type": "host_name_regex", "pattern": "heute.*"}},
+        {"host_choice": {"type": "host_name_regex", "pattern": "heute$"}},
+        {"host_choice": {"type": "host_alias_regex", "pattern": "heute_clone_"}},
+        {
+            "host_choice": {"type": "host_alias_regex", "pattern": "heute"},
+            "host_tags": {"clone-tag": "clone-tag"},
+        },
+    ],
+)
+def test_indexed_host_search(conditions: dict, bi_searcher_with_sample_config: BISearcher) -> None:
+    conditions = BIHostSearch.schema()().dump({"conditions": conditions})["conditions"]
+    # Matching each host without the lookup tables
+    hosts, matched_re_groups = bi_searcher_with_sample_config.filter_host_choice(
+        list(bi_searcher_with_sample_config.hosts.values()), conditions["host_choice"]
+    )
+    matched_hosts = bi_searcher_with_sample_config.filter_host_folder(
+        hosts, conditions["host_folder"]
+    )
+    matched_hosts = bi_searcher_with_sample_config.filter_host_tags(
+        matched_hosts, conditions["host_tags"]
+    )
+    matched_hosts = bi_searcher_with_sample_config.filter_host_labels(
+        matched_hosts, conditions["host_labels"]
+    )
+    expected = [(x.name, matched_re_groups[x.name]) for x in matched_hosts]
+
+    for _repetition in range(2):
+        assert [
+            (x.host.name, x.match_groups)
+            for x in bi_searcher_with_sample_config.search_hosts(conditions)
+        ] == expected
+
+
+def test_search_dependencies(bi_searcher_with_sample_config: BISearcher) -> None:
+    schema_config = BIServiceSearch.schema()().dump(
+        {"conditions": {"service_regex": "Interface 5", "host_folder": "subfolder"}}
+    )
+    with bi_searcher_with_sample_config.record_dependencies() as dependencies:
+        BIServiceSearch(schema_config).execute({}, bi_searcher_with_sample_config)
+    assert dependencies.host_names == {"heute_clone"}
+
+    heute, heute_clone = (
+        bi_searcher_with_sample_config.hosts[name] for name in ["heute", "heute_clone"]
+    )
+    changed_hosts = BISearcher()
+    assert dependencies.affected_by({"heute_clone"}, changed_hosts)
+    assert not dependencies.affected_by({"heute"}, changed_hosts)
+
+    # The changed host has no matching service
+    changed_hosts.set_hosts({"heute": heute._replace(folder="subfolder/")})
+    assert not dependencies.affected_by({"heute"}, changed_hosts)
+
+    changed_hosts.set_hosts(
+        {"heute": heute._replace(folder="subfolder/", services=heute_clone.services)}
+    )
+    assert dependencies.affected_by({"heute"}, changed_hosts)
@@ -14,7 +14,7 @@ from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig
 
 from cmk.fetchers.snmp import make_backend
-from cmk.fetchers.snmp_backend import ClassicSNMPBackend
+from cmk.fetchers.snmp_backend import ClassicSNMPBackend, NativeSNMPBackend
 
 if is_enterprise_repo():
     from cmk.fetchers.cee.snmp_backend.inline import (  # type: ignore[import] # pylint: disable=import-error,no-name-in-module
@@ -53,6 +53,11 @@ def test_factory_snmp_backend_inline(snmp_config: SNMPHostConfig) -> None:
         assert isinstance(make_backend(snmp_config, logging.getLogger()), InlineSNMPBackend)
 
 
+def test_factory_snmp_backend_native(snmp_config: SNMPHostConfig) -> None:
+    snmp_config = snmp_config._replace(snmp_backend=SNMPBackendEnum.NATIVE)
+    assert isinstance(make_backend(snmp_config, logging.getLogger()), NativeSNMPBackend)
+
+
 def test_factory_snmp_backend_unknown_backend(snmp_config: SNMPHostConfig) -> None:
     with pytest.raises(NotImplementedError, match="Unknown SNMP backend"):
         snmp_config = snmp_config._replace(snmp_backend="bla")  # type: ignore[arg-type]
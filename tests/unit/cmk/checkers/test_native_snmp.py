@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import bisect
+import socket
+import threading
+from collections.abc import Iterator, Mapping
+
+import pytest
+
+from cmk.utils.exceptions import MKSNMPError
+from cmk.utils.hostaddress import HostAddress, HostName
+from cmk.utils.log import logger
+
+from cmk.snmplib import OID, SNMPBackendEnum, SNMPCredentials, SNMPHostConfig
+
+import cmk.fetchers.snmp_backend._ber as ber
+from cmk.fetchers.snmp_backend import NativeSNMPBackend
+from cmk.fetchers.snmp_backend._usm import USM
+from cmk.fetchers.snmp_backend.native import _Walk
+
+_MIB: Mapping[OID, bytes] = {
+    ".1.3.6.1.2.1.1.1.0": ber.encode_octet_string(b"Linux box"),
+    ".1.3.6.1.2.1.1.2.0": ber.encode_oid(".1.3.6.1.4.1.8072.3.2.10"),
+    ".1.3.6.1.2.1.1.3.0": ber.encode_integer(4711, ber.TIME_TICKS),
+    **{f".1.3.6.1.2.1.2.2.1.1.{index}": ber.encode_integer(index) for index in (1, 2, 3, 10, 11)},
+    **{
+        f".1.3.6.1.2.1.2.2.1.2.{index}": ber.encode_octet_string(b"eth%d" % index)
+        for index in (1, 2, 3, 10, 11)
+    },
+    ".1.3.6.1.2.1.2.2.1.10.1": ber.encode_integer(2**32 - 1, ber.COUNTER32),
+    ".1.3.6.1.2.1.2.2.1.10.2": ber.encode_integer(2**63, ber.COUNTER64),
+    ".1.3.6.1.2.1.4.20.1.1.10.0.0.1": ber.encode_tlv(ber.IP_ADDRESS, bytes((10, 0, 0, 1))),
+    ".1.3.6.1.4.1.42.1.0": ber.encode_integer(-17),
+}
+
+
+def _key(oid: OID) -> tuple[int, ...]:
+    return tuple(map(int, oid.strip(".").split(".")))
+
+
+class _Agent:
+    """A minimal SNMP agent serving the given MIB on localhost"""
+
+    def __init__(self, mib: Mapping[OID, bytes], credentials: SNMPCredentials) -> None:
+        self._oids = sorted(mib, key=_key)
+        self._keys = [_key(oid) for oid in self._oids]
+        self._mib = mib
+        self.max_varbinds = 1000  # larger responses are "tooBig"
+        self._usm = USM(credentials) if isinstance(credentials, tuple) else None
+        if self._usm is not None:
+            self._usm.synchronize(
+                ber.USMParameters(b"\x80\x00\x1f\x88test", 3, 1000, b"", b"", b"")
+            )
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self.port = self._socket.getsockname()[1]
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._socket.sendto(b"", ("127.0.0.1", self.port))
+        self._thread.join()
+        self._socket.close()
+
+    def _serve(self) -> None:
+        while data_address := self._socket.recvfrom(65535):
+            data, address = data_address
+            if not data:
+                return
+            try:
+                self._socket.sendto(self._respond(data), address)
+            except MKSNMPError:
+                pass  # e.g. a wrong digest, the request is dropped
+
+    def _respond(self, data: bytes) -> bytes:
+        if self._usm is None:
+            version, community, request = ber.decode_community_message(data)
+            return ber.encode_community_message(
+                version, community, self._response(request, version + 1)
+            )
+        msg_id, parameters, scoped_pdu = self._usm.decode(data)
+        if not parameters.engine_id:
+            return ber.encode_v3_message(
+                msg_id,
+                65507,
+                0,
+                ber.USMParameters(self._usm.engine_id, 3, 1000, b"", b"", b""),
+                ber.encode_scoped_pdu(
+                    ber.ScopedPDU(
+                        self._usm.engine_id,
+                        b"",
+                        ber.encode_pdu(
+                            ber.REPORT,
+                            msg_id,
+                            [(".1.3.6.1.6.3.15.1.1.4.0", ber.encode_integer(1, ber.COUNTER32))],
+                        ),
+                    )
+                ),
+            )[0]
+        assert scoped_pdu is not None
+        scoped = ber.decode_scoped_pdu(scoped_pdu)
+        response = self._response(ber.decode_pdu(scoped.pdu), 3)
+        return self._usm.encode(
+            msg_id, ber.encode_scoped_pdu(ber.ScopedPDU(self._usm.engine_id, b"", response))
+        )
+
+    def _response(self, request: ber.PDU, version: int) -> bytes:
+        varbinds: list[tuple[OID, bytes]] = []
+        if request.type == ber.GET_REQUEST:
+            for oid, _value in request.varbinds:
+                if oid in self._mib:
+                    varbinds.append((oid, self._mib[oid]))
+                elif version == 1:
+                    return self._no_such_name(request, oid)
+                else:
+                    varbinds.append((oid, b"\x80\x00"))
+            return ber.encode_pdu(ber.RESPONSE, request.request_id, varbinds)
+
+        repetitions = request.error_index if request.type == ber.GET_BULK_REQUEST else 1
+        cursors = [oid for oid, _value in request.varbinds]
+        for _repetition in range(repetitions):
+            for num, oid in enumerate(cursors):
+                position = bisect.bisect_right(self._keys, _key(oid))
+                if position < len(self._oids):
+                    cursors[num] = self._oids[position]
+                    varbinds.append((self._oids[position], self._mib[self._oids[position]]))
+                elif version == 1:
+                    return self._no_such_name(request, oid)
+                else:
+                    varbinds.append((oid, b"\x82\x00"))
+        if len(varbinds) > self.max_varbinds:
+            return ber.encode_pdu(ber.RESPONSE, request.request_id, request.varbinds, 1, 0)
+        return ber.encode_pdu(ber.RESPONSE, request.request_id, varbinds)
+
+    @staticmethod
+    def _no_such_name(request: ber.PDU, oid: OID) -> bytes:
+        error_index = [found for found, _value in request.varbinds].index(oid) + 1
+        return ber.encode_pdu(ber.RESPONSE, request.request_id, request.varbinds, 2, error_index)
+
+
+def _config(port: int, credentials: SNMPCredentials, bulk: bool = False) -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("testhost"),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials=credentials,
+        port=port,
+        is_bulkwalk_host=bulk,
+        is_snmpv2or3_without_bulkwalk_host=not bulk,
+        bulk_walk_size_of=3,
+        timing={"timeout": 1, "retries": 0, "concurrent_walks": 2},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.NATIVE,
+    )
+
+
+@pytest.fixture(name="agent")
+def fixture_agent(request: pytest.FixtureRequest) -> Iterator[_Agent]:
+    agent = _Agent(_MIB, getattr(request, "param", "public"))
+    yield agent
+    agent.close()
+
+
+@pytest.mark.parametrize(
+    "oid",
+    [".1.3.6.1.2.1.1.3", "1.3.6.1.2.1.1.3", ".1.3.6.1.2.1.4.20.1.1.10.0.0.1", ".1.2"],
+)
+def test_encode_decode_oid(oid: OID) -> None:
+    encoded = ber.encode_oid(oid)
+    tag, start, end = ber.read_tlv(encoded, 0)
+    assert tag == ber.OBJECT_IDENTIFIER
+    assert ber.decode_oid(encoded[start:end]) == "." + oid.strip(".")
+
+
+@pytest.mark.parametrize("value", [0, 127, 128, 255, 256, -1, -128, -129, 2**31, -(2**31)])
+def test_encode_decode_integer(value: int) -> None:
+    assert ber.render_value(ber.encode_integer(value)) == str(value).encode()
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_walk_table_column(agent: _Agent, bulk: bool) -> None:
+    backend = NativeSNMPBackend(_config(agent.port, "public", bulk), logger)
+    assert backend.walk(".1.3.6.1.2.1.2.2.1.2") == [
+        (f".1.3.6.1.2.1.2.2.1.2.{index}", b"eth%d" % index) for index in (1, 2, 3, 10, 11)
+    ]
+    assert backend.walk(".1.3.6.1.2.1.2.2.1.10") == [
+        (".1.3.6.1.2.1.2.2.1.10.1", b"4294967295"),
+        (".1.3.6.1.2.1.2.2.1.10.2", b"9223372036854775808"),
+    ]
+
+
+def test_walk_snmpv1_end_of_mib(agent: _Agent) -> None:
+    backend = NativeSNMPBackend(
+        _config(agent.port, "public")._replace(is_snmpv2or3_without_bulkwalk_host=False), logger
+    )
+    assert backend.walk(".1.3.6.1.4.1.42") == [(".1.3.6.1.4.1.42.1.0", b"-17")]
+    assert backend.walk(".1.3.6.1.4.1.43") == []
+
+
+def test_walk_values(agent: _Agent) -> None:
+    backend = NativeSNMPBackend(_config(agent.port, "public", bulk=True), logger)
+    assert backend.walk(".1.3.6.1.2.1.1") == [
+        (".1.3.6.1.2.1.1.1.0", b"Linux box"),
+        (".1.3.6.1.2.1.1.2.0", b".1.3.6.1.4.1.8072.3.2.10"),
+        (".1.3.6.1.2.1.1.3.0", b"4711"),
+    ]
+    assert backend.walk(".1.3.6.1.2.1.4.20.1.1") == [
+        (".1.3.6.1.2.1.4.20.1.1.10.0.0.1", b"10.0.0.1")
+    ]
+    # A scalar is fetched with a GET, like snmpwalk does
+    assert backend.walk(".1.3.6.1.2.1.1.1.0") == [(".1.3.6.1.2.1.1.1.0", b"Linux box")]
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+@pytest.mark.parametrize("snmpv1", [False, True])
+@pytest.mark.parametrize("max_varbinds", [1000, 4, 1])
+def test_walk_many_merges_walks(agent: _Agent, bulk: bool, snmpv1: bool, max_varbinds: int) -> None:
+    config = _config(agent.port, "public", bulk)
+    if snmpv1:
+        config = config._replace(is_bulkwalk_host=False, is_snmpv2or3_without_bulkwalk_host=False)
+    backend = NativeSNMPBackend(config, logger)
+    oids = [
+        ".1.3.6.1.2.1.2.2.1.2",
+        ".1.3.6.1.2.1.2.2.1.1",
+        ".1.3.6.1.2.1.2.2.1.10",
+        ".1.3.6.1.2.1.1",
+        ".1.3.6.1.9",
+        ".1.3.6.1.4.1.42",
+        ".1.3.6.1.2.1.1.1.0",
+    ]
+    expected = [backend.walk(oid) for oid in oids]
+    assert [len(rowinfo) for rowinfo in expected] == [5, 5, 2, 3, 0, 1, 1]
+    agent.max_varbinds = max_varbinds
+    assert backend.walk_many(oids) == expected
+
+
+def test_get(agent: _Agent) -> None:
+    backend = NativeSNMPBackend(_config(agent.port, "public"), logger)
+    assert backend.get(".1.3.6.1.2.1.1.1.0") == b"Linux box"
+    assert backend.get(".1.3.6.1.2.1.1.*") == b"Linux box"
+    assert backend.get(".1.3.6.1.2.1.1.9.0") is None
+    assert backend.get(".1.3.6.1.2.1.3.*") is None
+
+
+@pytest.mark.parametrize(
+    "agent",
+    [
+        ("noAuthNoPriv", "user"),
+        ("authNoPriv", "md5", "user", "password"),
+        ("authNoPriv", "SHA-512", "user", "password"),
+        ("authPriv", "md5", "user", "password", "DES", "secret123"),
+        ("authPriv", "sha", "user", "password", "AES", "secret123"),
+        ("authPriv", "SHA-256", "user", "password", "AES-256", "secret123"),
+    ],
+    indirect=True,
+)
+def test_snmpv3(agent: _Agent, request: pytest.FixtureRequest) -> None:
+    credentials = request.node.callspec.params["agent"]
+    backend = NativeSNMPBackend(_config(agent.port, credentials, bulk=True), logger)
+    assert backend.get(".1.3.6.1.2.1.1.1.0") == b"Linux box"
+    assert backend.walk(".1.3.6.1.2.1.2.2.1.1") == [
+        (f".1.3.6.1.2.1.2.2.1.1.{index}", str(index).encode()) for index in (1, 2, 3, 10, 11)
+    ]
+
+
+@pytest.mark.parametrize("agent", [("authNoPriv", "md5", "user", "password")], indirect=True)
+def test_snmpv3_wrong_password(agent: _Agent) -> None:
+    credentials = ("authNoPriv", "md5", "user", "wrong password")
+    backend = NativeSNMPBackend(
+        _config(agent.port, credentials)._replace(timing={"timeout": 0.1, "retries": 0}), logger
+    )
+    with pytest.raises(MKSNMPError):
+        backend.walk(".1.3.6.1.2.1.1")
+
+
+def test_timeout() -> None:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as silent:
+        silent.bind(("127.0.0.1", 0))
+        backend = NativeSNMPBackend(
+            _config(silent.getsockname()[1], "public")._replace(
+                timing={"timeout": 0.05, "retries": 1}
+            ),
+            logger,
+        )
+        with pytest.raises(MKSNMPError, match="Timeout"):
+            backend.walk(".1.3.6.1.2.1.1")
+        assert backend.get(".1.3.6.1.2.1.1.1.0") is None
+
+
+def test_walk_stops_at_oid_not_increasing() -> None:
+    walk = _Walk(".1.3.6.1.2.1.2.2.1.2")
+    assert walk.add(
+        [
+            (".1.3.6.1.2.1.2.2.1.2.2", ber.encode_octet_string(b"eth2")),
+            (".1.3.6.1.2.1.2.2.1.2.10", ber.encode_octet_string(b"eth10")),
+        ]
+    )
+    assert not walk.add([(".1.3.6.1.2.1.2.2.1.2.3", ber.encode_octet_string(b"eth3"))])
+    assert walk.rowinfo == [
+        (".1.3.6.1.2.1.2.2.1.2.2", b"eth2"),
+        (".1.3.6.1.2.1.2.2.1.2.10", b"eth10"),
+    ]
+    assert not _Walk(".1.3.6.1.2.1.1").add(
+        [
+            (".1.3.6.1.2.1.1.1.0", ber.encode_octet_string(b"Linux box")),
+            (".1.3.6.1.2.1.1.1.0", ber.encode_octet_string(b"Linux box")),
+        ]
+    )
+
+
+def test_no_ip_address() -> None:
+    backend = NativeSNMPBackend(_config(161, "public")._replace(ipaddress=HostAddress("")), logger)
+    with pytest.raises(MKSNMPError, match="no IP address"):
+        backend.walk(".1.3.6.1.2.1.1")
+
+
+# The tests below check the user-based security model against published values. The agent of
+# the tests above uses the same implementation, errors on both ends would cancel out there.
+_RFC_3414_ENGINE_ID = bytes.fromhex("000000000000000000000002")
+
+
+@pytest.mark.parametrize(
+    "auth_protocol, localized_key",
+    [
+        pytest.param("md5", "526f5eed9fcce26f8964c2930787d82b", id="RFC 3414 A.3.1"),
+        pytest.param("sha", "6695febc9288e36282235fc7151f128497b38f3f", id="RFC 3414 A.3.2"),
+    ],
+)
+def test_usm_localized_keys(auth_protocol: str, localized_key: str) -> None:
+    usm = USM(("authPriv", auth_protocol, "user", "maplesyrup", "AES", "maplesyrup"))
+    usm.synchronize(ber.USMParameters(_RFC_3414_ENGINE_ID, 0, 0, b"", b"", b""))
+    assert usm._auth_key.hex() == localized_key
+    assert usm._priv_key.hex() == localized_key[:32]
+
+
+@pytest.mark.parametrize(
+    "auth_protocol, key_length, digest",
+    [
+        # RFC 2202, test case 1, truncated to 96 bit (RFC 3414 6.3.1 and 7.3.1)
+        ("md5", 16, "9294727a3638bb1c13f48ef8"),
+        ("sha", 20, "b617318655057264e28bc0b6"),
+    ],
+)
+def test_usm_digest(auth_protocol: str, key_length: int, digest: str) -> None:
+    usm = USM(("authNoPriv", auth_protocol, "user", "password"))
+    usm._auth_key = b"\x0b" * key_length
+    assert usm._digest(b"Hi There").hex() == digest
+
+
+def test_usm_aes_encryption() -> None:
+    # NIST SP 800-38A, F.3.13 (CFB128-AES128), the IV built from the engine boots, the engine
+    # time and the salt (RFC 3826 3.1.2.1)
+    usm = USM(("authPriv", "sha", "user", "password", "AES", "secret123"))
+    usm._priv_key = bytes.fromhex("2b7e151628aed2a6abf7158809cf4f3c")
+    usm._engine_boots = 0x00010203
+    usm._salt = 0x08090A0B0C0D0E0E  # incremented before use
+    plain = bytes.fromhex("6bc1bee22e409f96e93d7e117393172aae2d8a571e03ac9c9eb76fac45af8e51")
+    encrypted, salt = usm._encrypt(plain, 0x04050607)
+    assert salt.hex() == "08090a0b0c0d0e0f"
+    assert encrypted.hex() == ("3b3fd92eb72dad20333449f8e83cfb4ac8a64537a0b3a93fcde3cdad9f1ce58b")
+    assert (
+        usm._decrypt(encrypted, ber.USMParameters(b"", 0x00010203, 0x04050607, b"", b"", salt))
+        == plain
+    )
+
+
+def test_usm_des_encryption() -> None:
+    # The pre-IV (RFC 3414 8.1.1.1) cancels out the salt, so this is a single DES block
+    usm = USM(("authPriv", "md5", "user", "password", "DES", "secret123"))
+    usm._priv_key = bytes.fromhex("133457799bbcdff10000000100000002")
+    usm._engine_boots = 1
+    usm._salt = 1  # incremented before use
+    encrypted, salt = usm._encrypt(bytes.fromhex("0123456789abcdef"), 0)
+    assert salt.hex() == "0000000100000002"
+    assert encrypted.hex() == "85e813540f0ab405"
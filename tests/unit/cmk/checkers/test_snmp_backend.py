@@ -3,12 +3,47 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import logging
+import os
 from pathlib import Path
 
 import pytest
 
+from cmk.utils.exceptions import MKGeneralException
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig
+
 import cmk.fetchers.snmp_backend._utils as utils
 from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
+from cmk.fetchers.snmp_backend._walk_index import compile_walk, oid_key, WalkIndex
+
+_WALK = """\
+.1.2.3.1 "first"
+.1.2.3.2 INTEGER: 2
+.1.2.3.10 "B2 E0 7D 2C 4D 15 "
+.1.2.30.1 "other"
+.1.2.3 "table"
+.1.2.4.1 "multi
+line"
+.1.2.5.1
+"""
+
+_CONFIG = SNMPHostConfig(
+    is_ipv6_primary=False,
+    hostname=HostName("walkhost"),
+    ipaddress=HostAddress("127.0.0.1"),
+    credentials="public",
+    port=161,
+    is_bulkwalk_host=False,
+    is_snmpv2or3_without_bulkwalk_host=False,
+    bulk_walk_size_of=0,
+    timing={},
+    oid_range_limits={},
+    snmpv3_contexts=[],
+    character_encoding=None,
+    snmp_backend=SNMPBackendEnum.STORED_WALK,
+)
 
 
 @pytest.mark.parametrize(
@@ -52,6 +87,85 @@ class TestStoredWalkSNMPBackend:
         ]
 
 
+@pytest.mark.parametrize(
+    "oids",
+    [
+        ["1.2", "1.2.3", "1.2.3.1", "1.2.3.2", "1.2.3.10", "1.2.30", "1.2.255", "1.2.256"],
+        ["0", "0.0", "1", "1.0", "127", "128", "4294967295"],
+    ],
+)
+def test_oid_keys_sort_like_oids(oids: list[str]) -> None:
+    assert sorted(oids, key=oid_key) == sorted(oids, key=lambda o: tuple(map(int, o.split("."))))
+
+
+def test_oid_key_invalid() -> None:
+    with pytest.raises(MKGeneralException):
+        oid_key("1.2.x")
+
+
+class TestWalkIndex:
+    @pytest.fixture(name="backend")
+    def fixture_backend(self, tmp_path: Path) -> StoredWalkSNMPBackend:
+        (tmp_path / "walkhost").write_text(_WALK)
+        return StoredWalkSNMPBackend(_CONFIG, logging.getLogger("test"), tmp_path / "walkhost")
+
+    def test_walk_prefix(self, backend: StoredWalkSNMPBackend) -> None:
+        assert backend.walk(".1.2.3") == [
+            (".1.2.3", b"table"),
+            (".1.2.3.1", b"first"),
+            (".1.2.3.2", b"INTEGER: 2"),
+            (".1.2.3.10", b"\xb2\xe0},M\x15"),
+        ]
+        assert backend.walk("1.2.4") == [(".1.2.4.1", b"multi\nline")]
+        assert backend.walk(".1.2.6") == []
+        assert backend.walk(".0") == []
+        assert backend.walk(".2") == []
+
+    def test_walk_dot_star(self, backend: StoredWalkSNMPBackend) -> None:
+        assert backend.walk(".1.2.3.*") == [(".1.2.3.1", b"first")]
+        assert backend.walk(".1.2.3.10.*") == []
+
+    def test_get(self, backend: StoredWalkSNMPBackend) -> None:
+        assert backend.get(".1.2.3.2") == b"INTEGER: 2"
+        assert backend.get(".1.2.5.1") == b""
+        assert backend.get(".1.2.3") is None
+        assert backend.get(".1.2.30.*") == b"other"
+
+    def test_index_is_written_and_reused(self, backend: StoredWalkSNMPBackend) -> None:
+        backend.walk(".1.2.3")
+        assert backend.index_path.exists()
+        mtime = backend.index_path.stat().st_mtime_ns
+
+        other = StoredWalkSNMPBackend(_CONFIG, logging.getLogger("test"), backend.path)
+        assert other.walk(".1.2.30") == [(".1.2.30.1", b"other")]
+        assert backend.index_path.stat().st_mtime_ns == mtime
+
+    def test_index_is_rebuilt(self, backend: StoredWalkSNMPBackend) -> None:
+        backend.walk(".1.2.3")
+        backend.path.write_text('.1.2.3.1 "changed"\n')
+        stat = backend.index_path.stat()
+        os.utime(backend.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        other = StoredWalkSNMPBackend(_CONFIG, logging.getLogger("test"), backend.path)
+        assert other.walk(".1.2.3") == [(".1.2.3.1", b"changed")]
+
+    def test_broken_index_is_rebuilt(self, backend: StoredWalkSNMPBackend) -> None:
+        backend.index_path.write_bytes(b"garbage")
+        assert backend.walk(".1.2.3.*") == [(".1.2.3.1", b"first")]
+        assert backend.index_path.read_bytes().startswith(b"CMKWALK1")
+
+    def test_in_memory(self) -> None:
+        index = WalkIndex(compile_walk(['.1.3.1 "a"\n', '.1.3 "b"\n', '.1.3 "c"\n']))
+        assert len(index) == 3
+        assert index.lookup("1.3") == [(".1.3", b"b"), (".1.3", b"c"), (".1.3.1", b"a")]
+        assert index.first("1.3") == [(".1.3.1", b"a")]
+
+    def test_empty(self) -> None:
+        index = WalkIndex(compile_walk([]))
+        assert index.lookup("1.3") == []
+        assert index.first("1.3") == []
+
+
 @pytest.fixture
 def create_files(tmpdir):
     tmpdir.mkdir("walkdata")
@@ -12,7 +12,7 @@ from cmk.utils.hostaddress import HostName
 from cmk.ec.config import Config, Rule, ServiceLevel
 from cmk.ec.defaults import default_rule_pack
 from cmk.ec.event import Event
-from cmk.ec.main import EventServer
+from cmk.ec.main import EventServer, EventStatus
 
 RULE = Rule(
     actions=[],
@@ -61,3 +61,23 @@ def test_event_rewrite(
 
     assert event["text"] == "SUPERWARN"
     assert event["state"] == 2
+
+
+def test_match_event_counts_rule_evaluations(
+    event_server: EventServer, event_status: EventStatus, config: Config
+) -> None:
+    # Both rules are evaluated, the prefilter finds the literal "SUPER" in the text
+    rule = RULE.copy()
+    rule["match"] = "SUPER(CRIT|OK)"
+    other_rule = RULE.copy()
+    other_rule["id"] = "other"
+    other_rule["match"] = "SUPER(WARN|OK)X"
+    config = config.copy()
+    config["rule_packs"] = [default_rule_pack([other_rule, rule])]
+    event_server.reload_configuration(config=config)
+    for _ in range(2):
+        event_server.match_event(
+            CMKEventConsole.new_event(Event(host=HostName("heute"), text="SUPERWARN"))
+        )
+
+    assert event_status.get_rule_stats() == [["other", 0, 2], ["patterns", 0, 2]]
@@ -5,9 +5,22 @@
 """EC History methods"""
 import logging
 import shlex
+import time
 from pathlib import Path
+from typing import Literal
 
+import pytest
+
+from tests.testlib import CMKEventConsole
+
+from tests.unit.cmk.ec.helpers import FakeStatusSocket
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ec.config import Config
 from cmk.ec.history import _grep_pipeline, convert_history_line, History, parse_history_file
+from cmk.ec.main import StatusServer
+from cmk.ec.settings import Settings
 
 
 def test_convert_history_line(history: History) -> None:
@@ -51,3 +64,81 @@ def test_history_parse(history: History, tmp_path: Path) -> None:
 
     assert len(new_entries) == 4
     assert new_entries[0][1] == 1666942292.3000507
+
+
+@pytest.mark.parametrize("archive_mode", ["file", "sqlite"])
+def test_history_add_and_query(
+    history: History,
+    status_server: StatusServer,
+    config: Config,
+    archive_mode: Literal["file", "sqlite"],
+) -> None:
+    config["archive_mode"] = archive_mode
+    history.reload_configuration(config)
+    for num in range(10):
+        event = CMKEventConsole.new_event(
+            {
+                "host": HostName(f"host-{num % 2}"),
+                "text": f"text {num}",
+                "core_host": HostName(f"host-{num % 2}"),
+            }
+        )
+        event.update({"id": num, "match_groups": ("a", "b"), "contact_groups": None})
+        history.add(event, "NEW")
+
+    s = FakeStatusSocket(
+        b"GET history\n"
+        b"Columns: event_id event_text event_match_groups event_contact_groups\n"
+        b"Filter: event_host = host-1\n"
+        b"Filter: event_text ~ text [0-7]\n"
+        b"Limit: 3\n"
+    )
+    status_server.handle_client(s, True, "127.0.0.1")
+
+    assert s.get_response()[1:] == [
+        [7, "text 7", ("a", "b"), None],
+        [5, "text 5", ("a", "b"), None],
+        [3, "text 3", ("a", "b"), None],
+    ]
+
+
+def test_history_sqlite_housekeeping(
+    history: History, settings: Settings, config: Config, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    config["archive_mode"] = "sqlite"
+    config["history_lifetime"] = 1
+    history.reload_configuration(config)
+    history_dir = settings.paths.history_dir.value
+    gmtime = time.gmtime
+    segments = []
+    for now in [1000000.0, 1000000.0 + 2 * 86400]:
+        monkeypatch.setattr(time, "time", lambda now=now: now)
+        monkeypatch.setattr(time, "localtime", lambda secs=None, now=now: gmtime(secs or now))
+        history.add(CMKEventConsole.new_event({"host": HostName("heute")}), "NEW")
+        # Writes the pending entry and deletes the segments of the expired entries as a whole
+        history.housekeeping()
+        segments.append(sorted(path.name for path in history_dir.glob("*.sqlite")))
+
+    assert segments == [["950400.sqlite"], ["1123200.sqlite"]]
+    history.flush()
+    assert not list(history_dir.glob("*.sqlite"))
+
+
+def test_history_sqlite_write_pending(
+    history: History, config: Config, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    config["archive_mode"] = "sqlite"
+    history.reload_configuration(config)
+    monkeypatch.setattr(time, "time", lambda: 1000000.0)
+    history.add(CMKEventConsole.new_event({"host": HostName("heute")}), "NEW")
+
+    monkeypatch.setattr(time, "time", lambda: 1000000.5)
+    history.write_pending()
+    assert history._sqlite.pending
+
+    # Written without a further entry being added
+    monkeypatch.setattr(time, "time", lambda: 1000001.0)
+    history.write_pending()
+    assert not history._sqlite.pending
+    assert history._sqlite.connection is not None
+    assert history._sqlite.connection.execute("SELECT count(*) FROM history").fetchone() == (1,)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from collections.abc import Iterable
+
+import pytest
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ec.event import Event
+from cmk.ec.event_store import breed_key, EventStore
+
+
+def _event(event_id: int, rule_id: str, host: str, application: str = "app") -> Event:
+    return {
+        "id": event_id,
+        "rule_id": rule_id,
+        "host": HostName(host),
+        "application": application,
+        "match_groups": ("a",),
+    }
+
+
+def _ids(events: Iterable[Event]) -> list[int]:
+    return [event["id"] for event in events]
+
+
+def test_event_store_indexes() -> None:
+    store = EventStore(
+        [
+            _event(1, "r1", "h1"),
+            _event(2, "r2", "h1"),
+            _event(3, "r1", "h2"),
+            _event(4, "r1", "h1", "other"),
+            _event(5, "r1", "h1"),
+        ]
+    )
+    assert len(store) == 5
+    assert _ids(store.events()) == [1, 2, 3, 4, 5]
+    assert _ids(store.events_of_rule("r1")) == [1, 3, 4, 5]
+    assert _ids(store.events_of_rule("unknown")) == []
+    assert _ids(store.events_of_host("h1")) == [1, 2, 4, 5]
+    assert _ids(store.events_of_rule_and_host("r1", "h1")) == [1, 4, 5]
+    assert _ids(store.events_of_breed(breed_key(_event(0, "r1", "h1")))) == [1, 5]
+    assert (event := store.get(3)) is not None and event["host"] == "h2"
+    assert store.get(6) is None
+
+
+def test_event_store_add_existing() -> None:
+    store = EventStore([_event(1, "r1", "h1")])
+    with pytest.raises(ValueError):
+        store.add(_event(1, "r2", "h2"))
+
+
+def test_event_store_remove_and_oldest() -> None:
+    events = [_event(1, "r1", "h1"), _event(2, "r2", "h1"), _event(3, "r1", "h2")]
+    store = EventStore(events)
+    assert (oldest := store.oldest()) is not None and oldest["id"] == 1
+    assert (oldest := store.oldest_of_rule("r1")) is not None and oldest["id"] == 1
+    assert (oldest := store.oldest_of_host("h2")) is not None and oldest["id"] == 3
+
+    store.remove(events[0])
+    assert events[0] not in store
+    assert _ids(store.events()) == [2, 3]
+    assert (oldest := store.oldest_of_rule("r1")) is not None and oldest["id"] == 3
+    assert (oldest := store.oldest_of_host("h1")) is not None and oldest["id"] == 2
+
+    store.remove(events[2])
+    assert store.oldest_of_rule("r1") is None
+    with pytest.raises(KeyError):
+        store.remove(events[2])
+    # Only the stored event itself can be removed, not an equal copy
+    with pytest.raises(KeyError):
+        store.remove(dict(events[1]))  # type: ignore[arg-type]
+
+
+def test_event_store_update() -> None:
+    events = [_event(1, "r1", "h1"), _event(2, "r1", "h2"), _event(3, "r1", "h3")]
+    store = EventStore(events)
+
+    events[2]["host"] = HostName("h2")
+    store.update(events[2])
+    events[0]["host"] = HostName("h2")
+    store.update(events[0])
+    events[1]["match_groups"] = ("b",)
+    store.update(events[1])
+
+    assert _ids(store.events()) == [1, 2, 3]
+    assert _ids(store.events_of_host("h1")) == []
+    assert _ids(store.events_of_host("h2")) == [1, 2, 3]
+    assert _ids(store.events_of_rule_and_host("r1", "h2")) == [1, 2, 3]
+    assert _ids(store.events_of_breed(breed_key(_event(0, "r1", "h2")))) == [1, 3]
+    assert (oldest := store.oldest_of_host("h2")) is not None and oldest["id"] == 1
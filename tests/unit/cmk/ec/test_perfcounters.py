@@ -114,6 +114,8 @@ def test_perfcounters_correct_status_values() -> None:
     for _x in range(2):
         c.count("rule_tries")
 
+    c.set_gauge("match_queue_length", 3)
+
     for column_name, column_value in zip([n for n, _d in c.status_columns()], c.get_status()):
         if column_name.startswith("status_average_") and column_name.endswith("_time"):
             counter_name = column_name.split("_")[-2]
@@ -127,6 +129,10 @@ def test_perfcounters_correct_status_values() -> None:
             counter_name = column_name.split("_")[-2]
             assert column_value == c._rates.get(counter_name, 0.0)
 
+        elif column_name.endswith("_queue_length"):
+            gauge_name = "_".join(column_name.split("_")[1:])
+            assert column_value == c._gauges[gauge_name]
+
         elif column_name.startswith("status_"):
             counter_name = "_".join(column_name.split("_")[1:])
             assert column_value == c._counters[counter_name], "Invalid value {!r}: {!r}".format(
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import threading
+import time
+from functools import partial
+
+from cmk.ec.perfcounters import Perfcounters
+from cmk.ec.pipeline import Commit, OrderedPipeline
+
+logger = logging.getLogger("cmk.mkeventd")
+
+
+def _job(committed: list[int], num: int, delay: float = 0.0) -> Commit:
+    time.sleep(delay)
+    return lambda: committed.append(num)
+
+
+def test_pipeline_commits_in_order() -> None:
+    committed: list[int] = []
+    pipeline = OrderedPipeline(logger, Perfcounters(logger), num_workers=4, max_queued=3)
+    pipeline.start()
+    for num in range(50):
+        # Later jobs are finished before earlier ones
+        assert pipeline.submit(partial(_job, committed, num, (num % 4) * 0.001), True)
+    pipeline.stop()
+    assert committed == list(range(50))
+
+
+def test_pipeline_drops_jobs_if_full() -> None:
+    perfcounters = Perfcounters(logger)
+    committed: list[int] = []
+    blocked = threading.Event()
+    pipeline = OrderedPipeline(logger, perfcounters, num_workers=1, max_queued=2)
+
+    def blocking_job() -> Commit:
+        blocked.wait()
+        return _job(committed, 0)
+
+    pipeline.start()
+    assert pipeline.submit(blocking_job, False)
+    while pipeline._jobs.qsize():  # wait for the worker to take the first job
+        time.sleep(0.001)
+    assert pipeline.submit(partial(_job, committed, 1), False)
+    assert pipeline.submit(partial(_job, committed, 2), False)
+    assert not pipeline.submit(partial(_job, committed, 3), False)
+    blocked.set()
+    pipeline.stop()
+    assert committed == [0, 1, 2]
+    assert perfcounters._counters["queue_drops"] == 1
+
+
+def test_pipeline_skips_failing_jobs() -> None:
+    committed: list[int] = []
+
+    def failing_job() -> Commit:
+        raise ValueError("broken message")
+
+    def failing_commit() -> None:
+        raise ValueError("broken event")
+
+    pipeline = OrderedPipeline(logger, Perfcounters(logger), num_workers=2, max_queued=10)
+    pipeline.start()
+    pipeline.submit(partial(_job, committed, 0), True)
+    pipeline.submit(failing_job, True)
+    pipeline.submit(lambda: failing_commit, True)
+    pipeline.submit(partial(_job, committed, 3), True)
+    pipeline.stop()
+    assert committed == [0, 3]
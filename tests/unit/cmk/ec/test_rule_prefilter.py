@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import random
+import re
+
+import pytest
+
+from livestatus import SiteId
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ec.config import Rule
+from cmk.ec.event import Event
+from cmk.ec.rule_matcher import compile_rule, MatchSuccess, RuleMatcher
+from cmk.ec.rule_prefilter import LiteralMatcher, required_literal, RulePrefilter
+
+
+@pytest.mark.parametrize(
+    "pattern,literal",
+    [
+        ("", None),
+        ("Plain Text", "Plain Text"),
+        ("x" * 40, "x" * 32),
+        (re.compile("Disk Failure", re.I), "disk failure"),
+        (re.compile(r"^kernel: \[\d+\] oom", re.I), "kernel: ["),
+        (re.compile(r"a\.b\\c\(d", re.I), "a.b\\c(d"),
+        (re.compile(r"ab*c+d?efg{2}h{0,2}i", re.I), "efg"),
+        (re.compile(r"abc+?de", re.I), "abc"),
+        (re.compile(r"x(abcdef)+yz", re.I), "yz"),
+        (re.compile(r"x[abcdef)]yz", re.I), "yz"),
+        (re.compile(r"x[]abcdef]yz", re.I), "yz"),
+        (re.compile(r"x(?:a(b)c|d)yz", re.I), "yz"),
+        (re.compile(r"(?i)x{yz", re.I), "x{yz"),
+        (re.compile(r"\x41bcdefg\N{LATIN SMALL LETTER A}bc", re.I), "bcdefg"),
+        (re.compile(r"\d\w\s\bword\B", re.I), "word"),
+        (re.compile(r"(a)\1bc", re.I), "bc"),
+        (re.compile(r"some.*thing", re.I), "thing"),
+        (re.compile("größe", re.I), "gr"),
+        (re.compile(r"foo|bar", re.I), None),
+        (re.compile(r"(?x) foo bar", re.I), None),
+        (re.compile(r"[abc]", re.I), None),
+    ],
+)
+def test_required_literal(pattern: str | re.Pattern[str], literal: str | None) -> None:
+    assert required_literal(pattern) == literal
+
+
+def test_literal_matcher() -> None:
+    matcher = LiteralMatcher(["ab", "abc", "bcd", "d", "xyz"])
+    assert matcher.find("zabcde") == {"ab", "abc", "bcd", "d"}
+    assert matcher.find("xy") == set()
+    assert LiteralMatcher([]).find("abc") == set()
+
+
+def _rule(rule_id: str, **kwargs: str | bool) -> Rule:
+    rule = Rule(id=rule_id, pack="pack")
+    rule.update(kwargs)  # type: ignore[typeddict-item]
+    compile_rule(rule)
+    return rule
+
+
+def _event(text: str, host: str = "host", application: str = "app") -> Event:
+    return Event(
+        text=text,
+        host=HostName(host),
+        application=application,
+        ipaddress="",
+        facility=1,
+        priority=2,
+    )
+
+
+def test_rule_prefilter_candidates() -> None:
+    rules = [
+        _rule("1", match="disk (\\d+) failed"),
+        _rule("2", match="no literal|in this one"),
+        _rule("3", match="link down", match_ok="LINK UP"),
+        _rule("4", match="failed", match_host="^db"),
+        _rule("5", match="failed", invert_matching=True),
+        _rule("6", match_application="sshd", cancel_application="cron"),
+    ]
+    prefilter = RulePrefilter(rules)
+
+    def ids(event: Event) -> list[str]:
+        return [rule["id"] for rule in prefilter.candidates(rules, event)]
+
+    assert ids(_event("Disk 7 FAILED")) == ["1", "2", "5"]
+    assert ids(_event("disk 7 failed", host="db01")) == ["1", "2", "4", "5"]
+    assert ids(_event("eth0: Link up")) == ["2", "3", "5"]
+    assert ids(_event("something", application="CRON")) == ["2", "5", "6"]
+    # Case insensitive matching of regexes is not limited to ASCII
+    assert ids(_event("disk 7 \N{LATIN SMALL LETTER LONG S}")) == list("123456")
+    assert ids(_event("nothing")) == ["2", "5"]
+    # The order of the given rules is kept, unknown rules are not filtered
+    candidates = prefilter.candidates(
+        [rules[2], _rule("7", match="unknown"), rules[1]], _event("x")
+    )
+    assert [rule["id"] for rule in candidates] == ["7", "2"]
+
+
+def test_rule_prefilter_never_skips_matching_rules() -> None:
+    rand = random.Random(42)
+    words = ["disk", "Disk", "failed", "up", "down", "kernel", "oom", "a.b", "x{2}"]
+    pieces = ["", ".*", "\\d+", "(\\w+)", "[a-z]", "?", "|", "^", "\\.", "\\s"]
+
+    def random_pattern() -> str:
+        return "".join(rand.choice(words) + rand.choice(pieces) for _i in range(rand.randint(1, 3)))
+
+    rules = []
+    for num in range(300):
+        kwargs: dict[str, str] = {"match": random_pattern()}
+        if rand.random() < 0.3:
+            kwargs["match_ok"] = random_pattern()
+        if rand.random() < 0.3:
+            kwargs["match_host"] = rand.choice(["db", "^web\\d", "DB01"])
+        if rand.random() < 0.3:
+            kwargs["match_application"] = rand.choice(["sshd", "cron", "k.rnel"])
+        try:
+            rules.append(_rule(str(num), **kwargs))
+        except re.error:
+            pass
+    prefilter = RulePrefilter(rules)
+    matcher = RuleMatcher(None, SiteId("test_site"), lambda time_period_name: True)
+
+    for _num in range(300):
+        event = _event(
+            " ".join(rand.choice(words + ["123", "a-b", "12.3"]) for _i in range(6)),
+            host=rand.choice(["db01", "web1", "DB01", "other"]),
+            application=rand.choice(["sshd", "cron", "kernel", "KERNEL"]),
+        )
+        candidates = [rule["id"] for rule in prefilter.candidates(rules, event)]
+        matching = [
+            rule["id"]
+            for rule in rules
+            if isinstance(matcher.event_rule_matches(rule, event), MatchSuccess)
+        ]
+        assert set(matching) <= set(candidates)
+        assert candidates == sorted(candidates, key=int)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import pickle
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ec.event import Event
+from cmk.ec.main import EventServer, EventStatus
+from cmk.ec.status_journal import JournalEntry, PackedEventStatus, StatusJournal
+
+logger = logging.getLogger("cmk.mkeventd")
+
+
+def _event(event_id: int, text: str = "text") -> Event:
+    return {"id": event_id, "text": text, "match_groups": ("a",)}
+
+
+def _entry(next_event_id: int, changed: list[Event], removed: list[int]) -> JournalEntry:
+    return JournalEntry(
+        next_event_id=next_event_id,
+        changed_events=changed,
+        removed_event_ids=removed,
+        rule_stats={"rule": next_event_id},
+        interval_starts={},
+    )
+
+
+def _snapshot() -> PackedEventStatus:
+    return PackedEventStatus(
+        next_event_id=3,
+        events=[_event(1), _event(2)],
+        rule_stats={},
+        interval_starts={"rule": 42},
+    )
+
+
+def test_status_journal_replays_entries(tmp_path: Path) -> None:
+    journal = StatusJournal(tmp_path / "status", logger)
+    assert journal.load() is None
+
+    journal.write_snapshot(_snapshot())
+    journal.append(_entry(4, [_event(3), _event(1, "changed")], [2]))
+    journal.append(_entry(5, [_event(4)], [3, 17]))
+
+    assert journal.load() == PackedEventStatus(
+        next_event_id=5,
+        events=[_event(1, "changed"), _event(4)],
+        rule_stats={"rule": 5},
+        interval_starts={},
+    )
+
+    journal.write_snapshot(_snapshot())
+    assert journal.load() == _snapshot()
+    assert not (tmp_path / "status.journal").exists()
+
+
+def test_status_journal_removes_incomplete_last_entry(tmp_path: Path) -> None:
+    journal = StatusJournal(tmp_path / "status", logger)
+    journal.write_snapshot(_snapshot())
+    journal.append(_entry(4, [_event(3)], []))
+    with (tmp_path / "status.journal").open("ab") as f:
+        f.write(pickle.dumps(dict(_entry(5, [_event(4)], [])), protocol=4)[:-10])
+
+    status = journal.load()
+    assert status is not None
+    assert [event["id"] for event in status["events"]] == [1, 2, 3]
+
+    journal.append(_entry(6, [_event(5)], []))
+    status = journal.load()
+    assert status is not None
+    assert [event["id"] for event in status["events"]] == [1, 2, 3, 5]
+
+
+def test_status_journal_reads_legacy_snapshot(tmp_path: Path) -> None:
+    (tmp_path / "status").write_text(repr(_snapshot()) + "\n")
+    assert StatusJournal(tmp_path / "status", logger).load() == _snapshot()
+
+
+def test_status_journal_merges_into_snapshot(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("cmk.ec.status_journal._MIN_MERGE_SIZE", 0)
+    journal = StatusJournal(tmp_path / "status", logger)
+    journal.write_snapshot(_snapshot())
+    for event_id in range(3, 30):
+        journal.append(_entry(event_id + 1, [_event(event_id, "x" * 100)], [event_id - 1]))
+    journal.write_snapshot(journal.load() or _snapshot())  # waits for the running merge
+    assert not (tmp_path / "status.journal.merging").exists()
+
+    status = StatusJournal(tmp_path / "status", logger).load()
+    assert status is not None
+    assert status["next_event_id"] == 30
+    assert [event["id"] for event in status["events"]] == [1, 29]
+
+
+def test_event_status_saves_changes(event_status: EventStatus, event_server: EventServer) -> None:
+    event_status.settings.paths.status_file.value.parent.mkdir(parents=True, exist_ok=True)
+    events: list[Event] = [
+        {
+            "host": HostName(f"host{num}"),
+            "application": "app",
+            "ipaddress": "",
+            "pid": 0,
+            "text": "text",
+            "rule_id": "rule",
+            "core_host": HostName(""),
+            "phase": "open",
+        }
+        for num in range(3)
+    ]
+    event_status.new_event(events[0])
+    event_status.new_event(events[1])
+    event_status.save_status()  # the first save writes the complete status
+
+    event_status.new_event(events[2])
+    events[0]["phase"] = "ack"
+    event_status.event_changed(events[0])
+    with event_status.lock:
+        event_status.remove_event(events[1], "DELETE")
+    event_status.count_rule_match("rule")
+    event_status.save_status()
+    assert event_status.settings.paths.status_file.value.with_name("status.journal").exists()
+
+    loaded = EventStatus(
+        event_status.settings,
+        event_status._config,
+        event_status._perfcounters,
+        event_status._history,
+        logger,
+    )
+    loaded.load_status(event_server)
+    assert loaded.events() == [events[0], events[2]]
+    assert loaded.events()[0]["phase"] == "ack"
+    assert loaded.get_rule_stats() == [["rule", 1, 0]]
@@ -54,6 +54,7 @@ def test_default_config_from_plugins() -> None:
         "custom_links",
         "debug_livestatus_queries",
         "show_livestatus_errors",
+        "livestatus_response_timeout",
         "liveproxyd_enabled",
         "visible_views",
         "hidden_views",
@@ -140,6 +141,7 @@ def test_default_config_from_plugins() -> None:
         "bi_packs",
         "default_bi_layout",
         "bi_layouts",
+        "bi_num_workers",
         "bi_compile_log",
         "bi_precompile_on_demand",
         "bi_use_legacy_compilation",
@@ -5,6 +5,7 @@
 
 import io
 import logging
+import os
 import tarfile
 from pathlib import Path
 
@@ -16,6 +17,7 @@ import tests.testlib.utils as testlibutils
 from livestatus import SiteConfiguration, SiteId
 
 import cmk.utils.paths
+import cmk.utils.store
 import cmk.utils.version as cmk_version
 
 import cmk.gui.watolib.activate_changes as activate_changes
@@ -237,7 +239,8 @@ def test_add_replication_paths() -> None:
 def test_automation_get_config_sync_state() -> None:
     get_state = activate_changes.AutomationGetConfigSyncState()
     response = get_state.execute([ReplicationPath("dir", "abc", "etc", [])])
-    assert response == (
+    assert response[2] == [str(c) for c in activate_changes._sync_archive_compressions()]
+    assert response[:2] == (
         {
             "etc/check_mk/multisite.mk": (
                 33200,
@@ -353,6 +356,66 @@ def test_get_config_sync_file_infos() -> None:
     }
 
 
+def test_get_config_sync_file_infos_with_hashes(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    base_dir = cmk.utils.paths.omd_root / "replication"
+    _create_get_config_sync_file_infos_test_config(base_dir)
+    replication_paths = [
+        ReplicationPath("dir", "d3-single-file", "etc/d3", []),
+        ReplicationPath("dir", "d4-multiple-files", "etc/d4", []),
+        ReplicationPath("dir", "links", "links", []),
+    ]
+    expected = activate_changes._get_config_sync_file_infos(replication_paths, base_dir)
+
+    hashed = []
+    create_hash = activate_changes._create_config_sync_file_hash
+
+    def _create_hash(file_path: str) -> str:
+        hashed.append(os.path.relpath(file_path, base_dir))
+        return create_hash(file_path)
+
+    monkeypatch.setattr(activate_changes, "_create_config_sync_file_hash", _create_hash)
+
+    def _file_infos() -> activate_changes.ConfigSyncFileInfos:
+        file_hashes = activate_changes.ConfigSyncFileHashes(tmp_path / "hashes.pickle")
+        file_infos = activate_changes._get_config_sync_file_infos(
+            replication_paths, base_dir, file_hashes=file_hashes
+        )
+        file_hashes.save()
+        return file_infos
+
+    assert _file_infos() == expected
+    assert sorted(hashed) == sorted(k for k, v in expected.items() if v.file_hash)
+
+    hashed.clear()
+    assert _file_infos() == expected
+    assert not hashed
+
+    base_dir.joinpath("etc/d4/x1").write_text("Däng3")
+    hashed.clear()
+    file_infos = _file_infos()
+    assert hashed == ["etc/d4/x1"]
+    assert file_infos["etc/d4/x1"].file_hash == create_hash(str(base_dir / "etc/d4/x1"))
+
+
+def test_config_sync_file_hashes_forget_removed_files(tmp_path: Path) -> None:
+    path = tmp_path / "hashes.pickle"
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.write_text("1")
+    second.write_text("2")
+    file_hashes = activate_changes.ConfigSyncFileHashes(path)
+    for file_path in [first, second]:
+        file_hashes.file_hash(str(file_path), file_path.stat())
+    file_hashes.save()
+
+    # Files not looked at are kept as long as they exist
+    second.unlink()
+    file_hashes = activate_changes.ConfigSyncFileHashes(path)
+    file_hashes.save()
+    assert list(cmk.utils.store.load_object_from_pickle_file(path, default={})) == [str(first)]
+
+
 def _create_get_config_sync_file_infos_test_config(base_dir: Path) -> None:
     base_dir.joinpath("etc/d1").mkdir(parents=True, exist_ok=True)
 
@@ -565,7 +628,33 @@ def test_get_sync_archive(tmp_path: Path) -> None:
         )
 
 
-def _get_test_sync_archive(tmp_path: Path) -> bytes:
+def test_get_sync_archive_compressed(tmp_path: Path) -> None:
+    sync_archive = _get_test_sync_archive(tmp_path, activate_changes.SyncArchiveCompression.GZIP)
+    with tarfile.open(mode="r:gz", fileobj=io.BytesIO(sync_archive)) as f:
+        assert "etc/abc" in f.getnames()
+
+
+def test_negotiate_sync_archive_compression(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        activate_changes,
+        "_sync_archive_compressions",
+        lambda: [
+            activate_changes.SyncArchiveCompression.ZSTD,
+            activate_changes.SyncArchiveCompression.GZIP,
+        ],
+    )
+    assert (
+        activate_changes._negotiate_sync_archive_compression(
+            [activate_changes.SyncArchiveCompression.GZIP]
+        )
+        is activate_changes.SyncArchiveCompression.GZIP
+    )
+    assert activate_changes._negotiate_sync_archive_compression([]) is None
+
+
+def _get_test_sync_archive(
+    tmp_path: Path, compression: activate_changes.SyncArchiveCompression | None = None
+) -> bytes:
     tmp_path.joinpath("etc").mkdir(parents=True, exist_ok=True)
     with tmp_path.joinpath("etc/abc").open("w", encoding="utf-8") as f:
         f.write("gä")
@@ -583,7 +672,7 @@ def _get_test_sync_archive(tmp_path: Path) -> bytes:
     tmp_path.joinpath("broken-symlink").symlink_to("eeg")
     tmp_path.joinpath("working-symlink").symlink_to("ding")
 
-    return activate_changes._get_sync_archive(
+    with activate_changes._get_sync_archive(
         [
             "etc/abc",
             "file-to-dir/aaa",
@@ -593,7 +682,9 @@ def _get_test_sync_archive(tmp_path: Path) -> bytes:
             "working-symlink",
         ],
         tmp_path,
-    )
+        compression,
+    ) as sync_archive:
+        return sync_archive.read()
 
 
 class TestAutomationReceiveConfigSync:
@@ -640,7 +731,7 @@ class TestAutomationReceiveConfigSync:
         automation.execute(
             activate_changes.ReceiveConfigSyncRequest(
                 site_id=SiteId("remote"),
-                sync_archive=_get_test_sync_archive(tmp_path.joinpath("central")),
+                sync_archive=io.BytesIO(_get_test_sync_archive(tmp_path.joinpath("central"))),
                 to_delete=[
                     "to_delete",
                     "working-symlink/file",
@@ -671,10 +762,11 @@ class TestAutomationReceiveConfigSync:
         request.set_var("site_id", "NO_SITE")
         request.set_var("to_delete", "['x/y/z.txt', 'abc.ending', '/ä/☃/☕']")
         request.set_var("config_generation", "123")
+        sync_archive = io.BytesIO(b"some data")
         request.files = werkzeug_datastructures.ImmutableMultiDict(
             {
                 "sync_archive": werkzeug_datastructures.FileStorage(
-                    stream=io.BytesIO(b"some data"),
+                    stream=sync_archive,
                     filename="sync_archive",
                     name="sync_archive",
                 )
@@ -689,7 +781,7 @@ class TestAutomationReceiveConfigSync:
             activate_changes.AutomationReceiveConfigSync().get_request()
             == activate_changes.ReceiveConfigSyncRequest(
                 site_id=SiteId("NO_SITE"),
-                sync_archive=b"some data",
+                sync_archive=sync_archive,
                 to_delete=["x/y/z.txt", "abc.ending", "/ä/☃/☕"],
                 config_generation=123,
             )
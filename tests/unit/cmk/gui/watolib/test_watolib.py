@@ -87,6 +87,7 @@ def test_registered_configvars() -> None:
         "apache_process_tuning",
         "archive_orphans",
         "auth_by_http_header",
+        "bi_num_workers",
         "builtin_icon_visibility",
         "bulk_discovery_default_settings",
         "check_mk_perfdata_with_times",
@@ -115,6 +116,7 @@ def test_registered_configvars() -> None:
         "inventory_check_autotrigger",
         "inventory_check_interval",
         "inventory_check_severity",
+        "livestatus_response_timeout",
         "log_logon_failures",
         "lock_on_logon_failures",
         "log_level",
@@ -122,6 +124,7 @@ def test_registered_configvars() -> None:
         "log_messages",
         "log_rulehits",
         "login_screen",
+        "max_concurrent_fetches",
         "mkeventd_connect_timeout",
         "mkeventd_notify_contactgroup",
         "mkeventd_notify_facility",
@@ -3,12 +3,15 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import io
 from collections.abc import Sequence
 from dataclasses import dataclass
 from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
+import requests
+from werkzeug.formparser import parse_form_data
 
 from cmk.utils import version as cmk_version
 
@@ -126,3 +129,23 @@ class TestCheckmkAutomationBackgroundJob:
                 api_request,
             )
             assert RESULT == "i was very different previously"
+
+
+def test_multipart_body() -> None:
+    archive = io.BytesIO(b"\0arch\r\nive")
+    body = automations._MultipartBody({"site_id": "remote"}, {"sync_archive": archive})
+    prepared = requests.Request("POST", "http://localhost/", data=body).prepare()
+    assert "Transfer-Encoding" not in prepared.headers
+
+    content = b"".join(body)
+    assert prepared.headers["Content-Length"] == str(len(content))
+    _stream, form, files = parse_form_data(
+        {
+            "REQUEST_METHOD": "POST",
+            "CONTENT_TYPE": body.content_type,
+            "CONTENT_LENGTH": str(len(content)),
+            "wsgi.input": io.BytesIO(content),
+        }
+    )
+    assert form["site_id"] == "remote"
+    assert files["sync_archive"].read() == b"\0arch\r\nive"
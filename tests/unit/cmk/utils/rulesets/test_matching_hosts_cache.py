@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# Copyright (C) 2023 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.rulesets.matching_hosts_cache import condition_key, MatchingHostsCache
+from cmk.utils.rulesets.ruleset_matcher import (
+    LabelManager,
+    RulesetMatcher,
+    RulesetMatchObject,
+    RuleSpec,
+)
+from cmk.utils.tags import TagGroupID, TagID
+
+_HOSTS = {HostName("host%d" % nr) for nr in range(10)}
+_TAGS = {
+    host_name: {(TagGroupID("criticality"), TagID("prod" if nr % 2 else "test"))}
+    for nr, host_name in enumerate(sorted(_HOSTS))
+}
+_PATHS = {HostName("host1"): "/wato/lvl1/hosts.mk"}
+
+
+def _cache(
+    cache_dir: Path, tags: dict[HostName, set[tuple[TagGroupID, TagID]]]
+) -> MatchingHostsCache:
+    return MatchingHostsCache(cache_dir, _HOSTS, tags, _PATHS)
+
+
+def test_matching_hosts_cache_roundtrip(tmp_path: Path) -> None:
+    cache = _cache(tmp_path, _TAGS)
+    cache.add(condition_key("all"), set(_HOSTS))
+    cache.add(condition_key("none"), set())
+    cache.add(condition_key("some"), {HostName("host3"), HostName("host7")})
+    assert cache.get(condition_key("some")) == {HostName("host3"), HostName("host7")}
+    cache.save()
+
+    loaded = _cache(tmp_path, _TAGS)
+    assert loaded.path == cache.path
+    assert loaded.get(condition_key("all")) == _HOSTS
+    assert loaded.get(condition_key("none")) == set()
+    assert loaded.get(condition_key("some")) == {HostName("host3"), HostName("host7")}
+    assert loaded.get(condition_key("unknown")) is None
+
+    # Saving again keeps the loaded entries
+    loaded.add(condition_key("more"), {HostName("host1")})
+    loaded.save()
+    reloaded = _cache(tmp_path, _TAGS)
+    assert reloaded.get(condition_key("some")) == {HostName("host3"), HostName("host7")}
+    assert reloaded.get(condition_key("more")) == {HostName("host1")}
+
+
+def test_matching_hosts_cache_scope(tmp_path: Path) -> None:
+    hosts = {HostName("host%03d" % nr) for nr in range(100)}
+    even_hosts = {HostName("host%03d" % nr) for nr in range(0, 100, 2)}
+    cache = MatchingHostsCache(tmp_path, hosts, {}, {})
+    cache.add(condition_key("even"), even_hosts)
+    cache.save()
+
+    loaded = MatchingHostsCache(tmp_path, hosts, {}, {})
+    # Looked up host by host
+    assert loaded.get(
+        condition_key("even"), {HostName("host010"), HostName("host011"), HostName("unknown")}
+    ) == {HostName("host010")}
+    # Decoded
+    assert loaded.get(condition_key("even"), hosts) == even_hosts
+
+
+def test_matching_hosts_cache_changed_host_config(tmp_path: Path) -> None:
+    cache = _cache(tmp_path, _TAGS)
+    cache.add(condition_key("all"), set(_HOSTS))
+    cache.save()
+
+    changed_tags = {**_TAGS, HostName("host0"): {(TagGroupID("criticality"), TagID("prod"))}}
+    changed = _cache(tmp_path, changed_tags)
+    assert changed.path != cache.path
+    assert changed.get(condition_key("all")) is None
+
+    changed.add(condition_key("all"), set(_HOSTS))
+    changed.save()
+    assert [p.name for p in tmp_path.iterdir()] == [changed.path.name]
+
+
+def _matcher(cache_dir: Path) -> RulesetMatcher:
+    return RulesetMatcher(
+        tag_to_group_map={},
+        host_tags={h: dict(tags) for h, tags in _TAGS.items()},
+        host_paths=_PATHS,
+        labels=LabelManager({}, [], [], lambda h, s: {}),
+        all_configured_hosts=_HOSTS,
+        clusters_of={},
+        nodes_of={},
+        matching_hosts_cache_dir=cache_dir,
+    )
+
+
+_RULESET: list[RuleSpec[str]] = [
+    {
+        "id": "1",
+        "value": "prod",
+        "condition": {"host_tags": {TagGroupID("criticality"): TagID("prod")}},
+    },
+    {"id": "2", "value": "lvl1", "condition": {"host_folder": "/wato/lvl1/"}},
+    {"id": "3", "value": "regex", "condition": {"host_name": [{"$regex": "host[0-2]"}]}},
+]
+
+
+def test_ruleset_matcher_uses_persisted_matching_hosts(tmp_path: Path) -> None:
+    def _values(matcher: RulesetMatcher) -> dict[HostName, list[str]]:
+        return {
+            host_name: list(
+                matcher.get_host_ruleset_values(
+                    RulesetMatchObject(host_name), _RULESET, is_binary=False
+                )
+            )
+            for host_name in sorted(_HOSTS)
+        }
+
+    matcher = _matcher(tmp_path)
+    expected = _values(matcher)
+    assert expected[HostName("host1")] == ["prod", "lvl1", "regex"]
+    matcher.save_matching_hosts_cache()
+
+    persisting_matcher = _matcher(tmp_path)
+    # Computing is not needed anymore
+    persisting_matcher.ruleset_optimizer._compute_matching_hosts = None  # type: ignore[method-assign, assignment]
+    assert _values(persisting_matcher) == expected
+
+
+def test_single_host_process_uses_persisted_matching_hosts(tmp_path: Path) -> None:
+    def _values(matcher: RulesetMatcher, host_name: HostName) -> list[str]:
+        return list(
+            matcher.get_host_ruleset_values(
+                RulesetMatchObject(host_name), _RULESET, is_binary=False
+            )
+        )
+
+    # A single host process does not compute the other hosts for a cache it never saves
+    single_host_matcher = _matcher(tmp_path)
+    single_host_matcher.ruleset_optimizer.set_all_processed_hosts({HostName("host1")})
+    expected = _values(single_host_matcher, HostName("host1"))
+    assert expected == ["prod", "lvl1", "regex"]
+    assert not single_host_matcher.ruleset_optimizer._matching_hosts_cache._new_entries  # type: ignore[union-attr]
+
+    full_matcher = _matcher(tmp_path)
+    for host_name in sorted(_HOSTS):
+        _values(full_matcher, host_name)
+    full_matcher.save_matching_hosts_cache()
+
+    single_host_matcher = _matcher(tmp_path)
+    single_host_matcher.ruleset_optimizer.set_all_processed_hosts({HostName("host1")})
+    # Computing is not needed anymore
+    single_host_matcher.ruleset_optimizer._compute_matching_hosts = None  # type: ignore[method-assign, assignment]
+    assert _values(single_host_matcher, HostName("host1")) == expected
@@ -15,6 +15,7 @@ from tests.testlib.base import Scenario
 import cmk.utils.paths
 from cmk.utils.hostaddress import HostName
 from cmk.utils.rulesets.ruleset_matcher import (
+    matches_labels,
     matches_tag_condition,
     RuleConditionsSpec,
     RulesetMatchObject,
@@ -610,6 +611,130 @@ def test_ruleset_matcher_get_host_ruleset_values_tags(
     )
 
 
+combined_ruleset: Sequence[RuleSpec[str]] = [
+    # tags and labels
+    {
+        "id": "id0",
+        "value": "prod_linux",
+        "condition": {
+            "host_tags": {TagGroupID("criticality"): TagID("prod")},
+            "host_labels": {"os": "linux"},
+        },
+        "options": {},
+    },
+    # negated tag and negated label
+    {
+        "id": "id1",
+        "value": "not_prod_not_windows",
+        "condition": {
+            "host_tags": {TagGroupID("criticality"): {"$ne": TagID("prod")}},
+            "host_labels": {"os": {"$ne": "windows"}},
+        },
+        "options": {},
+    },
+    # tags and regex host name
+    {
+        "id": "id2",
+        "value": "or_tag_and_regex",
+        "condition": {
+            "host_tags": {TagGroupID("networking"): {"$or": [TagID("lan"), TagID("dmz")]}},
+            "host_name": [{"$regex": "host[13]"}],
+        },
+        "options": {},
+    },
+    # negated host list mixing explicit names and regexes
+    {
+        "id": "id3",
+        "value": "negated_host_list",
+        "condition": {
+            "host_name": {"$nor": ["host1", {"$regex": "host2$"}]},
+        },
+        "options": {},
+    },
+    # folder and nor tags
+    {
+        "id": "id4",
+        "value": "folder_and_nor",
+        "condition": {
+            "host_folder": "/lvl1/",
+            "host_tags": {TagGroupID("networking"): {"$nor": [TagID("lan")]}},
+        },
+        "options": {},
+    },
+    # tag of an unknown tag group
+    {
+        "id": "id5",
+        "value": "unknown_tag_group",
+        "condition": {
+            "host_tags": {TagGroupID("unknown"): TagID("prod")},
+        },
+        "options": {},
+    },
+]
+
+
+@pytest.mark.parametrize(
+    "hostname,expected_result",
+    [
+        (HostName("host1"), ["prod_linux", "or_tag_and_regex"]),
+        (HostName("host2"), ["not_prod_not_windows"]),
+        (HostName("host3"), ["not_prod_not_windows", "or_tag_and_regex", "negated_host_list"]),
+        (HostName("host4"), ["negated_host_list", "folder_and_nor"]),
+    ],
+)
+def test_ruleset_matcher_get_host_ruleset_values_combined_conditions(
+    monkeypatch: MonkeyPatch,
+    hostname: HostName,
+    expected_result: Sequence[str],
+) -> None:
+    ts = Scenario()
+    ts.add_host(
+        HostName("host1"),
+        tags={
+            TagGroupID("criticality"): TagID("prod"),
+            TagGroupID("networking"): TagID("lan"),
+        },
+        labels={"os": "linux"},
+    )
+    ts.add_host(
+        HostName("host2"),
+        tags={
+            TagGroupID("criticality"): TagID("test"),
+            TagGroupID("networking"): TagID("lan"),
+        },
+        labels={"os": "linux"},
+    )
+    ts.add_host(
+        HostName("host3"),
+        tags={
+            TagGroupID("criticality"): TagID("test"),
+            TagGroupID("networking"): TagID("dmz"),
+        },
+    )
+    ts.add_host(
+        HostName("host4"),
+        tags={
+            TagGroupID("criticality"): TagID("prod"),
+            TagGroupID("networking"): TagID("wan"),
+        },
+        labels={"os": "windows"},
+        host_path="/lvl1/hosts.mk",
+    )
+    config_cache = ts.apply(monkeypatch)
+    matcher = config_cache.ruleset_matcher
+
+    assert (
+        list(
+            matcher.get_host_ruleset_values(
+                RulesetMatchObject(host_name=hostname, service_description=None),
+                ruleset=combined_ruleset,
+                is_binary=False,
+            )
+        )
+        == expected_result
+    )
+
+
 @pytest.mark.parametrize(
     "rule_spec, expected_result",
     [
@@ -806,16 +931,137 @@ def test_ruleset_matcher_get_service_ruleset_values_labels(
     )
 
 
+differential_service_ruleset: Sequence[RuleSpec[str]] = [
+    {"id": "0", "value": "all", "condition": {}},
+    {"id": "1", "value": "nothing", "condition": {"service_description": []}},
+    {"id": "2", "value": "cpu", "condition": {"service_description": [{"$regex": "CPU"}]}},
+    {
+        "id": "3",
+        "value": "not_cpu_or_mem",
+        "condition": {"service_description": {"$nor": [{"$regex": "CPU"}, {"$regex": "Mem"}]}},
+    },
+    {
+        "id": "4",
+        "value": "fs_exact",
+        "condition": {"service_description": [{"$regex": "Filesystem /$"}]},
+    },
+    {
+        "id": "5",
+        "value": "groups",
+        "condition": {"service_description": [{"$regex": "(Interface|Port) ([0-9]+)"}]},
+    },
+    {
+        "id": "6",
+        "value": "backreference",
+        "condition": {"service_description": [{"$regex": r"(\w)\1"}]},
+    },
+    {
+        "id": "7",
+        "value": "named_group",
+        "condition": {"service_description": [{"$regex": "(?P<name>Interface) 1"}]},
+    },
+    {
+        "id": "8",
+        "value": "cpu_on_host1",
+        "condition": {"host_name": ["host1"], "service_description": [{"$regex": "CPU"}]},
+    },
+    {
+        "id": "9",
+        "value": "cpu_on_linux",
+        "condition": {"host_labels": {"os": "linux"}, "service_description": [{"$regex": "CPU"}]},
+    },
+    {
+        "id": "10",
+        "value": "label",
+        "condition": {"service_labels": {"type": "net"}},
+    },
+    {
+        "id": "11",
+        "value": "negated_label",
+        "condition": {
+            "service_labels": {"type": {"$ne": "net"}},
+            "service_description": [{"$regex": "Interface"}],
+        },
+    },
+    {
+        "id": "12",
+        "value": "disabled",
+        "condition": {},
+        "options": {"disabled": True},
+    },
+]
+
+
+@pytest.mark.parametrize("hostname", [HostName("host1"), HostName("host2"), HostName("unknown")])
+@pytest.mark.parametrize(
+    "service_description, service_labels",
+    [
+        ("CPU load", {}),
+        ("CPU utilization", {"type": "net"}),
+        ("Memory", {}),
+        ("Filesystem /", {}),
+        ("Filesystem /var", {}),
+        ("Interface 1", {"type": "net"}),
+        ("Interface 1", {}),
+        ("Port 22", {"type": "net"}),
+        ("Uptime", {}),
+        ("aab", None),
+    ],
+)
+def test_ruleset_matcher_get_service_ruleset_values_differential(
+    monkeypatch: MonkeyPatch,
+    hostname: HostName,
+    service_description: str,
+    service_labels: dict[str, str] | None,
+) -> None:
+    ts = Scenario()
+    ts.add_host(HostName("host1"), labels={"os": "linux"})
+    ts.add_host(HostName("host2"), labels={"os": "windows"})
+    matcher = ts.apply(monkeypatch).ruleset_matcher
+    match_object = RulesetMatchObject(
+        host_name=hostname,
+        service_description=ServiceName(service_description),
+        service_labels=service_labels,
+    )
+
+    # Straight forward evaluation of the preprocessed ruleset, rule by rule
+    expected_result = [
+        value
+        for value, hosts, labels_condition, _cache_id, (
+            negate,
+            pattern,
+        ) in matcher.ruleset_optimizer.get_service_ruleset(
+            differential_service_ruleset,
+            hostname not in matcher.ruleset_optimizer.all_processed_hosts(),
+        )
+        if hostname in hosts
+        and (pattern.match(service_description) is not None) is not negate
+        and (not labels_condition or matches_labels(service_labels, labels_condition))
+    ]
+
+    assert (
+        list(
+            matcher.get_service_ruleset_values(
+                match_object, ruleset=differential_service_ruleset, is_binary=False
+            )
+        )
+        == expected_result
+    )
+
+
 def test_ruleset_optimizer_clear_ruleset_caches(monkeypatch: MonkeyPatch) -> None:
     config_cache = Scenario().apply(monkeypatch)
     ruleset_optimizer = config_cache.ruleset_matcher.ruleset_optimizer
     ruleset_optimizer.get_service_ruleset(ruleset, False)
+    ruleset_optimizer.get_compiled_service_ruleset(ruleset, False)
     ruleset_optimizer.get_host_ruleset(ruleset, False, False)
     assert ruleset_optimizer._host_ruleset_cache
     assert ruleset_optimizer._service_ruleset_cache
+    assert ruleset_optimizer._compiled_service_ruleset_cache
     ruleset_optimizer.clear_ruleset_caches()
     assert not ruleset_optimizer._host_ruleset_cache
     assert not ruleset_optimizer._service_ruleset_cache
+    assert not ruleset_optimizer._compiled_service_ruleset_cache
 
 
 @pytest.mark.parametrize(
@@ -4,10 +4,12 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import json
+import threading
+import time
 
 import pytest
 
-from cmk.utils.cpu_tracking import Snapshot
+from cmk.utils.cpu_tracking import CPUTracker, Snapshot
 
 
 def json_identity(serializable: object) -> object:
@@ -50,3 +52,19 @@ class TestCpuTracking:
 
     def test_json_serialization_now(self, now: Snapshot) -> None:
         assert Snapshot.deserialize(json_identity(now.serialize())) == now
+
+
+def test_tracker_per_thread() -> None:
+    def spin() -> None:
+        end = time.thread_time() + 0.3
+        while time.thread_time() < end:
+            pass
+
+    with CPUTracker() as process, CPUTracker(per_thread=True) as thread:
+        spinning = threading.Thread(target=spin)
+        spinning.start()
+        spinning.join()
+
+    # With a tolerance for the resolution of the clocks
+    assert process.duration.process.user + process.duration.process.system >= 0.25
+    assert thread.duration.process.user + thread.duration.process.system < 0.1
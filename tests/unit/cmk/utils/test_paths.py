@@ -36,6 +36,7 @@ _STR_PATHS: Final = {
     "tcp_cache_dir",
     "data_source_cache_dir",
     "snmp_scan_cache_dir",
+    "snmpwalks_index_dir",
     "include_cache_dir",
     "logwatch_dir",
     "nagios_objects_file",
@@ -49,6 +50,8 @@ _STR_PATHS: Final = {
     "apache_config_dir",
     "htpasswd_file",
     "livestatus_unix_socket",
+    "automation_helper_socket",
+    "automation_helper_generation_file",
     "livebackendsdir",
     "inventory_output_dir",
     "inventory_archive_dir",
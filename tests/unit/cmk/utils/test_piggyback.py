@@ -4,7 +4,8 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import os
-from collections.abc import Iterable
+import time
+from collections.abc import Iterable, Mapping, Sequence
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -589,3 +590,152 @@ def test_get_piggyback_matching_time_settings(
             [HostName("source-host")], HostName("piggybacked-host"), time_settings
         )._expanded_settings.keys()
     ) == sorted(expected_time_setting_keys)
+
+
+def _file_infos(host_name: HostName) -> Sequence[tuple[HostName, bool, str]]:
+    return sorted(
+        (
+            raw_data.info.source_hostname,
+            raw_data.info.successfully_processed,
+            raw_data.info.message,
+        )
+        for raw_data in piggyback.get_piggyback_raw_data(
+            host_name, [(None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)]
+        )
+    )
+
+
+def test_piggyback_index_matches_file_system() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostName("source1"),
+        {HostName("pig1"): [b"<<<a>>>"], HostName("pig2"): [b"<<<b>>>"]},
+    )
+    piggyback.store_piggyback_raw_data(HostName("source2"), {HostName("pig2"): [b"<<<c>>>"]})
+    # Fake age the pig2 piggyback file, which is not updated by the next store
+    aged = time.time() - 10
+    os.utime(str(cmk.utils.paths.piggyback_dir / "pig2" / "source1"), (aged, aged))
+    piggyback.store_piggyback_raw_data(HostName("source1"), {HostName("pig1"): [b"<<<a>>>"]})
+    piggyback.remove_source_status_file(HostName("source2"))
+
+    assert (cmk.utils.paths.piggyback_dir / ".index").exists()
+    from_index = {
+        host_name: _file_infos(host_name) for host_name in (HostName("pig1"), HostName("pig2"))
+    }
+    assert from_index == {
+        "pig1": [("source1", True, "Successfully processed from source 'source1'")],
+        "pig2": [
+            ("source1", False, "Piggyback file not updated by source 'source1'"),
+            ("source2", False, "Source 'source2' not sending piggyback data"),
+        ],
+    }
+
+    (cmk.utils.paths.piggyback_dir / ".index").unlink()
+    assert {
+        host_name: _file_infos(host_name) for host_name in (HostName("pig1"), HostName("pig2"))
+    } == from_index
+
+    piggyback.rebuild_piggyback_index()
+    assert (cmk.utils.paths.piggyback_dir / ".index").exists()
+    assert {
+        host_name: _file_infos(host_name) for host_name in (HostName("pig1"), HostName("pig2"))
+    } == from_index
+
+
+@pytest.mark.usefixtures("setup_files")
+def test_piggyback_index_built_from_files() -> None:
+    with freeze_time(_FREEZE_DATETIME):
+        piggyback.store_piggyback_raw_data(HostName("source2"), {_TEST_HOST_NAME: [b"<<<a>>>"]})
+
+    assert sorted(piggyback.get_source_hostnames(_TEST_HOST_NAME)) == ["source1", "source2"]
+    assert (cmk.utils.paths.piggyback_dir / ".index").read_text().count("source1") == 1
+
+
+def test_piggyback_index_compaction(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(piggyback, "_INDEX_COMPACTION_SLACK", 3)
+    for _nr in range(10):
+        piggyback.store_piggyback_raw_data(HostName("source1"), {HostName("pig1"): [b"<<<a>>>"]})
+        piggyback.store_piggyback_raw_data(HostName("source2"), {HostName("pig2"): [b"<<<b>>>"]})
+
+    assert len((cmk.utils.paths.piggyback_dir / ".index").read_text().splitlines()) < 10
+    assert _file_infos(HostName("pig1")) == [
+        ("source1", True, "Successfully processed from source 'source1'")
+    ]
+    assert _file_infos(HostName("pig2")) == [
+        ("source2", True, "Successfully processed from source 'source2'")
+    ]
+
+
+def test_cleanup_piggyback_files_updates_index() -> None:
+    piggyback.store_piggyback_raw_data(HostName("source1"), {HostName("pig1"): [b"<<<a>>>"]})
+    piggyback.cleanup_piggyback_files([(None, "max_cache_age", -1)])
+
+    assert not (cmk.utils.paths.piggyback_dir / "pig1").exists()
+    assert not piggyback.get_source_hostnames()
+    assert not list(piggyback.get_source_and_piggyback_hosts([(None, "max_cache_age", 3600)]))
+
+
+def _raw_data(host_name: HostName) -> Mapping[HostName, bytes]:
+    return {
+        raw_data.info.source_hostname: raw_data.raw_data
+        for raw_data in piggyback.get_piggyback_raw_data(
+            host_name, [(None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)]
+        )
+    }
+
+
+def test_store_piggyback_raw_data_segment(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(piggyback, "_SEGMENT_MIN_PIGGYBACKED_HOSTS", 2)
+    segment_path = cmk.utils.paths.piggyback_dir / ".segments" / "source1"
+
+    piggyback.store_piggyback_raw_data(
+        HostName("source1"),
+        {HostName("pig1"): [b"<<<a>>>", b"1"], HostName("pig2"): [b"<<<b>>>", b"2"]},
+    )
+    assert segment_path.exists()
+    assert not (cmk.utils.paths.piggyback_dir / "pig1").exists()
+    assert _raw_data(HostName("pig1")) == {"source1": b"<<<a>>>\n1\n"}
+    assert _raw_data(HostName("pig2")) == {"source1": b"<<<b>>>\n2\n"}
+    assert [
+        raw_data.info.file_path
+        for raw_data in piggyback.get_piggyback_raw_data(
+            HostName("pig1"), [(None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)]
+        )
+    ] == [segment_path]
+
+    # pig2 is not updated, but its data is kept
+    piggyback.store_piggyback_raw_data(
+        HostName("source1"),
+        {HostName("pig1"): [b"<<<a>>>", b"11"], HostName("pig3"): [b"<<<c>>>", b"3"]},
+    )
+    assert _raw_data(HostName("pig1")) == {"source1": b"<<<a>>>\n11\n"}
+    assert _raw_data(HostName("pig2")) == {"source1": b"<<<b>>>\n2\n"}
+    assert _raw_data(HostName("pig3")) == {"source1": b"<<<c>>>\n3\n"}
+    from_index = {
+        host_name: _file_infos(host_name)
+        for host_name in (HostName("pig1"), HostName("pig2"), HostName("pig3"))
+    }
+    assert from_index[HostName("pig2")] == [
+        ("source1", False, "Piggyback file not updated by source 'source1'")
+    ]
+
+    piggyback.rebuild_piggyback_index()
+    assert {
+        host_name: _file_infos(host_name)
+        for host_name in (HostName("pig1"), HostName("pig2"), HostName("pig3"))
+    } == from_index
+    assert _raw_data(HostName("pig2")) == {"source1": b"<<<b>>>\n2\n"}
+
+    piggyback.cleanup_piggyback_files([(None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)])
+    assert not piggyback.get_piggyback_raw_data(
+        HostName("pig2"), [(None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)]
+    )
+    assert _raw_data(HostName("pig1")) == {"source1": b"<<<a>>>\n11\n"}
+
+    # Back to piggybacked host files
+    piggyback.store_piggyback_raw_data(HostName("source1"), {HostName("pig1"): [b"<<<a>>>"]})
+    assert _raw_data(HostName("pig1")) == {"source1": b"<<<a>>>\n"}
+    assert (cmk.utils.paths.piggyback_dir / "pig1" / "source1").exists()
+
+    piggyback.cleanup_piggyback_files([(None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)])
+    assert not segment_path.exists()
+    assert _raw_data(HostName("pig1")) == {"source1": b"<<<a>>>\n"}
@@ -3,11 +3,22 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import random
+import sys
+
 import pytest
 
 from cmk.utils.prediction import _prediction
 
 
+@pytest.fixture(name="implementation", params=["python", "numpy"])
+def fixture_implementation(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setattr(
+        _prediction, "_NUMPY_MIN_POINTS", sys.maxsize if request.param == "python" else 0
+    )
+    return str(request.param)
+
+
 @pytest.mark.parametrize(
     "filter_condition, values, join, result",
     [
@@ -69,6 +80,7 @@ def test_rrdtimestamps(twindow: _prediction.TimeWindow, result: list[int]) -> No
     assert _prediction.rrd_timestamps(twindow) == result
 
 
+@pytest.mark.usefixtures("implementation")
 @pytest.mark.parametrize(
     "rrddata, twindow, shift, upsampled",
     [
@@ -100,6 +112,7 @@ def test_time_series_upsampling(
     assert ts.bfill_upsample(twindow, shift) == upsampled
 
 
+@pytest.mark.usefixtures("implementation")
 @pytest.mark.parametrize(
     "rrddata, twindow, cf, downsampled",
     [
@@ -128,6 +141,71 @@ def test_time_series_downsampling(
     assert ts.downsample(twindow, cf) == downsampled
 
 
+def _flatten(result: object) -> list[object]:
+    if isinstance(result, (list, tuple)):
+        return [v for item in result for v in _flatten(item)]
+    if isinstance(result, _prediction.PredictionData):
+        return _flatten([result.data_twindow, result.step, result.points])
+    return [result]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_numpy_implementation_is_equivalent(seed: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    rand = random.Random(seed)
+
+    def _series(start: int, step: int, length: int) -> _prediction.TimeSeries:
+        return _prediction.TimeSeries(
+            [None if rand.random() < 0.2 else rand.uniform(-100, 100) for _i in range(length)],
+            (start, start + length * step, step),
+        )
+
+    series_step = rand.choice([10, 60, 300])
+    ts = _series(rand.randrange(0, 1000), series_step, 500)
+    twindow_start = ts.start + rand.randrange(-2000, 2000)
+    shift = rand.randrange(-1000, 1000)
+    slices = [
+        [None if rand.random() < 0.3 else rand.uniform(0, 10) for _i in range(100)]
+        for _j in range(rand.randrange(1, 10))
+    ]
+    fine_ts = _series(0, series_step // 2, 1000)
+    prediction_slices = [(fine_ts, 0), (ts, -ts.start), (_series(300, series_step * 2, 250), -300)]
+
+    def _results() -> list[object]:
+        results: list[object] = []
+        for func in (
+            lambda: ts.bfill_upsample(
+                (twindow_start, twindow_start + 400 * series_step, rand.choice([1, 5, 10])), shift
+            ),
+            lambda: [
+                ts.downsample(
+                    (twindow_start, twindow_start + 600 * series_step, series_step * 7), cf
+                )
+                for cf in ("max", "min", "average")
+            ],
+            lambda: _prediction._calculate_data_for_prediction(prediction_slices),
+        ):
+            try:
+                results.extend(_flatten(func()))
+            except IndexError:
+                results.append(IndexError)
+        results.extend(_flatten(_prediction._data_stats(slices)))
+        return results
+
+    state = rand.getstate()
+    monkeypatch.setattr(_prediction, "_NUMPY_MIN_POINTS", sys.maxsize)
+    expected = _results()
+    rand.setstate(state)
+    monkeypatch.setattr(_prediction, "_NUMPY_MIN_POINTS", 0)
+    result = _results()
+
+    assert len(result) == len(expected)
+    for value, expected_value in zip(result, expected):
+        if isinstance(expected_value, float):
+            assert value == pytest.approx(expected_value, rel=1e-12, abs=1e-12)
+        else:
+            assert value == expected_value
+
+
 class TestTimeseries:
     def test_conversion(self) -> None:
         assert _prediction.TimeSeries(
@@ -873,3 +873,73 @@ def test_pydantic_store_serialization(tmp_path: Path) -> None:
     assert isinstance(deserialized_object, MyModel)
     assert deserialized_object.unit == "bar"
     assert deserialized_object.test == 42
+
+
+def test_try_load_file_from_pickle_cache(tmp_path: Path) -> None:
+    root_dir, temp_dir = tmp_path / "root", tmp_path / "tmp"
+    root_dir.mkdir()
+    path = root_dir / "etc" / "data.mk"
+    path.parent.mkdir()
+    store.save_object_to_file(path, {"a": 1})
+
+    def _load(in_memory: bool = False) -> object:
+        return store.try_load_file_from_pickle_cache(
+            path, default={}, in_memory=in_memory, temp_dir=temp_dir, root_dir=root_dir
+        )
+
+    assert _load() == {"a": 1}
+    stats = store.pickle_cache_stats()[temp_dir]
+    assert _load() == {"a": 1}
+    assert (stats.misses, stats.hits) == (1, 1)
+
+    # Same mtime, but different size: The cached version must not be used
+    mtime_ns = path.stat().st_mtime_ns
+    store.save_object_to_file(path, {"a": 10})
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    assert _load() == {"a": 10}
+    assert stats.misses == 2
+    # The outdated version has been replaced
+    assert len(list((temp_dir / "pickled_files_cache").iterdir())) == 1
+
+    assert _load(in_memory=True) is _load(in_memory=True)
+    assert stats.memory_hits == 1
+
+    store.clear_pickled_files_cache(temp_dir)
+    assert not (temp_dir / "pickled_files_cache").exists()
+    assert _load(in_memory=True) == {"a": 10}
+    assert stats.misses == 3
+
+
+def test_pickle_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    paths = [tmp_path / f"data{nr}.mk" for nr in range(3)]
+    for nr, path in enumerate(paths):
+        store.save_object_to_file(path, list(range(100)))
+        os.utime(path, (nr, nr))
+
+    cache = store.PickleCache(tmp_path / "cache", max_size=1000)
+
+    def _load(path: Path) -> object:
+        return cache.load(
+            path,
+            path.relative_to(tmp_path),
+            path.stat(),
+            lambda: store.load_object_from_file(path, default=None),
+            in_memory=False,
+        )
+
+    _load(paths[0])
+    _load(paths[1])
+    entry_sizes = {p.name: p.stat().st_size for p in (tmp_path / "cache").iterdir()}
+    assert len(entry_sizes) == 2
+    # Make the first entry the most recently used one
+    for nr, entry_path in enumerate(
+        sorted((tmp_path / "cache").iterdir(), key=lambda p: p.stat().st_mtime)
+    ):
+        os.utime(entry_path, (1000 - nr, 1000 - nr))
+
+    cache = store.PickleCache(tmp_path / "cache", max_size=sum(entry_sizes.values()))
+    _load(paths[2])
+    assert cache.stats == store.PickleCacheStats(misses=1, evictions=1)
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+    _load(paths[0])
+    assert cache.stats.hits == 1
@@ -8,6 +8,9 @@
 import errno
 import socket
 import ssl
+import threading
+import time
+from collections.abc import Iterator, Sequence
 from contextlib import closing
 from pathlib import Path
 
@@ -274,3 +277,122 @@ def test_set_auth_user(
             return
 
         livestatus.LocalConnection().set_auth_user("mydomain", user_id)
+
+
+def _fake_site(sock_path: Path, responses: Sequence[tuple[float, bytes | None]]) -> None:
+    """Answer the queries with the given responses after the given delays
+
+    A response of None closes the connection (and accepts a new one)."""
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(str(sock_path))
+    server.listen(1)
+
+    def _serve() -> None:
+        with closing(server):
+            conn, _addr = server.accept()
+            for delay, response in responses:
+                data = b""
+                while not data.endswith(b"\n\n"):
+                    if not (packet := conn.recv(4096)):
+                        return
+                    data += packet
+                time.sleep(delay)
+                if response is None:
+                    conn.close()
+                    conn, _addr = server.accept()
+                    continue
+                conn.sendall(b"200 %11d\n" % len(response) + response)
+            time.sleep(1)
+            conn.close()
+
+    threading.Thread(target=_serve, daemon=True).start()
+
+
+@pytest.fixture(name="sites")
+def fixture_sites(tmp_path: Path) -> Iterator[livestatus.SiteConfigurations]:
+    yield livestatus.SiteConfigurations(
+        {
+            livestatus.SiteId(site_id): {"socket": f"unix:{tmp_path / site_id}"}
+            for site_id in ("slow", "fast", "hanging", "reconnect")
+        }
+    )
+
+
+def test_multisite_query_parallel(tmp_path: Path, sites: livestatus.SiteConfigurations) -> None:
+    _fake_site(tmp_path / "slow", [(0.3, b"[['slow']]")])
+    _fake_site(tmp_path / "fast", [(0.0, b"[['fast']]")])
+    _fake_site(tmp_path / "hanging", [(10.0, b"[['hanging']]")])
+    _fake_site(tmp_path / "reconnect", [(0.0, None), (0.1, b"[['reconnect']]")])
+
+    live = livestatus.MultiSiteConnection(sites)
+    live.set_prepend_site(True)
+    live.set_response_timeout(1.0)
+    start = time.time()
+    assert live.query("GET hosts\nColumns: name") == [
+        ["slow", "slow"],
+        ["fast", "fast"],
+        ["reconnect", "reconnect"],
+    ]
+    assert time.time() - start < 2
+    assert live.alive_sites() == ["slow", "fast", "reconnect"]
+    assert list(live.dead_sites()) == ["hanging"]
+    assert "Timeout" in str(live.dead_sites()[livestatus.SiteId("hanging")]["exception"])
+
+
+@pytest.mark.parametrize(
+    "query, response, expected",
+    [
+        pytest.param("GET hosts\nColumns: name", b"[]\n", [], id="empty"),
+        pytest.param(
+            "GET hosts\nColumns: name state",
+            b'[["a\\n",0],\n["b",1],\n["c",2]]\n',
+            [["a\n", 0], ["b", 1], ["c", 2]],
+            id="json",
+        ),
+        pytest.param(
+            "GET hosts\nColumns: name custom_variables",
+            b"[['a',{'X':'1'}],\n['b',{}]]\n",
+            [["a", {"X": "1"}], ["b", {}]],
+            id="python",
+        ),
+    ],
+)
+def test_single_site_query_iter(
+    tmp_path: Path, monkeypatch: MonkeyPatch, query: str, response: bytes, expected: object
+) -> None:
+    # Rows are split across the chunks
+    monkeypatch.setattr(livestatus, "_STREAM_CHUNK_SIZE", 4)
+    _fake_site(tmp_path / "site", [(0.0, response), (0.0, response)])
+    live = livestatus.SingleSiteConnection(f"unix:{tmp_path / 'site'}")
+    assert list(live.query_iter(query)) == expected
+    # The connection can be used for the next query
+    assert live.query(query) == expected
+
+
+def test_single_site_query_iter_stopped(tmp_path: Path) -> None:
+    _fake_site(tmp_path / "site", [(0.0, b'[["a"],\n["b"]]\n')])
+    live = livestatus.SingleSiteConnection(f"unix:{tmp_path / 'site'}")
+    rows = live.query_iter("GET hosts\nColumns: name state")
+    assert next(rows) == ["a"]
+    rows.close()
+    # The rest of the response must not be mistaken for the next response
+    assert live.socket is None
+
+
+def test_multisite_query_iter(tmp_path: Path, sites: livestatus.SiteConfigurations) -> None:
+    _fake_site(tmp_path / "slow", [(0.0, b'[["slow1"],\n["slow2"]]\n')])
+    _fake_site(tmp_path / "fast", [(0.0, b'[["fast"]]\n')])
+    _fake_site(tmp_path / "hanging", [(0.0, b'[["hanging"],\n["bro')])
+    _fake_site(tmp_path / "reconnect", [(0.0, None), (0.0, b'[["reconnect"]]\n')])
+
+    live = livestatus.MultiSiteConnection(sites)
+    live.set_prepend_site(True)
+    assert list(live.query_iter("GET hosts\nColumns: name state")) == [
+        ["slow", "slow1"],
+        ["slow", "slow2"],
+        ["fast", "fast"],
+        ["hanging", "hanging"],
+        ["reconnect", "reconnect"],
+    ]
+    assert live.alive_sites() == ["slow", "fast", "reconnect"]
+    assert list(live.dead_sites()) == ["hanging"]